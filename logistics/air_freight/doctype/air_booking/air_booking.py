@@ -1012,9 +1012,9 @@ class AirBooking(Document):
 			return
 		if getattr(self.flags, "ignore_charges_sync", False):
 			return
-		for charge in self.get("charges") or []:
-			if hasattr(charge, "calculate_charge_amount"):
-				charge.calculate_charge_amount(parent_doc=self)
+		from logistics.utils.charges_calculation import sync_charges_with_parent
+
+		sync_charges_with_parent(self)
 
 	def _prepare_header_totals_for_charge_calculation(self):
 		"""Refresh header weight/volume/chargeable from packages (same basis as validate, before charge math)."""
@@ -2429,9 +2429,14 @@ class AirBooking(Document):
 			from logistics.air_freight.doctype.air_booking.air_booking_dashboard import (
 				render_air_booking_dashboard_html,
 			)
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
 			from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-			return get_sales_quote_validity_dashboard_html(self) + render_air_booking_dashboard_html(self)
+			return cached_dashboard_html(
+				self,
+				"dashboard",
+				lambda: get_sales_quote_validity_dashboard_html(self) + render_air_booking_dashboard_html(self),
+			)
 		except Exception as e:
 			frappe.log_error(f"Air Booking get_dashboard_html: {str(e)}", "Air Booking Dashboard")
 			return "<div class='alert alert-warning'>Error loading dashboard.</div>"
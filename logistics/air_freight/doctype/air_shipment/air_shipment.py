@@ -112,7 +112,7 @@ class AirShipment(Document):
 	@frappe.whitelist()
 	def get_milestone_html(self):
 		"""Generate HTML for milestone visualization with map and cards"""
-		try:
+		def render():
 			# Document alerts at top of dashboard
 			from logistics.document_management.api import get_document_alerts_html
 			doc_alerts = get_document_alerts_html("Air Shipment", self.name or "new")
@@ -146,106 +146,54 @@ class AirShipment(Document):
 			
 			# Build header with job details
 			incoterm = getattr(self, 'incoterm', None) or 'Not specified'
-			
-			# Get shipper details
+
+			# Linked parties, addresses and airline: one lookup per doctype
+			shipper = getattr(self, 'shipper', None)
+			consignee = getattr(self, 'consignee', None)
+			address_names = [
+				a for a in (getattr(self, 'shipper_address', None), getattr(self, 'consignee_address', None)) if a
+			]
+			addresses = {}
+			if address_names:
+				for addr in frappe.get_all(
+					'Address',
+					filters={'name': ['in', address_names]},
+					fields=['name', 'address_line1', 'city'],
+				):
+					addresses[addr.name] = f"{addr.address_line1 or ''}, {addr.city or ''}".strip(', ')
+
 			shipper_code = ''
 			shipper_name = 'Not specified'
 			shipper_address = ''
-			shipper = getattr(self, 'shipper', None)
 			if shipper:
-				try:
-					# Try to get as Shipper doctype first
-					if frappe.db.exists('Shipper', shipper):
-						shipper_doc = frappe.get_doc('Shipper', shipper)
-						shipper_code = getattr(shipper_doc, 'shipper_code', None) or getattr(shipper_doc, 'code', None) or ''
-						shipper_name = getattr(shipper_doc, 'shipper_name', None) or getattr(shipper_doc, 'name', None) or shipper
-						shipper_addr = getattr(shipper_doc, 'address', None)
-						if shipper_addr:
-							shipper_address = shipper_addr
-					else:
-						# Fallback: just use the value as name
-						shipper_name = shipper
-						
-					# Get address if linked separately
-					shipper_addr_field = getattr(self, 'shipper_address', None)
-					if shipper_addr_field:
-						try:
-							addr_doc = frappe.get_doc('Address', shipper_addr_field)
-							addr_line1 = getattr(addr_doc, 'address_line1', None) or ''
-							city = getattr(addr_doc, 'city', None) or ''
-							shipper_address = f"{addr_line1}, {city}".strip(', ')
-						except Exception:
-							pass
-				except Exception:
-					shipper_name = shipper
-			
-			# Get consignee details
+				shipper_row = frappe.db.get_value('Shipper', shipper, ['code', 'shipper_name'], as_dict=True)
+				shipper_code = (shipper_row.code or '') if shipper_row else ''
+				shipper_name = (shipper_row.shipper_name or shipper) if shipper_row else shipper
+				shipper_address = addresses.get(getattr(self, 'shipper_address', None), '')
+
 			consignee_code = ''
 			consignee_name = 'Not specified'
 			consignee_address = ''
-			consignee = getattr(self, 'consignee', None)
 			if consignee:
-				try:
-					# Try to get as Consignee doctype first
-					if frappe.db.exists('Consignee', consignee):
-						consignee_doc = frappe.get_doc('Consignee', consignee)
-						consignee_code = getattr(consignee_doc, 'consignee_code', None) or getattr(consignee_doc, 'code', None) or ''
-						consignee_name = getattr(consignee_doc, 'consignee_name', None) or getattr(consignee_doc, 'name', None) or consignee
-						consignee_addr = getattr(consignee_doc, 'address', None)
-						if consignee_addr:
-							consignee_address = consignee_addr
-					else:
-						# Fallback: just use the value as name
-						consignee_name = consignee
-						
-					# Get address if linked separately
-					consignee_addr_field = getattr(self, 'consignee_address', None)
-					if consignee_addr_field:
-						try:
-							addr_doc = frappe.get_doc('Address', consignee_addr_field)
-							addr_line1 = getattr(addr_doc, 'address_line1', None) or ''
-							city = getattr(addr_doc, 'city', None) or ''
-							consignee_address = f"{addr_line1}, {city}".strip(', ')
-						except Exception:
-							pass
-				except Exception:
-					consignee_name = consignee
-			
-			# Get flight details from Master Airway Bill if linked
-			# First, try to get from Master AWB
-			airline = 'Not specified'
+				consignee_row = frappe.db.get_value('Consignee', consignee, ['code', 'consignee_name'], as_dict=True)
+				consignee_code = (consignee_row.code or '') if consignee_row else ''
+				consignee_name = (consignee_row.consignee_name or consignee) if consignee_row else consignee
+				consignee_address = addresses.get(getattr(self, 'consignee_address', None), '')
+
+			# Flight details from Master Airway Bill, falling back to the shipment's own airline
+			airline_code = None
 			flight_number = 'Not specified'
 			mawb = getattr(self, 'master_awb', None)
 			if mawb:
-				try:
-					mawb_doc = frappe.get_doc('Master Air Waybill', mawb)
-					mawb_airline = getattr(mawb_doc, 'airline', None)
-					if mawb_airline:
-						# Try to get airline name if it's a link field
-						try:
-							if frappe.db.exists('Airline', mawb_airline):
-								airline_name = frappe.db.get_value('Airline', mawb_airline, 'airline_name')
-								airline = airline_name or mawb_airline
-							else:
-								airline = mawb_airline
-						except Exception:
-							airline = mawb_airline
-					flight_number = getattr(mawb_doc, 'flight_no', None) or 'Not specified'
-				except Exception:
-					pass
-			
-			# Fallback to Air Shipment's own airline field if Master AWB doesn't have it
-			if airline == 'Not specified' and getattr(self, 'airline', None):
-				# Try to get airline name if it's a link field
-				try:
-					if frappe.db.exists('Airline', self.airline):
-						airline_name = frappe.db.get_value('Airline', self.airline, 'airline_name')
-						airline = airline_name or self.airline
-					else:
-						airline = self.airline
-				except Exception:
-					airline = self.airline
-			
+				mawb_row = frappe.db.get_value('Master Air Waybill', mawb, ['airline', 'flight_no'], as_dict=True)
+				if mawb_row:
+					airline_code = mawb_row.airline
+					flight_number = mawb_row.flight_no or 'Not specified'
+			airline_code = airline_code or getattr(self, 'airline', None)
+			airline = 'Not specified'
+			if airline_code:
+				airline = frappe.db.get_value('Airline', airline_code, 'airline_name') or airline_code
+
 			html = f"""
 		<div class="job-header">
 			<div class="header-main">
@@ -1342,6 +1290,10 @@ class AirShipment(Document):
 		"""
 			return (doc_alerts + html) if doc_alerts else html
 			
+		try:
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
+
+			return cached_dashboard_html(self, "milestones", render)
 		except Exception as e:
 			frappe.log_error(f"Error in get_milestone_html: {str(e)}", "Air Shipment - Milestone HTML")
 			return "<div class='alert alert-danger'>Error loading milestone view. Please check the error log.</div>"
@@ -1350,16 +1302,19 @@ class AirShipment(Document):
 	def get_dashboard_html(self):
 		"""Generate HTML for Dashboard tab: tabbed layout with map, milestones, alerts."""
 		try:
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
 			from logistics.document_management.logistics_form_dashboard import (
 				build_air_shipment_dashboard_config,
 				render_logistics_form_dashboard_html,
 			)
 			from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-			dash = render_logistics_form_dashboard_html(
-				self, build_air_shipment_dashboard_config(self)
+			return cached_dashboard_html(
+				self,
+				"dashboard",
+				lambda: get_sales_quote_validity_dashboard_html(self)
+				+ render_logistics_form_dashboard_html(self, build_air_shipment_dashboard_config(self)),
 			)
-			return get_sales_quote_validity_dashboard_html(self) + dash
 		except Exception as e:
 			frappe.log_error(f"Air Shipment get_dashboard_html: {str(e)}", "Air Shipment Dashboard")
 			return "<div class='alert alert-warning'>Error loading dashboard.</div>"
@@ -1544,9 +1499,9 @@ class AirShipment(Document):
 			return
 		if getattr(self.flags, "ignore_charges_sync", False):
 			return
-		for charge in self.get("charges") or []:
-			if hasattr(charge, "calculate_charge_amount"):
-				charge.calculate_charge_amount(parent_doc=self)
+		from logistics.utils.charges_calculation import sync_charges_with_parent
+
+		sync_charges_with_parent(self)
 
 	def aggregate_volume_from_packages(self):
 		"""Set header volume from sum of package volumes, converted to base/default volume UOM (used for chargeable weight)."""
@@ -1556,29 +1511,17 @@ class AirShipment(Document):
 		if not packages:
 			return
 		try:
-			from logistics.utils.measurements import convert_volume, get_aggregation_volume_uom, get_default_uoms
+			from logistics.utils.measurements import convert_rows, get_aggregation_volume_uom, get_default_uoms
 			target_volume_uom = get_aggregation_volume_uom(company=getattr(self, "company", None))
 			if not target_volume_uom:
 				return
-			defaults = get_default_uoms(company=getattr(self, "company", None))
-			target_normalized = str(target_volume_uom).strip().upper()
-			total = 0
-			for pkg in packages:
-				pkg_vol = flt(getattr(pkg, "volume", 0) or 0)
-				if pkg_vol <= 0:
-					continue
-				pkg_volume_uom = getattr(pkg, "volume_uom", None) or defaults.get("volume")
-				if not pkg_volume_uom:
-					continue
-				if str(pkg_volume_uom).strip().upper() == target_normalized:
-					total += pkg_vol
-				else:
-					total += convert_volume(
-						pkg_vol,
-						from_uom=pkg_volume_uom,
-						to_uom=target_volume_uom,
-						company=getattr(self, "company", None),
-					)
+			default_uom = get_default_uoms(company=getattr(self, "company", None)).get("volume")
+			rows = [
+				pkg
+				for pkg in packages
+				if flt(getattr(pkg, "volume", 0) or 0) > 0 and (getattr(pkg, "volume_uom", None) or default_uom)
+			]
+			total = sum(convert_rows(rows, "volume", "volume_uom", target_volume_uom, default_uom=default_uom))
 			if total > 0:
 				self.total_volume = total
 		except Exception:
@@ -1592,29 +1535,12 @@ class AirShipment(Document):
 		if not packages:
 			return
 		try:
-			from logistics.utils.measurements import convert_weight, get_default_uoms
-			defaults = get_default_uoms(company=getattr(self, "company", None))
-			target_weight_uom = defaults.get("weight")
+			from logistics.utils.measurements import convert_rows, get_default_uoms
+			target_weight_uom = get_default_uoms(company=getattr(self, "company", None)).get("weight")
 			if not target_weight_uom:
 				return
-			target_normalized = str(target_weight_uom).strip().upper()
-			total = 0
-			for pkg in packages:
-				pkg_weight = flt(getattr(pkg, "weight", 0) or 0)
-				if pkg_weight <= 0:
-					continue
-				pkg_weight_uom = getattr(pkg, "weight_uom", None) or defaults.get("weight")
-				if not pkg_weight_uom:
-					continue
-				if str(pkg_weight_uom).strip().upper() == target_normalized:
-					total += pkg_weight
-				else:
-					total += convert_weight(
-						pkg_weight,
-						from_uom=pkg_weight_uom,
-						to_uom=target_weight_uom,
-						company=getattr(self, "company", None),
-					)
+			rows = [pkg for pkg in packages if flt(getattr(pkg, "weight", 0) or 0) > 0]
+			total = sum(convert_rows(rows, "weight", "weight_uom", target_weight_uom, default_uom=target_weight_uom))
 			if total > 0:
 				self.total_weight = total
 		except Exception:
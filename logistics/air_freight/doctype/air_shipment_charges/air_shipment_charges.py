@@ -11,6 +11,7 @@ from logistics.utils.charges_calculation import (
 )
 from logistics.utils.other_services_charges_sync import validate_charge_item_not_manual_other_service
 from logistics.utils.freight_95_5 import validate_freight_95_5_row
+from logistics.utils.save_profiler import profiled
 
 
 class AirShipmentCharges(Document):
@@ -45,6 +46,7 @@ class AirShipmentCharges(Document):
         if hasattr(self, "total_amount"):
             self.total_amount = flt(self.estimated_revenue) or 0
 
+    @profiled
     def calculate_charge_amount(self, parent_doc=None):
         """Recalculate charge amount. Called by Air Shipment recalculate_all_charges."""
         self._calculate_charges(parent_doc)
@@ -8,11 +8,9 @@ import re
 
 import frappe
 from frappe import _
-from frappe.utils import cint, flt, getdate
+from frappe.utils import cint, flt
 
-
-def _table(doctype):
-	return "`tab{0}`".format(doctype.replace("`", ""))
+from logistics.analytics_reports.rollup import rollup_source
 
 
 def _valid_field(fieldname):
@@ -77,35 +75,16 @@ def series_chart(rows, label_field, value_field, chart_type="bar"):
 	return _chart_from_rows(rows, value_field, label_field, chart_type)
 
 
-def _time_sql(grain):
-	if grain == "day":
-		return "DATE(creation)", _("Day")
+def _time_sql(grain, column="day"):
 	if grain == "week":
-		return "YEARWEEK(creation, 3)", _("Week")
+		return "YEARWEEK({0}, 3)".format(column), _("Week")
 	if grain == "month":
-		return "DATE_FORMAT(creation, '%%Y-%%m')", _("Month")
-	return "DATE(creation)", _("Day")
-
-
-def _base_where(ref_doctype, filters):
-	conditions = ["1=1"]
-	values = {}
-	if filters.get("from_date"):
-		conditions.append("creation >= %(from_date)s")
-		values["from_date"] = getdate(filters["from_date"])
-	if filters.get("to_date"):
-		conditions.append("creation <= %(to_date)s")
-		values["to_date"] = getdate(filters["to_date"])
-	if filters.get("company") and frappe.db.has_column(ref_doctype, "company"):
-		conditions.append("company = %(company)s")
-		values["company"] = filters["company"]
-	if frappe.db.has_column(ref_doctype, "docstatus"):
-		conditions.append("docstatus < 2")
-	return " AND ".join(conditions), values
+		return "DATE_FORMAT({0}, '%%Y-%%m')".format(column), _("Month")
+	return column, _("Day")
 
 
 def run_named_analytics(ref_doctype, mode, filters=None):
-	"""Run aggregation report: mode is time:day|time:week|time:month or group:fieldname."""
+	"""Run aggregation report: mode is time:day|time:week|time:month or group:fieldname (read via the daily rollup)."""
 	filters = frappe._dict(filters or {})
 	if not frappe.db.exists("DocType", ref_doctype):
 		columns = [{"fieldname": "message", "label": _("Message"), "fieldtype": "Data", "width": 400}]
@@ -113,9 +92,7 @@ def run_named_analytics(ref_doctype, mode, filters=None):
 		chart = _chart_from_rows([{"bucket": _("N/A"), "cnt": 0}], "cnt", "bucket")
 		return columns, data, None, chart, []
 
-	table = _table(ref_doctype)
-	where, values = _base_where(ref_doctype, filters)
-
+	group_field = ""
 	if mode.startswith("time:"):
 		grain = mode.split(":", 1)[1]
 		group_expr, bucket_label = _time_sql(grain)
@@ -124,7 +101,8 @@ def run_named_analytics(ref_doctype, mode, filters=None):
 		if not _valid_field(field) or not frappe.db.has_column(ref_doctype, field):
 			group_expr, bucket_label = _time_sql("day")
 		else:
-			group_expr = "COALESCE(CAST(`{0}` AS CHAR), '')".format(field)
+			group_field = field
+			group_expr = "group_value"
 			bucket_label = _(field.replace("_", " ").title())
 	else:
 		group_expr, bucket_label = _time_sql("day")
@@ -134,18 +112,17 @@ def run_named_analytics(ref_doctype, mode, filters=None):
 		{"fieldname": "cnt", "label": _("Count"), "fieldtype": "Int", "width": 100},
 	]
 	try:
+		src, values = rollup_source(ref_doctype, filters, group_field=group_field)
 		data = frappe.db.sql(
 			"""
-			SELECT {grp} as bucket, COUNT(*) as cnt
-			FROM {tbl}
-			WHERE {where}
+			SELECT {grp} as bucket, SUM(documents) as cnt
+			FROM {src}
 			GROUP BY {grp}
 			ORDER BY bucket DESC
 			LIMIT 80
 			""".format(
 				grp=group_expr,
-				tbl=table,
-				where=where,
+				src=src,
 			),
 			values,
 			as_dict=1,
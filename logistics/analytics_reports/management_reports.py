@@ -1,6 +1,11 @@
 # Copyright (c) 2026, Agilasoft and contributors
 # For license information, please see license.txt
-"""Management and KPI-oriented script report drivers (beyond simple counts)."""
+"""Management and KPI-oriented script report drivers (beyond simple counts).
+
+Count/value handlers read daily buckets through ``rollup.rollup_source`` (closed
+days from Analytics Daily Rollup, the open day live); handlers that need
+columns outside the rollup still query the source table.
+"""
 
 from __future__ import unicode_literals
 
@@ -16,6 +21,7 @@ from logistics.analytics_reports.bootstrap import (
 	bar_top_numeric,
 	series_chart,
 )
+from logistics.analytics_reports.rollup import rollup_source
 
 
 def _table(doctype):
@@ -72,10 +78,7 @@ def kpi_executive_snapshot(ref, filters, options):
 	"""Draft vs submitted vs cancelled, totals, and booked value where a currency column exists."""
 	if not frappe.db.exists("DocType", ref):
 		return _empty(_("DocType not found: {0}").format(ref))
-	table = _table(ref)
-	where, values = _base_where(ref, filters, include_cancelled=True)
-	amt = _pick_amount_field(ref)
-	amt_sql = "COALESCE(SUM(`{0}`), 0)".format(amt) if amt else "0"
+	src, values = rollup_source(ref, filters, include_cancelled=True)
 	columns = [
 		{"fieldname": "drafts", "label": _("Draft documents"), "fieldtype": "Int", "width": 120},
 		{"fieldname": "submitted", "label": _("Submitted"), "fieldtype": "Int", "width": 100},
@@ -87,17 +90,14 @@ def kpi_executive_snapshot(ref, filters, options):
 		row = frappe.db.sql(
 			"""
 			SELECT
-				SUM(CASE WHEN docstatus = 0 THEN 1 ELSE 0 END) AS drafts,
-				SUM(CASE WHEN docstatus = 1 THEN 1 ELSE 0 END) AS submitted,
-				SUM(CASE WHEN docstatus = 2 THEN 1 ELSE 0 END) AS cancelled,
-				COUNT(*) AS in_scope,
-				{amt_sql} AS booked_value
-			FROM {tbl}
-			WHERE {where}
+				SUM(CASE WHEN docstatus = 0 THEN documents ELSE 0 END) AS drafts,
+				SUM(CASE WHEN docstatus = 1 THEN documents ELSE 0 END) AS submitted,
+				SUM(CASE WHEN docstatus = 2 THEN documents ELSE 0 END) AS cancelled,
+				COALESCE(SUM(documents), 0) AS in_scope,
+				COALESCE(SUM(value_total), 0) AS booked_value
+			FROM {src}
 			""".format(
-				tbl=table,
-				where=where,
-				amt_sql=amt_sql,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -128,19 +128,19 @@ def kpi_trend_volume_value(ref, filters, options):
 	if not frappe.db.exists("DocType", ref):
 		return _empty(_("DocType not found: {0}").format(ref))
 	grain = options.get("grain") or "week"
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
 	if grain == "month":
-		bucket_expr = "DATE_FORMAT(creation, '%%Y-%%m')"
+		bucket_expr = "DATE_FORMAT(day, '%%Y-%%m')"
 		bucket_label = _("Month")
 	elif grain == "week":
-		bucket_expr = "YEARWEEK(creation, 3)"
+		bucket_expr = "YEARWEEK(day, 3)"
 		bucket_label = _("Week")
 	else:
-		bucket_expr = "DATE(creation)"
+		bucket_expr = "day"
 		bucket_label = _("Day")
 	amt = options.get("amount_field") or _pick_amount_field(ref)
-	amt_sql = "COALESCE(SUM(`{0}`), 0)".format(amt) if amt else "0"
+	if amt and not _valid_field(amt):
+		return _empty(_("Field not available on {0}: {1}").format(ref, amt))
+	src, values = rollup_source(ref, filters, amount_field=amt)
 	columns = [
 		{"fieldname": "period", "label": bucket_label, "fieldtype": "Data", "width": 120},
 		{"fieldname": "documents", "label": _("Documents"), "fieldtype": "Int", "width": 100},
@@ -150,18 +150,15 @@ def kpi_trend_volume_value(ref, filters, options):
 		data = frappe.db.sql(
 			"""
 			SELECT {bucket} AS period,
-				COUNT(*) AS documents,
-				{amt_sql} AS value_total
-			FROM {tbl}
-			WHERE {where}
+				SUM(documents) AS documents,
+				COALESCE(SUM(value_total), 0) AS value_total
+			FROM {src}
 			GROUP BY {bucket}
 			ORDER BY period DESC
 			LIMIT 52
 			""".format(
 				bucket=bucket_expr,
-				tbl=table,
-				where=where,
-				amt_sql=amt_sql,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -184,8 +181,7 @@ def kpi_pipeline_mix(ref, filters, options):
 	field = options.get("field") or "status"
 	if not _valid_field(field) or not frappe.db.has_column(ref, field):
 		return _empty(_("Field not available on {0}: {1}").format(ref, field))
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
+	src, values = rollup_source(ref, filters, group_field=field)
 	columns = [
 		{"fieldname": "bucket", "label": _(field.replace("_", " ").title()), "fieldtype": "Data", "width": 200},
 		{"fieldname": "documents", "label": _("Documents"), "fieldtype": "Int", "width": 100},
@@ -194,16 +190,13 @@ def kpi_pipeline_mix(ref, filters, options):
 	try:
 		rows = frappe.db.sql(
 			"""
-			SELECT COALESCE(CAST(`{field}` AS CHAR), '') AS bucket, COUNT(*) AS documents
-			FROM {tbl}
-			WHERE {where}
-			GROUP BY COALESCE(CAST(`{field}` AS CHAR), '')
+			SELECT group_value AS bucket, SUM(documents) AS documents
+			FROM {src}
+			GROUP BY group_value
 			ORDER BY documents DESC
 			LIMIT 40
 			""".format(
-				field=field,
-				tbl=table,
-				where=where,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -225,14 +218,13 @@ def kpi_top_value_concentration(ref, filters, options):
 	if not _valid_field(field) or not frappe.db.has_column(ref, field):
 		return _empty(_("Field not available on {0}: {1}").format(ref, field))
 	limit = cint(options.get("limit")) or 12
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
+	src, values = rollup_source(ref, filters, group_field=field)
 	amt = _pick_amount_field(ref)
 	if amt:
-		val_sql = "COALESCE(SUM(`{0}`), 0)".format(amt)
+		val_sql = "COALESCE(SUM(value_total), 0)"
 		val_label = _("Value")
 	else:
-		val_sql = "COUNT(*)"
+		val_sql = "SUM(documents)"
 		val_label = _("Documents")
 	columns = [
 		{"fieldname": "bucket", "label": _(field.replace("_", " ").title()), "fieldtype": "Data", "width": 220},
@@ -242,17 +234,14 @@ def kpi_top_value_concentration(ref, filters, options):
 	try:
 		rows = frappe.db.sql(
 			"""
-			SELECT COALESCE(CAST(`{field}` AS CHAR), '') AS bucket, {val_sql} AS metric
-			FROM {tbl}
-			WHERE {where}
-			GROUP BY COALESCE(CAST(`{field}` AS CHAR), '')
+			SELECT group_value AS bucket, {val_sql} AS metric
+			FROM {src}
+			GROUP BY group_value
 			ORDER BY metric DESC
 			LIMIT {limit}
 			""".format(
-				field=field,
 				val_sql=val_sql,
-				tbl=table,
-				where=where,
+				src=src,
 				limit=limit,
 			),
 			values,
@@ -273,9 +262,7 @@ def kpi_aging_open_backlog(ref, filters, options):
 	"""Age buckets for draft (docstatus 0) documents still open."""
 	if not frappe.db.has_column(ref, "docstatus"):
 		return _empty(_("Aging backlog needs docstatus on {0}").format(ref))
-	table = _table(ref)
-	where, values = _base_where(ref, filters, include_cancelled=True)
-	where = where + " AND docstatus = 0"
+	src, values = rollup_source(ref, filters, include_cancelled=True)
 	columns = [
 		{"fieldname": "age_bucket", "label": _("Age bucket"), "fieldtype": "Data", "width": 160},
 		{"fieldname": "documents", "label": _("Open drafts"), "fieldtype": "Int", "width": 120},
@@ -284,19 +271,18 @@ def kpi_aging_open_backlog(ref, filters, options):
 		data = frappe.db.sql(
 			"""
 			SELECT CASE
-				WHEN DATEDIFF(CURDATE(), DATE(creation)) <= 7 THEN '0-7 days'
-				WHEN DATEDIFF(CURDATE(), DATE(creation)) <= 30 THEN '8-30 days'
-				WHEN DATEDIFF(CURDATE(), DATE(creation)) <= 90 THEN '31-90 days'
+				WHEN DATEDIFF(CURDATE(), day) <= 7 THEN '0-7 days'
+				WHEN DATEDIFF(CURDATE(), day) <= 30 THEN '8-30 days'
+				WHEN DATEDIFF(CURDATE(), day) <= 90 THEN '31-90 days'
 				ELSE '90+ days'
 			END AS age_bucket,
-			COUNT(*) AS documents
-			FROM {tbl}
-			WHERE {where}
+			SUM(documents) AS documents
+			FROM {src}
+			WHERE docstatus = 0
 			GROUP BY age_bucket
 			ORDER BY FIELD(age_bucket, '0-7 days', '8-30 days', '31-90 days', '90+ days')
 			""".format(
-				tbl=table,
-				where=where,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -321,10 +307,7 @@ def kpi_owner_workload(ref, filters, options):
 	"""Throughput and optional value by record owner (capacity view)."""
 	if not frappe.db.has_column(ref, "owner"):
 		return _empty(_("Owner column not on {0}").format(ref))
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
-	amt = _pick_amount_field(ref)
-	amt_sql = "COALESCE(SUM(`{0}`), 0)".format(amt) if amt else "0"
+	src, values = rollup_source(ref, filters, group_field="owner")
 	columns = [
 		{"fieldname": "owner", "label": _("Owner"), "fieldtype": "Data", "width": 160},
 		{"fieldname": "documents", "label": _("Documents"), "fieldtype": "Int", "width": 100},
@@ -333,16 +316,13 @@ def kpi_owner_workload(ref, filters, options):
 	try:
 		data = frappe.db.sql(
 			"""
-			SELECT owner, COUNT(*) AS documents, {amt_sql} AS value_total
-			FROM {tbl}
-			WHERE {where}
-			GROUP BY owner
+			SELECT group_value AS owner, SUM(documents) AS documents, COALESCE(SUM(value_total), 0) AS value_total
+			FROM {src}
+			GROUP BY group_value
 			ORDER BY documents DESC
 			LIMIT 30
 			""".format(
-				tbl=table,
-				where=where,
-				amt_sql=amt_sql if amt else "0",
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -361,11 +341,9 @@ def kpi_branch_profit_view(ref, filters, options):
 	"""Branch and profit center where present: counts and value."""
 	if not frappe.db.has_column(ref, "branch"):
 		return _empty(_("Branch not on {0}").format(ref))
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
 	amt = _pick_amount_field(ref)
-	amt_sql = "COALESCE(SUM(`{0}`), 0)".format(amt) if amt else "0"
 	has_pc = frappe.db.has_column(ref, "profit_center")
+	src, values = rollup_source(ref, filters, group_field="profit_center" if has_pc else "")
 	columns = [
 		{"fieldname": "branch", "label": _("Branch"), "fieldtype": "Link", "options": "Branch", "width": 140},
 	]
@@ -390,18 +368,15 @@ def kpi_branch_profit_view(ref, filters, options):
 			data = frappe.db.sql(
 				"""
 				SELECT branch,
-					COALESCE(CAST(`profit_center` AS CHAR), '') AS profit_center,
-					COUNT(*) AS documents,
-					{amt_sql} AS value_total
-				FROM {tbl}
-				WHERE {where}
-				GROUP BY branch, profit_center
+					group_value AS profit_center,
+					SUM(documents) AS documents,
+					COALESCE(SUM(value_total), 0) AS value_total
+				FROM {src}
+				GROUP BY branch, group_value
 				ORDER BY value_total DESC
 				LIMIT 40
 				""".format(
-					tbl=table,
-					where=where,
-					amt_sql=amt_sql,
+					src=src,
 				),
 				values,
 				as_dict=1,
@@ -409,16 +384,13 @@ def kpi_branch_profit_view(ref, filters, options):
 		else:
 			data = frappe.db.sql(
 				"""
-				SELECT branch, COUNT(*) AS documents, {amt_sql} AS value_total
-				FROM {tbl}
-				WHERE {where}
+				SELECT branch, SUM(documents) AS documents, COALESCE(SUM(value_total), 0) AS value_total
+				FROM {src}
 				GROUP BY branch
 				ORDER BY value_total DESC
 				LIMIT 40
 				""".format(
-					tbl=table,
-					where=where,
-					amt_sql=amt_sql,
+					src=src,
 				),
 				values,
 				as_dict=1,
@@ -437,8 +409,7 @@ def kpi_doc_health_ratio(ref, filters, options):
 	"""Submitted share of all in-scope documents (quality of pipeline closure)."""
 	if not frappe.db.has_column(ref, "docstatus"):
 		return _empty(_("Docstatus not on {0}").format(ref))
-	table = _table(ref)
-	where, values = _base_where(ref, filters, include_cancelled=True)
+	src, values = rollup_source(ref, filters, include_cancelled=True)
 	columns = [
 		{"fieldname": "metric", "label": _("Metric"), "fieldtype": "Data", "width": 200},
 		{"fieldname": "value", "label": _("Value"), "fieldtype": "Float", "width": 120},
@@ -447,13 +418,11 @@ def kpi_doc_health_ratio(ref, filters, options):
 		row = frappe.db.sql(
 			"""
 			SELECT
-				SUM(CASE WHEN docstatus = 1 THEN 1 ELSE 0 END) AS submitted,
-				SUM(CASE WHEN docstatus IN (0, 1) THEN 1 ELSE 0 END) AS openish
-			FROM {tbl}
-			WHERE {where}
+				SUM(CASE WHEN docstatus = 1 THEN documents ELSE 0 END) AS submitted,
+				SUM(CASE WHEN docstatus IN (0, 1) THEN documents ELSE 0 END) AS openish
+			FROM {src}
 			""".format(
-				tbl=table,
-				where=where,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -584,16 +553,15 @@ def kpi_penalty_deposit_exposure(ref, filters, options):
 def kpi_simple_count_trend(ref, filters, options):
 	"""Lightweight activity trend (count only) when no value column — still a KPI index."""
 	grain = options.get("grain") or "week"
-	table = _table(ref)
-	where, values = _base_where(ref, filters)
+	src, values = rollup_source(ref, filters)
 	if grain == "month":
-		bucket_expr = "DATE_FORMAT(creation, '%%Y-%%m')"
+		bucket_expr = "DATE_FORMAT(day, '%%Y-%%m')"
 		label = _("Month")
 	elif grain == "day":
-		bucket_expr = "DATE(creation)"
+		bucket_expr = "day"
 		label = _("Day")
 	else:
-		bucket_expr = "YEARWEEK(creation, 3)"
+		bucket_expr = "YEARWEEK(day, 3)"
 		label = _("Week")
 	columns = [
 		{"fieldname": "period", "label": label, "fieldtype": "Data", "width": 120},
@@ -602,16 +570,14 @@ def kpi_simple_count_trend(ref, filters, options):
 	try:
 		data = frappe.db.sql(
 			"""
-			SELECT {b} AS period, COUNT(*) AS documents
-			FROM {tbl}
-			WHERE {where}
+			SELECT {b} AS period, SUM(documents) AS documents
+			FROM {src}
 			GROUP BY {b}
 			ORDER BY period DESC
 			LIMIT 52
 			""".format(
 				b=bucket_expr,
-				tbl=table,
-				where=where,
+				src=src,
 			),
 			values,
 			as_dict=1,
@@ -0,0 +1,353 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+"""Daily rollup store behind the management KPI and named analytics reports.
+
+``Analytics Daily Rollup`` holds COUNT(*) and SUM(amount field) per creation day,
+company, branch and docstatus for every report DocType, once ungrouped and once
+per group field the catalog reports group by. ``Analytics Rollup State`` records
+how far each DocType is rolled up.
+
+Closed days come from the rollup; days after ``rolled_through`` (normally only
+today) are aggregated live, see ``rollup_source``. ``refresh_rollups`` rolls new
+days in and rebuilds the creation days of documents modified since the last
+run; deletions rebuild their day from ``after_delete``.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import time
+
+import frappe
+from frappe.utils import add_days, cint, getdate, now_datetime, today
+
+from logistics.analytics_reports.catalog import REPORTS_BY_MODULE
+
+ROLLUP_DOCTYPE = "Analytics Daily Rollup"
+STATE_DOCTYPE = "Analytics Rollup State"
+
+# Reports that group by a field: handler id -> (option key holding the field, handler default)
+_GROUPING_HANDLERS = {"pipeline_mix": ("field", "status"), "top_value": ("field", "customer")}
+# Named analytics reports outside the KPI catalog
+_NAMED_ANALYTICS_DOCTYPES = ("Transport Job", "Sustainability Metrics")
+# Days rebuilt per statement on a first build
+_BUILD_CHUNK_DAYS = 31
+# Trailing closed days rebuilt nightly, for edits that bypass ``modified``
+RECONCILE_DAYS = 7
+# Re-read a little before the watermark for transactions that commit late
+_WATERMARK_OVERLAP_MIN = 5
+
+
+def _table(doctype):
+	return "`tab{0}`".format(doctype.replace("`", ""))
+
+
+def rollup_spec():
+	"""ref_doctype -> sorted group fields ('' = ungrouped), derived from the report catalog."""
+	spec = {dt: {""} for dt in _NAMED_ANALYTICS_DOCTYPES}
+	for rows in REPORTS_BY_MODULE.values():
+		for _title, ref, handler_id, options in rows:
+			fields = spec.setdefault(ref, {""})
+			if handler_id in _GROUPING_HANDLERS:
+				key, default = _GROUPING_HANDLERS[handler_id]
+				fields.add(options.get(key) or default)
+			elif handler_id == "owner_workload":
+				fields.add("owner")
+			elif handler_id == "branch_mix":
+				fields.add("profit_center")
+	return {ref: sorted(fields) for ref, fields in spec.items()}
+
+
+def rollup_doctypes():
+	return sorted(rollup_spec())
+
+
+_ROLLUP_DOCTYPE_SET = None
+
+
+def is_rollup_doctype(doctype):
+	global _ROLLUP_DOCTYPE_SET
+	if _ROLLUP_DOCTYPE_SET is None:
+		_ROLLUP_DOCTYPE_SET = frozenset(rollup_spec())
+	return doctype in _ROLLUP_DOCTYPE_SET
+
+
+def _amount_field(ref):
+	from logistics.analytics_reports.management_reports import _pick_amount_field
+
+	return _pick_amount_field(ref)
+
+
+def _column_or_blank(ref, fieldname):
+	return "IFNULL(`{0}`, '')".format(fieldname) if frappe.db.has_column(ref, fieldname) else "''"
+
+
+def _group_expr(field):
+	# Same bucket expression the report handlers group by
+	return "COALESCE(CAST(`{0}` AS CHAR), '')".format(field) if field else "''"
+
+
+def _live_select(ref, group_field, amount_field):
+	"""
+	Per-day aggregate of the source table, shaped like a rollup row. Grouped by
+	position: the company/branch aliases shadow the raw (nullable) columns.
+	"""
+	return """
+		SELECT DATE(creation) AS day,
+			{company} AS company,
+			{branch} AS branch,
+			docstatus,
+			{gv} AS group_value,
+			COUNT(*) AS documents,
+			{amt} AS value_total
+		FROM {tbl}
+		WHERE {{where}}
+		GROUP BY 1, 2, 3, 4, 5
+	""".format(
+		company=_column_or_blank(ref, "company"),
+		branch=_column_or_blank(ref, "branch"),
+		gv=_group_expr(group_field),
+		amt="COALESCE(SUM(`{0}`), 0)".format(amount_field) if amount_field else "0",
+		tbl=_table(ref),
+	)
+
+
+# ---------------------------------------------------------------------------
+# State
+# ---------------------------------------------------------------------------
+
+def _get_state(ref):
+	rows = frappe.get_all(
+		STATE_DOCTYPE,
+		filters={"name": ref},
+		fields=["rolled_through", "watermark", "amount_field", "group_fields"],
+		limit_page_length=1,
+	)
+	if not rows:
+		return None
+	st = rows[0]
+	st["group_fields"] = json.loads(st.group_fields or "[]")
+	return st
+
+
+def _save_state(ref, **values):
+	if "group_fields" in values:
+		values["group_fields"] = json.dumps(values["group_fields"])
+	if frappe.db.exists(STATE_DOCTYPE, ref):
+		frappe.db.set_value(STATE_DOCTYPE, ref, values, update_modified=False)
+	else:
+		doc = frappe.get_doc(dict(values, doctype=STATE_DOCTYPE, ref_doctype=ref))
+		doc.insert(ignore_permissions=True)
+
+
+def _usable_state(ref, group_field, amount_field=None):
+	"""State when the rollup can answer ``group_field`` for ``ref`` with ``amount_field`` (default: the picked one)."""
+	if not frappe.db.table_exists(ROLLUP_DOCTYPE):
+		return None
+	st = _get_state(ref)
+	if not st or not st.rolled_through:
+		return None
+	if (group_field or "") not in st.group_fields:
+		return None
+	if (st.amount_field or None) != ((amount_field or _amount_field(ref)) or None):
+		return None
+	return st
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def _row_name(ref, day, group_field, group_value, company, branch, docstatus):
+	raw = "\x1f".join((ref, str(day), group_field, group_value or "", company or "", branch or "", str(docstatus)))
+	return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _rebuild_range(ref, group_fields, amount_field, day_from, day_to):
+	"""Replace rollup rows of ``ref`` for creation days in [day_from, day_to]."""
+	day_from, day_to = getdate(day_from), getdate(day_to)
+	if day_from > day_to:
+		return
+	frappe.db.sql(
+		"DELETE FROM `tab{0}` WHERE ref_doctype = %s AND day BETWEEN %s AND %s".format(ROLLUP_DOCTYPE),
+		(ref, day_from, day_to),
+	)
+	now = now_datetime()
+	user = frappe.session.user
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+		"ref_doctype", "day", "group_field", "group_value", "company", "branch",
+		"docstatus_value", "documents", "value_total",
+	]
+	for gf in group_fields:
+		if gf and not frappe.db.has_column(ref, gf):
+			continue
+		rows = frappe.db.sql(
+			_live_select(ref, gf, amount_field).format(where="creation >= %(start)s AND creation < %(end)s"),
+			{"start": day_from, "end": add_days(day_to, 1)},
+			as_dict=1,
+		)
+		values = [
+			(
+				_row_name(ref, r.day, gf, r.group_value, r.company, r.branch, r.docstatus),
+				now, now, user, user, 0, 0,
+				ref, r.day, gf, (r.group_value or "")[:140], r.company, r.branch,
+				cint(r.docstatus), cint(r.documents), r.value_total or 0,
+			)
+			for r in rows
+		]
+		if values:
+			frappe.db.bulk_insert(ROLLUP_DOCTYPE, fields, values, chunk_size=5000)
+
+
+def _rebuild_days(ref, group_fields, amount_field, days):
+	"""Rebuild scattered days, merging consecutive ones into one range."""
+	days = sorted({getdate(d) for d in days})
+	start = prev = None
+	for d in days:
+		if prev is not None and d == add_days(prev, 1):
+			prev = d
+			continue
+		if start is not None:
+			_rebuild_range(ref, group_fields, amount_field, start, prev)
+		start = prev = d
+	if start is not None:
+		_rebuild_range(ref, group_fields, amount_field, start, prev)
+
+
+def refresh_rollup(ref, reconcile_days=0):
+	"""Bring one DocType's rollup up to yesterday; returns the number of days rebuilt."""
+	if not frappe.db.table_exists(ref):
+		return 0
+	started = time.monotonic()
+	run_at = now_datetime()
+	yesterday = getdate(add_days(today(), -1))
+	group_fields = rollup_spec().get(ref, [""])
+	amount_field = _amount_field(ref)
+	st = _get_state(ref)
+
+	if not st or not st.rolled_through or st.group_fields != group_fields or (st.amount_field or None) != (amount_field or None):
+		# first build, or the catalog / amount column changed: rebuild everything
+		frappe.db.sql("DELETE FROM `tab{0}` WHERE ref_doctype = %s".format(ROLLUP_DOCTYPE), (ref,))
+		first = frappe.db.sql("SELECT MIN(creation) FROM {0}".format(_table(ref)))[0][0]
+		day = getdate(first) if first else add_days(yesterday, 1)
+		rebuilt = 0
+		while day <= yesterday:
+			end = min(getdate(add_days(day, _BUILD_CHUNK_DAYS - 1)), yesterday)
+			_rebuild_range(ref, group_fields, amount_field, day, end)
+			rebuilt += (end - day).days + 1
+			day = getdate(add_days(end, 1))
+	else:
+		rolled = getdate(st.rolled_through)
+		dirty = set()
+		if st.watermark:
+			since = frappe.utils.add_to_date(st.watermark, minutes=-_WATERMARK_OVERLAP_MIN)
+			dirty.update(getdate(d) for d in frappe.db.sql_list(
+				"SELECT DISTINCT DATE(creation) FROM {0} WHERE modified >= %s AND creation < %s".format(_table(ref)),
+				(since, add_days(rolled, 1)),
+			))
+		if reconcile_days:
+			dirty.update(getdate(add_days(rolled, -i)) for i in range(reconcile_days))
+		_rebuild_days(ref, group_fields, amount_field, dirty)
+		rebuilt = len(dirty)
+		if rolled < yesterday:
+			_rebuild_range(ref, group_fields, amount_field, add_days(rolled, 1), yesterday)
+			rebuilt += (yesterday - rolled).days
+
+	_save_state(
+		ref,
+		rolled_through=yesterday,
+		watermark=run_at,
+		amount_field=amount_field,
+		group_fields=group_fields,
+		last_run=run_at,
+		last_duration_ms=int((time.monotonic() - started) * 1000),
+		last_days_rebuilt=rebuilt,
+	)
+	frappe.db.commit()
+	return rebuilt
+
+
+def refresh_rollups(reconcile_days=0):
+	"""Scheduler entry point: refresh every report DocType; one failure doesn't stop the rest."""
+	for ref in rollup_doctypes():
+		try:
+			refresh_rollup(ref, reconcile_days=reconcile_days)
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(frappe.get_traceback(), "analytics_rollup:{0}".format(ref))
+
+
+def reconcile_rollups():
+	"""Nightly: also rebuild the trailing closed days (catches updates that skip ``modified``)."""
+	refresh_rollups(reconcile_days=RECONCILE_DAYS)
+
+
+def on_doc_deleted(doc, method=None):
+	"""after_delete: a deleted document leaves no ``modified`` trace, so rebuild its day now."""
+	if not is_rollup_doctype(doc.doctype):
+		return
+	st = _get_state(doc.doctype)
+	if not st or not st.rolled_through or not doc.get("creation"):
+		return
+	day = getdate(doc.creation)
+	if day <= getdate(st.rolled_through):
+		_rebuild_range(doc.doctype, st.group_fields, st.amount_field, day, day)
+
+
+# ---------------------------------------------------------------------------
+# Read
+# ---------------------------------------------------------------------------
+
+def rollup_source(ref, filters, group_field="", include_cancelled=False, amount_field=None):
+	"""
+	Derived table (SQL, values) with columns day, company, branch, docstatus,
+	group_value, documents, value_total for ``ref`` within the report filters.
+
+	Days up to ``rolled_through`` come from the rollup; later days (or all days
+	when no usable rollup exists) are aggregated live from the source table.
+	Date filters apply to the creation day, as in the live reports. An explicit
+	``amount_field`` other than the rolled-up one is always read live.
+	"""
+	st = _usable_state(ref, group_field, amount_field)
+	amount_field = st.amount_field if st else (amount_field or _amount_field(ref))
+	values = {"r_ref": ref, "r_gf": group_field or ""}
+
+	live = ["1=1"]
+	roll = ["ref_doctype = %(r_ref)s", "group_field = %(r_gf)s"]
+	if filters.get("from_date"):
+		values["r_from"] = getdate(filters["from_date"])
+		live.append("creation >= %(r_from)s")
+		roll.append("day >= %(r_from)s")
+	if filters.get("to_date"):
+		values["r_to"] = getdate(filters["to_date"])
+		live.append("creation <= %(r_to)s")
+		roll.append("day < %(r_to)s")
+	if filters.get("company") and frappe.db.has_column(ref, "company"):
+		values["r_company"] = filters["company"]
+		live.append("company = %(r_company)s")
+		roll.append("company = %(r_company)s")
+	if not include_cancelled:
+		live.append("docstatus < 2")
+		roll.append("docstatus_value < 2")
+
+	live_sql = _live_select(ref, group_field, amount_field)
+	if not st:
+		return "({0}) src".format(live_sql.format(where=" AND ".join(live))), values
+
+	values["r_through"] = getdate(st.rolled_through)
+	values["r_live_from"] = getdate(add_days(st.rolled_through, 1))
+	roll.append("day <= %(r_through)s")
+	live.append("creation >= %(r_live_from)s")
+	return """(
+		SELECT day, company, branch, docstatus_value AS docstatus, group_value, documents, value_total
+		FROM `tab{rollup}`
+		WHERE {roll}
+		UNION ALL
+		{live}
+	) src""".format(
+		rollup=ROLLUP_DOCTYPE,
+		roll=" AND ".join(roll),
+		live=live_sql.format(where=" AND ".join(live)),
+	), values
@@ -58,9 +58,9 @@ class Declaration(Document):
 			return
 		if getattr(self.flags, "ignore_charges_sync", False):
 			return
-		for charge in self.get("charges") or []:
-			if hasattr(charge, "calculate_charge_amount"):
-				charge.calculate_charge_amount(parent_doc=self)
+		from logistics.utils.charges_calculation import sync_charges_with_parent
+
+		sync_charges_with_parent(self)
 
 	def _validate_etd_eta(self):
 		"""Departure must not be after arrival (same calendar day allowed)."""
@@ -724,13 +724,16 @@ class Declaration(Document):
 	def get_dashboard_html(self):
 		"""Generate HTML for Dashboard tab: tabbed layout with route, milestones, alerts."""
 		try:
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
 			from logistics.document_management.logistics_form_dashboard import (
 				build_declaration_dashboard_config,
 				render_logistics_form_dashboard_html,
 			)
 
-			return render_logistics_form_dashboard_html(
-				self, build_declaration_dashboard_config(self)
+			return cached_dashboard_html(
+				self,
+				"dashboard",
+				lambda: render_logistics_form_dashboard_html(self, build_declaration_dashboard_config(self)),
 			)
 		except Exception as e:
 			frappe.log_error(f"Declaration get_dashboard_html: {str(e)}", "Declaration Dashboard")
@@ -26,16 +26,19 @@ class DeclarationOrder(Document):
 	def get_dashboard_html(self):
 		"""Generate HTML for Dashboard tab: tabbed layout with route, milestones, alerts."""
 		try:
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
 			from logistics.document_management.logistics_form_dashboard import (
 				build_declaration_order_dashboard_config,
 				render_logistics_form_dashboard_html,
 			)
 			from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-			dash = render_logistics_form_dashboard_html(
-				self, build_declaration_order_dashboard_config(self)
+			return cached_dashboard_html(
+				self,
+				"dashboard",
+				lambda: get_sales_quote_validity_dashboard_html(self)
+				+ render_logistics_form_dashboard_html(self, build_declaration_order_dashboard_config(self)),
 			)
-			return get_sales_quote_validity_dashboard_html(self) + dash
 		except Exception as e:
 			frappe.log_error(f"Declaration Order get_dashboard_html: {str(e)}", "Declaration Order Dashboard")
 			err_msg = frappe.utils.escape_html(str(e))
@@ -183,9 +186,9 @@ class DeclarationOrder(Document):
 			return
 		if getattr(self.flags, "ignore_charges_sync", False):
 			return
-		for charge in self.get("charges") or []:
-			if hasattr(charge, "calculate_charge_amount"):
-				charge.calculate_charge_amount(parent_doc=self)
+		from logistics.utils.charges_calculation import sync_charges_with_parent
+
+		sync_charges_with_parent(self)
 
 	def _apply_actuals_to_charge_dicts(self, charge_dicts):
 		if not charge_dicts:
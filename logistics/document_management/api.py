@@ -129,6 +129,13 @@ def get_milestone_html(doctype, docname):
 	except frappe.DoesNotExistError:
 		return '<div class="alert alert-warning">Document not found.</div>'
 
+	from logistics.document_management.dashboard_cache import cached_dashboard_html
+
+	return cached_dashboard_html(doc, "milestones", lambda: _build_milestone_tab_html(doc))
+
+
+def _build_milestone_tab_html(doc):
+	doctype, docname = doc.doctype, doc.name
 	milestones, child_doctype = get_milestone_display_rows_and_editor_doctype(doc)
 
 	# Resolve origin/destination per doctype (detail items section removed)
@@ -865,11 +872,13 @@ def get_dashboard_alerts(doctype, docname):
 	return alerts
 
 
-def get_dashboard_alerts_html(doctype, docname):
+def get_dashboard_alerts_html(doctype, docname, alerts=None):
 	"""Return HTML for dashboard alerts banner. Critical (red), Warning (yellow), Information (blue).
 	Collapsible per level; grouping is applied by JS (_group_and_collapse_dash_alerts).
-	Uses Logistics Settings day thresholds. Applies to documents, milestones, estimated dates."""
-	alerts = get_dashboard_alerts(doctype, docname)
+	Uses Logistics Settings day thresholds. Applies to documents, milestones, estimated dates.
+	Pass ``alerts`` (from get_dashboard_alerts) when the caller already has them."""
+	if alerts is None:
+		alerts = get_dashboard_alerts(doctype, docname)
 	if not alerts:
 		return ""
 
@@ -0,0 +1,83 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Render cache for server-built form dashboard HTML (Dashboard / Milestones tabs).
+
+Entries are keyed by doctype, name, ``modified``, language and today's date (alerts
+are day-relative), plus a per-document generation token. Saving the document changes
+``modified``; records that feed the dashboard without touching the parent (legacy Job
+Milestone rows, Gate Passes, Logistics Settings thresholds) rotate the token through
+doc_events. Anything else is bounded by the entry TTL.
+
+Unsaved forms (``__unsaved`` / new docs sent by ``run_doc_method``) are never cached.
+"""
+
+from __future__ import unicode_literals
+
+import frappe
+from frappe.utils import today
+
+DASHBOARD_CACHE_TTL = 600
+
+_GLOBAL_GENERATION = "__all__"
+
+
+def _generation_key(doctype, name):
+	return "logistics:dash_gen:{0}:{1}".format(doctype, name)
+
+
+def _generation(doctype, name):
+	return frappe.cache.get_value(_generation_key(doctype, name)) or "0"
+
+
+def _cacheable(doc):
+	return bool(doc and doc.name and not doc.is_new() and doc.get("modified") and not doc.get("__unsaved"))
+
+
+def dashboard_cache_key(doc, section):
+	return "logistics:dash:{0}:{1}:{2}:{3}:{4}:{5}:{6}:{7}".format(
+		section,
+		doc.doctype,
+		doc.name,
+		doc.get("modified"),
+		frappe.local.lang or "en",
+		today(),
+		_generation(_GLOBAL_GENERATION, ""),
+		_generation(doc.doctype, doc.name),
+	)
+
+
+def cached_dashboard_html(doc, section, render, ttl=DASHBOARD_CACHE_TTL):
+	"""Return ``render()`` for ``doc``, served from cache while the key is unchanged."""
+	if not _cacheable(doc):
+		return render()
+	key = dashboard_cache_key(doc, section)
+	html = frappe.cache.get_value(key)
+	if html is None:
+		html = render()
+		frappe.cache.set_value(key, html, expires_in_sec=ttl)
+	return html
+
+
+def invalidate_dashboard(doctype=None, name=None):
+	"""Drop cached dashboards of one document (or of all documents when no doctype is given)."""
+	key = _generation_key(doctype, name) if doctype and name else _generation_key(_GLOBAL_GENERATION, "")
+	frappe.cache.set_value(key, frappe.generate_hash(length=10), expires_in_sec=DASHBOARD_CACHE_TTL)
+
+
+def on_job_milestone_change(doc, method=None):
+	"""Job Milestone doc_events: legacy milestone rows live outside the job document."""
+	if doc.get("job_type") and doc.get("job_number"):
+		invalidate_dashboard(doc.job_type, doc.job_number)
+
+
+def on_gate_pass_change(doc, method=None):
+	"""Gate Pass doc_events: gate passes are listed on the Warehouse Job dashboard."""
+	if doc.get("warehouse_job"):
+		invalidate_dashboard("Warehouse Job", doc.warehouse_job)
+
+
+def on_settings_change(doc, method=None):
+	"""Logistics Settings on_update: alert thresholds feed every dashboard."""
+	invalidate_dashboard()
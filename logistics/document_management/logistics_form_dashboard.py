@@ -658,8 +658,8 @@ def render_logistics_form_dashboard_html(doc, cfg):
 		doc_alerts = get_document_alerts_html(doctype, doc.name or "new")
 	except Exception:
 		doc_alerts = ""
-	alerts_html = get_dashboard_alerts_html(doctype, doc.name or "new")
 	dash_alert_list = get_dashboard_alerts(doctype, doc.name or "new") or []
+	alerts_html = get_dashboard_alerts_html(doctype, doc.name or "new", alerts=dash_alert_list)
 	alerts_section = (alerts_html or "").strip()
 	if alerts_section:
 		alerts_section = f'<div class="dash-alerts-section">{alerts_section}</div>'
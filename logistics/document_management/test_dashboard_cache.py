@@ -0,0 +1,47 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the form dashboard render cache."""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.document_management import dashboard_cache
+
+
+class _Doc(frappe._dict):
+	def is_new(self):
+		return not self.get("modified")
+
+
+class TestDashboardCache(UnitTestCase):
+	def test_renders_once_per_key(self):
+		calls = []
+		store = {}
+		doc = _Doc(doctype="Air Shipment", name="AS-0001", modified="2026-10-01 10:00:00")
+		with patch.object(frappe.cache, "get_value", side_effect=store.get), patch.object(
+			frappe.cache, "set_value", side_effect=lambda k, v, **kw: store.__setitem__(k, v)
+		):
+			for _ in range(2):
+				html = dashboard_cache.cached_dashboard_html(doc, "dashboard", lambda: calls.append(1) or "<div/>")
+		self.assertEqual(html, "<div/>")
+		self.assertEqual(len(calls), 1)
+
+	def test_unsaved_form_is_not_cached(self):
+		doc = _Doc(doctype="Air Shipment", name="AS-0001", modified="2026-10-01 10:00:00", __unsaved=1)
+		with patch.object(frappe.cache, "get_value") as get_value:
+			html = dashboard_cache.cached_dashboard_html(doc, "dashboard", lambda: "<div/>")
+		self.assertEqual(html, "<div/>")
+		get_value.assert_not_called()
+
+	def test_key_changes_with_modified(self):
+		with patch.object(frappe.cache, "get_value", return_value=None):
+			a = dashboard_cache.dashboard_cache_key(
+				_Doc(doctype="Air Shipment", name="AS-0001", modified="2026-10-01 10:00:00"), "dashboard"
+			)
+			b = dashboard_cache.dashboard_cache_key(
+				_Doc(doctype="Air Shipment", name="AS-0001", modified="2026-10-01 10:05:00"), "dashboard"
+			)
+		self.assertNotEqual(a, b)
@@ -45,10 +45,11 @@ app_include_js = [
 	"/assets/logistics/js/volume_from_dimensions.js",
 	"/assets/logistics/js/document_alerts_dialog.js?v=2",
 	"/assets/logistics/js/documents_tab_utils.js",
-	"/assets/logistics/js/profitability_form.js?v=4",
+	"/assets/logistics/js/profitability_form.js?v=5",
 	"/assets/logistics/js/purchase_invoice_dialog.js",
 	"/assets/logistics/js/sales_invoice_dialog.js",
 	"/assets/logistics/js/sales_invoice_job_dimension_cleanup.js",
+	"/assets/logistics/js/background_job.js",
 ]
 
 # include js, css files in header of web template
@@ -425,6 +426,123 @@ append_hook(
 	{"validate": "logistics.utils.load_type_active.validate_load_type_links_on_doc"},
 )
 
+# Form dashboard render cache: records that feed dashboards without touching the parent
+_DASHBOARD_MILESTONE_CHANGE = "logistics.document_management.dashboard_cache.on_job_milestone_change"
+append_hook(
+	doc_events,
+	"Job Milestone",
+	{
+		"on_update": _DASHBOARD_MILESTONE_CHANGE,
+		"on_trash": _DASHBOARD_MILESTONE_CHANGE,
+	},
+)
+append_hook(
+	doc_events,
+	"Gate Pass",
+	{
+		"on_update": "logistics.document_management.dashboard_cache.on_gate_pass_change",
+		"on_trash": "logistics.document_management.dashboard_cache.on_gate_pass_change",
+	},
+)
+append_hook(
+	doc_events,
+	"Logistics Settings",
+	{"on_update": "logistics.document_management.dashboard_cache.on_settings_change"},
+)
+
+# Tariff rate index: drop cached rate lookups in every worker when a Tariff changes
+_TARIFF_INDEX_CHANGE = "logistics.utils.tariff_index.on_tariff_change"
+append_hook(
+	doc_events,
+	"Tariff",
+	{
+		"on_update": _TARIFF_INDEX_CHANGE,
+		"on_trash": _TARIFF_INDEX_CHANGE,
+	},
+)
+
+# Zone resolver: rebuild the preloaded zip / postal code trie when mappings or zones change
+_ZONE_RESOLVER_CHANGE = "logistics.pricing_center.api_parts.zone.zone_resolver.invalidate_zone_resolver"
+for _dt in ("Zip Code Zone Mapping", "Transport Zone"):
+	append_hook(
+		doc_events,
+		_dt,
+		{
+			"on_update": _ZONE_RESOLVER_CHANGE,
+			"on_trash": _ZONE_RESOLVER_CHANGE,
+		},
+	)
+
+# Measurements: rebuild the per-worker UOM conversion matrix when factors change
+_UOM_MATRIX_CHANGE = "logistics.utils.measurements.invalidate_uom_conversion_matrix"
+for _dt in ("UOM Conversion Factor", "Dimension Volume UOM Conversion"):
+	append_hook(
+		doc_events,
+		_dt,
+		{
+			"on_update": _UOM_MATRIX_CHANGE,
+			"on_trash": _UOM_MATRIX_CHANGE,
+		},
+	)
+
+# Management report rollups: deletions leave no `modified` trace, rebuild their day
+append_hook(
+	doc_events,
+	"*",
+	{"after_delete": "logistics.analytics_reports.rollup.on_doc_deleted"},
+)
+
+# Invoice payment -> charge rows / job paid flags, for the invoices the payment allocates against
+for _dt in ("Payment Entry", "Journal Entry"):
+	append_hook(
+		doc_events,
+		_dt,
+		{
+			"on_submit": "logistics.invoice_integration.payment_settlement.on_payment_submit",
+			"on_cancel": "logistics.invoice_integration.payment_settlement.on_payment_cancel",
+		},
+	)
+
+def _add_doc_event(doctype, event, method):
+	"""Append ``method`` to a doc event that may already hold one handler (str) or several (list)."""
+	_v = doc_events.setdefault(doctype, {}).get(event)
+	if not _v:
+		doc_events[doctype][event] = method
+	elif isinstance(_v, list):
+		if method not in _v:
+			doc_events[doctype][event] = list(_v) + [method]
+	elif _v != method:
+		doc_events[doctype][event] = [_v, method]
+
+
+# Customer credit exposure: receivable documents recompute their customers' exposure
+_CREDIT_EXPOSURE_CHANGE = "logistics.utils.credit_exposure.on_exposure_change"
+for _dt in ("Sales Invoice", "Payment Entry", "Journal Entry", "Sales Order", "Delivery Note"):
+	for _event in ("on_submit", "on_cancel"):
+		_add_doc_event(_dt, _event, _CREDIT_EXPOSURE_CHANGE)
+
+# Job profitability summary: GL Entries with a job_number roll up per job / account / month
+append_hook(
+	doc_events,
+	"GL Entry",
+	{
+		"on_submit": "logistics.job_management.profitability_summary.on_gl_entry_submit",
+		"on_cancel": "logistics.job_management.profitability_summary.on_gl_entry_cancel",
+	},
+)
+
+# Consolidation candidate index: legs and the documents that decide their eligibility resync it
+_CONSOLIDATION_INDEX = "logistics.transport.consolidation_index."
+for _dt, _handler, _events in (
+	("Transport Leg", "on_leg_change", ("after_insert", "on_update", "on_submit", "on_cancel", "on_update_after_submit", "on_trash")),
+	("Transport Job", "on_job_change", ("on_submit", "on_cancel")),
+	("Run Sheet", "on_run_sheet_change", ("on_update", "on_submit", "on_cancel", "on_update_after_submit", "on_trash")),
+	("Transport Consolidation", "on_consolidation_change", ("on_update", "on_submit", "on_cancel", "on_trash")),
+	("Load Type", "on_load_type_change", ("on_update",)),
+):
+	for _event in _events:
+		_add_doc_event(_dt, _event, _CONSOLIDATION_INDEX + _handler)
+
 # Operational exchange rates: resolve from Source Exchange Rate (date-based) and push to charge lines
 _OER_BEFORE_SAVE = "logistics.utils.operational_exchange_rates.on_before_save_operational_exchange_rates"
 for _dt in ("Air Booking", "Sea Booking", "Air Shipment", "Sea Shipment", "Project Task Job"):
@@ -453,6 +571,21 @@ scheduler_events = {
 		"logistics.status_update.tasks.update_permit_statuses",
 		"logistics.status_update.tasks.update_exemption_statuses",
 		"logistics.container_management.api.reconcile_containers_from_terminal_sea_shipments",
+		"logistics.warehousing.hu_occupancy.snapshot_daily_occupancy",
+		"logistics.warehousing.stock_balance_snapshot.snapshot_stock_balances",
+		"logistics.transport.distance_matrix.purge_expired",
+		"logistics.utils.save_profiler.purge_old_logs",
+		"logistics.utils.background_jobs.purge_finished_jobs",
+	],
+	"hourly_long": [
+		"logistics.analytics_reports.rollup.refresh_rollups",
+	],
+	"daily_long": [
+		"logistics.analytics_reports.rollup.reconcile_rollups",
+		"logistics.warehousing.capacity_metrics.reconcile_daily",
+		"logistics.job_management.profitability_summary.verify_daily",
+		"logistics.utils.credit_exposure.recompute_all",
+		"logistics.transport.consolidation_index.rebuild_daily",
 	],
 }
 
@@ -479,6 +612,15 @@ scheduler_events = {
 #
 # auto_cancel_exempted_doctypes = ["Auto Repeat"]
 
+# Request Events
+# ----------------
+# Save pipeline profiler: patches Document only when logistics_save_profile_rate > 0
+before_request = ["logistics.utils.save_profiler.install"]
+
+# Job Events
+# ----------
+before_job = ["logistics.utils.save_profiler.install"]
+
 
 # User Data Protection
 # --------------------
@@ -9,7 +9,7 @@ Purchase Invoice is submitted, paid, or cancelled.
 
 import frappe
 from frappe import _
-from frappe.utils import getdate, today, flt
+from frappe.utils import getdate, flt
 
 # Job doctypes that have invoice monitoring fields
 JOB_DOCTYPES = ("Transport Job", "Air Shipment", "Sea Shipment", "Warehouse Job", "Declaration")
@@ -312,60 +312,16 @@ def update_job_on_purchase_invoice_cancel(pi_doc):
 
 
 def update_job_on_payment(party_type: str, party: str):
-    """Update fully_paid and charge row status when Sales Invoice or Purchase Invoice is fully paid."""
+    """Mark charge rows and jobs paid for all fully paid invoices of the party (set-based backfill).
+
+    Payments settle only the invoices they allocate against, see payment_settlement.settle_payment.
+    """
+    from logistics.invoice_integration.payment_settlement import reconcile_payment_settlement
+
     if party_type == "Customer":
-        # Find SIs for this customer with outstanding = 0
-        sis = frappe.get_all(
-            "Sales Invoice",
-            filters={
-                "customer": party,
-                "docstatus": 1,
-                "outstanding_amount": 0,
-            },
-            pluck="name",
-        )
-        for si_name in sis:
-            update_charge_rows_for_sales_invoice(si_name, "Paid")
-            jobs = get_jobs_linked_to_sales_invoice(si_name)
-            for job_dt, job_name in jobs:
-                if _has_field(job_dt, "fully_paid"):
-                    frappe.db.set_value(
-                        job_dt, job_name,
-                        "fully_paid", 1,
-                        update_modified=False,
-                    )
-                if _has_field(job_dt, "date_fully_paid"):
-                    frappe.db.set_value(
-                        job_dt, job_name,
-                        "date_fully_paid", today(),
-                        update_modified=False,
-                    )
+        reconcile_payment_settlement("Sales Invoice", party=party)
     elif party_type == "Supplier":
-        pis = frappe.get_all(
-            "Purchase Invoice",
-            filters={
-                "supplier": party,
-                "docstatus": 1,
-                "outstanding_amount": 0,
-            },
-            pluck="name",
-        )
-        for pi_name in pis:
-            update_charge_rows_for_purchase_invoice(pi_name, "Paid")
-            jobs = get_jobs_linked_to_purchase_invoice(pi_name)
-            for job_dt, job_name in jobs:
-                if _has_field(job_dt, "costs_fully_paid"):
-                    frappe.db.set_value(
-                        job_dt, job_name,
-                        "costs_fully_paid", 1,
-                        update_modified=False,
-                    )
-                if _has_field(job_dt, "date_costs_fully_paid"):
-                    frappe.db.set_value(
-                        job_dt, job_name,
-                        "date_costs_fully_paid", today(),
-                        update_modified=False,
-                    )
+        reconcile_payment_settlement("Purchase Invoice", party=party)
 
 
 def _has_field(doctype: str, fieldname: str) -> bool:
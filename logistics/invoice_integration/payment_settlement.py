@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Payment settlement: propagate invoice payment to charge rows and jobs.
+
+A submitted or cancelled Payment Entry / Journal Entry only touches the Sales and
+Purchase Invoices it allocates against (Payment Entry references, Journal Entry account
+rows with a reference). For those invoices ``sync_invoice_settlement`` reads which are
+fully paid (outstanding_amount = 0) and issues one UPDATE per charge table and per job
+doctype:
+
+- fully paid: charge rows -> 'Paid', jobs -> fully_paid / costs_fully_paid (+ date)
+- no longer fully paid (payment cancelled): 'Paid' charge rows back to 'Posted', flags cleared
+  on jobs that have no other fully paid invoice
+
+Jobs are matched to invoices as in lifecycle.get_jobs_linked_to_*_invoice (invoice link
+field on the job, invoice item references, Purchase Invoice header reference).
+
+``reconcile_payment_settlement`` backfills the flags for all fully paid invoices:
+
+    bench --site <site> execute logistics.invoice_integration.payment_settlement.reconcile_payment_settlement
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate, today
+
+from logistics.invoice_integration.lifecycle import CHARGE_CHILD_DOCTYPES, JOB_DOCTYPES
+from logistics.utils.background_jobs import enqueue_operation, iter_chunks
+
+# invoice doctype -> (charge/job link field, charge status field, job paid flag, job paid date)
+SETTLEMENT_FIELDS = {
+    "Sales Invoice": ("sales_invoice", "sales_invoice_status", "fully_paid", "date_fully_paid"),
+    "Purchase Invoice": ("purchase_invoice", "purchase_invoice_status", "costs_fully_paid", "date_costs_fully_paid"),
+}
+
+# Purchase Invoice Item references only allocate consolidation costs to shipments
+PI_ITEM_JOB_DOCTYPES = ("Air Shipment", "Sea Shipment")
+
+_NAME_CHUNK = 1000
+RECONCILE_CHUNK_SIZE = 500
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def invoices_from_payment(doc):
+    """{invoice doctype: set(names)} the Payment Entry / Journal Entry allocates against."""
+    if doc.doctype == "Payment Entry":
+        rows = [(row.get("reference_doctype"), row.get("reference_name")) for row in doc.get("references") or []]
+    elif doc.doctype == "Journal Entry":
+        rows = [(row.get("reference_type"), row.get("reference_name")) for row in doc.get("accounts") or []]
+    else:
+        rows = []
+    out = {}
+    for invoice_doctype, name in rows:
+        if invoice_doctype in SETTLEMENT_FIELDS and name:
+            out.setdefault(invoice_doctype, set()).add(name)
+    return out
+
+
+def on_payment_submit(doc, method=None):
+    """Payment Entry / Journal Entry on_submit: settle the invoices it pays."""
+    settle_payment(doc)
+
+
+def on_payment_cancel(doc, method=None):
+    """Payment Entry / Journal Entry on_cancel: un-settle invoices that are open again."""
+    settle_payment(doc, revert=True)
+
+
+def settle_payment(doc, revert=False):
+    """Sync charge rows and job flags for the invoices referenced by ``doc`` (outstanding is already updated)."""
+    for invoice_doctype, names in invoices_from_payment(doc).items():
+        try:
+            sync_invoice_settlement(invoice_doctype, names, paid_date=doc.get("posting_date"), revert=revert)
+        except Exception as e:
+            frappe.log_error(
+                f"Failed to sync payment settlement for {doc.doctype} {doc.name} ({invoice_doctype}): {e}",
+                "Invoice Integration Error",
+            )
+
+
+def sync_invoice_settlement(invoice_doctype, names, paid_date=None, revert=False):
+    """
+    Bring charge rows and jobs of ``names`` in line with their outstanding amount.
+
+    Open invoices are only reverted with ``revert`` (a payment was cancelled): a payment
+    that leaves an invoice open never un-flags a job another invoice settled.
+
+    Returns the number of fully paid and of open invoices among ``names`` (submitted only;
+    cancellation is handled by the invoice's own on_cancel hook).
+    """
+    names = sorted(set(filter(None, names)))
+    paid, unpaid = [], []
+    for chunk in _chunks(names, _NAME_CHUNK):
+        for row in frappe.get_all(
+            invoice_doctype,
+            filters={"name": ["in", chunk], "docstatus": 1},
+            fields=["name", "outstanding_amount"],
+        ):
+            (paid if flt(row.outstanding_amount) == 0 else unpaid).append(row.name)
+
+    if revert and unpaid:
+        _update_charge_rows(invoice_doctype, unpaid, paid=False)
+        _update_jobs(invoice_doctype, unpaid, paid=False)
+    if paid:
+        paid_date = getdate(paid_date or today())
+        _update_charge_rows(invoice_doctype, paid, paid=True)
+        _update_jobs(invoice_doctype, paid, paid=True, paid_date=paid_date)
+    return {"paid": len(paid), "unpaid": len(unpaid)}
+
+
+def _update_charge_rows(invoice_doctype, invoices, paid):
+    link, status_field = SETTLEMENT_FIELDS[invoice_doctype][:2]
+    if paid:
+        new_status, condition = "Paid", f"IFNULL(`{status_field}`, '') != 'Paid'"
+    else:
+        new_status, condition = "Posted", f"`{status_field}` = 'Paid'"
+    for child_dt in CHARGE_CHILD_DOCTYPES:
+        if not (frappe.db.has_column(child_dt, link) and frappe.db.has_column(child_dt, status_field)):
+            continue
+        for chunk in _chunks(invoices, _NAME_CHUNK):
+            frappe.db.sql(
+                f"""
+                UPDATE `tab{child_dt}`
+                SET `{status_field}` = %(status)s
+                WHERE `{link}` IN %(invoices)s AND {condition}
+                """,
+                {"status": new_status, "invoices": chunk},
+            )
+
+
+def _job_link_conditions(invoice_doctype, job_doctype, invoices="%(invoices)s"):
+    """SQL conditions (OR-ed) matching ``job_doctype`` rows linked to the ``invoices`` (list parameter or subquery)."""
+    link = SETTLEMENT_FIELDS[invoice_doctype][0]
+    item_doctype = f"{invoice_doctype} Item"
+    conditions = []
+    if frappe.db.has_column(job_doctype, link):
+        conditions.append(f"`{link}` IN {invoices}")
+    if (
+        invoice_doctype == "Sales Invoice" or job_doctype in PI_ITEM_JOB_DOCTYPES
+    ) and frappe.db.has_column(item_doctype, "reference_name"):
+        conditions.append(
+            f"""name IN (
+                SELECT reference_name FROM `tab{item_doctype}`
+                WHERE parent IN {invoices} AND reference_doctype = %(job_doctype)s
+            )"""
+        )
+    if invoice_doctype == "Purchase Invoice" and frappe.db.has_column("Purchase Invoice", "reference_name"):
+        conditions.append(
+            f"""name IN (
+                SELECT reference_name FROM `tabPurchase Invoice`
+                WHERE name IN {invoices} AND reference_doctype = %(job_doctype)s
+            )"""
+        )
+    return conditions
+
+
+def _update_jobs(invoice_doctype, invoices, paid, paid_date=None):
+    flag, date_field = SETTLEMENT_FIELDS[invoice_doctype][2:]
+    for job_doctype in JOB_DOCTYPES:
+        if not frappe.db.has_column(job_doctype, flag):
+            continue
+        conditions = _job_link_conditions(invoice_doctype, job_doctype)
+        if not conditions:
+            continue
+        has_date = frappe.db.has_column(job_doctype, date_field)
+        if paid:
+            # keep the date of the first settlement
+            assignments = [f"`{flag}` = 1"] + ([f"`{date_field}` = %(paid_date)s"] if has_date else [])
+            state = f"IFNULL(`{flag}`, 0) = 0"
+        else:
+            assignments = [f"`{flag}` = 0"] + ([f"`{date_field}` = NULL"] if has_date else [])
+            # a job stays paid while any other invoice linked to it is fully paid
+            paid_invoices = (
+                f"(SELECT name FROM `tab{invoice_doctype}` WHERE docstatus = 1 AND outstanding_amount = 0)"
+            )
+            paid_elsewhere = _job_link_conditions(invoice_doctype, job_doctype, invoices=paid_invoices)
+            state = f"`{flag}` = 1 AND NOT ({' OR '.join(paid_elsewhere)})"
+        for chunk in _chunks(invoices, _NAME_CHUNK):
+            frappe.db.sql(
+                f"""
+                UPDATE `tab{job_doctype}`
+                SET {", ".join(assignments)}
+                WHERE docstatus != 2 AND {state}
+                    AND ({" OR ".join(conditions)})
+                """,
+                {"invoices": chunk, "job_doctype": job_doctype, "paid_date": paid_date},
+            )
+
+
+def reconcile_payment_settlement(invoice_doctype=None, from_date=None, party=None):
+    """
+    Backfill: mark charge rows and jobs of every fully paid submitted invoice as paid.
+
+    Optionally limited to one invoice doctype, invoices posted on or after ``from_date``,
+    or one customer / supplier. Chunks commit and checkpoint when run as a background job.
+    """
+    results = {}
+    for dt in [invoice_doctype] if invoice_doctype else list(SETTLEMENT_FIELDS):
+        filters = {"docstatus": 1, "outstanding_amount": 0}
+        if from_date:
+            filters["posting_date"] = [">=", getdate(from_date)]
+        if party:
+            filters["customer" if dt == "Sales Invoice" else "supplier"] = party
+        names = frappe.get_all(dt, filters=filters, pluck="name", order_by="name asc")
+        for chunk in iter_chunks(
+            names,
+            f"settlement:{dt}",
+            chunk_size=RECONCILE_CHUNK_SIZE,
+            message=_("Reconciling paid {0}s").format(_(dt)),
+        ):
+            sync_invoice_settlement(dt, chunk)
+        results[dt] = len(names)
+    return results
+
+
+@frappe.whitelist()
+def start_reconcile_payment_settlement(invoice_doctype=None, from_date=None):
+    """Queue ``reconcile_payment_settlement`` as a Logistics Background Job."""
+    frappe.only_for(("System Manager", "Accounts Manager"))
+    if invoice_doctype and invoice_doctype not in SETTLEMENT_FIELDS:
+        frappe.throw(_("Invoice type must be Sales Invoice or Purchase Invoice"))
+    return enqueue_operation(
+        "logistics.invoice_integration.payment_settlement.reconcile_payment_settlement",
+        title=_("Reconcile invoice payment status on jobs"),
+        invoice_doctype=invoice_doctype,
+        from_date=str(getdate(from_date)) if from_date else None,
+    )
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from logistics.invoice_integration import payment_settlement
+
+
+class TestPaymentSettlement(unittest.TestCase):
+    def test_invoices_from_payment_entry_and_journal_entry(self):
+        pe = frappe._dict(
+            doctype="Payment Entry",
+            references=[
+                frappe._dict(reference_doctype="Sales Invoice", reference_name="SI-1"),
+                frappe._dict(reference_doctype="Sales Order", reference_name="SO-1"),
+                frappe._dict(reference_doctype="Sales Invoice", reference_name="SI-1"),
+            ],
+        )
+        je = frappe._dict(
+            doctype="Journal Entry",
+            accounts=[
+                frappe._dict(reference_type="Purchase Invoice", reference_name="PI-1"),
+                frappe._dict(reference_type=None, reference_name=None),
+            ],
+        )
+        self.assertEqual(payment_settlement.invoices_from_payment(pe), {"Sales Invoice": {"SI-1"}})
+        self.assertEqual(payment_settlement.invoices_from_payment(je), {"Purchase Invoice": {"PI-1"}})
+
+    def _sync(self, outstanding, revert=False):
+        rows = [frappe._dict(name=name, outstanding_amount=amount) for name, amount in outstanding.items()]
+        with patch.object(frappe, "get_all", return_value=rows), patch.object(
+            frappe.db, "has_column", return_value=True
+        ), patch.object(frappe.db, "sql") as sql:
+            result = payment_settlement.sync_invoice_settlement(
+                "Sales Invoice", list(outstanding), paid_date="2026-10-01", revert=revert
+            )
+        return result, [(" ".join(c.args[0].split()), c.args[1]) for c in sql.call_args_list]
+
+    def test_paid_invoices_update_charge_rows_and_jobs_in_bulk(self):
+        result, updates = self._sync({"SI-1": 0, "SI-2": 0})
+        self.assertEqual(result, {"paid": 2, "unpaid": 0})
+        charge_updates = [u for u in updates if "Charges`" in u[0]]
+        job_updates = [u for u in updates if "Charges`" not in u[0]]
+        self.assertEqual(len(charge_updates), len(payment_settlement.CHARGE_CHILD_DOCTYPES))
+        self.assertEqual(len(job_updates), len(payment_settlement.JOB_DOCTYPES))
+        self.assertEqual(charge_updates[0][1], {"status": "Paid", "invoices": ["SI-1", "SI-2"]})
+        sql, params = job_updates[0]
+        self.assertIn("`fully_paid` = 1, `date_fully_paid` = %(paid_date)s", sql)
+        self.assertEqual(str(params["paid_date"]), "2026-10-01")
+
+    def test_reopened_invoice_reverts_paid_rows_only(self):
+        result, updates = self._sync({"SI-1": 150.0}, revert=True)
+        self.assertEqual(result, {"paid": 0, "unpaid": 1})
+        self.assertEqual(updates[0][1]["status"], "Posted")
+        self.assertIn("`sales_invoice_status` = 'Paid'", updates[0][0])
+        reverts = [sql for sql, _ in updates if "`fully_paid` = 0, `date_fully_paid` = NULL" in sql]
+        self.assertTrue(reverts)
+        # jobs another fully paid invoice settles are left alone
+        self.assertIn(
+            "AND NOT (`sales_invoice` IN (SELECT name FROM `tabSales Invoice` WHERE docstatus = 1 AND outstanding_amount = 0)",
+            reverts[0],
+        )
+
+    def test_partial_payment_on_second_invoice_keeps_job_paid(self):
+        # invoice A is settled by one payment, invoice B partly paid by a later one
+        result, updates = self._sync({"SI-A": 0})
+        self.assertEqual(result, {"paid": 1, "unpaid": 0})
+        self.assertTrue(any("`fully_paid` = 1" in sql for sql, _ in updates))
+        result, updates = self._sync({"SI-B": 40.0})
+        self.assertEqual(result, {"paid": 0, "unpaid": 1})
+        self.assertEqual(updates, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
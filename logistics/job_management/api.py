@@ -66,16 +66,6 @@ def _account_has_job_profit_type():
 	return frappe.db.has_column("Account", "job_profit_account_type")
 
 
-def _jp_exclude_fragment():
-	"""Exclude Job Profit–tagged lines from generic Revenue/Cost GL totals."""
-	if not _account_has_job_profit_type():
-		return ""
-	return (
-		" AND IFNULL(acc.job_profit_account_type, '') NOT IN "
-		"('Disbursements', 'WIP', 'Accrual')"
-	)
-
-
 def _signed_disbursement_amount(root_type, debit, credit):
 	"""Signed P&L-style amount for accounts tagged Disbursements."""
 	rt = (root_type or "").strip()
@@ -157,7 +147,8 @@ def get_job_profitability_from_gl(job_number, company, to_date=None, from_date=N
 	"""
 	Get revenue, cost, profit, WIP, and accrual for a job from the General Ledger.
 
-	Uses job_number as the accounting dimension on GL Entry.
+	Uses job_number as the accounting dimension on GL Entry, read through the Job
+	Profitability Summary (see logistics.job_management.profitability_summary).
 
 	:param job_number: Job Number name (Link)
 	:param company: Company
@@ -169,155 +160,29 @@ def get_job_profitability_from_gl(job_number, company, to_date=None, from_date=N
 	if not job_number or not company:
 		return _empty_profitability(company)
 
-	conditions = [
-		"gle.job_number = %(job_number)s",
-		"gle.company = %(company)s",
-		"gle.docstatus = 1",
-	]
-	values = {"job_number": job_number, "company": company}
-	if to_date:
-		conditions.append("gle.posting_date <= %(to_date)s")
-		values["to_date"] = to_date
-	if from_date:
-		conditions.append("gle.posting_date >= %(from_date)s")
-		values["from_date"] = from_date
-	where = " AND ".join(conditions)
-
-	policy = None
-	try:
-		from logistics.job_management.recognition_engine import get_recognition_policy_for_job
-		policy = get_recognition_policy_for_job(job_number)
-	except Exception:
-		pass
+	from logistics.job_management.profitability_summary import get_jobs_profitability
 
-	# Revenue: sum(credit - debit) for Income accounts (exclude policy WIP Income — it is reported under WIP)
-	revenue_values = dict(values)
-	revenue_exclude = ""
-	if policy and policy.get("wip_account"):
-		revenue_exclude = " AND gle.account != %(wip_account_exclude)s"
-		revenue_values["wip_account_exclude"] = policy["wip_account"]
-	jp_ex = _jp_exclude_fragment()
-	revenue_row = frappe.db.sql("""
-		SELECT COALESCE(SUM(gle.credit - gle.debit), 0) as amount
-		FROM `tabGL Entry` gle
-		INNER JOIN `tabAccount` acc ON acc.name = gle.account
-		WHERE {where}
-		AND acc.root_type = 'Income'
-		{revenue_exclude}
-		{jp_ex}
-	""".format(where=where, revenue_exclude=revenue_exclude, jp_ex=jp_ex), revenue_values, as_dict=True)
-	revenue = flt(revenue_row[0].amount, 2) if revenue_row else 0
-
-	# Cost: sum(debit - credit) for Expense accounts (exclude policy Cost Accrual — shown under Accrual, not Cost)
-	cost_exclude = ""
-	cost_values = dict(values)
-	if policy and policy.get("cost_accrual_account"):
-		cost_exclude = " AND gle.account != %(cost_accrual_exclude)s"
-		cost_values["cost_accrual_exclude"] = policy["cost_accrual_account"]
-	cost_row = frappe.db.sql("""
-		SELECT COALESCE(SUM(gle.debit - gle.credit), 0) as amount
-		FROM `tabGL Entry` gle
-		INNER JOIN `tabAccount` acc ON acc.name = gle.account
-		WHERE {where}
-		AND acc.root_type = 'Expense'
-		{cost_exclude}
-		{jp_ex}
-	""".format(where=where, cost_exclude=cost_exclude, jp_ex=jp_ex), cost_values, as_dict=True)
-	cost = flt(cost_row[0].amount, 2) if cost_row else 0
+	return get_jobs_profitability([job_number], company, to_date=to_date, from_date=from_date)[job_number]
 
-	gross_profit = revenue - cost
-	profit_margin_pct = (gross_profit / revenue * 100) if revenue else 0
 
-	# Disbursements: Job Profit Account Type = Disbursements
-	disbursements_amount = 0
-	if _account_has_job_profit_type():
-		disb_row = frappe.db.sql(
-			"""
-			SELECT COALESCE(SUM(
-				CASE acc.root_type
-					WHEN 'Income' THEN gle.credit - gle.debit
-					WHEN 'Expense' THEN gle.debit - gle.credit
-					WHEN 'Liability' THEN gle.credit - gle.debit
-					WHEN 'Asset' THEN gle.debit - gle.credit
-					WHEN 'Equity' THEN gle.debit - gle.credit
-					ELSE 0
-				END
-			), 0) AS amount
-			FROM `tabGL Entry` gle
-			INNER JOIN `tabAccount` acc ON acc.name = gle.account
-			WHERE {where}
-			AND IFNULL(acc.job_profit_account_type, '') = 'Disbursements'
-			""".format(where=where),
-			values,
-			as_dict=True,
-		)
-		disbursements_amount = flt(disb_row[0].amount, 2) if disb_row else 0
-
-	# WIP / Accrual summary tiles: same GL basis as recognition JEs (policy accounts, job_number)
-	wip_amount = 0
-	accrual_amount = 0
-	if policy:
-		if policy.get("wip_account"):
-			# WIP recognition JEs credit the WIP (Income) account; show positive open WIP as (credit - debit)
-			wip_row = frappe.db.sql("""
-				SELECT COALESCE(SUM(gle.credit - gle.debit), 0) as balance
-				FROM `tabGL Entry` gle
-				WHERE gle.job_number = %(job_number)s
-				AND gle.company = %(company)s
-				AND gle.account = %(wip_account)s
-				AND gle.docstatus = 1
-			""" + (" AND gle.posting_date <= %(to_date)s" if to_date else ""), {
-				"job_number": job_number,
-				"company": company,
-				"wip_account": policy.wip_account,
-				**({"to_date": to_date} if to_date else {})
-			}, as_dict=True)
-			wip_amount = flt(wip_row[0].balance, 2) if wip_row else 0
-		if policy.get("accrued_cost_liability_account"):
-			# Accrual recognition JEs credit Accrued Cost Liability; open accrual = (credit - debit) on that account
-			accr_row = frappe.db.sql("""
-				SELECT COALESCE(SUM(gle.credit - gle.debit), 0) as balance
-				FROM `tabGL Entry` gle
-				WHERE gle.job_number = %(job_number)s
-				AND gle.company = %(company)s
-				AND gle.account = %(accrued_cost_liability_account)s
-				AND gle.docstatus = 1
-			""" + (" AND gle.posting_date <= %(to_date)s" if to_date else ""), {
-				"job_number": job_number,
-				"company": company,
-				"accrued_cost_liability_account": policy.accrued_cost_liability_account,
-				**({"to_date": to_date} if to_date else {})
-			}, as_dict=True)
-			accrual_amount = flt(accr_row[0].balance, 2) if accr_row else 0
-		elif policy.get("cost_accrual_account"):
-			# Fallback if liability account missing: expense leg (debit - credit) matches open accrual balance
-			accr_row = frappe.db.sql("""
-				SELECT COALESCE(SUM(gle.debit - gle.credit), 0) as balance
-				FROM `tabGL Entry` gle
-				WHERE gle.job_number = %(job_number)s
-				AND gle.company = %(company)s
-				AND gle.account = %(cost_accrual_account)s
-				AND gle.docstatus = 1
-			""" + (" AND gle.posting_date <= %(to_date)s" if to_date else ""), {
-				"job_number": job_number,
-				"company": company,
-				"cost_accrual_account": policy.cost_accrual_account,
-				**({"to_date": to_date} if to_date else {})
-			}, as_dict=True)
-			accrual_amount = flt(accr_row[0].balance, 2) if accr_row else 0
-
-	currency = frappe.get_cached_value("Company", company, "default_currency") or "USD"
+@frappe.whitelist()
+def get_job_profitability_batch(job_numbers, company=None, to_date=None, from_date=None):
+	"""
+	Profitability for many jobs at once (list views, reports).
 
-	return {
-		"revenue": revenue,
-		"cost": cost,
-		"gross_profit": gross_profit,
-		"profit_margin_pct": round(profit_margin_pct, 2),
-		"wip_amount": wip_amount,
-		"accrual_amount": accrual_amount,
-		"disbursements_amount": disbursements_amount,
-		"currency": currency,
-	}
+	:param job_numbers: list (or JSON list) of Job Number names, at most 500
+	:param company: Optional; default is each Job Number's company
+	:return: {job_number: dict as returned by get_job_profitability_from_gl}
+	"""
+	from logistics.job_management.profitability_summary import get_jobs_profitability
+
+	if isinstance(job_numbers, str):
+		job_numbers = frappe.parse_json(job_numbers)
+	job_numbers = list(job_numbers or [])
+	if len(job_numbers) > 500:
+		frappe.throw(_("At most 500 jobs can be read at once"))
+	frappe.has_permission("Job Number", "read", throw=True)
+	return get_jobs_profitability(job_numbers, company, to_date=to_date, from_date=from_date)
 
 
 def _get_job_gl_entries_classified(
@@ -0,0 +1,60 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from datetime import date
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.job_management import profitability_summary as summary
+
+ACCOUNT_TYPES = {
+	"Sales": ("Income", ""),
+	"WIP": ("Income", ""),
+	"Freight Cost": ("Expense", ""),
+	"Cost Accrual": ("Expense", ""),
+	"Accrued Liability": ("Liability", ""),
+	"Duties Paid": ("Asset", "Disbursements"),
+}
+POLICY = frappe._dict(wip_account="WIP", cost_accrual_account="Cost Accrual", accrued_cost_liability_account="Accrued Liability")
+
+
+class UnitTestJobProfitabilitySummary(UnitTestCase):
+	def test_mid_month_range_reads_edges_from_gl(self):
+		with patch.object(summary, "is_built", return_value=True):
+			months, gl_ranges = summary._segments("2026-01-15", "2026-04-10")
+		self.assertEqual(months, (date(2026, 2, 1), date(2026, 4, 1)))
+		self.assertEqual(gl_ranges, [(date(2026, 1, 15), date(2026, 1, 31)), (date(2026, 4, 1), date(2026, 4, 10))])
+
+	def test_whole_months_and_unbuilt_summary(self):
+		with patch.object(summary, "is_built", return_value=True):
+			self.assertEqual(summary._segments(None, "2026-03-31"), ((None, date(2026, 4, 1)), []))
+			self.assertEqual(summary._segments("2026-03-02", "2026-03-20"), (None, [(date(2026, 3, 2), date(2026, 3, 20))]))
+		with patch.object(summary, "is_built", return_value=False):
+			self.assertEqual(summary._segments(None, None), (None, [(None, None)]))
+
+	def test_classify_matches_gl_buckets(self):
+		balances = {
+			"Sales": [10.0, 1000.0],
+			"WIP": [0.0, 300.0],
+			"Freight Cost": [600.0, 0.0],
+			"Cost Accrual": [200.0, 0.0],
+			"Accrued Liability": [50.0, 200.0],
+			"Duties Paid": [80.0, 0.0],
+		}
+		with patch("logistics.job_management.api._account_has_job_profit_type", return_value=True):
+			data = summary._classify(balances, balances, POLICY, ACCOUNT_TYPES)
+		self.assertEqual((data["revenue"], data["cost"], data["gross_profit"]), (990.0, 600.0, 390.0))
+		self.assertEqual((data["wip_amount"], data["accrual_amount"], data["disbursements_amount"]), (300.0, 150.0, 80.0))
+		self.assertEqual(data["profit_margin_pct"], 39.39)
+
+	def test_row_name_is_per_month(self):
+		self.assertEqual(
+			summary._row_name("JOB-1", "Co", "Sales", date(2026, 3, 1)),
+			summary._row_name("JOB-1", "Co", "Sales", "2026-03-01"),
+		)
+		self.assertNotEqual(
+			summary._row_name("JOB-1", "Co", "Sales", date(2026, 3, 1)),
+			summary._row_name("JOB-1", "Co", "Sales", date(2026, 4, 1)),
+		)
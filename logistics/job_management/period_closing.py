@@ -0,0 +1,214 @@
+"""
+Period Closing Adjustments
+
+Set-based WIP / accrual close-out at period end. For every job type the open jobs of the
+company (``wip_amount`` or ``accrual_amount`` > 0) are read in one query, and their
+actual revenue / costs as of the period end in one grouped query per invoice doctype
+(Sales / Purchase Invoice Item joined to the invoice header). Actuals are the invoice
+``grand_total`` per item row referencing the job, as before.
+
+``build_closing_plan`` only reads, and backs the Period Closing Preview report.
+``post_closing_plan`` posts the plan in batches: one Journal Entry per kind (WIP /
+accrual) and JE header for up to ``JE_BATCH_SIZE`` jobs. When a batch JE fails, its jobs
+are posted one by one under savepoints, so one bad job only fails itself. Batches commit
+and checkpoint when run as a background job (see logistics.utils.background_jobs).
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate
+
+from logistics.job_management.charge_recognition_je import (
+    set_accrual_adjustment_je_on_charges,
+    set_wip_adjustment_je_on_charges,
+)
+from logistics.utils.background_jobs import iter_chunks
+
+CLOSING_JOB_TYPES = (
+    "Air Shipment", "Sea Shipment", "Transport Job",
+    "Warehouse Job", "Declaration", "General Job", "Project Task Job",
+)
+
+JE_BATCH_SIZE = 100
+_NAME_CHUNK = 1000
+
+KIND_WIP = "wip"
+KIND_ACCRUAL = "accrual"
+
+# kind -> (job balance field, job recognized field, adjustment rows method, charge link setter, remark)
+_KINDS = {
+    KIND_WIP: ("wip_amount", "recognized_revenue", "wip_adjustment_rows", set_wip_adjustment_je_on_charges, "WIP Adjustment"),
+    KIND_ACCRUAL: ("accrual_amount", "recognized_costs", "accrual_adjustment_rows", set_accrual_adjustment_je_on_charges, "Accrual Adjustment"),
+}
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def open_jobs(job_type, company):
+    """Submitted jobs of ``job_type`` with WIP or accrual balance (name, wip_amount, accrual_amount)."""
+    if not frappe.db.exists("DocType", job_type):
+        return []
+    if not (frappe.db.has_column(job_type, "wip_amount") and frappe.db.has_column(job_type, "accrual_amount")):
+        return []
+    return frappe.get_all(
+        job_type,
+        filters={"company": company, "docstatus": 1},
+        or_filters=[["wip_amount", ">", 0], ["accrual_amount", ">", 0]],
+        fields=["name", "wip_amount", "accrual_amount"],
+        order_by="name asc",
+    )
+
+
+def actuals_as_of(invoice_doctype, job_type, job_names, as_of_date):
+    """{job: SUM(invoice grand_total per referencing item row)} for submitted rows posted on or before ``as_of_date``."""
+    out = {}
+    for names in _chunks(list(job_names), _NAME_CHUNK):
+        rows = frappe.db.sql(
+            f"""
+            SELECT item.reference_name AS job, SUM(inv.grand_total) AS amount
+            FROM `tab{invoice_doctype} Item` item
+            INNER JOIN `tab{invoice_doctype}` inv ON inv.name = item.parent
+            WHERE item.reference_doctype = %(job_type)s
+                AND item.reference_name IN %(names)s
+                AND item.docstatus = 1
+                AND inv.posting_date <= %(as_of)s
+            GROUP BY item.reference_name
+            """,
+            {"job_type": job_type, "names": names, "as_of": as_of_date},
+            as_dict=True,
+        )
+        out.update((row.job, flt(row.amount)) for row in rows)
+    return out
+
+
+def build_closing_plan(company, period_end_date, job_types=None):
+    """Adjustments the close would post, one row per job with anything to adjust (nothing is written)."""
+    period_end_date = getdate(period_end_date)
+    plan = []
+    for job_type in job_types or CLOSING_JOB_TYPES:
+        jobs = open_jobs(job_type, company)
+        if not jobs:
+            continue
+        names = [job.name for job in jobs]
+        revenue = actuals_as_of("Sales Invoice", job_type, names, period_end_date)
+        costs = actuals_as_of("Purchase Invoice", job_type, names, period_end_date)
+        for job in jobs:
+            actual_revenue, actual_costs = revenue.get(job.name, 0.0), costs.get(job.name, 0.0)
+            wip_adjustment = min(actual_revenue, flt(job.wip_amount)) if actual_revenue > 0 else 0.0
+            accrual_adjustment = min(actual_costs, flt(job.accrual_amount)) if actual_costs > 0 else 0.0
+            if wip_adjustment <= 0 and accrual_adjustment <= 0:
+                continue
+            plan.append(frappe._dict(
+                job_type=job_type,
+                job=job.name,
+                wip_amount=flt(job.wip_amount),
+                actual_revenue=actual_revenue,
+                wip_adjustment=max(wip_adjustment, 0.0),  # negative balances never adjust
+                accrual_amount=flt(job.accrual_amount),
+                actual_costs=actual_costs,
+                accrual_adjustment=max(accrual_adjustment, 0.0),
+            ))
+    return plan
+
+
+def post_closing_plan(plan, period_end_date):
+    """Post ``plan`` rows as batched adjustment Journal Entries; returns the legacy result shape."""
+    from logistics.job_management.recognition_engine import RecognitionEngine
+
+    period_end_date = getdate(period_end_date)
+    results = {"wip_adjustments": [], "accrual_adjustments": [], "errors": []}
+
+    for chunk in iter_chunks(
+        plan,
+        "period_closing",
+        chunk_size=JE_BATCH_SIZE,
+        item_key=lambda row: "{0}\x1f{1}".format(row.job_type, row.job),
+        message=_("Posting closing adjustments"),
+    ):
+        engines = {}
+        for row in chunk:
+            try:
+                engines[row.job] = RecognitionEngine(frappe.get_doc(row.job_type, row.job))
+            except Exception as e:
+                results["errors"].append({"job": row.job, "error": str(e)})
+        for kind, field in ((KIND_WIP, "wip_adjustment"), (KIND_ACCRUAL, "accrual_adjustment")):
+            entries = [(engines[row.job], flt(row[field])) for row in chunk if row.job in engines and flt(row[field]) > 0]
+            for group in _group_by_je_header(entries):
+                _post_group(kind, group, period_end_date, results)
+    return results
+
+
+def _group_by_je_header(entries):
+    from logistics.job_management.recognition_engine import apply_journal_entry_posting_header_from_job
+
+    groups = {}
+    for engine, amount in entries:
+        header = frappe._dict(company=engine.company)
+        try:
+            apply_journal_entry_posting_header_from_job(header, engine.job)
+        except Exception:
+            pass  # missing posting dimensions: the job's own JE reports it
+        key = tuple(sorted(header.items()))
+        groups.setdefault(key, []).append((engine, amount))
+    return list(groups.values())
+
+
+def _post_group(kind, entries, period_end_date, results):
+    """One JE for all ``entries``; on failure fall back to one JE per job."""
+    if len(entries) > 1:
+        savepoint = "period_closing_batch"
+        frappe.db.savepoint(savepoint)
+        try:
+            _post_entries(kind, entries, period_end_date, results)
+            return
+        except Exception:
+            frappe.db.rollback(save_point=savepoint)
+            frappe.clear_messages()
+    for entry in entries:
+        savepoint = "period_closing_job"
+        frappe.db.savepoint(savepoint)
+        try:
+            _post_entries(kind, [entry], period_end_date, results)
+        except Exception as e:
+            frappe.db.rollback(save_point=savepoint)
+            frappe.clear_messages()
+            results["errors"].append({"job": entry[0].job.name, "error": str(e)})
+
+
+def _post_entries(kind, entries, period_end_date, results):
+    from logistics.job_management.recognition_engine import apply_journal_entry_posting_header_from_job
+
+    balance_field, recognized_field, rows_method, set_je_on_charges, remark = _KINDS[kind]
+    first = entries[0][0]
+    je = frappe.new_doc("Journal Entry")
+    je.posting_date = period_end_date
+    je.company = first.company
+    je.voucher_type = "Journal Entry"
+    if len(entries) == 1:
+        je.user_remark = f"{remark} for {first.job_type} {first.job.name}"
+    else:
+        je.user_remark = f"{remark} (period closing) for {len(entries)} jobs"
+    for engine, amount in entries:
+        for row in getattr(engine, rows_method)(amount):
+            je.append("accounts", row)
+    apply_journal_entry_posting_header_from_job(je, first.job)
+    je.insert()
+    je.submit()
+
+    posted = []
+    for engine, amount in entries:
+        job = engine.job
+        frappe.db.set_value(
+            engine.job_type,
+            job.name,
+            {
+                balance_field: flt(job.get(balance_field)) - amount,
+                recognized_field: flt(job.get(recognized_field)) + amount,
+            },
+        )
+        set_je_on_charges(engine.job_type, job.name, je.name, item_codes=None)
+        posted.append({"job": job.name, "journal_entry": je.name, "amount": amount})
+    results[f"{kind}_adjustments"].extend(posted)
@@ -0,0 +1,429 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Job profitability summary ledger.
+
+``Job Profitability Summary`` holds SUM(debit) / SUM(credit) of submitted GL Entries per
+job_number, company, account and posting month. Every GL Entry with a job_number adds
+itself on submit (and subtracts on cancel) with one upsert; ERPNext cancellations post
+reversing GL Entries, which net out the same way.
+
+Balances are kept per account rather than per profitability class: the class depends on
+the account's root / job profit type and on the job's recognition policy, which can
+change, so it is applied when reading (``get_jobs_profitability``) exactly as the
+per-job GL queries did. Date ranges read whole months from the summary and the partial
+months at either end from GL Entry. Until the first build (patch or
+``rebuild_job_profitability_summary``) everything is read from GL Entry.
+
+``verify_job_profitability_summary`` compares the summary with GL Entry and rebuilds the
+jobs that drifted (e.g. after a ledger repost that deletes GL Entries); it runs daily.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, cint, flt, get_first_day, get_last_day, getdate, now_datetime
+
+from logistics.utils.background_jobs import enqueue_operation, iter_chunks
+
+SUMMARY_DOCTYPE = "Job Profitability Summary"
+# Global default set once the summary has been built from GL Entry
+BUILT_KEY = "job_profitability_summary_built"
+
+# Debit / credit differences below this are not drift
+SUMMARY_TOLERANCE = 0.005
+_NAME_CHUNK = 500
+_REBUILD_JOB_CHUNK = 200
+
+
+def _chunks(seq, size):
+	for i in range(0, len(seq), size):
+		yield seq[i:i + size]
+
+
+def _row_name(job_number, company, account, posting_month):
+	# Same key as the MD5(CONCAT_WS(...)) of _rebuild
+	raw = "\x1f".join((job_number, company, account, getdate(posting_month).isoformat()))
+	return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def is_built():
+	return bool(frappe.db.get_global(BUILT_KEY)) and frappe.db.table_exists(SUMMARY_DOCTYPE)
+
+
+# ---------------------------------------------------------------------------
+# Maintain
+# ---------------------------------------------------------------------------
+
+def on_gl_entry_submit(doc, method=None):
+	"""GL Entry on_submit: add the entry to its job / account / month."""
+	_apply_gl_entry(doc, 1)
+
+
+def on_gl_entry_cancel(doc, method=None):
+	"""GL Entry on_cancel: remove the entry again."""
+	_apply_gl_entry(doc, -1)
+
+
+def _apply_gl_entry(doc, sign):
+	job_number = doc.get("job_number")
+	if not job_number or not doc.get("account") or not doc.get("posting_date"):
+		return
+	posting_month = get_first_day(doc.posting_date)
+	now = now_datetime()
+	frappe.db.sql(
+		"""
+		INSERT INTO `tab{0}`
+			(name, creation, modified, owner, modified_by, docstatus, idx,
+			job_number, company, account, posting_month, debit, credit)
+		VALUES
+			(%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+			%(job_number)s, %(company)s, %(account)s, %(posting_month)s, %(debit)s, %(credit)s)
+		ON DUPLICATE KEY UPDATE
+			debit = debit + VALUES(debit),
+			credit = credit + VALUES(credit),
+			modified = VALUES(modified)
+		""".format(SUMMARY_DOCTYPE),
+		{
+			"name": _row_name(job_number, doc.company, doc.account, posting_month),
+			"now": now,
+			"user": frappe.session.user,
+			"job_number": job_number,
+			"company": doc.company,
+			"account": doc.account,
+			"posting_month": posting_month,
+			"debit": sign * flt(doc.debit),
+			"credit": sign * flt(doc.credit),
+		},
+	)
+
+
+# ---------------------------------------------------------------------------
+# Read
+# ---------------------------------------------------------------------------
+
+def _segments(from_date=None, to_date=None):
+	"""
+	Split [from_date, to_date] into a summary month range (first month, month after the
+	last; None = open) and the GL Entry date ranges for the partial months at the ends.
+	"""
+	f = getdate(from_date) if from_date else None
+	t = getdate(to_date) if to_date else None
+	if not is_built():
+		return None, [(f, t)]
+	month_from = None if f is None else (f if f.day == 1 else get_first_day(add_months(f, 1)))
+	if t is None:
+		month_to = None
+	elif t == get_last_day(t):
+		month_to = get_first_day(add_months(t, 1))
+	else:
+		month_to = get_first_day(t)
+	if month_from and month_to and month_from >= month_to:
+		return None, [(f, t)]
+	gl_ranges = []
+	if f and f < month_from:
+		gl_ranges.append((f, getdate(add_days(month_from, -1))))
+	if t and month_to <= t:
+		gl_ranges.append((month_to, t))
+	return (month_from, month_to), gl_ranges
+
+
+def account_balances(job_numbers, company, from_date=None, to_date=None):
+	"""{job_number: {account: [debit, credit]}} of submitted GL Entries of ``company`` in the date range."""
+	months, gl_ranges = _segments(from_date, to_date)
+	out = {}
+
+	def add(rows):
+		for row in rows:
+			bal = out.setdefault(row.job_number, {}).setdefault(row.account, [0.0, 0.0])
+			bal[0] += flt(row.debit)
+			bal[1] += flt(row.credit)
+
+	for jobs in _chunks(sorted(set(job_numbers)), _NAME_CHUNK):
+		values = {"jobs": jobs, "company": company}
+		if months is not None:
+			conditions = ["job_number IN %(jobs)s", "company = %(company)s"]
+			if months[0]:
+				conditions.append("posting_month >= %(month_from)s")
+				values["month_from"] = months[0]
+			if months[1]:
+				conditions.append("posting_month < %(month_to)s")
+				values["month_to"] = months[1]
+			add(frappe.db.sql(
+				"""
+				SELECT job_number, account, SUM(debit) AS debit, SUM(credit) AS credit
+				FROM `tab{0}`
+				WHERE {1}
+				GROUP BY job_number, account
+				""".format(SUMMARY_DOCTYPE, " AND ".join(conditions)),
+				values,
+				as_dict=True,
+			))
+		for start, end in gl_ranges:
+			conditions = ["gle.job_number IN %(jobs)s", "gle.company = %(company)s", "gle.docstatus = 1"]
+			if start:
+				conditions.append("gle.posting_date >= %(gl_from)s")
+			if end:
+				conditions.append("gle.posting_date <= %(gl_to)s")
+			add(frappe.db.sql(
+				"""
+				SELECT gle.job_number, gle.account, SUM(gle.debit) AS debit, SUM(gle.credit) AS credit
+				FROM `tabGL Entry` gle
+				WHERE {0}
+				GROUP BY gle.job_number, gle.account
+				""".format(" AND ".join(conditions)),
+				dict(values, gl_from=start, gl_to=end),
+				as_dict=True,
+			))
+	return out
+
+
+def _account_types(accounts):
+	"""{account: (root_type, job_profit_account_type)}"""
+	from logistics.job_management.api import _account_has_job_profit_type
+
+	fields = ["name", "root_type"]
+	if _account_has_job_profit_type():
+		fields.append("job_profit_account_type")
+	out = {}
+	for names in _chunks(sorted(accounts), _NAME_CHUNK):
+		for row in frappe.get_all("Account", filters={"name": ["in", names]}, fields=fields):
+			out[row.name] = ((row.root_type or "").strip(), (row.get("job_profit_account_type") or "").strip())
+	return out
+
+
+def policies_for_jobs(job_numbers):
+	"""{job_number: recognition policy accounts (or None)}, resolved once per distinct Job Number dimensions."""
+	from logistics.job_management.recognition_engine import resolve_policy_row_for_job
+
+	resolved = {}
+	out = {}
+	for names in _chunks(sorted(set(job_numbers)), _NAME_CHUNK):
+		for jcn in frappe.get_all(
+			"Job Number",
+			filters={"name": ["in", names]},
+			fields=["name", "company", "cost_center", "profit_center", "branch"],
+		):
+			key = (jcn.company, jcn.cost_center, jcn.profit_center, jcn.branch)
+			if key not in resolved:
+				policy = None
+				try:
+					policy_doc, row = resolve_policy_row_for_job(frappe._dict(
+						company=jcn.company,
+						cost_center=jcn.cost_center,
+						profit_center=jcn.profit_center,
+						branch=jcn.branch,
+						job_number=None,
+						direction=None,
+						transport_mode=None,
+					))
+					if row:
+						policy = frappe._dict(
+							name=policy_doc.name if policy_doc else None,
+							wip_account=row.get("wip_account"),
+							revenue_liability_account=row.get("revenue_liability_account"),
+							cost_accrual_account=row.get("cost_accrual_account"),
+							accrued_cost_liability_account=row.get("accrued_cost_liability_account"),
+						)
+				except Exception:
+					pass
+				resolved[key] = policy
+			out[jcn.name] = resolved[key]
+	return out
+
+
+def _classify(balances, open_balances, policy, account_types):
+	"""Revenue / cost / disbursements over ``balances``; WIP / accrual over ``open_balances`` (no from_date)."""
+	from logistics.job_management.api import _account_has_job_profit_type, _signed_disbursement_amount
+
+	policy = policy or {}
+	has_jp = _account_has_job_profit_type()
+	revenue = cost = disbursements = 0.0
+	for account, (debit, credit) in balances.items():
+		root_type, jp = account_types.get(account, ("", ""))
+		excluded = has_jp and jp in ("Disbursements", "WIP", "Accrual")
+		if root_type == "Income" and not excluded and account != policy.get("wip_account"):
+			revenue += credit - debit
+		elif root_type == "Expense" and not excluded and account != policy.get("cost_accrual_account"):
+			cost += debit - credit
+		if has_jp and jp == "Disbursements":
+			disbursements += _signed_disbursement_amount(root_type, debit, credit)
+
+	def balance(account, credit_side):
+		debit, credit = open_balances.get(account, (0.0, 0.0))
+		return credit - debit if credit_side else debit - credit
+
+	wip = accrual = 0.0
+	if policy.get("wip_account"):
+		wip = balance(policy["wip_account"], True)
+	if policy.get("accrued_cost_liability_account"):
+		accrual = balance(policy["accrued_cost_liability_account"], True)
+	elif policy.get("cost_accrual_account"):
+		accrual = balance(policy["cost_accrual_account"], False)
+
+	revenue, cost = flt(revenue, 2), flt(cost, 2)
+	gross_profit = revenue - cost
+	return {
+		"revenue": revenue,
+		"cost": cost,
+		"gross_profit": gross_profit,
+		"profit_margin_pct": round((gross_profit / revenue * 100) if revenue else 0, 2),
+		"wip_amount": flt(wip, 2),
+		"accrual_amount": flt(accrual, 2),
+		"disbursements_amount": flt(disbursements, 2),
+	}
+
+
+def get_jobs_profitability(job_numbers, company=None, to_date=None, from_date=None):
+	"""
+	{job_number: profitability} with the keys of api.get_job_profitability_from_gl.
+
+	Without ``company`` each job is read for its Job Number's company. WIP and accrual are
+	open balances up to ``to_date`` (``from_date`` does not apply to them), as before.
+	"""
+	job_numbers = [j for j in dict.fromkeys(job_numbers or []) if j]
+	if not job_numbers:
+		return {}
+	if company:
+		by_company = {company: job_numbers}
+	else:
+		by_company = {}
+		for row in frappe.get_all("Job Number", filters={"name": ["in", job_numbers]}, fields=["name", "company"]):
+			if row.company:
+				by_company.setdefault(row.company, []).append(row.name)
+
+	policies = policies_for_jobs(job_numbers)
+	out = {}
+	for co, jobs in by_company.items():
+		balances = account_balances(jobs, co, from_date=from_date, to_date=to_date)
+		open_balances = account_balances(jobs, co, to_date=to_date) if from_date else balances
+		accounts = set()
+		for per_job in (balances, open_balances):
+			for job_accounts in per_job.values():
+				accounts.update(job_accounts)
+		account_types = _account_types(accounts) if accounts else {}
+		currency = frappe.get_cached_value("Company", co, "default_currency") or "USD"
+		for job in jobs:
+			data = _classify(balances.get(job, {}), open_balances.get(job, {}), policies.get(job), account_types)
+			data["currency"] = currency
+			out[job] = data
+	return out
+
+
+# ---------------------------------------------------------------------------
+# Rebuild / verify
+# ---------------------------------------------------------------------------
+
+def _rebuild(gl_conditions, summary_conditions, values):
+	"""Replace the summary rows matching ``summary_conditions`` with GL Entries matching ``gl_conditions``."""
+	month = "DATE_FORMAT(gle.posting_date, '%%Y-%%m-01')"
+	frappe.db.sql(
+		"DELETE FROM `tab{0}` WHERE {1}".format(SUMMARY_DOCTYPE, " AND ".join(summary_conditions)),
+		values,
+	)
+	frappe.db.sql(
+		"""
+		INSERT INTO `tab{doctype}`
+			(name, creation, modified, owner, modified_by, docstatus, idx,
+			job_number, company, account, posting_month, debit, credit)
+		SELECT
+			MD5(CONCAT_WS(CHAR(31), gle.job_number, gle.company, gle.account, {month})),
+			%(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+			gle.job_number, gle.company, gle.account, {month}, SUM(gle.debit), SUM(gle.credit)
+		FROM `tabGL Entry` gle
+		WHERE gle.docstatus = 1 AND IFNULL(gle.job_number, '') != '' {where}
+		GROUP BY gle.job_number, gle.company, gle.account, {month}
+		""".format(
+			doctype=SUMMARY_DOCTYPE,
+			month=month,
+			where="".join(" AND " + c for c in gl_conditions),
+		),
+		dict(values, now=now_datetime(), user=frappe.session.user),
+	)
+
+
+def rebuild_job_profitability_summary():
+	"""Rebuild the whole summary from GL Entry, one posting year per chunk (checkpointed in a background job)."""
+	first, last = frappe.db.sql(
+		"SELECT MIN(posting_date), MAX(posting_date) FROM `tabGL Entry` WHERE IFNULL(job_number, '') != ''"
+	)[0]
+	years = [str(y) for y in range(getdate(first).year, getdate(last).year + 1)] if first else []
+	for chunk in iter_chunks(years, "job_profitability_summary", chunk_size=1, message=_("Rebuilding job profitability summary")):
+		year = cint(chunk[0])
+		_rebuild(
+			["gle.posting_date >= %(year_from)s", "gle.posting_date <= %(year_to)s"],
+			["posting_month >= %(year_from)s", "posting_month <= %(year_to)s"],
+			{"year_from": getdate("{0}-01-01".format(year)), "year_to": getdate("{0}-12-31".format(year))},
+		)
+	frappe.db.set_global(BUILT_KEY, str(now_datetime()))
+	return {"years": len(years)}
+
+
+def rebuild_jobs(job_numbers):
+	"""Rebuild the summary rows of ``job_numbers`` from GL Entry."""
+	for jobs in _chunks(sorted(set(job_numbers)), _REBUILD_JOB_CHUNK):
+		_rebuild(["gle.job_number IN %(jobs)s"], ["job_number IN %(jobs)s"], {"jobs": jobs})
+
+
+def verify_job_profitability_summary(fix=True, limit=500):
+	"""
+	Compare summary totals with GL Entry per job, company and account.
+
+	With ``fix`` the drifted jobs are rebuilt. Returns the drift count and up to ``limit`` rows.
+	"""
+	drift = frappe.db.sql(
+		"""
+		SELECT job_number, company, account,
+			SUM(gl_debit) AS gl_debit, SUM(gl_credit) AS gl_credit,
+			SUM(summary_debit) AS summary_debit, SUM(summary_credit) AS summary_credit
+		FROM (
+			SELECT job_number, company, account, debit AS gl_debit, credit AS gl_credit,
+				0 AS summary_debit, 0 AS summary_credit
+			FROM `tabGL Entry`
+			WHERE docstatus = 1 AND IFNULL(job_number, '') != ''
+			UNION ALL
+			SELECT job_number, company, account, 0, 0, debit, credit
+			FROM `tab{0}`
+		) x
+		GROUP BY job_number, company, account
+		HAVING ABS(SUM(gl_debit) - SUM(summary_debit)) > {1}
+			OR ABS(SUM(gl_credit) - SUM(summary_credit)) > {1}
+		""".format(SUMMARY_DOCTYPE, SUMMARY_TOLERANCE),
+		as_dict=True,
+	)
+	if fix and drift:
+		rebuild_jobs([row.job_number for row in drift])
+	return {"fixed": bool(fix), "drift_count": len(drift), "drift": drift[:limit]}
+
+
+def verify_daily():
+	"""Daily: rebuild jobs whose summary drifted from GL Entry and log how many."""
+	if not is_built():
+		return
+	out = verify_job_profitability_summary(fix=True, limit=50)
+	if out["drift_count"]:
+		frappe.log_error(
+			title=_("Job profitability summary drift corrected"),
+			message=frappe.as_json(out),
+		)
+
+
+@frappe.whitelist()
+def start_rebuild_job_profitability_summary():
+	"""Queue ``rebuild_job_profitability_summary`` as a Logistics Background Job."""
+	frappe.only_for("System Manager")
+	return enqueue_operation(
+		"logistics.job_management.profitability_summary.rebuild_job_profitability_summary",
+		title=_("Rebuild job profitability summary"),
+	)
+
+
+@frappe.whitelist()
+def verify(limit=500):
+	"""Report jobs whose profitability summary drifted from GL Entry."""
+	frappe.only_for("System Manager")
+	return verify_job_profitability_summary(fix=False, limit=cint(limit) or 500)
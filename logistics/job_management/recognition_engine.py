@@ -14,6 +14,7 @@ from frappe.utils import getdate, today, flt, nowdate, cint
 from datetime import datetime
 
 from logistics.job_management.gl_item_dimension import item_row_dict
+from logistics.utils.background_jobs import enqueue_operation
 from logistics.job_management.charge_recognition_je import (
     set_accrual_adjustment_je_on_charges,
     set_wip_adjustment_je_on_charges,
@@ -739,7 +740,6 @@ class RecognitionEngine:
         Dr. WIP Account
         Cr. Revenue Liability Account
         """
-        settings = self.get_settings()
         remark_type = "Closure" if is_closure else "Adjustment"
         
         je = frappe.new_doc("Journal Entry")
@@ -747,31 +747,8 @@ class RecognitionEngine:
         je.company = self.company
         je.voucher_type = "Journal Entry"
         je.user_remark = f"WIP {remark_type} for {self.job_type} {self.job.name}"
-        jcn = self.job.get("job_number")
-
-        # Debit: WIP Account
-        row = {
-            "account": settings.get("wip_account"),
-            "debit_in_account_currency": amount,
-            "credit_in_account_currency": 0,
-            **self._je_dimension_fields_for_job(),
-            **self._je_account_reference_fields(),
-        }
-        if jcn:
-            row["job_number"] = jcn
-        je.append("accounts", row)
-
-        # Credit: Revenue Liability Account
-        row = {
-            "account": settings.get("revenue_liability_account"),
-            "debit_in_account_currency": 0,
-            "credit_in_account_currency": amount,
-            **self._je_dimension_fields_for_job(),
-            **self._je_account_reference_fields(),
-        }
-        if jcn:
-            row["job_number"] = jcn
-        je.append("accounts", row)
+        for row in self.wip_adjustment_rows(amount):
+            je.append("accounts", row)
 
         apply_journal_entry_posting_header_from_job(je, self.job)
         je.insert()
@@ -779,6 +756,34 @@ class RecognitionEngine:
 
         return je.name
 
+    def wip_adjustment_rows(self, amount):
+        """Journal Entry Account rows of a WIP adjustment: Dr WIP Account, Cr Revenue Liability."""
+        return self._adjustment_rows(amount, "wip_account", "revenue_liability_account")
+
+    def accrual_adjustment_rows(self, amount):
+        """Journal Entry Account rows of an accrual adjustment: Dr Accrued Cost Liability, Cr Cost Accrual."""
+        return self._adjustment_rows(amount, "accrued_cost_liability_account", "cost_accrual_account")
+
+    def _adjustment_rows(self, amount, debit_account_field, credit_account_field):
+        settings = self.get_settings()
+        jcn = self.job.get("job_number")
+        rows = []
+        for account_field, debit, credit in (
+            (debit_account_field, amount, 0),
+            (credit_account_field, 0, amount),
+        ):
+            row = {
+                "account": settings.get(account_field),
+                "debit_in_account_currency": debit,
+                "credit_in_account_currency": credit,
+                **self._je_dimension_fields_for_job(),
+                **self._je_account_reference_fields(),
+            }
+            if jcn:
+                row["job_number"] = jcn
+            rows.append(row)
+        return rows
+
     def create_accrual_recognition_je(self, recognition_date, lines):
         """
         Create Accrual recognition Journal Entry.
@@ -855,7 +860,6 @@ class RecognitionEngine:
         Dr. Accrued Cost Liability Account (close out)
         Cr. Cost Accrual Account (close out)
         """
-        settings = self.get_settings()
         remark_type = "Closure" if is_closure else "Adjustment"
         
         je = frappe.new_doc("Journal Entry")
@@ -863,31 +867,8 @@ class RecognitionEngine:
         je.company = self.company
         je.voucher_type = "Journal Entry"
         je.user_remark = f"Accrual {remark_type} for {self.job_type} {self.job.name}"
-        jcn = self.job.get("job_number")
-
-        # Debit: Accrued Cost Liability Account
-        row = {
-            "account": settings.get("accrued_cost_liability_account"),
-            "debit_in_account_currency": amount,
-            "credit_in_account_currency": 0,
-            **self._je_dimension_fields_for_job(),
-            **self._je_account_reference_fields(),
-        }
-        if jcn:
-            row["job_number"] = jcn
-        je.append("accounts", row)
-
-        # Credit: Cost Accrual Account
-        row = {
-            "account": settings.get("cost_accrual_account"),
-            "debit_in_account_currency": 0,
-            "credit_in_account_currency": amount,
-            **self._je_dimension_fields_for_job(),
-            **self._je_account_reference_fields(),
-        }
-        if jcn:
-            row["job_number"] = jcn
-        je.append("accounts", row)
+        for row in self.accrual_adjustment_rows(amount):
+            je.append("accounts", row)
 
         apply_journal_entry_posting_header_from_job(je, self.job)
         je.insert()
@@ -1551,126 +1532,50 @@ def close_job_recognition(doctype, docname, closure_date=None):
 
 
 @frappe.whitelist()
-def process_period_closing_adjustments(company, period_end_date):
+def start_period_closing_adjustments(company, period_end_date):
+    """Queue ``process_period_closing_adjustments`` as a Logistics Background Job (one per company at a time)."""
+    frappe.has_permission("Journal Entry", "create", throw=True)
+    return enqueue_operation(
+        "logistics.job_management.recognition_engine.process_period_closing_adjustments",
+        "Company",
+        company,
+        title=_("Period closing adjustments for {0} as of {1}").format(company, period_end_date),
+        company=company,
+        period_end_date=str(getdate(period_end_date)),
+    )
+
+
+@frappe.whitelist()
+def process_period_closing_adjustments(company, period_end_date, dry_run=0):
     """
     Process WIP and Accrual adjustments for period closing.
     
     Args:
         company: Company name
         period_end_date: End date of the period
+        dry_run: Only return the planned adjustments (see the Period Closing Preview report)
     
     Returns:
         dict: Summary of adjustments made
     """
-    period_end_date = getdate(period_end_date)
-    
-    job_types = [
-        "Air Shipment", "Sea Shipment", "Transport Job",
-        "Warehouse Job", "Declaration", "General Job", "Project Task Job"
-    ]
-    
-    results = {
-        "wip_adjustments": [],
-        "accrual_adjustments": [],
-        "errors": []
-    }
-    
-    for job_type in job_types:
-        if not frappe.db.exists("DocType", job_type):
-            continue
-        
-        # Get jobs with pending WIP or accruals
-        jobs = frappe.get_all(job_type,
-            filters={
-                "company": company,
-                "docstatus": 1
-            },
-            or_filters=[
-                ["wip_amount", ">", 0],
-                ["accrual_amount", ">", 0]
-            ],
-            pluck="name"
-        )
-        
-        for job_name in jobs:
-            try:
-                job = frappe.get_doc(job_type, job_name)
-                engine = RecognitionEngine(job)
-                
-                # Calculate actual revenue/costs as of period end
-                actual_revenue = calculate_actual_revenue_as_of(job, period_end_date)
-                actual_costs = calculate_actual_costs_as_of(job, period_end_date)
-                
-                # Adjust WIP if there are actuals
-                if actual_revenue > 0 and job.get("wip_amount", 0) > 0:
-                    adjustment = min(actual_revenue, job.wip_amount)
-                    je = engine.adjust_wip(adjustment, period_end_date)
-                    results["wip_adjustments"].append({
-                        "job": job_name,
-                        "journal_entry": je,
-                        "amount": adjustment
-                    })
-                
-                # Adjust accruals if there are actuals
-                if actual_costs > 0 and job.get("accrual_amount", 0) > 0:
-                    adjustment = min(actual_costs, job.accrual_amount)
-                    je = engine.adjust_accruals(adjustment, period_end_date)
-                    results["accrual_adjustments"].append({
-                        "job": job_name,
-                        "journal_entry": je,
-                        "amount": adjustment
-                    })
-                    
-            except Exception as e:
-                results["errors"].append({
-                    "job": job_name,
-                    "error": str(e)
-                })
-    
-    return results
+    from logistics.job_management.period_closing import build_closing_plan, post_closing_plan
+
+    frappe.has_permission("Journal Entry", "create", throw=True)
+    plan = build_closing_plan(company, period_end_date)
+    if cint(dry_run):
+        return {"plan": plan}
+    return post_closing_plan(plan, period_end_date)
 
 
 def calculate_actual_revenue_as_of(job, as_of_date):
     """Calculate actual revenue posted for a job as of a specific date."""
-    total = 0
-    
-    # Get from Sales Invoices linked to this job
-    invoices = frappe.get_all("Sales Invoice Item",
-        filters={
-            "reference_doctype": job.doctype,
-            "reference_name": job.name,
-            "docstatus": 1
-        },
-        fields=["parent"]
-    )
-    
-    for inv in invoices:
-        posting_date = frappe.db.get_value("Sales Invoice", inv.parent, "posting_date")
-        if getdate(posting_date) <= getdate(as_of_date):
-            amount = frappe.db.get_value("Sales Invoice", inv.parent, "grand_total")
-            total += flt(amount)
-    
-    return total
+    from logistics.job_management.period_closing import actuals_as_of
+
+    return actuals_as_of("Sales Invoice", job.doctype, [job.name], getdate(as_of_date)).get(job.name, 0)
 
 
 def calculate_actual_costs_as_of(job, as_of_date):
     """Calculate actual costs posted for a job as of a specific date."""
-    total = 0
-    
-    # Get from Purchase Invoices linked to this job
-    invoices = frappe.get_all("Purchase Invoice Item",
-        filters={
-            "reference_doctype": job.doctype,
-            "reference_name": job.name,
-            "docstatus": 1
-        },
-        fields=["parent"]
-    )
-    
-    for inv in invoices:
-        posting_date = frappe.db.get_value("Purchase Invoice", inv.parent, "posting_date")
-        if getdate(posting_date) <= getdate(as_of_date):
-            amount = frappe.db.get_value("Purchase Invoice", inv.parent, "grand_total")
-            total += flt(amount)
-    
-    return total
+    from logistics.job_management.period_closing import actuals_as_of
+
+    return actuals_as_of("Purchase Invoice", job.doctype, [job.name], getdate(as_of_date)).get(job.name, 0)
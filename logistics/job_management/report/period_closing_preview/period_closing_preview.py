@@ -0,0 +1,44 @@
+"""
+Period Closing Preview
+
+Dry run of the period-closing WIP / accrual adjustments: what
+process_period_closing_adjustments would post for the company and period end.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from logistics.job_management.period_closing import build_closing_plan
+
+
+def execute(filters=None):
+    filters = frappe._dict(filters or {})
+    if not (filters.get("company") and filters.get("period_end_date")):
+        return get_columns(), [], None, None, []
+    job_types = [filters.job_type] if filters.get("job_type") else None
+    data = build_closing_plan(filters.company, filters.period_end_date, job_types=job_types)
+    return get_columns(), data, None, None, get_summary(data)
+
+
+def get_columns():
+    return [
+        {"fieldname": "job_type", "label": _("Job Type"), "fieldtype": "Data", "width": 120},
+        {"fieldname": "job", "label": _("Job"), "fieldtype": "Dynamic Link", "options": "job_type", "width": 150},
+        {"fieldname": "wip_amount", "label": _("WIP Amount"), "fieldtype": "Currency", "width": 110},
+        {"fieldname": "actual_revenue", "label": _("Actual Revenue"), "fieldtype": "Currency", "width": 110},
+        {"fieldname": "wip_adjustment", "label": _("WIP Adjustment"), "fieldtype": "Currency", "width": 110},
+        {"fieldname": "accrual_amount", "label": _("Accrual Amount"), "fieldtype": "Currency", "width": 110},
+        {"fieldname": "actual_costs", "label": _("Actual Costs"), "fieldtype": "Currency", "width": 110},
+        {"fieldname": "accrual_adjustment", "label": _("Accrual Adjustment"), "fieldtype": "Currency", "width": 120},
+    ]
+
+
+def get_summary(data):
+    wip = sum(flt(row.wip_adjustment) for row in data)
+    accrual = sum(flt(row.accrual_adjustment) for row in data)
+    return [
+        {"value": len(data), "label": _("Jobs to Adjust"), "datatype": "Int", "indicator": "Blue"},
+        {"value": wip, "label": _("WIP Adjustments"), "datatype": "Currency", "indicator": "Green"},
+        {"value": accrual, "label": _("Accrual Adjustments"), "datatype": "Currency", "indicator": "Orange"},
+    ]
@@ -0,0 +1,64 @@
+"""
+Unit tests for set-based period closing
+
+Tests cover:
+- Closing plan from grouped actuals
+- Batch JE fallback and per-job error isolation
+"""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from logistics.job_management import period_closing
+
+
+class _Engine:
+    def __init__(self, name):
+        self.job = frappe._dict(name=name)
+        self.job_type = "Air Shipment"
+        self.company = "Co"
+
+
+class TestPeriodClosing(unittest.TestCase):
+    """Test cases for the period closing plan and posting."""
+
+    def test_plan_caps_adjustments_at_balances(self):
+        jobs = [
+            frappe._dict(name="AS-1", wip_amount=100, accrual_amount=0),
+            frappe._dict(name="AS-2", wip_amount=50, accrual_amount=80),
+            frappe._dict(name="AS-3", wip_amount=10, accrual_amount=10),
+        ]
+        actuals = {"Sales Invoice": {"AS-1": 40.0, "AS-2": 500.0}, "Purchase Invoice": {"AS-2": 30.0}}
+        with patch.object(period_closing, "open_jobs", return_value=jobs), patch.object(
+            period_closing, "actuals_as_of", side_effect=lambda inv, jt, names, d: actuals[inv]
+        ):
+            plan = period_closing.build_closing_plan("Co", "2026-09-30", job_types=["Air Shipment"])
+        self.assertEqual([row.job for row in plan], ["AS-1", "AS-2"])
+        self.assertEqual((plan[0].wip_adjustment, plan[0].accrual_adjustment), (40.0, 0.0))
+        self.assertEqual((plan[1].wip_adjustment, plan[1].accrual_adjustment), (50.0, 30.0))
+
+    def test_failed_batch_falls_back_to_one_je_per_job(self):
+        entries = [(_Engine("AS-1"), 10.0), (_Engine("AS-2"), 20.0)]
+        calls = []
+
+        def post(kind, batch, period_end_date, results):
+            calls.append([engine.job.name for engine, _ in batch])
+            if len(batch) > 1 or batch[0][0].job.name == "AS-2":
+                raise frappe.ValidationError("bad account")
+            results["wip_adjustments"].append({"job": batch[0][0].job.name})
+
+        results = {"wip_adjustments": [], "accrual_adjustments": [], "errors": []}
+        with patch.object(period_closing, "_post_entries", side_effect=post), patch.object(
+            frappe.db, "savepoint"
+        ), patch.object(frappe.db, "rollback") as rollback, patch.object(frappe, "clear_messages"):
+            period_closing._post_group(period_closing.KIND_WIP, entries, "2026-09-30", results)
+        self.assertEqual(calls, [["AS-1", "AS-2"], ["AS-1"], ["AS-2"]])
+        self.assertEqual(results["wip_adjustments"], [{"job": "AS-1"}])
+        self.assertEqual(results["errors"], [{"job": "AS-2", "error": "bad account"}])
+        self.assertEqual(rollback.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from datetime import date
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.analytics_reports import rollup
+
+FILTERS = frappe._dict(from_date="2026-03-01", to_date="2026-03-31")
+
+
+class UnitTestAnalyticsDailyRollup(UnitTestCase):
+	def test_reads_live_without_rollup(self):
+		with patch.object(rollup, "_usable_state", return_value=None), patch.object(
+			rollup, "_amount_field", return_value="grand_total"
+		), patch.object(frappe.db, "has_column", return_value=True):
+			sql, params = rollup.rollup_source("Air Shipment", FILTERS)
+		self.assertNotIn("UNION ALL", sql)
+		self.assertNotIn(f"`tab{rollup.ROLLUP_DOCTYPE}`", sql)
+		self.assertEqual(params["r_from"], date(2026, 3, 1))
+
+	def test_reads_closed_days_from_rollup(self):
+		state = frappe._dict(rolled_through=date(2026, 3, 15), amount_field="grand_total", group_fields=[""])
+		with patch.object(rollup, "_usable_state", return_value=state), patch.object(
+			frappe.db, "has_column", return_value=True
+		):
+			sql, params = rollup.rollup_source("Air Shipment", FILTERS)
+		self.assertEqual(sql.count("UNION ALL"), 1)
+		self.assertIn(f"`tab{rollup.ROLLUP_DOCTYPE}`", sql)
+		self.assertEqual(params["r_through"], date(2026, 3, 15))
+		self.assertEqual(params["r_live_from"], date(2026, 3, 16))
+
+	def test_spec_covers_default_group_fields(self):
+		spec = rollup.rollup_spec()
+		self.assertIn("Transport Job", spec)
+		self.assertTrue(all(fields[0] == "" for fields in spec.values()))
+
+	def test_row_name_is_per_day(self):
+		self.assertNotEqual(
+			rollup._row_name("Air Shipment", date(2026, 3, 1), "", "", "Co", "Br", 1),
+			rollup._row_name("Air Shipment", date(2026, 3, 2), "", "", "Co", "Br", 1),
+		)
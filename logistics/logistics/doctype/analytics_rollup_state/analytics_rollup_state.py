@@ -0,0 +1,10 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class AnalyticsRollupState(Document):
+	"""Maintained by logistics.analytics_reports.rollup."""
+	pass
@@ -0,0 +1,10 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class CustomerCreditExposure(Document):
+	"""Maintained by logistics.utils.credit_exposure."""
+	pass
@@ -0,0 +1,10 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class SaveProfileLog(Document):
+	"""Written by logistics.utils.save_profiler."""
+	pass
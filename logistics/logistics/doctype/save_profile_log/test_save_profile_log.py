@@ -0,0 +1,49 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.utils import save_profiler
+
+
+@save_profiler.profiled
+def _section(calls):
+	calls.append(1)
+	return "ok"
+
+
+class UnitTestSaveProfileLog(UnitTestCase):
+	def _profile(self):
+		return save_profiler._Profile(frappe._dict(doctype="Air Shipment"), "save")
+
+	def test_profiled_is_transparent_without_active_profile(self):
+		calls = []
+		with patch.object(save_profiler, "_active", return_value=None):
+			self.assertEqual(_section(calls), "ok")
+		self.assertEqual(calls, [1])
+
+	def test_sections_are_aggregated_under_current_event(self):
+		profile = self._profile()
+		profile.events.append(("Air Shipment.validate", frozenset()))
+		with patch.object(save_profiler, "_active", return_value=profile):
+			_section([])
+			_section([])
+		((event, kind, label), (calls, seconds, queries, rows)), = profile.entries.items()
+		self.assertEqual((event, kind), ("Air Shipment.validate", save_profiler.KIND_SECTION))
+		self.assertTrue(label.endswith("._section"))
+		self.assertEqual(calls, 2)
+
+	def test_counting_sql_tracks_queries_and_rows(self):
+		profile = self._profile()
+		sql = save_profiler._counting_sql(profile, lambda *a, **kw: [(1,), (2,), (3,)])
+		sql("select 1")
+		sql("select 2")
+		self.assertEqual((profile.queries, profile.rows), (2, 6))
+
+	def test_sampling_is_off_by_default(self):
+		doc = frappe._dict(doctype="Air Shipment", meta=frappe._dict(istable=0))
+		with patch.object(frappe, "conf", frappe._dict()):
+			self.assertFalse(save_profiler._should_sample(doc))
@@ -0,0 +1,10 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class SaveProfileLogEntry(Document):
+	"""One event / controller method / hook total within a Save Profile Log."""
+	pass
@@ -0,0 +1,31 @@
+// Copyright (c) 2026, Logistics Team and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Slowest Save Hooks"] = {
+	filters: [
+		{
+			fieldname: "ref_doctype",
+			label: __("Document Type"),
+			fieldtype: "Link",
+			options: "DocType",
+		},
+		{
+			fieldname: "kind",
+			label: __("Kind"),
+			fieldtype: "Select",
+			options: "\nEvent\nController\nHook\nSection",
+		},
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.add_days(frappe.datetime.get_today(), -7),
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.get_today(),
+		},
+	],
+};
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, Logistics Team and contributors
+# For license information, please see license.txt
+
+"""Save Profile Log entries aggregated per event / controller method / hook, slowest first."""
+
+from __future__ import unicode_literals
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, flt, getdate
+
+ROW_LIMIT = 200
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	data = get_data(filters)
+	return get_columns(), data, None, get_chart(data), get_summary(filters, data)
+
+
+def get_columns():
+	return [
+		{"fieldname": "event", "label": _("Event"), "fieldtype": "Data", "width": 220},
+		{"fieldname": "kind", "label": _("Kind"), "fieldtype": "Data", "width": 90},
+		{"fieldname": "label", "label": _("Hook / Method"), "fieldtype": "Data", "width": 380},
+		{"fieldname": "samples", "label": _("Saves"), "fieldtype": "Int", "width": 80},
+		{"fieldname": "calls", "label": _("Calls"), "fieldtype": "Int", "width": 80},
+		{"fieldname": "avg_ms", "label": _("Avg ms / Save"), "fieldtype": "Float", "precision": 1, "width": 110},
+		{"fieldname": "max_ms", "label": _("Max ms"), "fieldtype": "Float", "precision": 1, "width": 100},
+		{"fieldname": "total_ms", "label": _("Total ms"), "fieldtype": "Float", "precision": 1, "width": 110},
+		{"fieldname": "avg_queries", "label": _("Avg Queries"), "fieldtype": "Float", "precision": 1, "width": 100},
+		{"fieldname": "avg_rows", "label": _("Avg Rows Read"), "fieldtype": "Float", "precision": 1, "width": 110},
+	]
+
+
+def _conditions(filters):
+	conditions = ["1=1"]
+	values = {}
+	if filters.get("ref_doctype"):
+		conditions.append("log.ref_doctype = %(ref_doctype)s")
+		values["ref_doctype"] = filters.ref_doctype
+	if filters.get("kind"):
+		conditions.append("entry.kind = %(kind)s")
+		values["kind"] = filters.kind
+	if filters.get("from_date"):
+		conditions.append("log.creation >= %(from_date)s")
+		values["from_date"] = getdate(filters.from_date)
+	if filters.get("to_date"):
+		conditions.append("log.creation < %(to_date)s")
+		values["to_date"] = add_days(getdate(filters.to_date), 1)
+	return " AND ".join(conditions), values
+
+
+def get_data(filters):
+	where, values = _conditions(filters)
+	values["row_limit"] = ROW_LIMIT
+	return frappe.db.sql(
+		f"""
+		SELECT
+			entry.event, entry.kind, entry.label,
+			COUNT(DISTINCT entry.parent) AS samples,
+			SUM(entry.calls) AS calls,
+			SUM(entry.wall_ms) / COUNT(DISTINCT entry.parent) AS avg_ms,
+			MAX(entry.wall_ms) AS max_ms,
+			SUM(entry.wall_ms) AS total_ms,
+			SUM(entry.queries) / COUNT(DISTINCT entry.parent) AS avg_queries,
+			SUM(entry.rows_read) / COUNT(DISTINCT entry.parent) AS avg_rows
+		FROM `tabSave Profile Log Entry` entry
+		INNER JOIN `tabSave Profile Log` log
+			ON log.name = entry.parent AND entry.parenttype = 'Save Profile Log'
+		WHERE {where}
+		GROUP BY entry.event, entry.kind, entry.label
+		ORDER BY total_ms DESC
+		LIMIT %(row_limit)s
+		""",
+		values,
+		as_dict=True,
+	)
+
+
+def get_chart(data):
+	# Event rows include their hooks; chart only the leaves so time is not counted twice
+	leaves = [row for row in data if row.kind != "Event"][:10]
+	if not leaves:
+		return None
+	return {
+		"data": {
+			"labels": [row.label.rsplit(".", 1)[-1] for row in leaves],
+			"datasets": [{"name": _("Total ms"), "values": [flt(row.total_ms, 1) for row in leaves]}],
+		},
+		"type": "bar",
+		"barOptions": {"stacked": 0},
+	}
+
+
+def get_summary(filters, data):
+	where = ["1=1"]
+	values = {}
+	if filters.get("ref_doctype"):
+		where.append("ref_doctype = %(ref_doctype)s")
+		values["ref_doctype"] = filters.ref_doctype
+	if filters.get("from_date"):
+		where.append("creation >= %(from_date)s")
+		values["from_date"] = getdate(filters.from_date)
+	if filters.get("to_date"):
+		where.append("creation < %(to_date)s")
+		values["to_date"] = add_days(getdate(filters.to_date), 1)
+	where = " AND ".join(where)
+	totals = frappe.db.sql(
+		f"""
+		SELECT COUNT(*) AS saves, AVG(total_ms) AS avg_ms, MAX(total_ms) AS max_ms, AVG(queries) AS avg_queries
+		FROM `tabSave Profile Log`
+		WHERE {where}
+		""",
+		values,
+		as_dict=True,
+	)[0]
+	return [
+		{"label": _("Sampled Saves"), "value": totals.saves or 0, "datatype": "Int", "indicator": "Blue"},
+		{"label": _("Avg Save ms"), "value": flt(totals.avg_ms, 1), "datatype": "Float", "indicator": "Orange"},
+		{"label": _("Slowest Save ms"), "value": flt(totals.max_ms, 1), "datatype": "Float", "indicator": "Red"},
+		{"label": _("Avg Queries / Save"), "value": flt(totals.avg_queries, 1), "datatype": "Float", "indicator": "Grey"},
+	]
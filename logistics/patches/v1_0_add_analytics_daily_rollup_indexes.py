@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Index Analytics Daily Rollup for the report range reads."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	frappe.reload_doc("logistics", "doctype", "analytics_daily_rollup")
+	frappe.db.add_index("Analytics Daily Rollup", ["ref_doctype", "group_field", "day"], "idx_ref_group_day")
@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Index Customer Credit Exposure by customer and company."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	frappe.reload_doc("logistics", "doctype", "customer_credit_exposure")
+	frappe.db.add_index("Customer Credit Exposure", ["customer", "company"], "idx_customer_company")
@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Index Handling Unit Occupancy for the snapshot invalidation and billing reads."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	frappe.reload_doc("warehousing", "doctype", "handling_unit_occupancy")
+	for fields, index_name in (
+		(["snapshot_date"], "idx_snapshot_date"),
+		(["customer", "snapshot_date"], "idx_customer_snapshot_date"),
+		(["handling_unit", "snapshot_date"], "idx_handling_unit_snapshot_date"),
+	):
+		frappe.db.add_index("Handling Unit Occupancy", fields, index_name)
@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Index Telematics Poll Cursor by provider and stream."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	frappe.reload_doc("transport", "doctype", "telematics_poll_cursor")
+	frappe.db.add_index("Telematics Poll Cursor", ["provider", "stream"], "idx_provider_stream")
@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Index Warehouse Stock Balance Snapshot for the as-of balance reads."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	frappe.reload_doc("warehousing", "doctype", "warehouse_stock_balance_snapshot")
+	for fields, index_name in (
+		(["snapshot_date", "item"], "idx_snapshot_date_item"),
+		(["customer", "snapshot_date"], "idx_customer_snapshot_date"),
+	):
+		frappe.db.add_index("Warehouse Stock Balance Snapshot", fields, index_name)
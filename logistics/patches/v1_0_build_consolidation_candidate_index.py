@@ -0,0 +1,22 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Create the Consolidation Candidate indexes and fill the index from existing Transport Legs."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	from logistics.transport.consolidation_index import INDEX_DOCTYPE, rebuild_index
+
+	frappe.reload_doc("transport", "doctype", "consolidation_candidate")
+	for fields, index_name in (
+		(["company", "load_type", "bucket_date", "pick_geohash"], "idx_candidate_pick"),
+		(["company", "load_type", "bucket_date", "drop_geohash"], "idx_candidate_drop"),
+		(["bucket_date"], "idx_bucket_date"),
+	):
+		frappe.db.add_index(INDEX_DOCTYPE, fields, index_name)
+	rebuild_index()
+	frappe.db.commit()
@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Build the Job Profitability Summary from GL Entry; reads use it from then on."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	from logistics.job_management.profitability_summary import rebuild_job_profitability_summary
+
+	frappe.reload_doc("job_management", "doctype", "job_profitability_summary")
+	frappe.db.add_index("Job Profitability Summary", ["job_number", "company", "posting_month"], "idx_job_company_month")
+	rebuild_job_profitability_summary()
+	frappe.db.commit()
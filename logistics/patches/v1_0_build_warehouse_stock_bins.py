@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Create the Warehouse Stock Bin indexes and populate it from the existing Warehouse Stock Ledger."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	from logistics.warehousing.stock_bin import rebuild_stock_bins
+
+	frappe.reload_doc("warehousing", "doctype", "warehouse_stock_bin")
+	for fields, index_name in (
+		(["item", "storage_location"], "idx_item_storage_location"),
+		(["storage_location", "actual_qty"], "idx_storage_location_qty"),
+		(["handling_unit", "item"], "idx_handling_unit_item"),
+		(["company", "branch"], "idx_company_branch"),
+	):
+		frappe.db.add_index("Warehouse Stock Bin", fields, index_name)
+	rebuild_stock_bins()
+	frappe.db.commit()
@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Agilasoft and contributors
+# For license information, please see license.txt
+
+"""Align Handling Unit / Storage Location capacity metrics with the ledger before deltas apply."""
+
+from __future__ import unicode_literals
+
+import frappe
+
+
+def execute():
+	from logistics.warehousing.capacity_metrics import reconcile_capacity_metrics
+
+	reconcile_capacity_metrics(fix=True)
+	frappe.db.commit()
@@ -10,6 +10,7 @@ Core calculation delegates to logistics.utils.rate_calculation_engine.
 
 import frappe
 import json
+from frappe import _
 from typing import Dict, List
 
 from logistics.utils.rate_calculation_engine import (
@@ -18,6 +19,7 @@ from logistics.utils.rate_calculation_engine import (
     get_available_unit_types,
     validate_rate_data,
 )
+from logistics.utils.tariff_index import get_tariff_index
 
 
 class TransportRateCalculationEngine(RateCalculationEngine):
@@ -42,20 +44,20 @@ class TransportRateCalculationEngine(RateCalculationEngine):
             filters = {"enabled": 1}
 
             if tariff_name:
-                tariff_doc = frappe.get_doc("Tariff", tariff_name)
-                rates = []
-                for rate in tariff_doc.transport_rates:
-                    rate_dict = rate.as_dict()
-                    if self._matches_criteria(
-                        rate_dict,
-                        origin_location,
-                        destination_location,
-                        vehicle_type,
-                        load_type,
-                        container_type,
-                    ):
-                        rates.append(rate_dict)
-                return rates
+                tariff_index = get_tariff_index(tariff_name)
+                if tariff_index is None:
+                    frappe.throw(_("Tariff {0} not found").format(tariff_name))
+                rows = tariff_index.match(
+                    "transport_rates",
+                    as_of=kwargs.get("as_of"),
+                    location_from=origin_location,
+                    location_to=destination_location,
+                    vehicle_type=vehicle_type,
+                    load_type=load_type,
+                    container_type=container_type,
+                )
+                # index rows are shared; hand out copies
+                return [frappe._dict(row) for row in rows]
             else:
                 filters.update({
                     "location_from": origin_location,
@@ -70,28 +72,6 @@ class TransportRateCalculationEngine(RateCalculationEngine):
             frappe.log_error(f"Error getting matching rates: {str(e)}")
             return []
 
-    def _matches_criteria(
-        self,
-        rate_data: Dict,
-        origin: str,
-        destination: str,
-        vehicle_type: str,
-        load_type: str,
-        container_type: str,
-    ) -> bool:
-        """Check if rate matches the given criteria."""
-        if origin and rate_data.get("location_from") != origin:
-            return False
-        if destination and rate_data.get("location_to") != destination:
-            return False
-        if vehicle_type and rate_data.get("vehicle_type") != vehicle_type:
-            return False
-        if load_type and rate_data.get("load_type") != load_type:
-            return False
-        if container_type and rate_data.get("container_type") != container_type:
-            return False
-        return True
-
 
 @frappe.whitelist()
 def calculate_transport_rate_for_quote(rate_data: str, **kwargs) -> Dict:
@@ -1,6 +1,8 @@
 import frappe
 from frappe import _
 
+from logistics.pricing_center.api_parts.zone.zone_resolver import get_location_postcodes, get_zone_resolver
+
 class ZoneManager:
     """Zone and location management for transport pricing"""
     
@@ -9,87 +11,60 @@ class ZoneManager:
         """Get transport zone from zip code"""
         
         try:
-            # Direct zip code mapping
-            zone = frappe.get_value("Zip Code Zone Mapping", 
-                {"zip_code": zip_code, "enabled": 1}, 
-                "transport_zone"
-            )
-            
-            if zone:
-                return zone
-            
-            # Partial zip code matching (first 3 digits)
-            if len(zip_code) >= 3:
-                partial_zip = zip_code[:3]
-                zone = frappe.get_value("Zip Code Zone Mapping", 
-                    {"zip_code": ["like", f"{partial_zip}%"], "enabled": 1}, 
-                    "transport_zone"
-                )
-                
-                if zone:
-                    return zone
-            
-            # Zip code range matching
-            zone = frappe.get_value("Transport Zone", 
-                {
-                    "zip_code_range_from": ["<=", zip_code],
-                    "zip_code_range_to": [">=", zip_code],
-                    "enabled": 1
-                }, 
-                "name"
-            )
-            
-            if zone:
-                return zone
-            
-            return None
+            return get_zone_resolver().resolve(zip_code, country)
             
         except Exception as e:
             frappe.log_error(f"Zone lookup failed: {str(e)}")
             return None
     
     @staticmethod
-    def get_zone_from_location(location_name, country=None):
-        """Get transport zone from location name"""
+    def get_zones_from_zip_codes(zip_codes, country=None):
+        """Resolve many zip codes at once: {zip_code: zone or None}"""
         
         try:
-            # Get location details
-            location = frappe.get_doc("Location", location_name)
-            
-            if location.zip_code:
-                zone = ZoneManager.get_zone_from_zip_code(location.zip_code, location.country)
-                if zone:
-                    return zone
-            
-            # Fallback to location-based zone lookup
-            zone = frappe.get_value("Transport Zone", 
-                {
-                    "zone_name": ["like", f"%{location_name}%"],
-                    "enabled": 1
-                }, 
-                "name"
-            )
+            return get_zone_resolver().resolve_many(zip_codes or [], country)
             
-            if zone:
-                return zone
-            
-            return None
+        except Exception as e:
+            frappe.log_error(f"Bulk zone lookup failed: {str(e)}")
+            return {zip_code: None for zip_code in zip_codes or []}
+    
+    @staticmethod
+    def get_zones_from_locations(location_names):
+        """Resolve many locations at once: {location: zone or None}"""
+        
+        try:
+            resolver = get_zone_resolver()
+            postcodes = get_location_postcodes(location_names)
+            zones = {}
+            for location_name in location_names or []:
+                if not location_name or location_name in zones:
+                    continue
+                zip_code, country = postcodes.get(location_name, (None, None))
+                zone = resolver.resolve(zip_code, country) if zip_code else None
+                # Fallback to location-based zone lookup
+                zones[location_name] = zone or resolver.zone_by_name(location_name)
+            return zones
             
         except Exception as e:
             frappe.log_error(f"Location zone lookup failed: {str(e)}")
-            return None
+            return {location_name: None for location_name in location_names or []}
+    
+    @staticmethod
+    def get_zone_from_location(location_name, country=None):
+        """Get transport zone from location name"""
+        
+        return ZoneManager.get_zones_from_locations([location_name]).get(location_name)
     
     @staticmethod
     def update_zones_for_locations(origin, destination):
         """Update zones for origin and destination locations"""
         
         try:
-            origin_zone = ZoneManager.get_zone_from_location(origin)
-            destination_zone = ZoneManager.get_zone_from_location(destination)
+            zones = ZoneManager.get_zones_from_locations([origin, destination])
             
             return {
-                "origin_zone": origin_zone,
-                "destination_zone": destination_zone
+                "origin_zone": zones.get(origin),
+                "destination_zone": zones.get(destination)
             }
             
         except Exception as e:
@@ -105,6 +80,14 @@ def get_zone_from_zip_code(zip_code, country=None):
     
     return ZoneManager.get_zone_from_zip_code(zip_code, country)
 
+@frappe.whitelist()
+def get_zones_from_zip_codes(zip_codes, country=None):
+    """API endpoint for bulk zone lookup (e.g. rate sheet imports); zip_codes is a list or JSON list"""
+    
+    if isinstance(zip_codes, str):
+        zip_codes = frappe.parse_json(zip_codes)
+    return ZoneManager.get_zones_from_zip_codes(zip_codes, country)
+
 @frappe.whitelist()
 def get_zone_from_location(location_name, country=None):
     """API endpoint for zone lookup from location"""
@@ -0,0 +1,248 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Preloaded zip / postal code to Transport Zone resolver.
+
+All enabled Zip Code Zone Mappings are loaded once per worker into one prefix trie per
+country (mappings without a country apply everywhere). Countries are free text, so names
+and codes ("Philippines", "PH") are normalised through the Country master. A lookup tries
+the address country and the country-less mappings first, then the other countries (as the
+resolver did before it knew about countries), walking each trie once:
+
+1. exact mapping of the code;
+2. longest mapping that is a prefix of the code ("123" covers "12345");
+3. best mapping sharing the first ``AREA_PREFIX_LENGTH`` characters (the old
+   ``LIKE 'abc%'`` fallback).
+
+Higher ``priority`` wins between mappings of the same code. Sites that carry
+``zip_code_range_from`` / ``zip_code_range_to`` on Transport Zone also get a sorted
+interval index over those ranges, compared numerically chunk by chunk so that "9999"
+sorts before "10000".
+
+The resolver is rebuilt when a mapping or zone changes (Redis generation token, so every
+worker notices) and after ``ZONE_RESOLVER_TTL`` seconds at the latest.
+"""
+
+from __future__ import unicode_literals
+
+import re
+import time
+from bisect import bisect_right
+
+import frappe
+from frappe.utils import cint
+
+ZONE_RESOLVER_TTL = 900
+AREA_PREFIX_LENGTH = 3
+
+_GENERATION_KEY = "logistics:zone_resolver_gen"
+_CHUNKS = re.compile(r"\d+|\D+")
+
+_resolvers = {}  # site -> (generation, loaded_at, ZoneResolver); workers serve several sites
+
+
+def normalize_code(code):
+	"""Upper-case zip / postal code without spaces or dashes."""
+	return re.sub(r"[\s\-]", "", str(code or "")).upper()
+
+
+def _country_key(country, aliases=None):
+	"""Canonical upper-case country; ``aliases`` maps Country codes and names to the name."""
+	key = (country or "").strip().upper()
+	return (aliases or {}).get(key, key)
+
+
+def _country_aliases():
+	if not frappe.db.has_column("Country", "code"):
+		return {}
+	aliases = {}
+	for row in frappe.get_all("Country", fields=["name", "code"]):
+		name = (row.name or "").strip().upper()
+		aliases[name] = name
+		if row.code:
+			aliases[row.code.strip().upper()] = name
+	return aliases
+
+
+def zip_sort_key(code):
+	"""Numeric-aware key: digit runs compare as numbers, everything else as text."""
+	return tuple((0, int(chunk), "") if chunk.isdigit() else (1, 0, chunk) for chunk in _CHUNKS.findall(code))
+
+
+class _Node(object):
+	__slots__ = ("children", "mapping", "best")
+
+	def __init__(self):
+		self.children = {}
+		self.mapping = None  # (priority, zone) of a mapping ending here
+		self.best = None  # best (priority, zone) anywhere below
+
+
+class _Trie(object):
+	def __init__(self):
+		self.root = _Node()
+
+	def insert(self, code, priority, zone):
+		entry = (priority, zone)
+		node = self.root
+		for char in code:
+			node = node.children.setdefault(char, _Node())
+			if node.best is None or entry[0] > node.best[0]:
+				node.best = entry
+		if node.mapping is None or entry[0] > node.mapping[0]:
+			node.mapping = entry
+
+	def lookup(self, code):
+		node, depth = self.root, 0
+		longest = area = None
+		for char in code:
+			node = node.children.get(char)
+			if node is None:
+				break
+			depth += 1
+			if node.mapping is not None:
+				longest = node.mapping
+			if depth == AREA_PREFIX_LENGTH:
+				area = node.best
+		if longest is not None:
+			return longest[1]
+		return area[1] if area else None
+
+
+class _RangeIndex(object):
+	"""Zone ranges sorted by lower bound, with a running max of upper bounds for pruning."""
+
+	def __init__(self, ranges):
+		ranges = sorted(ranges, key=lambda r: r[0])
+		self.starts = [r[0] for r in ranges]
+		self.ranges = ranges
+		self.max_end = []
+		running = None
+		for _start, end, _zone in ranges:
+			running = end if running is None or end > running else running
+			self.max_end.append(running)
+
+	def lookup(self, key):
+		i = bisect_right(self.starts, key) - 1
+		while i >= 0 and self.max_end[i] >= key:
+			start, end, zone = self.ranges[i]
+			if start <= key <= end:
+				return zone
+			i -= 1
+		return None
+
+
+class ZoneResolver(object):
+	def __init__(self, mappings, ranges, zone_names, country_aliases=None):
+		self.country_aliases = country_aliases or {}
+		self.tries = {}
+		for country, code, priority, zone in mappings:
+			self.tries.setdefault(country, _Trie()).insert(code, priority, zone)
+		grouped = {}
+		for country, start, end, zone in ranges:
+			grouped.setdefault(country, []).append((start, end, zone))
+		self.ranges = {country: _RangeIndex(rows) for country, rows in grouped.items()}
+		self.zone_names = zone_names  # [(name, zone_name)] in name order
+
+	def resolve(self, zip_code, country=None):
+		code = normalize_code(zip_code)
+		if not code:
+			return None
+		country = _country_key(country, self.country_aliases)
+		others = sorted(c for c in set(self.tries) | set(self.ranges) if c and c != country)
+		countries = [country, ""] + others if country else [""] + others
+		for c in countries:
+			trie = self.tries.get(c)
+			zone = trie.lookup(code) if trie else None
+			if zone:
+				return zone
+		key = zip_sort_key(code)
+		for c in countries:
+			index = self.ranges.get(c)
+			zone = index.lookup(key) if index else None
+			if zone:
+				return zone
+		return None
+
+	def resolve_many(self, zip_codes, country=None):
+		return {zip_code: self.resolve(zip_code, country) for zip_code in zip_codes}
+
+	def zone_by_name(self, text):
+		"""First zone whose zone_name contains ``text`` (case-insensitive)."""
+		needle = (text or "").lower()
+		if not needle:
+			return None
+		for name, zone_name in self.zone_names:
+			if needle in (zone_name or "").lower():
+				return name
+		return None
+
+
+def _load():
+	mapping_dt, zone_dt = "Zip Code Zone Mapping", "Transport Zone"
+	zone_field = "zone" if frappe.db.has_column(mapping_dt, "zone") else "transport_zone"
+	code_fields = [f for f in ("zip_code", "postal_code") if frappe.db.has_column(mapping_dt, f)]
+	fields = [zone_field] + code_fields + [
+		f for f in ("country", "priority") if frappe.db.has_column(mapping_dt, f)
+	]
+	filters = {zone_field: ["is", "set"]}
+	if frappe.db.has_column(mapping_dt, "enabled"):
+		filters["enabled"] = 1
+	aliases = _country_aliases()
+	mappings = []
+	for row in frappe.get_all(mapping_dt, filters=filters, fields=fields, order_by="name asc"):
+		for f in code_fields:
+			code = normalize_code(row.get(f))
+			if code:
+				mappings.append((_country_key(row.get("country"), aliases), code, cint(row.get("priority")), row.get(zone_field)))
+
+	zone_filters = {"enabled": 1} if frappe.db.has_column(zone_dt, "enabled") else {}
+	zone_fields = ["name", "zone_name"]
+	has_ranges = frappe.db.has_column(zone_dt, "zip_code_range_from") and frappe.db.has_column(
+		zone_dt, "zip_code_range_to"
+	)
+	if has_ranges:
+		zone_fields += ["zip_code_range_from", "zip_code_range_to"]
+	if frappe.db.has_column(zone_dt, "country"):
+		zone_fields.append("country")
+	zones = frappe.get_all(zone_dt, filters=zone_filters, fields=zone_fields, order_by="name asc")
+	ranges = []
+	if has_ranges:
+		for z in zones:
+			start, end = normalize_code(z.zip_code_range_from), normalize_code(z.zip_code_range_to)
+			if start and end:
+				ranges.append((_country_key(z.get("country"), aliases), zip_sort_key(start), zip_sort_key(end), z.name))
+	return ZoneResolver(mappings, ranges, [(z.name, z.zone_name) for z in zones], aliases)
+
+
+def get_zone_resolver():
+	"""Shared resolver of this site in this worker, rebuilt when mappings or zones change."""
+	site = frappe.local.site
+	generation = frappe.cache.get_value(_GENERATION_KEY) or "0"
+	cached = _resolvers.get(site)
+	if cached and cached[0] == generation and time.monotonic() - cached[1] < ZONE_RESOLVER_TTL:
+		return cached[2]
+	resolver = _load()
+	_resolvers[site] = (generation, time.monotonic(), resolver)
+	return resolver
+
+
+def invalidate_zone_resolver(doc=None, method=None):
+	"""Zip Code Zone Mapping / Transport Zone doc_events: rebuild resolvers in every worker."""
+	_resolvers.pop(frappe.local.site, None)
+	frappe.cache.set_value(_GENERATION_KEY, frappe.generate_hash(length=10))
+
+
+def get_location_postcodes(location_names):
+	"""{location: (postcode, country)} for Locations, in one query (postcode fields are optional custom fields)."""
+	names = [n for n in set(location_names or []) if n]
+	if not names:
+		return {}
+	postcode_fields = [f for f in ("zip_code", "pincode", "postal_code") if frappe.db.has_column("Location", f)]
+	fields = ["name"] + postcode_fields + (["country"] if frappe.db.has_column("Location", "country") else [])
+	out = {}
+	for row in frappe.get_all("Location", filters={"name": ["in", names]}, fields=fields):
+		postcode = next((row.get(f) for f in postcode_fields if row.get(f)), None)
+		out[row.name] = (postcode, row.get("country"))
+	return out
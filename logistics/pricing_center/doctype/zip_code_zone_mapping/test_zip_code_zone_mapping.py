@@ -0,0 +1,83 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.pricing_center.api_parts.zone import zone_resolver
+from logistics.pricing_center.api_parts.zone.zone_resolver import ZoneResolver, zip_sort_key
+
+
+def _resolver(ranges=()):
+	mappings = [
+		("", "12345", 0, "EXACT"),
+		("", "123", 0, "PREFIX"),
+		("", "45610", 0, "AREA-LOW"),
+		("", "45699", 5, "AREA-HIGH"),
+		("PH", "1000", 0, "MANILA"),
+		("", "1000", 0, "GLOBAL-1000"),
+	]
+	return ZoneResolver(mappings, list(ranges), [("Z-NORTH", "North Luzon")])
+
+
+class UnitTestZipCodeZoneMapping(UnitTestCase):
+	def test_exact_then_longest_prefix(self):
+		resolver = _resolver()
+		self.assertEqual(resolver.resolve("12345"), "EXACT")
+		self.assertEqual(resolver.resolve("123-99"), "PREFIX")
+
+	def test_area_fallback_prefers_priority(self):
+		self.assertEqual(_resolver().resolve("45600"), "AREA-HIGH")
+
+	def test_country_specific_mapping_wins(self):
+		resolver = _resolver()
+		self.assertEqual(resolver.resolve("1000", "ph"), "MANILA")
+		self.assertEqual(resolver.resolve("1000", "SG"), "GLOBAL-1000")
+
+	def test_ranges_compare_numerically(self):
+		ranges = [("", zip_sort_key("9000"), zip_sort_key("10999"), "RANGE")]
+		resolver = _resolver(ranges)
+		self.assertEqual(resolver.resolve("9999"), "RANGE")
+		self.assertIsNone(resolver.resolve("11000"))
+
+	def test_resolve_many_and_zone_name_fallback(self):
+		resolver = _resolver()
+		self.assertEqual(resolver.resolve_many(["12345", "99999"]), {"12345": "EXACT", "99999": None})
+		self.assertEqual(resolver.zone_by_name("luzon"), "Z-NORTH")
+
+	def test_worker_keeps_one_resolver_per_site(self):
+		zone_resolver._resolvers.clear()
+		site = frappe.local.site
+		self.addCleanup(setattr, frappe.local, "site", site)
+		with patch.object(frappe.cache, "get_value", return_value="0"), patch.object(
+			zone_resolver, "_load", side_effect=lambda: _resolver()
+		) as load:
+			frappe.local.site = "site-a"
+			first = zone_resolver.get_zone_resolver()
+			frappe.local.site = "site-b"
+			self.assertIsNot(zone_resolver.get_zone_resolver(), first)
+			frappe.local.site = "site-a"
+			self.assertIs(zone_resolver.get_zone_resolver(), first)
+		self.assertEqual(load.call_count, 2)
+		zone_resolver._resolvers.clear()
+
+	def test_country_codes_and_names_match(self):
+		rows = {
+			"Country": [frappe._dict(name="Philippines", code="ph"), frappe._dict(name="Singapore", code="sg")],
+			"Zip Code Zone Mapping": [
+				frappe._dict(zone="MANILA", zip_code="1000", country="PH", priority=0),
+				frappe._dict(zone="CEBU", zip_code="6000", country="Phils.", priority=0),
+			],
+			"Transport Zone": [],
+		}
+		with patch.object(frappe.db, "has_column", return_value=True), patch.object(
+			frappe, "get_all", side_effect=lambda doctype, **kwargs: rows[doctype]
+		):
+			resolver = zone_resolver._load()
+		self.assertEqual(resolver.resolve("1000", "Philippines"), "MANILA")
+		self.assertEqual(resolver.resolve("1000", "ph"), "MANILA")
+		# an unrecognised country spelling is still found after the address country
+		self.assertEqual(resolver.resolve("6000", "Philippines"), "CEBU")
+		self.assertEqual(resolver.resolve("1000", "Singapore"), "MANILA")
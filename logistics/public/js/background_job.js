@@ -0,0 +1,59 @@
+// Copyright (c) 2026, www.agilasoft.com and contributors
+// For license information, please see license.txt
+// Starts a Logistics Background Job and follows it: realtime progress bar, polling fallback, result callback.
+
+frappe.provide("logistics.background_job");
+
+logistics.background_job.POLL_MS = 3000;
+
+// opts: { method, args, title, on_done(result, job), on_failed(job) }
+logistics.background_job.run = function(opts) {
+	return frappe.call({ method: opts.method, args: opts.args || {} }).then(function(r) {
+		if (r && r.message && r.message.name) {
+			logistics.background_job.follow(r.message, opts);
+		}
+		return r && r.message;
+	});
+};
+
+logistics.background_job.follow = function(job, opts) {
+	var title = opts.title || job.title;
+	var finished = false;
+	var timer = null;
+
+	var update = function(state) {
+		if (finished || !state || state.name !== job.name) {
+			return;
+		}
+		if (state.status === "Completed" || state.status === "Failed") {
+			finished = true;
+			clearInterval(timer);
+			frappe.realtime.off("logistics_background_job", update);
+			frappe.hide_progress();
+			if (state.status === "Completed") {
+				opts.on_done && opts.on_done(state.result || {}, state);
+			} else if (opts.on_failed) {
+				opts.on_failed(state);
+			} else {
+				frappe.msgprint({
+					title: title,
+					message: frappe.utils.escape_html(state.error_message || __("The background job failed. Check Error Log.")),
+					indicator: "red",
+				});
+			}
+			return;
+		}
+		frappe.show_progress(title, Math.round(state.progress || 0), 100, state.progress_message || __(state.status));
+	};
+
+	frappe.realtime.on("logistics_background_job", update);
+	timer = setInterval(function() {
+		frappe
+			.xcall("logistics.utils.background_jobs.get_background_job", { name: job.name })
+			.then(update)
+			.catch(function() {
+				clearInterval(timer);
+			});
+	}, logistics.background_job.POLL_MS);
+	update(job);
+};
@@ -78,6 +78,16 @@ logistics.profitability.load_profitability_html = function(frm) {
 		return;
 	}
 
+	// onload, refresh, form-refresh, render_complete and the route polls below all land here on one open:
+	// load once per job / company within a short window instead of once per event
+	var load_key = [frm.doctype, frm.doc.name, frm.doc.job_number, frm.doc.company].join("::");
+	var now = Date.now();
+	if (frm.__profitability_key === load_key && now - (frm.__profitability_at || 0) < 3000) {
+		return;
+	}
+	frm.__profitability_key = load_key;
+	frm.__profitability_at = now;
+
 	// Show loading state immediately so we know the section can display content
 	set_html("<p class=\"text-muted\"><i class=\"fa fa-spinner fa-spin\"></i> " + __("Loading profitability...") + "</p>");
 
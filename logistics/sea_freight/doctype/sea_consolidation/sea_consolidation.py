@@ -88,9 +88,9 @@ class SeaConsolidation(Document):
             return
         if getattr(self.flags, "ignore_charges_sync", False):
             return
-        for charge in self.get("consolidation_charges") or []:
-            if hasattr(charge, "calculate_charge_amount"):
-                charge.calculate_charge_amount(parent_doc=self)
+        from logistics.utils.charges_calculation import sync_charges_with_parent
+
+        sync_charges_with_parent(self, "consolidation_charges")
 
     def before_save(self):
         """Actions before saving the document"""
@@ -962,16 +962,19 @@ class SeaConsolidation(Document):
     def get_dashboard_html(self):
         """Generate HTML for Dashboard tab: same tabbed layout as Sea Booking / Sea Shipment (Route, Milestones, Alerts)."""
         try:
+            from logistics.document_management.dashboard_cache import cached_dashboard_html
             from logistics.document_management.logistics_form_dashboard import (
                 build_sea_consolidation_dashboard_config,
                 render_logistics_form_dashboard_html,
             )
             from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-            dash = render_logistics_form_dashboard_html(
-                self, build_sea_consolidation_dashboard_config(self)
+            return cached_dashboard_html(
+                self,
+                "dashboard",
+                lambda: get_sales_quote_validity_dashboard_html(self)
+                + render_logistics_form_dashboard_html(self, build_sea_consolidation_dashboard_config(self)),
             )
-            return get_sales_quote_validity_dashboard_html(self) + dash
         except Exception as e:
             frappe.log_error(f"Sea Consolidation get_dashboard_html: {str(e)}", "Sea Consolidation Dashboard")
             return "<div class='alert alert-warning'>Error loading dashboard.</div>"
@@ -137,9 +137,9 @@ class SeaShipment(Document):
             return
         if getattr(self.flags, "ignore_charges_sync", False):
             return
-        for charge in self.get("charges") or []:
-            if hasattr(charge, "calculate_charge_amount"):
-                charge.calculate_charge_amount(parent_doc=self)
+        from logistics.utils.charges_calculation import sync_charges_with_parent
+
+        sync_charges_with_parent(self)
 
     def _sync_freight_consolidator_from_sea_booking(self):
         """Keep Freight Consolidator aligned with the linked Sea Booking when set there."""
@@ -977,16 +977,19 @@ class SeaShipment(Document):
     def get_dashboard_html(self):
         """Generate HTML for Dashboard tab: tabbed layout with map, milestones, alerts."""
         try:
+            from logistics.document_management.dashboard_cache import cached_dashboard_html
             from logistics.document_management.logistics_form_dashboard import (
                 build_sea_shipment_dashboard_config,
                 render_logistics_form_dashboard_html,
             )
             from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-            dash = render_logistics_form_dashboard_html(
-                self, build_sea_shipment_dashboard_config(self)
+            return cached_dashboard_html(
+                self,
+                "dashboard",
+                lambda: get_sales_quote_validity_dashboard_html(self)
+                + render_logistics_form_dashboard_html(self, build_sea_shipment_dashboard_config(self)),
             )
-            return get_sales_quote_validity_dashboard_html(self) + dash
         except Exception as e:
             frappe.log_error(f"Sea Shipment get_dashboard_html: {str(e)}", "Sea Shipment Dashboard")
             return "<div class='alert alert-warning'>Error loading dashboard.</div>"
@@ -4,12 +4,18 @@
 """
 Scheduled tasks for auto-updating statuses and dates of milestones,
 documents, permits, and exemptions.
+
+Each rule is one set-based UPDATE per table, applied in name-ordered chunks
+(keyset pagination) until no matching rows remain, with a commit per chunk.
+Every task accepts dry_run=True to only count the rows it would change.
 """
 
 from __future__ import unicode_literals
 
+import time
+
 import frappe
-from frappe.utils import getdate, today, date_diff, now_datetime
+from frappe.utils import cint, getdate, today, now_datetime
 
 
 # Child table doctypes that have milestone rows (parenttype -> child doctype)
@@ -24,51 +30,95 @@ MILESTONE_CHILD_TABLES = [
 	"Declaration Order Milestone",
 ]
 
+# Rows selected and updated per round trip
+CHUNK_SIZE = 1000
+
+
+def _auto_updates_enabled():
+	settings = frappe.get_single("Logistics Settings")
+	return getattr(settings, "enable_auto_status_updates", 1) != 0
+
+
+def _bulk_update(doctype, where_sql, set_sql, params, dry_run=False, chunk_size=CHUNK_SIZE):
+	"""
+	UPDATE `tab<doctype>` SET <set_sql> for every row matching <where_sql>.
 
-def update_milestone_statuses():
+	Walks matching names in order (name > last seen), so a backlog of any size is
+	drained in one run without OFFSET scans; the predicate is re-checked in the
+	UPDATE so rows changed concurrently are left alone. Returns per-table stats.
+	"""
+	started = time.monotonic()
+	stats = {"doctype": doctype, "rows": 0, "chunks": 0, "ms": 0}
+
+	if dry_run:
+		stats["rows"] = cint(frappe.db.sql(
+			f"SELECT COUNT(*) FROM `tab{doctype}` WHERE {where_sql}", params
+		)[0][0])
+		stats["ms"] = int((time.monotonic() - started) * 1000)
+		return stats
+
+	after = ""
+	while True:
+		names = frappe.db.sql_list(
+			f"""
+			SELECT name FROM `tab{doctype}`
+			WHERE {where_sql} AND name > %(_after)s
+			ORDER BY name
+			LIMIT {int(chunk_size)}
+			""",
+			dict(params, _after=after),
+		)
+		if not names:
+			break
+		frappe.db.sql(
+			f"UPDATE `tab{doctype}` SET {set_sql} WHERE name IN %(_names)s AND {where_sql}",
+			dict(params, _names=tuple(names)),
+		)
+		frappe.db.commit()
+		stats["rows"] += len(names)
+		stats["chunks"] += 1
+		after = names[-1]
+
+	stats["ms"] = int((time.monotonic() - started) * 1000)
+	return stats
+
+
+def _run_rules(task, rules, dry_run, error_title):
+	"""Apply (doctype, where_sql, set_sql, params) rules in order; one failing table doesn't stop the rest."""
+	summary = []
+	for doctype, where_sql, set_sql, params in rules:
+		try:
+			summary.append(_bulk_update(doctype, where_sql, set_sql, params, dry_run=dry_run))
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(f"Error updating {doctype} in {task}: {e}", error_title)
+			summary.append({"doctype": doctype, "error": str(e)})
+	if not dry_run:
+		frappe.logger("status_update").info({"task": task, "tables": summary})
+	return summary
+
+
+def update_milestone_statuses(dry_run=False):
 	"""
 	Mark milestones as Delayed when planned_end has passed and actual_end is not set.
 	Runs hourly.
 	"""
 	try:
-		settings = frappe.get_single("Logistics Settings")
-		if getattr(settings, "enable_auto_status_updates", 1) == 0:
+		if not _auto_updates_enabled():
 			return
 
-		now = now_datetime()
-		updated = 0
-
-		for child_doctype in MILESTONE_CHILD_TABLES:
-			if not frappe.db.table_exists(child_doctype):
-				continue
-			rows = frappe.get_all(
+		params = {"now": now_datetime()}
+		rules = [
+			(
 				child_doctype,
-				filters={
-					"status": ["in", ["Planned", "Started"]],
-					"planned_end": ["<", now],
-					"actual_end": ["is", "not set"],
-				},
-				fields=["name", "parent", "parenttype"],
-				limit=500,
+				"status IN ('Planned', 'Started') AND planned_end < %(now)s AND actual_end IS NULL",
+				"status = 'Delayed'",
+				params,
 			)
-			for row in rows:
-				try:
-					frappe.db.set_value(
-						child_doctype,
-						row.name,
-						"status",
-						"Delayed",
-						update_modified=False,
-					)
-					updated += 1
-				except Exception as e:
-					frappe.log_error(
-						f"Error updating milestone {child_doctype} {row.name}: {e}",
-						"Milestone Status Update Error",
-					)
-
-		if updated:
-			frappe.db.commit()
+			for child_doctype in MILESTONE_CHILD_TABLES
+			if frappe.db.table_exists(child_doctype)
+		]
+		return _run_rules("update_milestone_statuses", rules, dry_run, "Milestone Status Update Error")
 	except Exception as e:
 		frappe.log_error(
 			f"Error in update_milestone_statuses: {e}",
@@ -76,74 +126,33 @@ def update_milestone_statuses():
 		)
 
 
-def update_document_statuses():
+def update_document_statuses(dry_run=False):
 	"""
 	Bulk update Job Document status: Overdue when date_required passed, Expired when expiry_date passed.
 	Runs daily.
 	"""
 	try:
-		settings = frappe.get_single("Logistics Settings")
-		if getattr(settings, "enable_auto_status_updates", 1) == 0:
+		if not _auto_updates_enabled():
 			return
 
-		today_date = getdate(today())
-		updated = 0
-
-		# Overdue: status in Pending/Uploaded/Overdue, date_required < today
-		overdue_rows = frappe.get_all(
-			"Job Document",
-			filters={
-				"status": ["in", ["Pending", "Uploaded", "Overdue"]],
-				"date_required": ["<", today_date],
-			},
-			fields=["name", "date_required", "status"],
-			limit=1000,
-		)
-		for row in overdue_rows:
-			try:
-				required = getdate(row.date_required)
-				days = date_diff(today_date, required)
-				frappe.db.set_value(
-					"Job Document",
-					row.name,
-					{"status": "Overdue", "overdue_days": days},
-					update_modified=False,
-				)
-				updated += 1
-			except Exception as e:
-				frappe.log_error(
-					f"Error updating Job Document {row.name}: {e}",
-					"Document Status Update Error",
-				)
-
-		# Expired: expiry_date < today
-		expired_rows = frappe.get_all(
-			"Job Document",
-			filters={
-				"status": ["not in", ["Expired"]],
-				"expiry_date": ["<", today_date],
-			},
-			fields=["name"],
-			limit=1000,
-		)
-		for row in expired_rows:
-			try:
-				frappe.db.set_value(
-					"Job Document",
-					row.name,
-					"status",
-					"Expired",
-					update_modified=False,
-				)
-				updated += 1
-			except Exception as e:
-				frappe.log_error(
-					f"Error updating Job Document {row.name}: {e}",
-					"Document Status Update Error",
-				)
-
-		if updated:
-			frappe.db.commit()
+		params = {"today": getdate(today())}
+		rules = [
+			# Overdue: status in Pending/Uploaded/Overdue, date_required < today
+			(
+				"Job Document",
+				"status IN ('Pending', 'Uploaded', 'Overdue') AND date_required < %(today)s",
+				"status = 'Overdue', overdue_days = DATEDIFF(%(today)s, date_required)",
+				params,
+			),
+			# Expired: expiry_date < today
+			(
+				"Job Document",
+				"IFNULL(status, '') != 'Expired' AND expiry_date < %(today)s",
+				"status = 'Expired'",
+				params,
+			),
+		]
+		return _run_rules("update_document_statuses", rules, dry_run, "Document Status Update Error")
 	except Exception as e:
 		frappe.log_error(
 			f"Error in update_document_statuses: {e}",
@@ -151,44 +160,22 @@ def update_document_statuses():
 		)
 
 
-def update_permit_statuses():
+def update_permit_statuses(dry_run=False):
 	"""
 	Set Permit Application status to Expired when valid_to has passed.
 	Runs daily.
 	"""
 	try:
-		settings = frappe.get_single("Logistics Settings")
-		if getattr(settings, "enable_auto_status_updates", 1) == 0:
+		if not _auto_updates_enabled():
 			return
 
-		today_date = getdate(today())
-		rows = frappe.get_all(
+		rules = [(
 			"Permit Application",
-			filters={
-				"status": "Approved",
-				"valid_to": ["<", today_date],
-			},
-			fields=["name"],
-			limit=500,
-		)
-		updated = 0
-		for row in rows:
-			try:
-				frappe.db.set_value(
-					"Permit Application",
-					row.name,
-					"status",
-					"Expired",
-					update_modified=False,
-				)
-				updated += 1
-			except Exception as e:
-				frappe.log_error(
-					f"Error updating Permit Application {row.name}: {e}",
-					"Permit Status Update Error",
-				)
-		if updated:
-			frappe.db.commit()
+			"status = 'Approved' AND valid_to < %(today)s",
+			"status = 'Expired'",
+			{"today": getdate(today())},
+		)]
+		return _run_rules("update_permit_statuses", rules, dry_run, "Permit Status Update Error")
 	except Exception as e:
 		frappe.log_error(
 			f"Error in update_permit_statuses: {e}",
@@ -196,50 +183,43 @@ def update_permit_statuses():
 		)
 
 
-def update_exemption_statuses():
+def update_exemption_statuses(dry_run=False):
 	"""
 	Set Exemption Certificate status to Expired when valid_to passed or fully used.
 	Runs daily.
 	"""
 	try:
-		settings = frappe.get_single("Logistics Settings")
-		if getattr(settings, "enable_auto_status_updates", 1) == 0:
+		if not _auto_updates_enabled():
 			return
 
-		today_date = getdate(today())
-		rows = frappe.get_all(
+		# Fully used: a value-limited certificate with no value left, and no quantity left if it has a quantity limit
+		rules = [(
 			"Exemption Certificate",
-			filters={"status": "Active"},
-			fields=["name", "valid_to", "remaining_value", "remaining_quantity", "exemption_value", "exemption_quantity"],
-			limit=500,
-		)
-		updated = 0
-		for row in rows:
-			try:
-				expired = False
-				if row.valid_to and getdate(row.valid_to) < today_date:
-					expired = True
-				elif row.exemption_value and (row.remaining_value or 0) <= 0:
-					if not row.exemption_quantity or (row.remaining_quantity or 0) <= 0:
-						expired = True
-				if expired:
-					frappe.db.set_value(
-						"Exemption Certificate",
-						row.name,
-						"status",
-						"Expired",
-						update_modified=False,
-					)
-					updated += 1
-			except Exception as e:
-				frappe.log_error(
-					f"Error updating Exemption Certificate {row.name}: {e}",
-					"Exemption Status Update Error",
+			"""status = 'Active' AND (
+				valid_to < %(today)s
+				OR (
+					IFNULL(exemption_value, 0) != 0 AND IFNULL(remaining_value, 0) <= 0
+					AND (IFNULL(exemption_quantity, 0) = 0 OR IFNULL(remaining_quantity, 0) <= 0)
 				)
-		if updated:
-			frappe.db.commit()
+			)""",
+			"status = 'Expired'",
+			{"today": getdate(today())},
+		)]
+		return _run_rules("update_exemption_statuses", rules, dry_run, "Exemption Status Update Error")
 	except Exception as e:
 		frappe.log_error(
 			f"Error in update_exemption_statuses: {e}",
 			"Exemption Status Task Error",
 		)
+
+
+@frappe.whitelist()
+def preview_status_updates():
+	"""Dry run of every status task: rows each table would change right now."""
+	frappe.only_for("System Manager")
+	return {
+		"milestones": update_milestone_statuses(dry_run=True),
+		"documents": update_document_statuses(dry_run=True),
+		"permits": update_permit_statuses(dry_run=True),
+		"exemptions": update_exemption_statuses(dry_run=True),
+	}
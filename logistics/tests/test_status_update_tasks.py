@@ -0,0 +1,48 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from __future__ import unicode_literals
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from logistics.status_update import tasks
+
+
+class TestStatusUpdateBulkUpdate(FrappeTestCase):
+	def test_backlog_drained_in_keyset_chunks(self):
+		with patch.object(frappe.db, "sql_list", side_effect=[["A", "B"], ["C"], []]) as sql_list, patch.object(
+			frappe.db, "sql"
+		) as sql, patch.object(frappe.db, "commit") as commit:
+			stats = tasks._bulk_update("Job Document", "status = %(status)s", "status = 'Overdue'", {"status": "Pending"}, chunk_size=2)
+
+		self.assertEqual((stats["rows"], stats["chunks"]), (3, 2))
+		self.assertEqual([c.args[1]["_after"] for c in sql_list.call_args_list], ["", "B", "C"])
+		self.assertEqual([c.args[1]["_names"] for c in sql.call_args_list], [("A", "B"), ("C",)])
+		# the UPDATE re-checks the rule so rows changed since the SELECT are skipped
+		self.assertIn("AND status = %(status)s", sql.call_args_list[0].args[0])
+		self.assertEqual(commit.call_count, 2)
+
+	def test_dry_run_only_counts(self):
+		with patch.object(frappe.db, "sql", return_value=[[7]]) as sql, patch.object(
+			frappe.db, "sql_list"
+		) as sql_list, patch.object(frappe.db, "commit") as commit:
+			stats = tasks._bulk_update("Job Document", "status = 'Pending'", "status = 'Overdue'", {}, dry_run=True)
+
+		self.assertEqual(stats["rows"], 7)
+		self.assertTrue(sql.call_args.args[0].startswith("SELECT COUNT(*)"))
+		sql_list.assert_not_called()
+		commit.assert_not_called()
+
+	def test_failing_table_does_not_stop_the_others(self):
+		ok = {"doctype": "Sea Shipment Milestone", "rows": 1, "chunks": 1, "ms": 0}
+		rules = [("Air Shipment Milestone", "1", "1", {}), ("Sea Shipment Milestone", "1", "1", {})]
+		with patch.object(tasks, "_bulk_update", side_effect=[Exception("lock wait timeout"), ok]), patch.object(
+			frappe.db, "rollback"
+		) as rollback, patch.object(frappe, "log_error"):
+			summary = tasks._run_rules("update_milestone_statuses", rules, False, "Milestone Status Update Error")
+
+		rollback.assert_called_once()
+		self.assertEqual(summary, [{"doctype": "Air Shipment Milestone", "error": "lock wait timeout"}, ok])
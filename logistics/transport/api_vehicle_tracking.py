@@ -304,9 +304,26 @@ def get_all_vehicles_with_status():
 					"driver_name": rs.driver_name
 				}
 		
+		# Latest fixes from the per-vehicle table kept by telematics ingest (one indexed read)
+		from logistics.transport.telematics.ingest import get_latest_positions
+		latest_map = get_latest_positions([v.name for v in vehicles])
+		
 		# Process each vehicle
 		vehicle_data = []
 		for vehicle in vehicles:
+			latest = latest_map.get(vehicle.name)
+			if latest and latest.lat is not None and latest.lon is not None and (
+				not vehicle.last_telematics_ts or (latest.ts and latest.ts >= vehicle.last_telematics_ts)
+			):
+				vehicle.last_telematics_lat = latest.lat
+				vehicle.last_telematics_lon = latest.lon
+				vehicle.last_telematics_ts = latest.ts
+				vehicle.last_speed_kph = latest.speed_kph
+				vehicle.last_ignition_on = latest.ignition
+				if latest.fuel_l is not None:
+					vehicle.last_fuel_level = latest.fuel_l
+				vehicle.last_provider = latest.provider or vehicle.last_provider
+			
 			# Determine status
 			if vehicle.name in vehicle_run_sheet_map:
 				rs_info = vehicle_run_sheet_map[vehicle.name]
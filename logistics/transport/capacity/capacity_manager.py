@@ -111,6 +111,39 @@ class CapacityManager:
 		except Exception as e:
 			frappe.log_error(f"Error getting vehicle capacity: {str(e)}", "Capacity Manager")
 			return {'weight': 0, 'volume': 0, 'pallets': 0}
+
+	def get_vehicle_capacities(self, vehicles: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+		"""
+		Batch form of get_vehicle_capacity for rows already read from Transport Vehicle.
+		
+		Args:
+			vehicles: Rows with name, capacity_weight, capacity_volume, capacity_pallets
+				and (optionally) capacity_weight_uom / capacity_volume_uom
+		
+		Returns:
+			Dictionary of vehicle name -> 'weight', 'volume', 'pallets' in standard UOMs
+		"""
+		if not self.is_enabled():
+			return {v['name']: {'weight': 0, 'volume': 0, 'pallets': 0} for v in vehicles}
+		
+		convert = self.settings.get('uom_conversion_enabled') and self.volume_uom
+		out = {}
+		for v in vehicles:
+			weight = flt(v.get('capacity_weight'))
+			volume = flt(v.get('capacity_volume'))
+			try:
+				if convert:
+					weight = convert_weight(weight, v.get('capacity_weight_uom') or self.default_uoms['weight'], self.default_uoms['weight'], self.company)
+					volume = convert_volume(volume, v.get('capacity_volume_uom') or self.default_uoms['volume'], self.volume_uom, self.company)
+			except Exception as e:
+				frappe.log_error(f"Error converting capacity for {v.get('name')}: {str(e)}", "Capacity Manager")
+				weight, volume = 0, 0
+			out[v['name']] = {
+				'weight': weight,
+				'volume': volume,
+				'pallets': flt(v.get('capacity_pallets')),
+			}
+		return out
 	
 	def get_available_capacity(
 		self,
@@ -178,20 +178,16 @@ def _resolve_distance_km(leg) -> Optional[float]:
             if val and val > 0:
                 return val
 
-    # As a last resort, if routing.py is present & addresses exist, compute haversine
+    # As a last resort, use the shared route cache / provider, else haversine
     pick = getattr(leg, "pick_address", None)
     drop = getattr(leg, "drop_address", None)
     if not pick or not drop:
         return None
     try:
-        from logistics.transport.routing import get_address_coords, haversine_km  # local import; no circular
-        c1 = get_address_coords(pick)
-        c2 = get_address_coords(drop)
-        if c1 and c2:
-            return haversine_km(c1[0], c1[1], c2[0], c2[1])
+        from logistics.transport.distance_matrix import get_address_distance_km  # local import; no circular
+        return get_address_distance_km(pick, drop)
     except Exception:
         return None
-    return None
 
 
 def _resolve_vehicle_type(leg) -> str:
@@ -0,0 +1,279 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Consolidation candidate index
+
+``Consolidation Candidate`` holds one row per Transport Leg that can still be
+consolidated, keyed by (company, load type, date bucket, pick / drop geohash):
+- the leg is not cancelled, has pick and drop addresses, no Run Sheet and no
+  consolidation flag / link
+- its Transport Job is submitted and the job's Load Type can handle consolidation
+- the date bucket is the leg date (else run date, job scheduled / booking date,
+  leg creation); geohashes come from Address custom_latitude / custom_longitude
+  and are empty for addresses that are not geocoded
+
+Rows are synced when legs are saved, submitted, cancelled or deleted and when the
+Transport Job, Run Sheet or Transport Consolidation that decides their eligibility
+changes. Some paths set leg fields without hooks (e.g. run sheet assignment from a
+Transport Plan), so readers join the live leg row and drop stale candidates;
+``rebuild_index`` runs nightly and resyncs everything.
+
+Readers ask for a bounded window (company, load type, date +/- window days) instead
+of scanning every job and leg ever created.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import frappe
+from frappe.utils import add_days, flt, getdate, now_datetime, today
+
+from logistics.utils.background_jobs import iter_chunks
+
+INDEX_DOCTYPE = "Consolidation Candidate"
+# Stored geohash precision (~150 m cells)
+GEOHASH_PRECISION = 7
+CANDIDATE_WINDOW_DAYS = 7
+_SYNC_CHUNK = 500
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+# ------------------------ Geohash ------------------------
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[bits])
+            bits, bit = 0, 0
+    return "".join(chars)
+
+
+def _address_geohashes(addresses: Iterable[str]) -> Dict[str, str]:
+    addresses = {a for a in addresses if a}
+    if not addresses or not frappe.get_meta("Address").has_field("custom_latitude"):
+        return {}
+    out = {}
+    for r in frappe.get_all(
+        "Address",
+        filters={"name": ["in", list(addresses)]},
+        fields=["name", "custom_latitude", "custom_longitude"],
+        limit_page_length=0,
+    ):
+        lat, lon = flt(r.custom_latitude), flt(r.custom_longitude)
+        if (lat or lon) and -90 <= lat <= 90 and -180 <= lon <= 180:
+            out[r.name] = geohash_encode(lat, lon)
+    return out
+
+
+# ------------------------ Maintain ------------------------
+
+_ELIGIBLE_SQL = """
+    SELECT
+        l.name, l.transport_job, l.pick_address, l.drop_address,
+        j.company, j.load_type,
+        COALESCE(l.date, l.run_date, j.scheduled_date, j.booking_date, DATE(l.creation)) AS bucket_date
+    FROM `tabTransport Leg` l
+    INNER JOIN `tabTransport Job` j ON j.name = l.transport_job AND j.docstatus = 1
+    INNER JOIN `tabLoad Type` lt ON lt.name = j.load_type AND lt.can_handle_consolidation = 1
+    WHERE {conditions}
+    AND l.docstatus < 2
+    AND IFNULL(l.pick_address, '') != '' AND IFNULL(l.drop_address, '') != ''
+    AND IFNULL(l.run_sheet, '') = ''
+    AND IFNULL(l.transport_consolidation, '') = ''
+    AND IFNULL(l.pick_consolidated, 0) = 0 AND IFNULL(l.drop_consolidated, 0) = 0
+"""
+
+
+def _upsert(rows: Sequence[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    geohashes = _address_geohashes(a for r in rows for a in (r.pick_address, r.drop_address))
+    now, user = now_datetime(), frappe.session.user
+    values, params = [], []
+    for r in rows:
+        values.append("(%s, %s, %s, %s, %s, 0, 0, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+        params.extend([
+            r.name, now, now, user, user,
+            r.name, r.transport_job, r.company, r.load_type, r.bucket_date,
+            r.pick_address, r.drop_address,
+            geohashes.get(r.pick_address, ""), geohashes.get(r.drop_address, ""),
+        ])
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{INDEX_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, docstatus, idx,
+            transport_leg, transport_job, company, load_type, bucket_date,
+            pick_address, drop_address, pick_geohash, drop_geohash)
+        VALUES {", ".join(values)}
+        ON DUPLICATE KEY UPDATE
+            transport_job = VALUES(transport_job),
+            company = VALUES(company),
+            load_type = VALUES(load_type),
+            bucket_date = VALUES(bucket_date),
+            pick_address = VALUES(pick_address),
+            drop_address = VALUES(drop_address),
+            pick_geohash = VALUES(pick_geohash),
+            drop_geohash = VALUES(drop_geohash),
+            modified = VALUES(modified)
+        """,
+        params,
+    )
+
+
+def sync_legs(leg_names: Iterable[str]) -> None:
+    """Add the eligible legs of ``leg_names`` to the index and remove the others."""
+    names = sorted({n for n in leg_names if n})
+    for offset in range(0, len(names), _SYNC_CHUNK):
+        chunk = names[offset : offset + _SYNC_CHUNK]
+        eligible = frappe.db.sql(_ELIGIBLE_SQL.format(conditions="l.name IN %(legs)s"), {"legs": chunk}, as_dict=True)
+        _upsert(eligible)
+        stale = set(chunk) - {r.name for r in eligible}
+        if stale:
+            frappe.db.delete(INDEX_DOCTYPE, {"name": ["in", list(stale)]})
+
+
+def sync_jobs(job_names: Iterable[str]) -> None:
+    jobs = [j for j in set(job_names) if j]
+    if jobs:
+        sync_legs(frappe.get_all("Transport Leg", filters={"transport_job": ["in", jobs]}, pluck="name"))
+
+
+def _safe(fn, *args) -> None:
+    try:
+        fn(*args)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Consolidation candidate sync")
+
+
+def on_leg_change(doc, method=None):
+    """Transport Leg after_insert / on_update / on_submit / on_cancel / on_update_after_submit / on_trash."""
+    if method == "on_trash":
+        frappe.db.delete(INDEX_DOCTYPE, {"name": doc.name})
+        return
+    _safe(sync_legs, [doc.name])
+
+
+def on_job_change(doc, method=None):
+    """Transport Job on_submit / on_cancel: its legs become (in)eligible."""
+    _safe(sync_jobs, [doc.name])
+
+
+def on_run_sheet_change(doc, method=None):
+    """Run Sheet changes assign / release legs."""
+    legs = {row.get("transport_leg") for row in doc.get("legs") or []}
+    before = doc.get_doc_before_save() if method == "on_update" else None
+    if before:
+        legs.update(row.get("transport_leg") for row in before.get("legs") or [])
+    legs.update(frappe.get_all("Transport Leg", filters={"run_sheet": doc.name}, pluck="name"))
+    _safe(sync_legs, legs)
+
+
+def on_consolidation_change(doc, method=None):
+    """Transport Consolidation changes set / clear consolidation flags on its jobs' legs."""
+    jobs = {row.get("transport_job") for row in doc.get("transport_jobs") or []}
+    before = doc.get_doc_before_save() if method == "on_update" else None
+    if before:
+        jobs.update(row.get("transport_job") for row in before.get("transport_jobs") or [])
+    _safe(sync_jobs, jobs)
+
+
+def on_load_type_change(doc, method=None):
+    """Turning can_handle_consolidation on or off re-indexes the legs of that load type."""
+    if doc.has_value_changed("can_handle_consolidation"):
+        frappe.enqueue(
+            "logistics.transport.consolidation_index.rebuild_index",
+            queue="long",
+            load_type=doc.name,
+            enqueue_after_commit=True,
+        )
+
+
+def rebuild_index(load_type: Optional[str] = None) -> int:
+    """Resync every leg (of ``load_type``) that is or may be indexed; returns the indexed count."""
+    started = now_datetime()
+    conditions, params = "1 = 1", {}
+    if load_type:
+        conditions, params = "j.load_type = %(load_type)s", {"load_type": load_type}
+    eligible = frappe.db.sql(_ELIGIBLE_SQL.format(conditions=conditions), params, as_dict=True)
+    for chunk in iter_chunks(eligible, "consolidation_index", item_key=lambda r: r.name):
+        _upsert(chunk)
+    # rows not touched above are no longer eligible
+    stale_filters = {"modified": ["<", started]}
+    if load_type:
+        stale_filters["load_type"] = load_type
+    frappe.db.delete(INDEX_DOCTYPE, stale_filters)
+    frappe.db.commit()
+    return len(eligible)
+
+
+def rebuild_daily():
+    try:
+        rebuild_index()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "Consolidation candidate rebuild")
+
+
+# ------------------------ Read ------------------------
+
+def window(date: Optional[str] = None, days: int = CANDIDATE_WINDOW_DAYS) -> Tuple[Any, Any]:
+    """Date bucket range searched around ``date`` (today when not given)."""
+    center = getdate(date or today())
+    return add_days(center, -days), add_days(center, days)
+
+
+def candidate_legs(
+    company: Optional[str] = None,
+    date: Optional[str] = None,
+    load_type: Optional[str] = None,
+    days: int = CANDIDATE_WINDOW_DAYS,
+) -> List[Dict[str, Any]]:
+    """Indexed candidates in the date window.
+
+    The live leg row is joined so legs changed without hooks are left out.
+    """
+    start, end = window(date, days)
+    conditions = ["c.bucket_date BETWEEN %(start)s AND %(end)s"]
+    params: Dict[str, Any] = {"start": start, "end": end}
+    if company:
+        conditions.append("c.company = %(company)s")
+        params["company"] = company
+    if load_type:
+        conditions.append("c.load_type = %(load_type)s")
+        params["load_type"] = load_type
+    return frappe.db.sql(
+        f"""
+        SELECT c.transport_leg, c.transport_job, c.company, c.load_type, c.bucket_date,
+            c.pick_address, c.drop_address, c.pick_geohash, c.drop_geohash
+        FROM `tab{INDEX_DOCTYPE}` c
+        INNER JOIN `tabTransport Leg` l ON l.name = c.transport_leg
+            AND l.docstatus < 2
+            AND IFNULL(l.run_sheet, '') = ''
+            AND IFNULL(l.transport_consolidation, '') = ''
+            AND IFNULL(l.pick_consolidated, 0) = 0 AND IFNULL(l.drop_consolidated, 0) = 0
+        WHERE {" AND ".join(conditions)}
+        ORDER BY c.bucket_date, c.transport_job, c.transport_leg
+        """,
+        params,
+        as_dict=True,
+    )
+
+
+def candidate_jobs(company: Optional[str] = None, date: Optional[str] = None, load_type: Optional[str] = None) -> List[str]:
+    """Transport Jobs with at least one indexed candidate leg in the window."""
+    return sorted({r.transport_job for r in candidate_legs(company, date, load_type)})
@@ -642,10 +642,16 @@ def check_adhoc_factors(
 
 
 def _is_within_radius(address1: str, address2: str, radius_km: float) -> bool:
-    """Check if address1 is within radius_km of address2"""
-    # TODO: Implement actual distance calculation
-    # For now, return False (conservative approach)
-    return False
+    """Check if address1 is within radius_km (straight line) of address2"""
+    from logistics.transport.distance_matrix import get_addresses_coords
+    from logistics.transport.routing import haversine_km
+
+    coords = get_addresses_coords([address1, address2])
+    a, b = coords.get(address1), coords.get(address2)
+    if not a or not b:
+        # Without coordinates we can't tell; don't block (conservative approach)
+        return False
+    return haversine_km(a[0], a[1], b[0], b[1]) <= float(radius_km or 0)
 
 
 # Helper functions for time calculations
@@ -664,16 +670,21 @@ def calculate_travel_time_minutes(distance_km: float, avg_speed_kmh: float) -> f
 
 def get_distance(from_address: Optional[str], to_address: Optional[str], routing_provider: Optional[str] = None) -> Optional[float]:
     """
-    Get distance between two addresses.
+    Get road distance between two addresses.
     Priority:
-    1. Use routing provider if available
-    2. Use cached distance if available
-    3. Use existing distance_km from leg if available
-    4. Calculate using routing service
+    1. Cached road distance for the routing provider (Route Distance Cache)
+    2. Routing provider call, cached for later checks
+    Returns None when either address is missing or has no coordinates, or no road
+    distance is available, so the caller falls back to the leg's distance_km (a
+    straight-line figure would make travel times optimistic).
     """
-    # TODO: Integrate with existing routing infrastructure
-    # For now, return None to use existing distance_km from leg
-    return None
+    if not from_address or not to_address:
+        return None
+    from logistics.transport.distance_matrix import get_address_distance_km
+    try:
+        return get_address_distance_km(from_address, to_address, routing_provider, straight_line=False)
+    except Exception:
+        return None
 
 
 def calculate_leg_volume(leg: Dict[str, Any]) -> float:
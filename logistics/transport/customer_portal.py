@@ -145,6 +145,19 @@ def get_job_vehicle(job_name: str) -> Optional[Dict[str, Any]]:
 def get_vehicle_position(vehicle_name: str) -> Optional[Dict[str, Any]]:
     """Get current vehicle position"""
     try:
+        latest = frappe.db.get_value(
+            "Telematics Latest Position", vehicle_name,
+            ["lat", "lon", "ts", "speed_kph", "ignition"], as_dict=True
+        )
+        if latest and latest.lat is not None and latest.lon is not None:
+            return {
+                "lat": float(latest.lat),
+                "lng": float(latest.lon),
+                "timestamp": latest.ts,
+                "speed_kph": latest.speed_kph,
+                "ignition": latest.ignition
+            }
+        
         vehicle = frappe.get_doc("Transport Vehicle", vehicle_name)
         
         if vehicle.last_telematics_lat and vehicle.last_telematics_lon:
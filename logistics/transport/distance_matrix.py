@@ -0,0 +1,410 @@
+# logistics/transport/distance_matrix.py
+
+"""
+Distance Matrix
+
+Road distance / duration between coordinates, shared by the planner, constraint
+checks and carbon calculation:
+- Results from OSRM / Mapbox / Google are kept in Route Distance Cache, keyed by
+  provider and coordinates rounded to PRECISION decimals, for routing_cache_ttl_days
+- get_distance_matrix() looks every pair up in one query and fetches only the
+  missing ones with the providers' matrix endpoints (OSRM table, Mapbox
+  directions-matrix, Google distance matrix), in as few requests as their limits allow
+- Haversine results are never cached; they are cheaper to recompute than to read
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import frappe
+from frappe.utils import add_to_date, cint, flt
+
+from logistics.transport.routing import (
+    _get_setting,
+    _route_google,
+    _route_mapbox,
+    _route_osrm,
+    haversine_km,
+    requests,
+)
+
+CACHE_DOCTYPE = "Route Distance Cache"
+PRECISION = 4  # ~11 m; stops that close share a cache row
+_LOOKUP_CHUNK = 500
+_UPSERT_CHUNK = 500
+
+Point = Tuple[float, float]
+Pair = Tuple[Point, Point]
+Measure = Tuple[float, float]  # (distance_km, duration_min)
+MatrixFn = Callable[[List[Point], List[Point]], Tuple[Optional[List[List[Optional[Measure]]]], Optional[str]]]
+
+_SINGLE = {"OSRM": _route_osrm, "MAPBOX": _route_mapbox, "GOOGLE": _route_google}
+
+
+# ------------------------ settings ------------------------
+
+def _provider(provider: Optional[str] = None) -> str:
+    return (provider or _get_setting("routing_provider", "HAVERSINE") or "HAVERSINE").upper()
+
+
+def _timeout() -> float:
+    t = flt(_get_setting("routing_timeout_sec", 10))
+    return t if t > 0 else 10.0
+
+
+def _ttl_days() -> int:
+    return cint(_get_setting("routing_cache_ttl_days", 30))
+
+
+def _default_speed_kmh() -> float:
+    return flt(_get_setting("default_speed_kmh", 40.0)) or 40.0
+
+
+def _round(p: Point) -> Point:
+    return (round(flt(p[0]), PRECISION), round(flt(p[1]), PRECISION))
+
+
+def _key(provider: str, a: Point, b: Point) -> str:
+    raw = "\x1f".join([provider, *(f"{v:.{PRECISION}f}" for v in (*a, *b))])
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def haversine_measure(a: Point, b: Point, speed_kmh: Optional[float] = None) -> Measure:
+    km = haversine_km(a[0], a[1], b[0], b[1])
+    speed = speed_kmh or _default_speed_kmh()
+    return km, (km / speed * 60.0 if speed > 0 else 0.0)
+
+
+# ------------------------ cache ------------------------
+
+def get_cached(pairs: Iterable[Pair], provider: str) -> Dict[Pair, Measure]:
+    """Unexpired cached measures for (origin, destination) pairs (already rounded)."""
+    by_name = {_key(provider, a, b): (a, b) for a, b in pairs}
+    if not by_name or _ttl_days() <= 0:
+        return {}
+    now = frappe.utils.now_datetime()
+    names = list(by_name)
+    out: Dict[Pair, Measure] = {}
+    for i in range(0, len(names), _LOOKUP_CHUNK):
+        for r in frappe.get_all(
+            CACHE_DOCTYPE,
+            filters={"name": ["in", names[i:i + _LOOKUP_CHUNK]], "expires_on": [">", now]},
+            fields=["name", "distance_km", "duration_min"],
+            limit_page_length=0,
+        ):
+            out[by_name[r.name]] = (flt(r.distance_km), flt(r.duration_min))
+    return out
+
+
+def store(measures: Dict[Pair, Measure], provider: str) -> None:
+    """Upsert measured pairs with multi-row INSERT ... ON DUPLICATE KEY UPDATE."""
+    ttl = _ttl_days()
+    if not measures or ttl <= 0:
+        return
+    now = frappe.utils.now_datetime()
+    expires = add_to_date(now, days=ttl)
+    user = frappe.session.user
+    rows = [
+        (_key(provider, a, b), now, now, user, user, 0, 0,
+         provider, a[0], a[1], b[0], b[1], m[0], m[1], now, expires)
+        for (a, b), m in measures.items()
+    ]
+    for i in range(0, len(rows), _UPSERT_CHUNK):
+        chunk = rows[i:i + _UPSERT_CHUNK]
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * 16) + ")"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{CACHE_DOCTYPE}`
+                (name, creation, modified, owner, modified_by, docstatus, idx,
+                 provider, origin_lat, origin_lon, dest_lat, dest_lon,
+                 distance_km, duration_min, fetched_on, expires_on)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                distance_km  = VALUES(distance_km),
+                duration_min = VALUES(duration_min),
+                fetched_on   = VALUES(fetched_on),
+                expires_on   = VALUES(expires_on),
+                modified     = VALUES(modified)
+            """,
+            [v for row in chunk for v in row],
+        )
+
+
+def purge_expired() -> None:
+    """Daily: drop cache rows past their expiry."""
+    frappe.db.delete(CACHE_DOCTYPE, {"expires_on": ["<", frappe.utils.now_datetime()]})
+
+
+@frappe.whitelist()
+def clear_cache(provider: Optional[str] = None):
+    """Forget cached measures (e.g. after switching OSRM profile or server)."""
+    frappe.only_for("System Manager")
+    frappe.db.delete(CACHE_DOCTYPE, {"provider": provider.upper()} if provider else {})
+    return {"cleared": provider or "all"}
+
+
+# ------------------------ provider matrix calls ------------------------
+
+def _matrix_osrm(origins: List[Point], dests: List[Point]):
+    base = (_get_setting("osrm_base_url") or "").strip().rstrip("/")
+    if not base:
+        return None, "OSRM base URL not set"
+    if "map.project-osrm.org" in base:
+        base = "https://router.project-osrm.org"
+    coords = ";".join(f"{p[1]},{p[0]}" for p in origins + dests)  # lon,lat
+    n = len(origins)
+    params = {
+        "sources": ";".join(str(i) for i in range(n)),
+        "destinations": ";".join(str(n + j) for j in range(len(dests))),
+        "annotations": "distance,duration",
+    }
+    try:
+        r = requests.get(f"{base}/table/v1/driving/{coords}", params=params, timeout=_timeout())
+        r.raise_for_status()
+        js = r.json() or {}
+    except Exception as e:
+        return None, f"OSRM table request failed: {e}"
+    if js.get("code") != "Ok":
+        return None, f"OSRM table code={js.get('code')}: {js.get('message') or ''}"
+    return _zip_matrix(js.get("distances"), js.get("durations"), len(origins), len(dests)), None
+
+
+def _matrix_mapbox(origins: List[Point], dests: List[Point]):
+    token = _get_setting("mapbox_access_token")
+    if not token:
+        return None, "Mapbox token not set"
+    profile = (_get_setting("mapbox_profile") or "driving").strip() or "driving"
+    if profile not in ("driving", "driving-traffic", "walking", "cycling"):
+        profile = "driving"
+    coords = ";".join(f"{p[1]},{p[0]}" for p in origins + dests)
+    n = len(origins)
+    params = {
+        "sources": ";".join(str(i) for i in range(n)),
+        "destinations": ";".join(str(n + j) for j in range(len(dests))),
+        "annotations": "distance,duration",
+        "access_token": token,
+    }
+    url = f"https://api.mapbox.com/directions-matrix/v1/mapbox/{profile}/{coords}"
+    try:
+        r = requests.get(url, params=params, timeout=_timeout())
+        js = r.json() if r.content else {}
+    except Exception as e:
+        return None, f"Mapbox matrix request failed: {e}"
+    if (js or {}).get("code") != "Ok":
+        return None, f"Mapbox matrix code={js.get('code')}: {js.get('message') or ''}"
+    return _zip_matrix(js.get("distances"), js.get("durations"), len(origins), len(dests)), None
+
+
+def _matrix_google(origins: List[Point], dests: List[Point]):
+    key = _get_setting("google_api_key")
+    if not key:
+        return None, "Google API key not set"
+    params = {
+        "origins": "|".join(f"{p[0]},{p[1]}" for p in origins),  # lat,lon
+        "destinations": "|".join(f"{p[0]},{p[1]}" for p in dests),
+        "mode": "driving",
+        "units": "metric",
+        "key": key,
+    }
+    try:
+        r = requests.get("https://maps.googleapis.com/maps/api/distancematrix/json", params=params, timeout=_timeout())
+        js = r.json() if r.content else {}
+    except Exception as e:
+        return None, f"Google request failed: {e}"
+    if (js or {}).get("status") != "OK":
+        return None, f"Google status={js.get('status')}: {js.get('error_message') or ''}"
+    out: List[List[Optional[Measure]]] = []
+    for row in (js.get("rows") or [])[:len(origins)]:
+        line: List[Optional[Measure]] = []
+        for el in (row.get("elements") or [])[:len(dests)]:
+            try:
+                line.append((float(el["distance"]["value"]) / 1000.0, float(el["duration"]["value"]) / 60.0)
+                            if el.get("status") == "OK" else None)
+            except Exception:
+                line.append(None)
+        out.append(line)
+    return out, None
+
+
+def _zip_matrix(distances, durations, n: int, m: int) -> List[List[Optional[Measure]]]:
+    """OSRM / Mapbox metres + seconds -> (km, min); unroutable cells come back as None."""
+    out: List[List[Optional[Measure]]] = []
+    for i in range(n):
+        line: List[Optional[Measure]] = []
+        for j in range(m):
+            try:
+                d, t = distances[i][j], durations[i][j]
+            except Exception:
+                d = t = None
+            line.append((float(d) / 1000.0, float(t) / 60.0) if d is not None and t is not None else None)
+        out.append(line)
+    return out
+
+
+def _block_size(provider: str) -> Tuple[int, int]:
+    """Origins x destinations per request, within each provider's documented limits."""
+    if provider == "GOOGLE":
+        return 10, 10  # 25 origins / 25 destinations / 100 elements per request
+    if provider == "MAPBOX":
+        if (_get_setting("mapbox_profile") or "").strip() == "driving-traffic":
+            return 5, 5  # 10 coordinates
+        return 12, 13  # 25 coordinates
+    return 50, 50  # OSRM public server: 100 coordinates per table call
+
+
+_MATRIX: Dict[str, MatrixFn] = {"OSRM": _matrix_osrm, "MAPBOX": _matrix_mapbox, "GOOGLE": _matrix_google}
+
+
+def _fetch_missing(provider: str, missing: List[Pair], debug: Optional[List[str]] = None) -> Dict[Pair, Measure]:
+    """Fetch missing pairs in origin x destination blocks; every returned cell is kept."""
+    fetch = _MATRIX.get(provider)
+    if not fetch or not requests or not missing:
+        return {}
+    origins = list(dict.fromkeys(a for a, _b in missing))
+    dests = list(dict.fromkeys(b for _a, b in missing))
+    wanted = set(missing)
+    bo, bd = _block_size(provider)
+    got: Dict[Pair, Measure] = {}
+    for i in range(0, len(origins), bo):
+        oblock = origins[i:i + bo]
+        for j in range(0, len(dests), bd):
+            dblock = dests[j:j + bd]
+            if not any((a, b) in wanted for a in oblock for b in dblock):
+                continue
+            matrix, err = fetch(oblock, dblock)
+            if err:
+                if debug is not None:
+                    debug.append(f"{provider} matrix failed: {err}")
+                if _get_setting("routing_debug", 0):
+                    frappe.log_error(f"{provider} matrix failed: {err}", "Routing")
+                continue
+            for oi, a in enumerate(oblock):
+                for dj, b in enumerate(dblock):
+                    cell = matrix[oi][dj] if oi < len(matrix) and dj < len(matrix[oi]) else None
+                    if cell is not None and a != b:
+                        got[(a, b)] = cell
+    return got
+
+
+# ------------------------ public API ------------------------
+
+def get_distance_matrix(
+    points: Sequence[Point],
+    provider: Optional[str] = None,
+    fallback: bool = True,
+    debug: Optional[List[str]] = None,
+) -> List[List[Optional[Measure]]]:
+    """
+    N x N (distance_km, duration_min) between ``points`` (lat, lon).
+
+    Cached pairs are read in one query; the rest come from the provider's matrix
+    endpoint and are cached. Pairs the provider can't measure are filled with
+    haversine at the default speed when ``fallback`` is set, else left as None.
+    """
+    provider = _provider(provider)
+    pts = [_round(p) for p in points]
+    uniq = list(dict.fromkeys(pts))
+    measures: Dict[Pair, Measure] = {}
+
+    if provider in _MATRIX:
+        pairs = [(a, b) for a in uniq for b in uniq if a != b]
+        measures = get_cached(pairs, provider)
+        missing = [p for p in pairs if p not in measures]
+        fetched = _fetch_missing(provider, missing, debug)
+        store(fetched, provider)
+        measures.update(fetched)
+        if debug is not None:
+            debug.append(
+                f"Distance matrix {len(uniq)}x{len(uniq)} via {provider}: "
+                f"{len(pairs) - len(missing)} cached, {len(fetched)} fetched"
+            )
+
+    speed = _default_speed_kmh()
+    out: List[List[Optional[Measure]]] = []
+    for a in pts:
+        line: List[Optional[Measure]] = []
+        for b in pts:
+            if a == b:
+                line.append((0.0, 0.0))
+            elif (a, b) in measures:
+                line.append(measures[(a, b)])
+            else:
+                line.append(haversine_measure(a, b, speed) if fallback else None)
+        out.append(line)
+    return out
+
+
+def get_distance_duration(a: Point, b: Point, provider: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Provider distance/duration for one pair, through the cache.
+
+    Returns {"distance_km", "duration_min", "provider", "cached"} or None when the
+    provider is haversine / disabled or the call fails (callers keep their own fallback).
+    """
+    provider = _provider(provider)
+    route = _SINGLE.get(provider)
+    if not route:
+        return None
+    a, b = _round(a), _round(b)
+    if a == b:
+        return {"distance_km": 0.0, "duration_min": 0.0, "provider": provider, "cached": True}
+
+    memo = getattr(frappe.local, "route_distance_memo", None)
+    if memo is None:
+        memo = frappe.local.route_distance_memo = {}
+    hit = memo.get((provider, a, b)) or get_cached([(a, b)], provider).get((a, b))
+    if hit:
+        memo[(provider, a, b)] = hit
+        return {"distance_km": hit[0], "duration_min": hit[1], "provider": provider, "cached": True}
+
+    result, err = route(a, b)
+    if err or not result:
+        return None
+    m = (flt(result.get("distance_km")), flt(result.get("duration_min")))
+    store({(a, b): m}, provider)
+    memo[(provider, a, b)] = m
+    return {"distance_km": m[0], "duration_min": m[1], "provider": provider, "cached": False}
+
+
+def remember(a: Point, b: Point, provider: str, distance_km: float, duration_min: float) -> None:
+    """Cache a measure obtained elsewhere (e.g. a full route call)."""
+    store({(_round(a), _round(b)): (flt(distance_km), flt(duration_min))}, provider.upper())
+
+
+def get_addresses_coords(addresses: Iterable[str]) -> Dict[str, Point]:
+    """Address -> (lat, lon) from custom_latitude / custom_longitude, one query."""
+    names = list({a for a in addresses if a})
+    if not names or not frappe.get_meta("Address").has_field("custom_latitude"):
+        return {}
+    out: Dict[str, Point] = {}
+    for r in frappe.get_all(
+        "Address",
+        filters={"name": ["in", names]},
+        fields=["name", "custom_latitude", "custom_longitude"],
+        limit_page_length=0,
+    ):
+        lat, lon = flt(r.custom_latitude), flt(r.custom_longitude)
+        if (lat or lon) and -90 <= lat <= 90 and -180 <= lon <= 180:
+            out[r.name] = (lat, lon)
+    return out
+
+
+def get_address_distance_km(
+    from_address: str, to_address: str, provider: Optional[str] = None, straight_line: bool = True
+) -> Optional[float]:
+    """
+    Road km between two Addresses (cached provider), else haversine; None without coordinates.
+
+    With ``straight_line=False`` there is no haversine fallback: None unless the provider or
+    the cache has a road distance, for callers that would rather keep their own figure.
+    """
+    coords = get_addresses_coords([from_address, to_address])
+    a, b = coords.get(from_address), coords.get(to_address)
+    if not a or not b:
+        return None
+    r = get_distance_duration(a, b, provider)
+    if r:
+        return r["distance_km"]
+    return haversine_km(a[0], a[1], b[0], b[1]) if straight_line else None
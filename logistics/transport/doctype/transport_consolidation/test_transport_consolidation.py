@@ -1,9 +1,32 @@
 # Copyright (c) 2026, www.agilasoft.com and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from logistics.transport.doctype.transport_consolidation import transport_consolidation
+
 
 class TestTransportConsolidation(FrappeTestCase):
-	pass
+	def test_current_consolidation_jobs_stay_candidates(self):
+		calls = {}
+
+		def get_all(doctype, filters=None, **kwargs):
+			calls[doctype] = filters
+			if doctype == "Transport Leg":
+				return ["JOB-2"]
+			if doctype == "Transport Consolidation Job":
+				return ["JOB-3", None]
+			return []
+
+		with patch.object(transport_consolidation, "candidate_jobs", return_value=["JOB-1"]), patch.object(
+			frappe.db, "has_column", return_value=True
+		), patch.object(frappe.db, "has_table", return_value=True), patch.object(frappe, "get_all", side_effect=get_all):
+			transport_consolidation.get_consolidatable_jobs(company="Co", current_consolidation="TC-1")
+			self.assertEqual(calls["Transport Job"]["name"], ["in", ["JOB-1", "JOB-2", "JOB-3"]])
+			self.assertEqual(calls["Transport Leg"], {"transport_consolidation": "TC-1"})
+
+			transport_consolidation.get_consolidatable_jobs(company="Co")
+			self.assertEqual(calls["Transport Job"]["name"], ["in", ["JOB-1"]])
@@ -125,32 +125,32 @@ function fetch_matching_jobs(frm) {
 		return;
 	}
 	
-	// Automatically find and add matching jobs
-	frappe.call({
-		method: "logistics.transport.doctype.transport_consolidation.transport_consolidation.fetch_matching_jobs",
+	// Automatically find and add matching jobs (background job; large job pools take a while)
+	logistics.background_job.run({
+		method: "logistics.transport.doctype.transport_consolidation.transport_consolidation.start_fetch_matching_jobs",
 		args: {
 			consolidation_name: frm.doc.name
 		},
-		callback: function(r) {
-			if (r.message && r.message.status === "success") {
+		title: __("Fetching matching jobs"),
+		on_done: function(res) {
+			if (res.status === "success") {
 				frappe.show_alert({
-					message: __("Added {0} matching job(s) to consolidation", [r.message.added_count || 0]),
+					message: __("Added {0} matching job(s) to consolidation", [res.added_count || 0]),
 					indicator: "green"
 				});
 				frm.reload_doc();
 			} else {
 				frappe.show_alert({
-					message: __("Error fetching jobs: {0}", [r.message.message || "Unknown error"]),
+					message: __("Error fetching jobs: {0}", [res.message || "Unknown error"]),
 					indicator: "red"
 				});
 			}
-		},
-		error: function(r) {
-			frappe.show_alert({
-				message: __("Error fetching jobs"),
-				indicator: "red"
-			});
 		}
+	}).catch(function() {
+		frappe.show_alert({
+			message: __("Error fetching jobs"),
+			indicator: "red"
+		});
 	});
 }
 
@@ -182,9 +182,10 @@ function fetch_consolidatable_jobs(frm) {
 	});
 }
 
-function fetch_legs_for_jobs(job_names, callback, company, fetch_all) {
+function fetch_legs_for_jobs(job_names, callback, company, fetch_all, date) {
 	// Fetch transport legs for the given job names or all consolidatable legs
-	// If fetch_all is true, fetches ALL consolidatable legs (without run_sheet, with valid Load Type)
+	// If fetch_all is true, fetches the consolidatable legs (without run_sheet, with valid Load Type)
+	// dated within a week of date (the consolidation date)
 	// If fetch_all is false or undefined, fetches legs for the given job names
 	
 	// If fetch_all is true, we don't need job_names
@@ -193,7 +194,8 @@ function fetch_legs_for_jobs(job_names, callback, company, fetch_all) {
 			method: "logistics.transport.doctype.transport_consolidation.transport_consolidation.get_consolidatable_legs",
 			args: {
 				fetch_all: true,
-				company: company || null
+				company: company || null,
+				date: date || null
 			},
 			callback: function(r) {
 				if (r.message && r.message.status === "success") {
@@ -937,7 +939,7 @@ function show_jobs_dialog(frm, jobs, consolidation_groups, debug_info) {
 					
 					// Now apply filters to legs
 					apply_legs_filters();
-				}, frm.doc.company || null, true);
+				}, frm.doc.company || null, true, frm.doc.consolidation_date || null);
 			} else {
 				// Legs already fetched, just apply filters
 				apply_legs_filters();
@@ -1260,7 +1262,7 @@ function show_jobs_dialog(frm, jobs, consolidation_groups, debug_info) {
 							dialog.fields_dict.jobs_table.$wrapper.html(table_html);
 						}
 						update_select_all_state();
-					}, frm.doc.company || null, true);
+					}, frm.doc.company || null, true, frm.doc.consolidation_date || null);
 				} else {
 					// Legs already fetched, update filters and show all legs
 					update_filters_for_view("legs");
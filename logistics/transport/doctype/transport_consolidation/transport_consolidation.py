@@ -6,6 +6,9 @@ from frappe.model.document import Document
 from frappe import _
 from frappe.utils import flt
 
+from logistics.transport.consolidation_index import candidate_jobs, candidate_legs
+from logistics.utils.background_jobs import enqueue_operation, report_progress
+
 
 class TransportConsolidation(Document):
 	@frappe.whitelist()
@@ -885,6 +888,19 @@ def create_run_sheet_from_consolidation(consolidation_name: str):
 		}
 
 
+@frappe.whitelist()
+def start_fetch_matching_jobs(consolidation_name: str):
+	"""Queue ``fetch_matching_jobs`` as a Logistics Background Job (one per consolidation at a time)."""
+	frappe.has_permission("Transport Consolidation", "write", consolidation_name, throw=True)
+	return enqueue_operation(
+		"logistics.transport.doctype.transport_consolidation.transport_consolidation.fetch_matching_jobs",
+		"Transport Consolidation",
+		consolidation_name,
+		title=_("Fetch matching jobs for {0}").format(consolidation_name),
+		consolidation_name=consolidation_name,
+	)
+
+
 @frappe.whitelist()
 def fetch_matching_jobs(consolidation_name: str):
 	"""
@@ -955,10 +971,18 @@ def fetch_matching_jobs(consolidation_name: str):
 		if reference_job and reference_job.transport_job_type:
 			filters["transport_job_type"] = reference_job.transport_job_type
 		
-		# Exclude jobs already in this consolidation
-		existing_job_names = [row.transport_job for row in consolidation.transport_jobs if row.transport_job]
-		if existing_job_names:
-			filters["name"] = ["not in", existing_job_names]
+		# Only jobs with a consolidation candidate leg near the reference date,
+		# excluding jobs already in this consolidation
+		existing_job_names = {row.transport_job for row in consolidation.transport_jobs if row.transport_job}
+		candidate_date = None
+		if reference_job:
+			candidate_date = reference_job.scheduled_date or reference_job.booking_date
+		candidate_date = candidate_date or consolidation.consolidation_date
+		candidates = [
+			job for job in candidate_jobs(consolidation.company, candidate_date, consolidation.load_type)
+			if job not in existing_job_names
+		]
+		filters["name"] = ["in", candidates or [""]]
 		
 		# Get matching jobs
 		matching_jobs = frappe.get_all(
@@ -1006,7 +1030,8 @@ def fetch_matching_jobs(consolidation_name: str):
 			reference_contains_dg = reference_job.contains_dangerous_goods
 			reference_refrigeration = reference_job.refrigeration
 		
-		for job_data in matching_jobs:
+		for pos, job_data in enumerate(matching_jobs):
+			report_progress(pos, len(matching_jobs), _("Checking Transport Jobs"))
 			# Check max jobs limit
 			if current_job_count + len(valid_jobs) >= max_jobs:
 				break
@@ -1208,7 +1233,7 @@ def get_consolidatable_jobs(consolidation_type: str = None, company: str = None,
 	Args:
 		consolidation_type: Filter by consolidation type (Pick, Drop, Both, Route)
 		company: Filter by company
-		date: Filter by date (not currently implemented)
+		date: Centre of the date window (CANDIDATE_WINDOW_DAYS either side; today if not given)
 		current_consolidation: Name of current consolidation (to allow jobs from this consolidation)
 	
 	Returns empty list if no jobs match all criteria.
@@ -1220,11 +1245,32 @@ def get_consolidatable_jobs(consolidation_type: str = None, company: str = None,
 		if company:
 			filters["company"] = company
 		
+		# Only jobs with a consolidation candidate leg within the date window
+		# (consolidation_index keeps them; avoids scanning every job ever created)
+		candidates = set(candidate_jobs(company, date))
+		if current_consolidation:
+			# The index drops legs once they are consolidated, so add back the
+			# jobs already in the current consolidation
+			if frappe.db.has_column("Transport Leg", "transport_consolidation"):
+				candidates.update(frappe.get_all(
+					"Transport Leg",
+					filters={"transport_consolidation": current_consolidation},
+					pluck="transport_job"
+				))
+			if frappe.db.has_table("Transport Consolidation Job"):
+				candidates.update(frappe.get_all(
+					"Transport Consolidation Job",
+					filters={"parent": current_consolidation},
+					pluck="transport_job"
+				))
+			candidates.discard(None)
+		filters["name"] = ["in", sorted(candidates) or [""]]
+		
 		# Note: We don't filter by consolidate in the initial query
 		# Instead, we check it in the loop so we can track it in debug info
 		# and handle cases where the field might not exist
 		
-		# Get all submitted Transport Jobs
+		# Get submitted Transport Jobs
 		# Include group_legs_in_one_runsheet field for filtering
 		job_fields = ["name", "customer", "company", "status", "load_type", "vehicle_type", "scheduled_date"]
 		if frappe.db.has_column("Transport Job", "group_legs_in_one_runsheet"):
@@ -1638,12 +1684,6 @@ def get_consolidatable_jobs(consolidation_type: str = None, company: str = None,
 			# Update job's consolidation_type (will be set to blank if no filter and no consolidation potential)
 			job["consolidation_type"] = dynamic_type
 		
-		# Filter by date if provided
-		if date:
-			# This would require checking job dates, which may not be available in Transport Job
-			# For now, we'll skip date filtering or implement it based on available date fields
-			pass
-		
 		# Filter by consolidation_type (type_filter) if provided
 		# Apply enhanced filtering logic based on type_filter requirements
 		if consolidation_type:
@@ -1978,11 +2018,13 @@ def get_consolidatable_jobs(consolidation_type: str = None, company: str = None,
 
 
 @frappe.whitelist()
-def get_consolidatable_legs(job_names: list = None, company: str = None, fetch_all: bool = False):
+def get_consolidatable_legs(job_names: list = None, company: str = None, fetch_all: bool = False, date: str = None):
 	"""
 	Get transport legs for consolidation.
 	
-	If fetch_all=True, fetches ALL transport legs that are applicable for consolidation:
+	If fetch_all=True, fetches the transport legs applicable for consolidation whose date
+	falls within CANDIDATE_WINDOW_DAYS of ``date`` (today if not given), from the
+	consolidation candidate index:
 	- Legs without run_sheet
 	- Legs with Load Type that has can_handle_consolidation = 1
 	- Legs with pick_address and drop_address
@@ -1994,6 +2036,7 @@ def get_consolidatable_legs(job_names: list = None, company: str = None, fetch_a
 		job_names: List of Transport Job names (can be a list or JSON string). Ignored if fetch_all=True.
 		company: Filter by company (optional)
 		fetch_all: If True, fetch all consolidatable legs. If False, fetch legs for given job_names.
+		date: Centre of the date window when fetch_all=True
 		
 	Returns:
 		Dictionary with status and legs list
@@ -2017,39 +2060,17 @@ def get_consolidatable_legs(job_names: list = None, company: str = None, fetch_a
 			leg_fields.append("run_sheet")
 		
 		if fetch_all:
-			# Fetch ALL consolidatable legs
-			# Build filters for legs
-			leg_filters = {
-				"docstatus": ["<", 2],  # Not cancelled
-				"pick_address": ["!=", ""],  # Must have pick address
-				"drop_address": ["!=", ""]  # Must have drop address
-			}
-			
-			# Filter out legs with run_sheet
-			if frappe.db.has_column("Transport Leg", "run_sheet"):
-				leg_filters["run_sheet"] = ["in", ["", None]]
-			
-			# Filter by company if provided (via transport_job)
-			if company:
-				# Get all job names for this company
-				company_jobs = frappe.get_all(
-					"Transport Job",
-					filters={"company": company, "docstatus": 1},
-					pluck="name"
-				)
-				if company_jobs:
-					leg_filters["transport_job"] = ["in", company_jobs]
-				else:
-					# No jobs for this company, return empty
-					return {
-						"status": "success",
-						"legs": []
-					}
+			# Candidate legs in the date window from the consolidation candidate index
+			candidate_leg_names = [row.transport_leg for row in candidate_legs(company, date)]
+			if not candidate_leg_names:
+				return {
+					"status": "success",
+					"legs": []
+				}
 			
-			# Fetch all legs matching filters
 			legs = frappe.get_all(
 				"Transport Leg",
-				filters=leg_filters,
+				filters={"name": ["in", candidate_leg_names]},
 				fields=leg_fields,
 				order_by="transport_job, order asc"
 			)
@@ -100,9 +100,9 @@ class TransportJob(Document):
             return
         if getattr(self.flags, "ignore_charges_sync", False):
             return
-        for charge in self.get("charges") or []:
-            if hasattr(charge, "calculate_charge_amount"):
-                charge.calculate_charge_amount(parent_doc=self)
+        from logistics.utils.charges_calculation import sync_charges_with_parent
+
+        sync_charges_with_parent(self)
 
     def before_save(self):
         """Calculate sustainability metrics and create job costing number before saving"""
@@ -882,16 +882,19 @@ class TransportJob(Document):
     def get_dashboard_html(self):
         """Generate HTML for Dashboard tab: tabbed layout with map, milestones, alerts."""
         try:
+            from logistics.document_management.dashboard_cache import cached_dashboard_html
             from logistics.document_management.logistics_form_dashboard import (
                 build_transport_job_dashboard_config,
                 render_logistics_form_dashboard_html,
             )
             from logistics.utils.sales_quote_validity import get_sales_quote_validity_dashboard_html
 
-            dash = render_logistics_form_dashboard_html(
-                self, build_transport_job_dashboard_config(self)
+            return cached_dashboard_html(
+                self,
+                "dashboard",
+                lambda: get_sales_quote_validity_dashboard_html(self)
+                + render_logistics_form_dashboard_html(self, build_transport_job_dashboard_config(self)),
             )
-            return get_sales_quote_validity_dashboard_html(self) + dash
         except Exception as e:
             frappe.log_error(f"Transport Job get_dashboard_html: {str(e)}", "Transport Job Dashboard")
             return "<div class='alert alert-warning'>Error loading dashboard.</div>"
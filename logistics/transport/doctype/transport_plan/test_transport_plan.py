@@ -0,0 +1,54 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.transport.doctype.transport_plan import transport_plan
+
+
+class UnitTestTransportPlanAvailability(UnitTestCase):
+	def setUp(self):
+		meta = patch.multiple(transport_plan, _doctype_exists=lambda dt: True, _has_field=lambda dt, f: True)
+		meta.start()
+		self.addCleanup(meta.stop)
+
+	def _index(self):
+		vehicles = [
+			frappe._dict(vehicle="VH-1", run_date="2026-10-14 08:00:00", estimated_return_datetime="2026-10-16 12:00:00"),
+			frappe._dict(vehicle="VH-2", run_date="2026-10-15 08:00:00", estimated_return_datetime=None),
+		]
+		drivers = [frappe._dict(driver="DRV-1", run_date="2026-10-16 07:00:00")]
+		with patch.object(frappe, "get_all", side_effect=[vehicles, drivers]) as get_all:
+			index = transport_plan._AvailabilityIndex("2026-10-15", "2026-10-17")
+		self.assertEqual(get_all.call_count, 2)
+		return index
+
+	def test_vehicle_busy_until_estimated_return(self):
+		index = self._index()
+		self.assertFalse(index.vehicle_free("VH-1", "2026-10-16"))
+		self.assertTrue(index.vehicle_free("VH-1", "2026-10-17"))
+		# no return time: busy until the end of its run day
+		self.assertFalse(index.vehicle_free("VH-2", "2026-10-15"))
+		self.assertTrue(index.vehicle_free("VH-2", "2026-10-16"))
+		self.assertTrue(index.vehicle_free("VH-3", "2026-10-15"))
+
+	def test_run_sheets_created_during_the_run_are_seen(self):
+		index = self._index()
+		self.assertTrue(index.driver_free("DRV-2", "2026-10-17"))
+		index.mark(frappe._dict(run_date="2026-10-17 06:00:00", vehicle="VH-3", driver="DRV-2"))
+		self.assertFalse(index.driver_free("DRV-2", "2026-10-17"))
+		self.assertFalse(index.vehicle_free("VH-3", "2026-10-17"))
+		self.assertFalse(index.driver_free("DRV-1", "2026-10-16"))
+
+	def test_free_checks_answer_from_the_run_index(self):
+		index = self._index()
+		with patch.object(frappe.local, "transport_plan_availability", index, create=True), patch.object(
+			frappe, "get_all"
+		) as get_all:
+			self.assertFalse(transport_plan._vehicle_free_on_date("VH-1", "2026-10-16"))
+			self.assertFalse(transport_plan._driver_free_on_date("DRV-1", "2026-10-16"))
+			self.assertTrue(transport_plan._driver_free_on_date("DRV-1", "2026-10-17"))
+		get_all.assert_not_called()
@@ -11,6 +11,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import add_days, getdate, nowdate, cint, cstr, flt, get_datetime, get_time
 
+from logistics.utils.background_jobs import enqueue_operation, report_progress
+
 
 # ------------------------ Job-level grouping helpers ------------------------
 
@@ -206,6 +208,27 @@ def auto_allocate_and_create(plan_name: str, consolidate_legs: bool = False) ->
     and append legs (we link only the Transport Leg, then prefill child fields
     from the leg so validations don't complain about facility types).
     """
+    try:
+        return _auto_allocate_and_create(plan_name, consolidate_legs)
+    finally:
+        frappe.local.transport_plan_availability = None
+
+
+@frappe.whitelist()
+def start_auto_allocate_and_create(plan_name: str, consolidate_legs: bool = False) -> Dict[str, Any]:
+    """Queue ``auto_allocate_and_create`` as a Logistics Background Job (one per plan at a time)."""
+    frappe.has_permission("Transport Plan", "write", plan_name, throw=True)
+    return enqueue_operation(
+        "logistics.transport.doctype.transport_plan.transport_plan.auto_allocate_and_create",
+        "Transport Plan",
+        plan_name,
+        title=_("Create Run Sheets for {0}").format(plan_name),
+        plan_name=plan_name,
+        consolidate_legs=cint(consolidate_legs),
+    )
+
+
+def _auto_allocate_and_create(plan_name: str, consolidate_legs: bool = False) -> Dict[str, Any]:
     _ensure_controller_class()
 
     result: Dict[str, Any] = {
@@ -252,14 +275,20 @@ def auto_allocate_and_create(plan_name: str, consolidate_legs: bool = False) ->
         })
         return _finalize_and_msgprint(plan_name, result)
 
+    # Run Sheet occupancy for the whole window, loaded once for every vehicle/driver check below
+    frappe.local.transport_plan_availability = _AvailabilityIndex(*_date_window_for_plan(plan))
+
     # Step 1: Initialize mapping to track vehicle usage per Run Sheet: {vehicle_name: runsheet_name}
     vehicle_to_runsheet: Dict[str, str] = {}
 
     def _date_key(leg: Dict[str, Any]) -> str:
         return _get_leg_date_value(leg) or ""
 
-    for _, group in itertools.groupby(sorted(legs, key=_date_key), key=_date_key):
+    legs_done = 0
+    for day, group in itertools.groupby(sorted(legs, key=_date_key), key=_date_key):
         day_legs = list(group)
+        report_progress(legs_done, len(legs), _("Allocating legs of {0}").format(day or "—"))
+        legs_done += len(day_legs)
         day_legs.sort(key=lambda l: cstr(l.get("name") or ""))
 
         # Group legs by Run Sheet (vehicle + driver + date combination)
@@ -300,7 +329,7 @@ def auto_allocate_and_create(plan_name: str, consolidate_legs: bool = False) ->
         if legs_without_job:
             if consolidate_legs:
                 # Consolidate legs into optimized trips
-                consolidated_trips = _consolidate_legs(legs_without_job, result["debug"])
+                consolidated_trips = _consolidate_legs(legs_without_job, result["debug"], company=plan.company)
                 result["consolidated_trips"] = len(consolidated_trips)
                 result["total_legs"] = len(legs_without_job)
                 
@@ -509,6 +538,10 @@ def _get_transport_legs(plan: Document, debug: Optional[List[str]] = None) -> Tu
         "facility_type_from", "facility_from",
         "facility_type_to", "facility_to",
         "run_date", "transport_job",
+        "pick_address", "drop_address",
+        "pick_window_start", "pick_window_end",
+        "drop_window_start", "drop_window_end",
+        "cargo_weight_kg", "distance_km", "duration_min",
     ]:
         if _has_field("Transport Leg", f):
             opt_fields.append(f)
@@ -608,6 +641,10 @@ def _get_consolidation_legs(start: str, end: str, leg_date_field: str, debug: Op
                 "facility_type_from", "facility_from",
                 "facility_type_to", "facility_to",
                 "run_date", "transport_job",
+                "pick_address", "drop_address",
+                "pick_window_start", "pick_window_end",
+                "drop_window_start", "drop_window_end",
+                "cargo_weight_kg", "distance_km", "duration_min",
             ]:
                 if _has_field("Transport Leg", f):
                     opt_fields.append(f)
@@ -646,7 +683,7 @@ def _get_leg_date_value(leg: Dict[str, Any]) -> Optional[str]:
 
 # ------------------------ Consolidation & Optimization ------------------------
 
-def _consolidate_legs(day_legs: List[Dict[str, Any]], debug: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+def _consolidate_legs(day_legs: List[Dict[str, Any]], debug: Optional[List[str]] = None, company: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Consolidate legs into optimized trips based on Transport Consolidations, Load Type consolidation rules, and route optimization.
     """
@@ -730,11 +767,8 @@ def _consolidate_legs(day_legs: List[Dict[str, Any]], debug: Optional[List[str]]
         for vehicle_type, legs in legs_by_vehicle_type.items():
             debug.append(f"Processing {len(legs)} legs for vehicle type: {vehicle_type}")
             
-            # Sort legs by priority and time windows
-            sorted_legs = _sort_legs_for_optimization(legs)
-            
-            # Create trips based on capacity and route optimization
-            vehicle_trips = _create_optimized_trips(sorted_legs, vehicle_type, debug)
+            # Pack legs into trips by vehicle capacity, time windows and proximity
+            vehicle_trips = _create_optimized_trips(legs, vehicle_type, debug, company=company)
             trips.extend(vehicle_trips)
     
     debug.append(f"Created {len(trips)} total trips from {len(day_legs)} legs")
@@ -748,11 +782,19 @@ def _create_load_type_consolidations(day_legs: List[Dict[str, Any]], debug: Opti
     debug = debug or []
     consolidation_trips = []
     
-    # Group legs by load type
+    # Group legs by load type (one lookup for all jobs of the day)
+    jobs = list({leg["transport_job"] for leg in day_legs if leg.get("transport_job")})
+    job_load_types = dict(frappe.get_all(
+        "Transport Job",
+        filters={"name": ["in", jobs]},
+        fields=["name", "load_type"],
+        as_list=True,
+        limit_page_length=0,
+    )) if jobs else {}
     legs_by_load_type = {}
     for leg in day_legs:
         # Get load type from transport job
-        load_type = _get_leg_load_type(leg)
+        load_type = job_load_types.get(leg.get("transport_job"))
         if load_type:
             if load_type not in legs_by_load_type:
                 legs_by_load_type[load_type] = []
@@ -792,21 +834,6 @@ def _create_load_type_consolidations(day_legs: List[Dict[str, Any]], debug: Opti
     return consolidation_trips
 
 
-def _get_leg_load_type(leg: Dict[str, Any]) -> Optional[str]:
-    """
-    Get the load type for a transport leg by looking up the transport job.
-    """
-    transport_job = leg.get("transport_job")
-    if not transport_job:
-        return None
-    
-    try:
-        load_type = frappe.db.get_value("Transport Job", transport_job, "load_type")
-        return load_type
-    except Exception:
-        return None
-
-
 def _create_transport_consolidation(load_type: str, legs: List[Dict[str, Any]], debug: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
     """
     Create a Transport Consolidation for the given legs.
@@ -855,117 +882,15 @@ def _create_transport_consolidation(load_type: str, legs: List[Dict[str, Any]],
         return None
 
 
-def _sort_legs_for_optimization(legs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _create_optimized_trips(legs: List[Dict[str, Any]], vehicle_type: str, debug: Optional[List[str]] = None, company: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Sort legs for optimization considering priority, time windows, and geographic proximity.
+    Create optimized trips by packing legs into the real capacities of this vehicle type
+    owned by the plan's company (see logistics.transport.trip_builder).
     """
-    def sort_key(leg):
-        # Priority: dangerous goods first, then by order, then by time
-        priority = 0
-        if leg.get("contains_dangerous_goods"):
-            priority += 1000
-        
-        order = cint(leg.get("order") or 0)
-        time_factor = 0
-        
-        # Consider time windows if available
-        for time_field in ["pick_window_start", "drop_window_start", "run_date"]:
-            if leg.get(time_field):
-                try:
-                    time_factor = cint(str(leg[time_field]).replace(":", "").replace("-", "").replace(" ", ""))
-                except (ValueError, TypeError, AttributeError):
-                    time_factor = 0
-                break
-        
-        return (priority, order, time_factor)
-    
-    return sorted(legs, key=sort_key)
+    from logistics.transport.trip_builder import build_trips
 
-
-def _create_optimized_trips(legs: List[Dict[str, Any]], vehicle_type: str, debug: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-    """
-    Create optimized trips by grouping legs that can be served by the same vehicle.
-    """
-    debug = debug or []
-    trips = []
-    remaining_legs = legs.copy()
-    
-    while remaining_legs:
-        # Start a new trip with the first leg
-        current_trip = [remaining_legs.pop(0)]
-        trip_capacity = _calculate_trip_capacity(current_trip)
-        
-        # Try to add more legs to this trip
-        legs_to_remove = []
-        for leg in remaining_legs:
-            if _can_add_leg_to_trip(current_trip, leg, trip_capacity):
-                current_trip.append(leg)
-                legs_to_remove.append(leg)
-                trip_capacity = _calculate_trip_capacity(current_trip)
-        
-        # Remove added legs from remaining
-        for leg in legs_to_remove:
-            remaining_legs.remove(leg)
-        
-        # Create trip object
-        trip = {
-            "legs": current_trip,
-            "vehicle_type": vehicle_type,
-            "total_weight": sum(flt(leg.get("weight") or 0) for leg in current_trip),
-            "total_volume": sum(flt(leg.get("volume") or 0) for leg in current_trip),
-            "total_pallets": sum(flt(leg.get("pallets") or 0) for leg in current_trip),
-            "contains_dangerous_goods": any(leg.get("contains_dangerous_goods") for leg in current_trip),
-            "leg_count": len(current_trip)
-        }
-        
-        trips.append(trip)
-        debug.append(f"Created trip with {len(current_trip)} legs for vehicle type {vehicle_type}")
-    
-    return trips
-
-
-def _can_add_leg_to_trip(trip_legs: List[Dict[str, Any]], new_leg: Dict[str, Any], current_capacity: Dict[str, float]) -> bool:
-    """
-    Check if a leg can be added to an existing trip based on capacity and compatibility.
-    """
-    # Check vehicle type compatibility
-    if new_leg.get("vehicle_type") != trip_legs[0].get("vehicle_type"):
-        return False
-    
-    # Check dangerous goods compatibility
-    if new_leg.get("contains_dangerous_goods") and not all(leg.get("contains_dangerous_goods") for leg in trip_legs):
-        return False
-    
-    # Check capacity constraints
-    new_weight = flt(new_leg.get("weight") or 0)
-    new_volume = flt(new_leg.get("volume") or 0)
-    new_pallets = flt(new_leg.get("pallets") or 0)
-    
-    # Get vehicle capacity (we'll need to find a vehicle to check this)
-    # For now, use reasonable defaults
-    max_weight = 10000  # kg
-    max_volume = 100    # m³
-    max_pallets = 50
-    
-    if current_capacity["weight"] + new_weight > max_weight:
-        return False
-    if current_capacity["volume"] + new_volume > max_volume:
-        return False
-    if current_capacity["pallets"] + new_pallets > max_pallets:
-        return False
-    
-    return True
-
-
-def _calculate_trip_capacity(trip_legs: List[Dict[str, Any]]) -> Dict[str, float]:
-    """
-    Calculate total capacity requirements for a trip.
-    """
-    return {
-        "weight": sum(flt(leg.get("weight") or 0) for leg in trip_legs),
-        "volume": sum(flt(leg.get("volume") or 0) for leg in trip_legs),
-        "pallets": sum(flt(leg.get("pallets") or 0) for leg in trip_legs)
-    }
+    debug = debug if debug is not None else []
+    return build_trips(legs, vehicle_type, company=company, debug=debug)
 
 
 def _find_vehicle_for_trip(trip_legs: List[Dict[str, Any]], debug: Optional[List[str]] = None, vehicle_to_runsheet: Optional[Dict[str, str]] = None, target_runsheet: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -1006,7 +931,7 @@ def _find_vehicle_for_trip(trip_legs: List[Dict[str, Any]], debug: Optional[List
         if _has_field("Transport Vehicle", vf):
             v_fields.append(vf)
 
-    vehicles = frappe.get_all(
+    vehicles = _plan_get_all(
         "Transport Vehicle",
         filters=v_filters,
         fields=v_fields,
@@ -1082,7 +1007,7 @@ def _find_candidate_vehicle(leg: Dict[str, Any], debug: Optional[List[str]] = No
         if _has_field("Transport Vehicle", vf):
             v_fields.append(vf)
 
-    vehicles = frappe.get_all(
+    vehicles = _plan_get_all(
         "Transport Vehicle",
         filters=v_filters,
         fields=v_fields,
@@ -1188,7 +1113,7 @@ def _find_candidate_driver(leg: Dict[str, Any], vehicle: Dict[str, Any], debug:
     if _has_field("Driver", "full_name"):
         d_fields.append("full_name")
 
-    drivers = frappe.get_all(
+    drivers = _plan_get_all(
         "Driver",
         filters=filters,
         fields=d_fields,
@@ -1209,6 +1134,101 @@ def _find_candidate_driver(leg: Dict[str, Any], vehicle: Dict[str, Any], debug:
     return None
 
 
+_ACTIVE_RUN_SHEET_STATUSES = ["Draft", "Dispatched", "In-Progress", "Submitted"]
+
+
+class _AvailabilityIndex:
+    """
+    Vehicle / driver Run Sheet occupancy for one allocation run.
+
+    Active Run Sheets are read once when allocation starts; "free on day X"
+    is then answered from memory, and Run Sheets created during the run are
+    added with mark(). Same rules as the per-call queries it replaces.
+    """
+
+    def __init__(self, start: str, end: str):
+        self.enabled = _doctype_exists("Run Sheet") and _has_field("Run Sheet", "run_date")
+        self.has_estimated_return = _has_field("Run Sheet", "estimated_return_datetime")
+        self.vehicle_busy_until: Dict[str, datetime] = {}
+        self.vehicle_days: Dict[str, set] = {}
+        self.driver_days: Dict[str, set] = {}
+        self.memo: Dict[str, Any] = {}
+        if self.enabled:
+            self._load(start, end)
+
+    def _load(self, start: str, end: str) -> None:
+        if _has_field("Run Sheet", "vehicle"):
+            filters: List[Any] = [["vehicle", "is", "set"], ["docstatus", "<", 2]]
+            if _has_field("Run Sheet", "status"):
+                filters.append(["status", "in", _ACTIVE_RUN_SHEET_STATUSES])
+            fields = ["vehicle", "run_date"]
+            if self.has_estimated_return:
+                fields.append("estimated_return_datetime")
+            else:
+                # only same-day sheets matter without a return time
+                filters += [["run_date", ">=", f"{start} 00:00:00"], ["run_date", "<=", f"{end} 23:59:59"]]
+            for r in frappe.get_all("Run Sheet", filters=filters, fields=fields, limit_page_length=0):
+                self._add_vehicle(r.vehicle, r.run_date, r.get("estimated_return_datetime"))
+
+        if _has_field("Run Sheet", "driver"):
+            for r in frappe.get_all(
+                "Run Sheet",
+                filters=[
+                    ["driver", "is", "set"],
+                    ["run_date", ">=", f"{start} 00:00:00"],
+                    ["run_date", "<=", f"{end} 23:59:59"],
+                    ["docstatus", "<", 2],
+                ],
+                fields=["driver", "run_date"],
+                limit_page_length=0,
+            ):
+                self.driver_days.setdefault(r.driver, set()).add(cstr(r.run_date)[:10])
+
+    def _add_vehicle(self, vehicle: str, run_date: Any, estimated_return: Any = None) -> None:
+        if not vehicle or not run_date:
+            return
+        day = cstr(run_date)[:10]
+        self.vehicle_days.setdefault(vehicle, set()).add(day)
+        # a sheet without a return time occupies the vehicle until the end of its run day
+        until = get_datetime(estimated_return) if estimated_return else get_datetime(f"{day} 23:59:59")
+        if vehicle not in self.vehicle_busy_until or until > self.vehicle_busy_until[vehicle]:
+            self.vehicle_busy_until[vehicle] = until
+
+    def vehicle_free(self, vehicle: str, day: str) -> bool:
+        if self.has_estimated_return:
+            until = self.vehicle_busy_until.get(vehicle)
+            return until is None or until < get_datetime(f"{day} 00:00:00")
+        return day not in self.vehicle_days.get(vehicle, ())
+
+    def driver_free(self, driver: str, day: str) -> bool:
+        return day not in self.driver_days.get(driver, ())
+
+    def mark(self, rs: Document) -> None:
+        """Record a Run Sheet created during this run."""
+        run_date = rs.get("run_date")
+        if not run_date:
+            return
+        if rs.get("vehicle"):
+            self._add_vehicle(rs.vehicle, run_date, rs.get("estimated_return_datetime"))
+        if rs.get("driver"):
+            self.driver_days.setdefault(rs.driver, set()).add(cstr(run_date)[:10])
+
+
+def _availability() -> Optional[_AvailabilityIndex]:
+    return getattr(frappe.local, "transport_plan_availability", None)
+
+
+def _plan_get_all(doctype: str, **kwargs) -> List[Dict[str, Any]]:
+    """frappe.get_all memoised for the allocation run (candidate vehicle / driver lists)."""
+    index = _availability()
+    if index is None:
+        return frappe.get_all(doctype, **kwargs)
+    key = frappe.as_json([doctype, kwargs])
+    if key not in index.memo:
+        index.memo[key] = frappe.get_all(doctype, **kwargs)
+    return index.memo[key]
+
+
 def _vehicle_free_on_date(vehicle_name: str, day: Optional[str]) -> bool:
     """
     Check if vehicle is free on the given date.
@@ -1228,6 +1248,10 @@ def _vehicle_free_on_date(vehicle_name: str, day: Optional[str]) -> bool:
     if not day:
         return True
 
+    index = _availability()
+    if index is not None and index.enabled:
+        return index.vehicle_free(vehicle_name, cstr(day)[:10])
+
     # Get the start of the requested day as datetime
     requested_datetime = f"{day} 00:00:00"
     
@@ -1306,6 +1330,10 @@ def _driver_free_on_date(driver_name: str, day: Optional[str]) -> bool:
     if not day:
         return True
 
+    index = _availability()
+    if index is not None and index.enabled:
+        return index.driver_free(driver_name, cstr(day)[:10])
+
     start = f"{day} 00:00:00"
     end = f"{day} 23:59:59"
     rows = frappe.get_all(
@@ -1438,6 +1466,9 @@ def _create_or_reuse_run_sheet(leg: Dict[str, Any], vehicle: Optional[Dict[str,
     try:
         rs.insert(ignore_permissions=True)
         debug.append(f"Created Run Sheet: {rs.name}")
+        index = _availability()
+        if index is not None:
+            index.mark(rs)
         # Track vehicle when creating new Run Sheet
         if vehicle and vehicle.get("name"):
             vehicle_to_runsheet[vehicle["name"]] = rs.name
@@ -1704,20 +1735,36 @@ def _finalize_and_msgprint(plan_name: str, result: Dict[str, Any]) -> Dict[str,
 
 # ------------------------ Helpers ------------------------
 
+def _meta_memo() -> Dict[Tuple[str, str], bool]:
+    """Per-request memo for the meta checks below (they run inside every allocation loop)."""
+    memo = getattr(frappe.local, "transport_plan_meta_memo", None)
+    if memo is None:
+        memo = frappe.local.transport_plan_meta_memo = {}
+    return memo
+
+
 def _doctype_exists(doctype: str) -> bool:
-    try:
-        frappe.get_meta(doctype)
-        return True
-    except Exception:
-        return False
+    memo = _meta_memo()
+    key = (doctype, "")
+    if key not in memo:
+        try:
+            frappe.get_meta(doctype)
+            memo[key] = True
+        except Exception:
+            memo[key] = False
+    return memo[key]
 
 
 def _has_field(doctype: str, fieldname: str) -> bool:
-    try:
-        meta = frappe.get_meta(doctype)
-        return bool(meta.get_field(fieldname))
-    except Exception:
-        return False
+    memo = _meta_memo()
+    key = (doctype, fieldname)
+    if key not in memo:
+        try:
+            meta = frappe.get_meta(doctype)
+            memo[key] = bool(meta.get_field(fieldname))
+        except Exception:
+            memo[key] = False
+    return memo[key]
 
 
 def _has_child_table(doc_or_doctype: Any, childtable_fieldname: str, child_doctype: str) -> bool:
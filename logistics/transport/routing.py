@@ -415,7 +415,16 @@ def compute_leg_distance_time(leg_name: str) -> Dict[str, Any]:
     failure_reason: Optional[str] = None
     failed_provider: Optional[str] = None
 
-    if provider == "OSRM":
+    # Pairs measured recently (by any leg, plan or matrix call) are reused as-is.
+    from logistics.transport.distance_matrix import get_cached, remember, _round
+    cached = None
+    if provider in ("OSRM", "MAPBOX", "GOOGLE"):
+        key = (_round(c1), _round(c2))
+        cached = get_cached([key], provider).get(key)
+
+    if cached:
+        result = {"distance_km": cached[0], "duration_min": cached[1], "provider": provider}
+    elif provider == "OSRM":
         result, err = _route_osrm(c1, c2)
         if err:
             failure_reason, failed_provider = err, "OSRM"
@@ -434,6 +443,12 @@ def compute_leg_distance_time(leg_name: str) -> Dict[str, Any]:
         failure_reason, failed_provider = f"Unknown provider '{provider}'", provider
         result = None
 
+    if result and not cached:
+        try:
+            remember(c1, c2, provider, result.get("distance_km"), result.get("duration_min"))
+        except Exception:
+            pass
+
     if not result:
         if failed_provider and failure_reason:
             _store_failure_reason(leg, f"{failed_provider}: {failure_reason}")
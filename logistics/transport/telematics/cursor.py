@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import frappe
+
+CURSOR_DOCTYPE = "Telematics Poll Cursor"
+
+# stream key -> Telematics Poll Cursor.stream
+STREAMS = {
+    "positions": "Positions",
+    "events": "Events",
+    "temperatures": "Temperatures",
+    "can": "CAN",
+}
+
+# Re-read a little before the cursor so late-arriving device buffers are not lost;
+# the deterministic row names in ingest collapse the overlap.
+OVERLAP = timedelta(seconds=60)
+# Never ask a provider for more than this much history in one tick (e.g. after an outage).
+MAX_LOOKBACK = timedelta(hours=24)
+
+def _cursor_name(provider_doc: str, stream: str) -> str:
+    return f"{provider_doc}-{STREAMS[stream]}"
+
+def load_cursors(providers) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """(provider, stream key) -> cursor row, for every provider polled this tick."""
+    if not providers:
+        return {}
+    by_label = {v: k for k, v in STREAMS.items()}
+    rows = frappe.get_all(
+        CURSOR_DOCTYPE,
+        filters={"provider": ["in", list(providers)]},
+        fields=["provider", "stream", "last_ts", "last_data_ts"],
+        limit_page_length=0,
+    )
+    return {(r.provider, by_label.get(r.stream)): r for r in rows}
+
+def window(cursor: Optional[Dict[str, Any]], now: datetime, default_minutes: int) -> Tuple[datetime, datetime]:
+    """[since, until) to request for one stream: from the cursor (less overlap), capped to MAX_LOOKBACK."""
+    if cursor and cursor.get("last_ts"):
+        since = cursor["last_ts"] - OVERLAP
+    else:
+        since = now - timedelta(minutes=default_minutes)
+    return max(since, now - MAX_LOOKBACK), now
+
+def save_cursor(
+    provider_doc: str,
+    stream: str,
+    *,
+    status: str,
+    until: Optional[datetime],
+    data_ts: Optional[datetime],
+    latency_ms: int,
+    rows: int,
+    error: Optional[str] = None,
+):
+    """Upsert one cursor row. last_ts / last_data_ts only move forward, and only on success."""
+    now = frappe.utils.now_datetime()
+    user = frappe.session.user
+    ok = status == "OK"
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{CURSOR_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, docstatus, idx,
+             provider, stream, status, last_ts, last_data_ts, last_run,
+             last_latency_ms, last_rows, last_error)
+        VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+             %(provider)s, %(stream)s, %(status)s, %(last_ts)s, %(data_ts)s, %(now)s,
+             %(latency_ms)s, %(rows)s, %(error)s)
+        ON DUPLICATE KEY UPDATE
+            status          = VALUES(status),
+            last_ts         = IF(VALUES(last_ts) IS NULL, last_ts, GREATEST(COALESCE(last_ts, VALUES(last_ts)), VALUES(last_ts))),
+            last_data_ts    = IF(VALUES(last_data_ts) IS NULL, last_data_ts, GREATEST(COALESCE(last_data_ts, VALUES(last_data_ts)), VALUES(last_data_ts))),
+            last_run        = VALUES(last_run),
+            last_latency_ms = VALUES(last_latency_ms),
+            last_rows       = VALUES(last_rows),
+            last_error      = VALUES(last_error),
+            modified        = VALUES(modified)
+        """,
+        {
+            "name": _cursor_name(provider_doc, stream),
+            "now": now,
+            "user": user,
+            "provider": provider_doc,
+            "stream": STREAMS[stream],
+            "status": status,
+            "last_ts": until if ok else None,
+            "data_ts": data_ts if ok else None,
+            "latency_ms": int(latency_ms or 0),
+            "rows": int(rows or 0),
+            "error": (error or "")[:1000] or None,
+        },
+    )
+
+@frappe.whitelist()
+def reset_cursors(provider: Optional[str] = None):
+    """Forget cursors so the next tick falls back to the poll-interval window."""
+    frappe.only_for("System Manager")
+    filters = {"provider": provider} if provider else {}
+    for name in frappe.get_all(CURSOR_DOCTYPE, filters=filters, pluck="name"):
+        frappe.delete_doc(CURSOR_DOCTYPE, name, ignore_permissions=True)
+    return {"reset": provider or "all"}
@@ -1,9 +1,37 @@
 from __future__ import annotations
-from typing import Dict, Any, List
-from datetime import timedelta
+from typing import Dict, Any, List, Iterable, Tuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+import hashlib
+import time
 import frappe
+from frappe.utils import get_datetime, get_system_timezone
 from .providers import make_provider
 from .resolve import _provider_conf
+from .cursor import STREAMS, load_cursors, save_cursor, window
+
+_BULK_CHUNK = 1000
+
+# doctype -> (insert columns, dedupe key parts after vehicle)
+_STREAMS = {
+    "Telematics Position": (
+        ["vehicle", "provider", "external_id", "ts", "lat", "lon", "speed_kph", "ignition", "odometer_km", "raw_json"],
+        (),
+    ),
+    "Telematics Event": (
+        ["vehicle", "provider", "external_id", "ts", "kind", "meta_json"],
+        ("kind",),
+    ),
+    "Telematics Temperature": (
+        ["vehicle", "provider", "external_id", "ts", "sensor", "temperature_c"],
+        ("sensor",),
+    ),
+    "Telematics CAN Snapshot": (
+        ["vehicle", "provider", "external_id", "ts", "fuel_l", "rpm", "engine_hours", "coolant_c", "ambient_c", "raw_json"],
+        (),
+    ),
+}
 
 def _vehicles_with_mapping() -> List[Dict[str, Any]]:
     rows = frappe.db.get_all("Transport Vehicle",
@@ -26,116 +54,320 @@ def _group_by_provider(items: List[Dict[str, Any]]):
         g.setdefault(it["provider_doc"], []).append(it)
     return g
 
-def run_ingest():
+def _naive_ts(ts) -> datetime:
+    """Provider timestamps may be tz-aware; store them in system time like the rest of the site."""
+    d = get_datetime(ts)
+    if d.tzinfo is not None:
+        d = d.astimezone(ZoneInfo(get_system_timezone())).replace(tzinfo=None)
+    return d
+
+def _row_name(doctype: str, vehicle: str, ts: datetime, extra: Tuple[Any, ...]) -> str:
+    """Deterministic name so a (vehicle, ts[, kind/sensor]) seen twice collapses to one row."""
+    raw = "\x1f".join([doctype, vehicle, ts.isoformat(), *(str(x or "") for x in extra)])
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+class _IngestBatch:
+    """Collects one provider's rows for a tick and writes them with multi-row inserts."""
+
+    def __init__(self, provider_doc: str, vindex: Dict[str, Dict[str, Any]]):
+        self.provider_doc = provider_doc
+        self.vindex = vindex
+        self.rows: Dict[str, Dict[str, Tuple]] = {dt: {} for dt in _STREAMS}
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.latest_can: Dict[str, Dict[str, Any]] = {}
+
+    def _add(self, doctype: str, rec: Dict[str, Any], values: Dict[str, Any]):
+        meta = self.vindex.get(str(rec.get("external_id")))
+        if not meta or not rec.get("ts"):
+            return None
+        ts = _naive_ts(rec["ts"])
+        cols, key_parts = _STREAMS[doctype]
+        values.update({
+            "vehicle": meta["vehicle"],
+            "provider": self.provider_doc,
+            "external_id": meta["external_id"],
+            "ts": ts,
+        })
+        name = _row_name(doctype, meta["vehicle"], ts, tuple(values.get(k) for k in key_parts))
+        self.rows[doctype][name] = (name,) + tuple(values.get(c) for c in cols)
+        return values
+
+    def add_positions(self, items: Iterable[Dict[str, Any]]):
+        for p in items:
+            v = self._add("Telematics Position", p, {
+                "lat": p.get("lat"),
+                "lon": p.get("lon"),
+                "speed_kph": p.get("speed_kph"),
+                "ignition": 1 if p.get("ignition") else 0,
+                "odometer_km": p.get("odometer_km"),
+                "raw_json": frappe.as_json(p.get("raw")),
+            })
+            if v and v.get("lat") is not None and v.get("lon") is not None:
+                cur = self.latest.get(v["vehicle"])
+                if not cur or v["ts"] >= cur["ts"]:
+                    self.latest[v["vehicle"]] = v
+
+    def add_events(self, items: Iterable[Dict[str, Any]]):
+        for ev in items:
+            self._add("Telematics Event", ev, {
+                "kind": ev.get("kind"),
+                "meta_json": frappe.as_json(ev.get("meta")),
+            })
+
+    def add_temperatures(self, items: Iterable[Dict[str, Any]]):
+        for t in items:
+            self._add("Telematics Temperature", t, {
+                "sensor": t.get("sensor"),
+                "temperature_c": t.get("temperature_c"),
+            })
+
+    def add_can(self, items: Iterable[Dict[str, Any]]):
+        for c in items:
+            v = self._add("Telematics CAN Snapshot", c, {
+                "fuel_l": c.get("fuel_l"),
+                "rpm": c.get("rpm"),
+                "engine_hours": c.get("engine_hours"),
+                "coolant_c": c.get("coolant_c"),
+                "ambient_c": c.get("ambient_c"),
+                "raw_json": frappe.as_json(c.get("raw")),
+            })
+            if v and v.get("fuel_l") is not None:
+                cur = self.latest_can.get(v["vehicle"])
+                if not cur or v["ts"] >= cur["ts"]:
+                    self.latest_can[v["vehicle"]] = v
+
+    def counts(self) -> Dict[str, int]:
+        return {dt: len(rows) for dt, rows in self.rows.items()}
+
+    def flush(self) -> Dict[str, int]:
+        now = frappe.utils.now_datetime()
+        user = frappe.session.user
+        for doctype, rows in self.rows.items():
+            if not rows:
+                continue
+            cols, _key = _STREAMS[doctype]
+            fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", "idx", *cols]
+            values = [(r[0], now, now, user, user, 0, 0, *r[1:]) for r in rows.values()]
+            # INSERT IGNORE on the deterministic name drops rows already stored by an earlier tick
+            frappe.db.bulk_insert(doctype, fields, values, ignore_duplicates=True, chunk_size=_BULK_CHUNK)
+        upsert_latest_positions(list(self.latest.values()), list(self.latest_can.values()))
+        return self.counts()
+
+def upsert_latest_positions(positions: List[Dict[str, Any]], can_rows: List[Dict[str, Any]] | None = None):
+    """Keep one Telematics Latest Position row per vehicle; older fixes never overwrite newer ones."""
     now = frappe.utils.now_datetime()
-    since = now - timedelta(minutes = frappe.db.get_single_value("Transport Settings", "telematics_poll_interval_min") or 5)
+    user = frappe.session.user
+    for p in positions:
+        # ts is assigned last so the IF() guards compare against the stored (older) value
+        frappe.db.sql(
+            """
+            INSERT INTO `tabTelematics Latest Position`
+                (name, creation, modified, owner, modified_by, docstatus, idx,
+                 vehicle, provider, external_id, lat, lon, speed_kph, ignition, odometer_km, ts)
+            VALUES (%(vehicle)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+                 %(vehicle)s, %(provider)s, %(external_id)s, %(lat)s, %(lon)s, %(speed_kph)s,
+                 %(ignition)s, %(odometer_km)s, %(ts)s)
+            ON DUPLICATE KEY UPDATE
+                provider    = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(provider), provider),
+                external_id = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(external_id), external_id),
+                lat         = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(lat), lat),
+                lon         = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(lon), lon),
+                speed_kph   = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(speed_kph), speed_kph),
+                ignition    = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(ignition), ignition),
+                odometer_km = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(odometer_km), odometer_km),
+                modified    = VALUES(modified),
+                ts          = IF(ts IS NULL OR VALUES(ts) >= ts, VALUES(ts), ts)
+            """,
+            dict(p, now=now, user=user),
+        )
+    for c in can_rows or []:
+        frappe.db.sql(
+            """
+            INSERT INTO `tabTelematics Latest Position`
+                (name, creation, modified, owner, modified_by, docstatus, idx,
+                 vehicle, provider, external_id, fuel_l, can_ts)
+            VALUES (%(vehicle)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+                 %(vehicle)s, %(provider)s, %(external_id)s, %(fuel_l)s, %(ts)s)
+            ON DUPLICATE KEY UPDATE
+                fuel_l   = IF(can_ts IS NULL OR VALUES(can_ts) >= can_ts, VALUES(fuel_l), fuel_l),
+                modified = VALUES(modified),
+                can_ts   = IF(can_ts IS NULL OR VALUES(can_ts) >= can_ts, VALUES(can_ts), can_ts)
+            """,
+            dict(c, now=now, user=user),
+        )
 
-    mapping = _vehicles_with_mapping()
-    if not mapping: return
-    by_provider = _group_by_provider(mapping)
+def get_latest_positions(vehicles: List[str] | None = None) -> Dict[str, Dict[str, Any]]:
+    """vehicle -> latest fix, read from the compact per-vehicle table."""
+    filters = {"vehicle": ["in", vehicles]} if vehicles else {}
+    rows = frappe.get_all(
+        "Telematics Latest Position",
+        filters=filters,
+        fields=["vehicle", "provider", "ts", "lat", "lon", "speed_kph", "ignition", "odometer_km", "fuel_l"],
+        limit_page_length=0,
+    )
+    return {r.vehicle: r for r in rows}
 
-    for provider_doc, vehs in by_provider.items():
-        conf = _provider_conf(provider_doc)
-        if not conf: continue
-        prov = make_provider(conf["provider_type"], conf)
-        vindex = {x["external_id"]: x["vehicle"] for x in vehs}
+# stream key -> (fetch call, whether failures go to the Error Log)
+_FETCHERS = {
+    "positions": (lambda prov, since, until: prov.fetch_latest_positions(None), True),
+    "events": (lambda prov, since, until: prov.fetch_events(since, until), True),
+    "temperatures": (lambda prov, since, until: prov.fetch_temperatures(since, until), False),
+    "can": (lambda prov, since, until: prov.fetch_can(since, until), False),
+}
 
-        # Positions
-        try:
-            for p in prov.fetch_latest_positions(None):
-                _store_position(vindex.get(str(p["external_id"])), p)
-        except Exception as e:
-            frappe.log_error(f"{provider_doc} positions failed: {e}", "Transport/Telematics")
+def _fetch_provider(prov, windows: Dict[str, Tuple[datetime, datetime]], budget_s: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Worker-thread body: pull every stream of one provider and materialise the results.
 
-        # Events
+    Runs outside the request context, so it must not touch frappe.db / frappe.local;
+    all storage happens on the main thread.
+    """
+    started = time.monotonic()
+    out: Dict[str, Dict[str, Any]] = {}
+    for stream, (since, until) in windows.items():
+        if time.monotonic() - started > budget_s:
+            out[stream] = {"status": "Timeout", "items": [], "latency_ms": 0,
+                           "error": f"provider budget of {budget_s:.0f}s exhausted"}
+            continue
+        t0 = time.monotonic()
+        fetch, _log = _FETCHERS[stream]
         try:
-            for ev in prov.fetch_events(since, now):
-                _store_event(vindex.get(str(ev["external_id"])), ev)
+            items = list(fetch(prov, since, until) or [])
+            out[stream] = {"status": "OK", "items": items, "error": None}
         except Exception as e:
-            frappe.log_error(f"{provider_doc} events failed: {e}", "Transport/Telematics")
-
-        # Temps
+            out[stream] = {"status": "Error", "items": [], "error": str(e)}
+        out[stream]["latency_ms"] = int((time.monotonic() - t0) * 1000)
+    close = getattr(prov, "close", None)
+    if close:
         try:
-            for t in prov.fetch_temperatures(since, now):
-                _store_temp(vindex.get(str(t["external_id"])), t)
+            close()
         except Exception:
             pass
+    return out
 
-        # CAN
+def _newest_ts(items: List[Dict[str, Any]]):
+    newest = None
+    for it in items:
+        if not it.get("ts"):
+            continue
         try:
-            for c in prov.fetch_can(since, now):
-                _store_can(vindex.get(str(c["external_id"])), c)
+            ts = _naive_ts(it["ts"])
         except Exception:
-            pass
+            continue
+        if newest is None or ts > newest:
+            newest = ts
+    return newest
+
+def _store_provider(provider_doc: str, vehs: List[Dict[str, Any]], windows, result: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Write one provider's fetched streams, then advance its cursors (main thread)."""
+    batch = _IngestBatch(provider_doc, {x["external_id"]: x for x in vehs})
+    adders = {
+        "positions": batch.add_positions,
+        "events": batch.add_events,
+        "temperatures": batch.add_temperatures,
+        "can": batch.add_can,
+    }
+    for stream, r in result.items():
+        if r["status"] != "OK":
+            continue
+        try:
+            adders[stream](r["items"])
+        except Exception as e:
+            r.update(status="Error", error=str(e))
+
+    counts: Dict[str, int] = {}
+    try:
+        counts = batch.flush()
+    except Exception as e:
+        frappe.log_error(f"{provider_doc} store failed: {e}", "Transport/Telematics")
+        for r in result.values():
+            if r["status"] == "OK":
+                r.update(status="Error", error=f"store failed: {e}")
+
+    for stream, r in result.items():
+        if r["status"] != "OK" and _FETCHERS[stream][1]:
+            frappe.log_error(f"{provider_doc} {stream} failed: {r['error']}", "Transport/Telematics")
+        save_cursor(
+            provider_doc, stream,
+            status=r["status"],
+            until=windows[stream][1],
+            data_ts=_newest_ts(r["items"]) if r["status"] == "OK" else None,
+            latency_ms=r["latency_ms"],
+            rows=len(r["items"]),
+            error=r["error"],
+        )
+    frappe.db.commit()
+    return counts
+
+def _int_setting(field: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int(frappe.db.get_single_value("Transport Settings", field) or default)
+    except Exception:
+        v = default
+    return max(lo, min(v, hi))
+
+def run_ingest() -> Dict[str, Any]:
+    """
+    Poll every mapped provider in parallel and store what comes back.
+
+    Providers are fetched on a bounded thread pool (HTTP only); each provider is
+    written and committed as soon as its fetch completes, so a slow provider no
+    longer holds back the others. Each provider/stream keeps a cursor in
+    Telematics Poll Cursor and only asks for data after it.
+    """
+    now = frappe.utils.now_datetime()
+    interval = _int_setting("telematics_poll_interval_min", 5, 1, 60)
+    max_workers = _int_setting("telematics_max_workers", 4, 1, 32)
+    budget_s = _int_setting("telematics_provider_timeout_sec", 60, 5, 600)
+
+    # Vehicle metadata is resolved once per run; rows carry it instead of re-reading Transport Vehicle.
+    mapping = _vehicles_with_mapping()
+    if not mapping: return {}
+    by_provider = _group_by_provider(mapping)
+    cursors = load_cursors(by_provider)
+
+    jobs = {}
+    for provider_doc, vehs in by_provider.items():
+        conf = _provider_conf(provider_doc)
+        if not conf: continue
+        try:
+            prov = make_provider(conf["provider_type"], conf)
+        except Exception as e:
+            frappe.log_error(f"{provider_doc} init failed: {e}", "Transport/Telematics")
+            continue
+        windows = {s: window(cursors.get((provider_doc, s)), now, interval) for s in STREAMS}
+        jobs[provider_doc] = (prov, vehs, windows)
+    if not jobs: return {}
 
-def _store_position(vehicle: str, p: Dict[str, Any]):
-    if not vehicle: return
-    
-    # Get vehicle info to set provider and external_id
-    vehicle_doc = frappe.get_doc("Transport Vehicle", vehicle)
-    provider = vehicle_doc.telematics_provider
-    external_id = vehicle_doc.telematics_external_id
-    
-    doc = frappe.get_doc({
-        "doctype": "Telematics Position",
-        "vehicle": vehicle,
-        "provider": provider,
-        "external_id": external_id,
-        "ts": p["ts"],
-        "lat": p["lat"], 
-        "lon": p["lon"],
-        "speed_kph": p.get("speed_kph"),
-        "ignition": 1 if p.get("ignition") else 0,
-        "odometer_km": p.get("odometer_km"),
-        "raw_json": frappe.as_json(p.get("raw")),
-    })
-    doc.flags.ignore_permissions = True
-    doc.insert(ignore_permissions=True)
-
-def _store_event(vehicle: str, ev: Dict[str, Any]):
-    if not vehicle: return
-    doc = frappe.get_doc({
-        "doctype": "Telematics Event",
-        "vehicle": vehicle,
-        "ts": ev["ts"],
-        "kind": ev["kind"],
-        "meta_json": frappe.as_json(ev.get("meta")),
-    })
-    doc.flags.ignore_permissions = True
-    doc.insert(ignore_permissions=True)
-
-def _store_temp(vehicle: str, t: Dict[str, Any]):
-    if not vehicle: return
-    doc = frappe.get_doc({
-        "doctype": "Telematics Temperature",
-        "vehicle": vehicle,
-        "ts": t["ts"], "sensor": t["sensor"], "temperature_c": t["temperature_c"],
-    })
-    doc.flags.ignore_permissions = True
-    doc.insert(ignore_permissions=True)
-
-def _store_can(vehicle: str, c: Dict[str, Any]):
-    if not vehicle: return
-    
-    # Get vehicle info to set provider and external_id
-    vehicle_doc = frappe.get_doc("Transport Vehicle", vehicle)
-    provider = vehicle_doc.telematics_provider
-    external_id = vehicle_doc.telematics_external_id
-    
-    doc = frappe.get_doc({
-        "doctype": "Telematics CAN Snapshot",
-        "vehicle": vehicle,
-        "provider": provider,
-        "external_id": external_id,
-        "ts": c["ts"],
-        "fuel_l": c.get("fuel_l"), 
-        "rpm": c.get("rpm"),
-        "engine_hours": c.get("engine_hours"),
-        "coolant_c": c.get("coolant_c"), 
-        "ambient_c": c.get("ambient_c"),
-        "raw_json": frappe.as_json(c.get("raw")),
-    })
-    doc.flags.ignore_permissions = True
-    doc.insert(ignore_permissions=True)
-    
-    frappe.logger().info(f"Stored CAN data for vehicle {vehicle}: fuel={c.get('fuel_l')}, rpm={c.get('rpm')}, engine_hours={c.get('engine_hours')}")
+    workers = min(max_workers, len(jobs))
+    waves = -(-len(jobs) // workers)
+    summary: Dict[str, Any] = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="telematics")
+    futures = {
+        executor.submit(_fetch_provider, prov, windows, budget_s): provider_doc
+        for provider_doc, (prov, _vehs, windows) in jobs.items()
+    }
+    try:
+        # a little slack over the per-provider budget for the in-flight HTTP call to return
+        for fut in as_completed(futures, timeout=waves * budget_s + 30):
+            provider_doc = futures[fut]
+            _prov, vehs, windows = jobs[provider_doc]
+            summary[provider_doc] = _store_provider(provider_doc, vehs, windows, fut.result())
+    except FuturesTimeout:
+        for fut, provider_doc in futures.items():
+            if provider_doc in summary:
+                continue
+            _prov, vehs, windows = jobs[provider_doc]
+            if fut.done():
+                summary[provider_doc] = _store_provider(provider_doc, vehs, windows, fut.result())
+                continue
+            frappe.log_error(f"{provider_doc} timed out after {budget_s}s", "Transport/Telematics")
+            for stream in STREAMS:
+                save_cursor(provider_doc, stream, status="Timeout", until=None, data_ts=None,
+                            latency_ms=budget_s * 1000, rows=0, error="provider timed out")
+            frappe.db.commit()
+            summary[provider_doc] = "timeout"
+    finally:
+        # don't wait on a hung provider; its result is discarded and its cursor stays put
+        executor.shutdown(wait=False, cancel_futures=True)
+    return summary
@@ -3,10 +3,13 @@ from __future__ import annotations
 
 import logging
 import datetime as dt
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     import xmltodict  # SOAP XML → dict
@@ -29,7 +32,12 @@ class RemoraProvider:
       - soap_version: "SOAP11" | "SOAP12"  (default SOAP11; basicHttp in WSDL)
       - base_url: optional (used for logs/discovery only)
       - request_timeout_sec | timeout (default 20)
+      - device_workers: parallel per-device interval calls (default 4)
       - debug: 0/1  (prints request + response to terminal/logs when 1)
+
+    One instance serves one ingest tick: HTTP goes through a pooled session and
+    the device list / interval positions are fetched once and shared by the
+    temperature and CAN extractors (see _interval_positions).
     """
 
     # Target namespace from WSDL
@@ -79,6 +87,18 @@ class RemoraProvider:
 
         self.base_url = (config.get("base_url") or "").strip()
 
+        self.device_workers = max(1, int(config.get("device_workers") or 4))
+        # Keep-alive connections reused across every SOAP call of the tick
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.device_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # Per-tick fetch plan, shared between streams
+        self._plan_lock = threading.RLock()
+        self._device_ids: Optional[List[str]] = None
+        self._interval_plan: Optional[Tuple[dt.datetime, dt.datetime, List[Dict[str, Any]]]] = None
+
         # Validate timeout is reasonable
         if self.timeout < 5 or self.timeout > 300:
             _LOG.warning(f"REMORA timeout {self.timeout}s is outside recommended range (5-300s)")
@@ -108,7 +128,10 @@ class RemoraProvider:
         )
 
     def _post_once(self, url: str, xml: str, headers: Dict[str, str]) -> requests.Response:
-        return requests.post(url, data=xml.encode("utf-8"), headers=headers, timeout=self.timeout)
+        return self._session.post(url, data=xml.encode("utf-8"), headers=headers, timeout=self.timeout)
+
+    def close(self) -> None:
+        self._session.close()
 
     def _parse_soap_fault(self, text: str) -> Optional[str]:
         if not _HAS_XMLTODICT:
@@ -571,37 +594,69 @@ class RemoraProvider:
             if row:
                 yield row
 
+    # --------------------------
+    # Per-tick fetch plan
+    # --------------------------
+
+    def _get_device_ids(self) -> List[str]:
+        """GetDevices once per instance."""
+        with self._plan_lock:
+            if self._device_ids is None:
+                ids = (_get_field(d, "deviceId", "DeviceId", "deviceID") for d in self.GetDevices())
+                self._device_ids = [str(x) for x in ids if x]
+            return self._device_ids
+
+    def _fetch_intervals(self, device_ids: List[str], since: dt.datetime, until: dt.datetime) -> List[Dict[str, Any]]:
+        def one(device_id: str) -> List[Dict[str, Any]]:
+            try:
+                return self.GetPositionsByInterval(device_id, since, until)
+            except Exception:
+                # Skip devices that don't return interval data
+                return []
+
+        if self.device_workers <= 1 or len(device_ids) <= 1:
+            results = [one(d) for d in device_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.device_workers, len(device_ids))) as ex:
+                results = list(ex.map(one, device_ids))
+        return [p for rows in results for p in rows]
+
+    def _interval_positions(self, since: dt.datetime, until: dt.datetime) -> List[Dict[str, Any]]:
+        """
+        Raw interval positions for every device, fetched once and reused.
+
+        A later request inside the cached window is served from the cache; one
+        outside it refetches the union, so overlapping stream windows cost one
+        round of GetPositionsByInterval. Rows outside a caller's window are
+        harmless: ingest dedupes on (vehicle, ts).
+        """
+        with self._plan_lock:
+            plan = self._interval_plan
+            if plan and plan[0] <= since and plan[1] >= until:
+                return plan[2]
+            if plan:
+                since, until = min(plan[0], since), max(plan[1], until)
+            positions = self._fetch_intervals(self._get_device_ids(), since, until)
+            self._interval_plan = (since, until, positions)
+            return positions
+
     def fetch_temperatures(self, since: dt.datetime, until: dt.datetime) -> Iterable[Dict[str, Any]]:
         """Fetch temperature sensor data from Remora API"""
-        # Remora doesn't have a dedicated temperature endpoint, 
+        # Remora doesn't have a dedicated temperature endpoint,
         # but we can extract temperature data from position data if available
-        for device in self.GetDevices():
-            device_id = _get_field(device, "deviceId", "DeviceId", "deviceID")
-            if device_id:
-                try:
-                    for pos in self.GetPositionsByInterval(device_id, since, until):
-                        temp_data = _extract_temperature_from_position(pos)
-                        if temp_data:
-                            yield temp_data
-                except Exception:
-                    # Skip devices that don't support temperature data
-                    continue
+        for pos in self._interval_positions(since, until):
+            temp_data = _extract_temperature_from_position(pos)
+            if temp_data:
+                yield temp_data
 
     def fetch_can(self, since: dt.datetime, until: dt.datetime) -> Iterable[Dict[str, Any]]:
         """Fetch CAN bus data from Remora API"""
         # Remora doesn't have a dedicated CAN endpoint,
         # but we can extract CAN data from position data if available
-        for device in self.GetDevices():
-            device_id = _get_field(device, "deviceId", "DeviceId", "deviceID")
-            if device_id:
-                try:
-                    for pos in self.GetPositionsByInterval(device_id, since, until):
-                        can_data = _extract_can_from_position(pos)
-                        if can_data:
-                            yield can_data
-                except Exception:
-                    # Skip devices that don't support CAN data
-                    continue
+        for pos in self._interval_positions(since, until):
+            can_data = _extract_can_from_position(pos)
+            if can_data:
+                yield can_data
 
     def get_debug_logs(self) -> List[Dict[str, Any]]:
         """Get captured debug logs from API calls"""
@@ -882,6 +937,31 @@ def _extract_temperature_from_position(pos: Dict[str, Any]) -> Optional[Dict[str
     }
 
 
+def _extract_can_from_position(pos: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extract CAN readings carried on position data, if any"""
+    device_id = _get_field(pos, "deviceId", "DeviceId")
+    if not device_id:
+        return None
+
+    fuel_l = _to_float(_get_field(pos, "fuelLevelPercent", "FuelLevelPercent", "fuelLevel", "FuelLevel", "fuel", "Fuel"))
+    rpm = _to_float(_get_field(pos, "rpm", "RPM"))
+    engine_hours = _to_float(_get_field(pos, "totalEngineHours", "TotalEngineHours"))
+    coolant_c = _to_float(_get_field(pos, "coolantTemp", "CoolantTemp"))
+    if fuel_l is None and rpm is None and engine_hours is None and coolant_c is None:
+        return None
+
+    return {
+        "external_id": str(device_id),
+        "ts": _to_string(_get_field(pos, "dateTime", "DateTime")),
+        "fuel_l": fuel_l,
+        "rpm": rpm,
+        "engine_hours": engine_hours,
+        "coolant_c": coolant_c,
+        "ambient_c": _to_float(_get_field(pos, "ambientTemp", "AmbientTemp")),
+        "raw": pos,
+    }
+
+
 def _can_to_row(can_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Convert CAN data to normalized row format with fuel level"""
     dev = _get_field(can_data, "deviceId", "DeviceId")
@@ -0,0 +1,207 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for telematics ingest storage, poll cursors and the Remora fetch plan."""
+
+import re
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.transport.telematics import cursor, ingest
+from logistics.transport.telematics.providers.remora import RemoraProvider
+
+_SQL_WORDS = {"IF": "_if", "IS": "is", "NULL": "None", "OR": "or", "GREATEST": "_greatest", "COALESCE": "_coalesce"}
+
+
+def _greatest(*values):
+    return None if any(v is None for v in values) else max(values)
+
+
+def _coalesce(*values):
+    return next((v for v in values if v is not None), None)
+
+
+def _python_expr(expr):
+    def token(m):
+        if m.group(1):
+            return f"new[{m.group(1)!r}]"
+        word = m.group(2)
+        return _SQL_WORDS.get(word, f"row[{word!r}]")
+
+    return re.sub(r"VALUES\((\w+)\)|\b([A-Za-z_]\w*)\b", token, expr)
+
+
+class _UpsertTable:
+    """In-memory tables that run INSERT ... ON DUPLICATE KEY UPDATE, assignments in order like MariaDB."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def sql(self, query, params=None, *args, **kwargs):
+        table = re.search(r"INSERT INTO `tab([^`]+)`", query).group(1)
+        head, rest = query.split("VALUES", 1)
+        values, updates = rest.split("ON DUPLICATE KEY UPDATE")
+        columns = [c.strip() for c in head[head.index("(") + 1:head.rindex(")")].split(",")]
+        literals = [v.strip() for v in values.strip()[1:-1].split(",")]
+        new = {
+            col: params[m.group(1)] if (m := re.fullmatch(r"%\((\w+)\)s", v)) else int(v)
+            for col, v in zip(columns, literals)
+        }
+        rows = self.tables.setdefault(table, {})
+        row = rows.get(new["name"])
+        if row is None:
+            rows[new["name"]] = new
+            return
+        for line in updates.strip().splitlines():
+            column, expr = line.strip().rstrip(",").split("=", 1)
+            scope = {"_if": lambda c, a, b: a if c else b, "_greatest": _greatest, "_coalesce": _coalesce}
+            row[column.strip()] = eval(_python_expr(expr), scope, {"row": row, "new": new})
+
+    def bulk_insert(self, doctype, fields, values, ignore_duplicates=False, chunk_size=None):
+        rows = self.tables.setdefault(doctype, {})
+        for value in values:
+            row = dict(zip(fields, value))
+            if row["name"] in rows and ignore_duplicates:
+                continue
+            rows[row["name"]] = row
+
+    def patch(self):
+        return patch.multiple(frappe.db, sql=self.sql, bulk_insert=self.bulk_insert)
+
+
+class UnitTestTelematicsIngest(UnitTestCase):
+    vehicles = {"DEV-1": {"vehicle": "TRUCK-1", "external_id": "DEV-1"}}
+
+    def _flush(self, table, positions):
+        batch = ingest._IngestBatch("Remora", self.vehicles)
+        with table.patch(), patch.object(ingest, "get_system_timezone", return_value="UTC"):
+            batch.add_positions(positions)
+            return batch.flush()
+
+    def test_duplicate_fix_is_not_reinserted(self):
+        table = _UpsertTable()
+        fix = {"external_id": "DEV-1", "ts": datetime(2026, 10, 16, 10, 0), "lat": 14.5, "lon": 121.0}
+        self.assertEqual(self._flush(table, [fix, dict(fix)])["Telematics Position"], 1)
+        # the next tick re-reads the overlap; the same instant in UTC names the same row
+        self._flush(table, [dict(fix, ts=datetime(2026, 10, 16, 10, 0, tzinfo=timezone.utc))])
+        self.assertEqual(len(table.tables["Telematics Position"]), 1)
+
+        self._flush(table, [dict(fix, ts=datetime(2026, 10, 16, 10, 1))])
+        self.assertEqual(len(table.tables["Telematics Position"]), 2)
+
+    def test_event_dedupe_key_includes_kind(self):
+        batch = ingest._IngestBatch("Remora", self.vehicles)
+        ts = datetime(2026, 10, 16, 10, 0)
+        with patch.object(ingest, "get_system_timezone", return_value="UTC"):
+            batch.add_events(
+                [
+                    {"external_id": "DEV-1", "ts": ts, "kind": "Harsh Brake"},
+                    {"external_id": "DEV-1", "ts": ts, "kind": "Harsh Brake"},
+                    {"external_id": "DEV-1", "ts": ts, "kind": "Speeding"},
+                    {"external_id": "UNKNOWN", "ts": ts, "kind": "Speeding"},
+                ]
+            )
+        self.assertEqual(batch.counts()["Telematics Event"], 2)
+
+    def test_older_fix_never_overwrites_latest_position(self):
+        table = _UpsertTable()
+        newer = {"external_id": "DEV-1", "ts": datetime(2026, 10, 16, 10, 5), "lat": 14.6, "lon": 121.1}
+        older = {"external_id": "DEV-1", "ts": datetime(2026, 10, 16, 10, 0), "lat": 14.5, "lon": 121.0}
+        # within one tick the newest fix wins regardless of order
+        self._flush(table, [newer, older])
+        latest = table.tables["Telematics Latest Position"]["TRUCK-1"]
+        self.assertEqual((latest["lat"], latest["ts"]), (14.6, newer["ts"]))
+
+        # a late device buffer in a later tick leaves the stored newer fix alone
+        self._flush(table, [older])
+        self.assertEqual((latest["lat"], latest["ts"]), (14.6, newer["ts"]))
+
+        self._flush(table, [dict(newer, ts=datetime(2026, 10, 16, 10, 9), lat=14.7)])
+        self.assertEqual((latest["lat"], latest["ts"]), (14.7, datetime(2026, 10, 16, 10, 9)))
+
+    def test_older_can_reading_keeps_newer_fuel_level(self):
+        table = _UpsertTable()
+        row = {"vehicle": "TRUCK-1", "provider": "Remora", "external_id": "DEV-1"}
+        with table.patch():
+            ingest.upsert_latest_positions([], [dict(row, ts=datetime(2026, 10, 16, 10, 5), fuel_l=60.0)])
+            ingest.upsert_latest_positions([], [dict(row, ts=datetime(2026, 10, 16, 10, 0), fuel_l=80.0)])
+        latest = table.tables["Telematics Latest Position"]["TRUCK-1"]
+        self.assertEqual((latest["fuel_l"], latest["can_ts"]), (60.0, datetime(2026, 10, 16, 10, 5)))
+
+
+class UnitTestTelematicsCursor(UnitTestCase):
+    def test_window_starts_at_cursor_less_overlap(self):
+        now = datetime(2026, 10, 16, 10, 0)
+        self.assertEqual(cursor.window(None, now, 5), (now - timedelta(minutes=5), now))
+        last = {"last_ts": now - timedelta(minutes=10)}
+        self.assertEqual(cursor.window(last, now, 5), (last["last_ts"] - cursor.OVERLAP, now))
+        # after a long outage only MAX_LOOKBACK of history is requested
+        stale = {"last_ts": now - timedelta(days=3)}
+        self.assertEqual(cursor.window(stale, now, 5), (now - cursor.MAX_LOOKBACK, now))
+
+    def _store(self, table, windows, result):
+        with table.patch(), patch.object(frappe.db, "commit"), patch.object(frappe, "log_error") as log_error:
+            ingest._store_provider("Remora", [{"vehicle": "TRUCK-1", "external_id": "DEV-1"}], windows, result)
+        return log_error
+
+    def test_failed_poll_does_not_move_cursor(self):
+        table = _UpsertTable()
+        t0, t1, t2 = datetime(2026, 10, 16, 9, 55), datetime(2026, 10, 16, 10, 0), datetime(2026, 10, 16, 10, 5)
+        ok = {"status": "OK", "items": [], "error": None, "latency_ms": 120}
+        self._store(table, {"positions": (t0, t1), "events": (t0, t1)}, {"positions": dict(ok), "events": dict(ok)})
+        cursors = table.tables["Telematics Poll Cursor"]
+        self.assertEqual(cursors["Remora-Events"]["last_ts"], t1)
+
+        failed = {"status": "Error", "items": [], "error": "HTTP 500", "latency_ms": 80}
+        log_error = self._store(
+            table, {"positions": (t1, t2), "events": (t1, t2)}, {"positions": dict(ok), "events": failed}
+        )
+        log_error.assert_called_once()
+        self.assertEqual(cursors["Remora-Positions"]["last_ts"], t2)
+        events = cursors["Remora-Events"]
+        self.assertEqual((events["status"], events["last_ts"], events["last_error"]), ("Error", t1, "HTTP 500"))
+        # the next tick asks again from the last successful poll
+        self.assertEqual(cursor.window(events, t2, 5)[0], t1 - cursor.OVERLAP)
+
+
+class UnitTestRemoraFetchPlan(UnitTestCase):
+    def _provider(self):
+        prov = RemoraProvider({"username": "user", "password": "secret", "device_workers": 2})
+        prov.device_calls, prov.interval_calls = 0, []
+
+        def get_devices():
+            prov.device_calls += 1
+            return [{"deviceId": "D1"}, {"deviceId": "D2"}, {"name": "no id"}]
+
+        def get_positions_by_interval(device_id, since, until):
+            prov.interval_calls.append((device_id, since, until))
+            return [{"deviceId": device_id, "dateTime": "2026-10-16T10:00:00", "temperature": 4.5, "fuelLevel": 55}]
+
+        prov.GetDevices = get_devices
+        prov.GetPositionsByInterval = get_positions_by_interval
+        self.addCleanup(prov.close)
+        return prov
+
+    def test_temperature_and_can_share_one_interval_fetch(self):
+        prov = self._provider()
+        since, until = datetime(2026, 10, 16, 9, 55), datetime(2026, 10, 16, 10, 0)
+        temperatures = list(prov.fetch_temperatures(since, until))
+        can = list(prov.fetch_can(since + timedelta(minutes=1), until))
+        self.assertEqual([t["external_id"] for t in temperatures], ["D1", "D2"])
+        self.assertEqual([c["fuel_l"] for c in can], [55.0, 55.0])
+        self.assertEqual(prov.device_calls, 1)
+        self.assertEqual(sorted(d for d, _since, _until in prov.interval_calls), ["D1", "D2"])
+
+    def test_wider_window_refetches_the_union_once(self):
+        prov = self._provider()
+        since, until = datetime(2026, 10, 16, 9, 55), datetime(2026, 10, 16, 10, 0)
+        list(prov.fetch_temperatures(since, until))
+        earlier = since - timedelta(minutes=30)
+        list(prov.fetch_can(earlier, until))
+        list(prov.fetch_temperatures(earlier, until))
+        self.assertEqual(prov.device_calls, 1)
+        self.assertEqual(len(prov.interval_calls), 4)
+        self.assertEqual({(s, u) for _d, s, u in prov.interval_calls[2:]}, {(earlier, until)})
@@ -0,0 +1,30 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.transport import consolidation_index as index
+
+
+class UnitTestConsolidationIndex(UnitTestCase):
+	def test_geohash_encode(self):
+		self.assertEqual(index.geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+		# neighbouring points share the stored cell prefix
+		self.assertEqual(index.geohash_encode(57.64912, 10.40745)[:6], "u4pruy")
+
+	def test_sync_removes_ineligible_legs(self):
+		eligible = [
+			frappe._dict(
+				name="L1", transport_job="J1", pick_address="A", drop_address="B",
+				company="Co", load_type="LCL", bucket_date="2026-10-16",
+			)
+		]
+		with patch.object(frappe.db, "sql", return_value=eligible), patch.object(
+			index, "_upsert"
+		) as upsert, patch.object(frappe.db, "delete") as delete:
+			index.sync_legs(["L1", "L2", None])
+		upsert.assert_called_once_with(eligible)
+		delete.assert_called_once_with(index.INDEX_DOCTYPE, {"name": ["in", ["L2"]]})
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+from unittest.mock import patch
+
+from frappe.tests import UnitTestCase
+
+from logistics.transport import distance_matrix as dm
+from logistics.transport.constraint_validator import get_distance
+
+
+class UnitTestDistanceMatrix(UnitTestCase):
+	def test_nearby_points_share_a_cache_key(self):
+		a, b = dm._round((14.55001, 121.02001)), dm._round((14.55004, 121.02004))
+		self.assertEqual(dm._key("OSRM", a, a), dm._key("OSRM", b, b))
+		self.assertNotEqual(dm._key("OSRM", a, b), dm._key("GOOGLE", a, b))
+
+	def test_zip_matrix_converts_units_and_keeps_gaps(self):
+		m = dm._zip_matrix([[0, 1500], [None, 0]], [[0, 120], [None, 0]], 2, 2)
+		self.assertEqual(m[0][1], (1.5, 2.0))
+		self.assertIsNone(m[1][0])
+
+	def test_missing_pairs_fetched_in_provider_blocks(self):
+		calls = []
+
+		def fake(origins, dests):
+			calls.append((len(origins), len(dests)))
+			return [[(1.0, 1.0)] * len(dests) for _ in origins], None
+
+		points = [(float(i), 0.0) for i in range(12)]
+		missing = [(a, b) for a in points for b in points if a != b]
+		with patch.dict(dm._MATRIX, {"GOOGLE": fake}), patch.object(dm, "requests", object()):
+			got = dm._fetch_missing("GOOGLE", missing)
+		self.assertEqual(len(got), len(missing))
+		self.assertEqual(len(calls), 4)  # 12 x 12 in 10 x 10 blocks
+		self.assertTrue(all(o <= 10 and d <= 10 for o, d in calls))
+
+	def test_road_distance_only_without_straight_line_fallback(self):
+		coords = {"ADDR-A": (14.55, 121.02), "ADDR-B": (14.60, 121.05)}
+		with patch.object(dm, "get_addresses_coords", return_value=coords), patch.object(
+			dm, "get_distance_duration", return_value=None
+		):
+			self.assertAlmostEqual(
+				dm.get_address_distance_km("ADDR-A", "ADDR-B"), dm.haversine_km(14.55, 121.02, 14.60, 121.05)
+			)
+			self.assertIsNone(dm.get_address_distance_km("ADDR-A", "ADDR-B", straight_line=False))
+			# the constraint checks then keep the leg's own distance_km
+			self.assertIsNone(get_distance("ADDR-A", "ADDR-B"))
@@ -0,0 +1,69 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.transport import trip_builder
+from logistics.transport.trip_builder import pack_legs
+
+
+def _leg(name, weight=0.0, volume=0.0, pick=None, drop=None, pick_window=(None, None), dg=0):
+	return {
+		"name": name,
+		"_load": (weight, volume, 0.0),
+		"_pick_xy": pick,
+		"_drop_xy": drop,
+		"_pick_window": pick_window,
+		"_drop_window": (None, None),
+		"contains_dangerous_goods": dg,
+	}
+
+
+class UnitTestTripBuilder(UnitTestCase):
+	def test_respects_vehicle_capacity(self):
+		bins = [{"weight": 1000.0, "volume": 50.0, "pallets": 10.0}] * 3
+		legs = [_leg(f"L{i}", weight=400) for i in range(5)]
+		trips = pack_legs(legs, bins)
+		self.assertEqual([len(t.legs) for t in trips], [2, 2, 1])
+		self.assertTrue(all(t.load[0] <= 1000 for t in trips))
+
+	def test_fills_trips_before_opening_new_ones(self):
+		bins = [{"weight": 1000.0, "volume": 50.0, "pallets": 10.0}] * 5
+		legs = [_leg("A", weight=600), _leg("B", weight=600), _leg("C", weight=400), _leg("D", weight=400)]
+		trips = pack_legs(legs, bins)
+		self.assertEqual(len(trips), 2)
+
+	def test_dangerous_goods_not_mixed_into_general_trip(self):
+		bins = [{"weight": 1000.0, "volume": 50.0, "pallets": 10.0}] * 2
+		trips = pack_legs([_leg("A", weight=1), _leg("B", weight=1, dg=1)], bins)
+		self.assertEqual(len(trips), 2)
+
+	def test_missed_pick_window_starts_new_trip(self):
+		bins = [{"weight": 1000.0, "volume": 50.0, "pallets": 10.0}] * 2
+		far = (14.6, 121.0), (15.5, 121.0)  # ~100 km apart
+		legs = [
+			_leg("A", weight=1, pick=far[0], drop=far[1], pick_window=(480, 540)),
+			_leg("B", weight=1, pick=far[0], drop=far[0], pick_window=(480, 540)),
+		]
+		trips = pack_legs(legs, bins, speed_kmh=50, radius_km=1000)
+		self.assertEqual(len(trips), 2)
+
+	def test_nearby_legs_share_a_trip(self):
+		bins = [{"weight": 1000.0, "volume": 50.0, "pallets": 10.0}] * 2
+		here, there = (14.55, 121.02), (16.40, 120.60)
+		legs = [
+			_leg("A", weight=1, pick=here, drop=here),
+			_leg("B", weight=1, pick=there, drop=there),
+			_leg("C", weight=1, pick=here, drop=here),
+		]
+		trips = pack_legs(legs, bins)
+		self.assertEqual(sorted(len(t.legs) for t in trips), [1, 2])
+		self.assertIn("C", [l["name"] for l in trips[0].legs])
+
+	def test_vehicle_bins_only_use_the_plan_company(self):
+		with patch.object(frappe, "get_all", return_value=[]) as get_all:
+			self.assertEqual(trip_builder._vehicle_bins("Truck", "Co A"), [])
+		self.assertEqual(get_all.call_args.kwargs["filters"], {"company_owned": 1, "vehicle_type": "Truck", "company": "Co A"})
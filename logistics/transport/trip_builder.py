@@ -0,0 +1,341 @@
+# logistics/transport/trip_builder.py
+
+"""
+Trip Builder
+
+Packs a day's Transport Legs of one vehicle type into trips for Transport Plan
+auto-allocation:
+- Bin sizes are the real capacities of the company-owned vehicles of that type
+  (CapacityManager, standard UOMs, less the capacity buffer)
+- Each trip keeps running weight / volume / pallet sums, so adding a leg is O(1)
+- Legs are sequenced by pick window; a trip only accepts a leg whose pick and
+  drop windows it can still make (travel + loading / unloading time)
+- Among feasible trips the geographically nearest one wins; a leg further than
+  CLUSTER_RADIUS_KM from every open trip starts a new trip while vehicles remain
+- Distances are road distances from the shared distance matrix when a routing
+  provider is configured, haversine otherwise
+"""
+
+from __future__ import annotations
+
+from math import atan2, inf
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import frappe
+from frappe.utils import cint, cstr, flt, get_time
+
+from logistics.transport.routing import haversine_km
+
+# Used when no vehicle of the type has capacity data (previous hardcoded limits)
+DEFAULT_CAPACITY = {"weight": 10000.0, "volume": 100.0, "pallets": 50.0}
+CLUSTER_RADIUS_KM = 50.0
+# Above this many distinct stops the planner keeps to haversine rather than an N x N provider matrix
+MAX_MATRIX_POINTS = 100
+DAY_END_MIN = 24 * 60
+
+Coords = Optional[Tuple[float, float]]
+DistanceFn = Callable[[Tuple[float, float], Tuple[float, float]], float]
+
+
+def _haversine(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    return haversine_km(a[0], a[1], b[0], b[1])
+
+
+def _minutes(v: Any) -> Optional[float]:
+    """Minutes after midnight for a Time value (timedelta / time / 'HH:MM[:SS]')."""
+    if v in (None, ""):
+        return None
+    if isinstance(v, timedelta):
+        return v.total_seconds() / 60.0
+    try:
+        t = get_time(v)
+        return t.hour * 60 + t.minute + t.second / 60.0
+    except Exception:
+        return None
+
+
+# ------------------------ Trip state ------------------------
+
+class _Trip:
+    __slots__ = ("legs", "cap", "load", "dg", "clock", "last_xy")
+
+    def __init__(self, cap: Dict[str, float]):
+        self.legs: List[Dict[str, Any]] = []
+        self.cap = cap
+        self.load = [0.0, 0.0, 0.0]
+        self.dg = True
+        self.clock = 0.0
+        self.last_xy: Coords = None
+
+    def fits_load(self, load: Tuple[float, float, float]) -> bool:
+        return (
+            self.load[0] + load[0] <= self.cap["weight"]
+            and self.load[1] + load[1] <= self.cap["volume"]
+            and self.load[2] + load[2] <= self.cap["pallets"]
+        )
+
+    def add(self, leg: Dict[str, Any], load: Tuple[float, float, float], done_at: float):
+        self.legs.append(leg)
+        self.load[0] += load[0]
+        self.load[1] += load[1]
+        self.load[2] += load[2]
+        self.dg = self.dg and bool(leg.get("contains_dangerous_goods"))
+        self.clock = done_at
+        self.last_xy = leg.get("_drop_xy") or leg.get("_pick_xy") or self.last_xy
+
+
+# ------------------------ Packing core ------------------------
+
+def pack_legs(
+    legs: List[Dict[str, Any]],
+    bins: List[Dict[str, float]],
+    speed_kmh: float = 50.0,
+    service_min: Callable[[Dict[str, Any]], Tuple[float, float]] = lambda leg: (0.0, 0.0),
+    distance_fn: DistanceFn = _haversine,
+    radius_km: float = CLUSTER_RADIUS_KM,
+) -> List[_Trip]:
+    """
+    Best-fit packing of legs into trips.
+
+    Legs carry ``_load`` (weight, volume, pallets) and optionally ``_pick_xy`` /
+    ``_drop_xy`` coordinates; ``bins`` are per-vehicle capacities, largest
+    first. Once every vehicle has a trip, new trips reuse the largest bin.
+    """
+    speed_kmh = speed_kmh if speed_kmh and speed_kmh > 0 else 50.0
+    largest = bins[0] if bins else DEFAULT_CAPACITY
+    trips: List[_Trip] = []
+
+    def travel(a: Coords, b: Coords) -> Tuple[float, float]:
+        if not a or not b:
+            return 0.0, 0.0
+        km = distance_fn(a, b)
+        return km, km / speed_kmh * 60.0
+
+    def schedule(trip: _Trip, leg: Dict[str, Any]) -> Tuple[Optional[float], float]:
+        """(time the leg is dropped, km to reach its pick) or (None, km) if a window is missed."""
+        km, to_pick = travel(trip.last_xy, leg.get("_pick_xy"))
+        arrive = trip.clock + to_pick
+        pick_start, pick_end = leg.get("_pick_window", (None, None))
+        if pick_end is not None and arrive > pick_end:
+            return None, km
+        start = max(arrive, pick_start or 0.0)
+        load_min, unload_min = service_min(leg)
+        if flt(leg.get("duration_min")) > 0:
+            drive = flt(leg["duration_min"])
+        else:
+            drive = travel(leg.get("_pick_xy"), leg.get("_drop_xy"))[1]
+        done = start + load_min + drive + unload_min
+        drop_start, drop_end = leg.get("_drop_window", (None, None))
+        if drop_start is not None and done - unload_min < drop_start:
+            done = drop_start + unload_min
+        if (drop_end is not None and done > drop_end) or done > DAY_END_MIN:
+            return None, km
+        return done, km
+
+    for leg in legs:
+        load = leg["_load"]
+        dg = bool(leg.get("contains_dangerous_goods"))
+        best: Optional[Tuple[float, float, _Trip, float]] = None
+        for trip in trips:
+            if dg and not trip.dg:
+                continue
+            if not trip.fits_load(load):
+                continue
+            done, km = schedule(trip, leg)
+            if done is None:
+                continue
+            if km > radius_km and len(trips) < len(bins):
+                # a spare vehicle is closer than chaining this far
+                continue
+            # nearest first, then the fuller trip (best fit)
+            slack = trip.cap["weight"] - trip.load[0] - load[0]
+            if best is None or (km, slack) < (best[0], best[1]):
+                best = (km, slack, trip, done)
+
+        if best is None:
+            trip = _Trip(bins[len(trips)] if len(trips) < len(bins) else largest)
+            done, _km = schedule(trip, leg)
+            trips.append(trip)
+            trip.add(leg, load, done if done is not None else trip.clock)
+        else:
+            best[2].add(leg, load, best[3])
+
+    return trips
+
+
+# ------------------------ Data loading (one query each) ------------------------
+
+def _attach_loads(legs: List[Dict[str, Any]]) -> None:
+    """_load per leg: leg cargo weight if set, else the job's package totals."""
+    jobs = list({leg["transport_job"] for leg in legs if leg.get("transport_job")})
+    totals: Dict[str, Any] = {}
+    if jobs:
+        for r in frappe.get_all(
+            "Transport Job",
+            filters={"name": ["in", jobs]},
+            fields=["name", "total_weight", "total_volume", "total_packages"],
+            limit_page_length=0,
+        ):
+            totals[r.name] = r
+    for leg in legs:
+        job = totals.get(leg.get("transport_job")) or {}
+        leg["_load"] = (
+            flt(leg.get("weight")) or flt(leg.get("cargo_weight_kg")) or flt(job.get("total_weight")),
+            flt(leg.get("volume")) or flt(job.get("total_volume")),
+            flt(leg.get("pallets")) or flt(job.get("total_packages")),
+        )
+
+
+def _attach_coords(legs: List[Dict[str, Any]]) -> None:
+    addresses = {a for leg in legs for a in (leg.get("pick_address"), leg.get("drop_address")) if a}
+    coords: Dict[str, Tuple[float, float]] = {}
+    if addresses and frappe.get_meta("Address").has_field("custom_latitude"):
+        for r in frappe.get_all(
+            "Address",
+            filters={"name": ["in", list(addresses)]},
+            fields=["name", "custom_latitude", "custom_longitude"],
+            limit_page_length=0,
+        ):
+            lat, lon = flt(r.custom_latitude), flt(r.custom_longitude)
+            if (lat or lon) and -90 <= lat <= 90 and -180 <= lon <= 180:
+                coords[r.name] = (lat, lon)
+    for leg in legs:
+        leg["_pick_xy"] = coords.get(leg.get("pick_address"))
+        leg["_drop_xy"] = coords.get(leg.get("drop_address"))
+        leg["_pick_window"] = (_minutes(leg.get("pick_window_start")), _minutes(leg.get("pick_window_end")))
+        leg["_drop_window"] = (_minutes(leg.get("drop_window_start")), _minutes(leg.get("drop_window_end")))
+
+
+def _vehicle_bins(vehicle_type: str, company: Optional[str] = None) -> List[Dict[str, float]]:
+    """Per-vehicle capacities for the type (standard UOMs, less buffer), largest first."""
+    from logistics.transport.capacity.capacity_manager import CapacityManager
+
+    meta = frappe.get_meta("Transport Vehicle")
+    fields = ["name"] + [
+        f for f in ("capacity_weight", "capacity_weight_uom", "capacity_volume", "capacity_volume_uom", "capacity_pallets")
+        if meta.has_field(f)
+    ]
+    filters = {"company_owned": 1, "vehicle_type": vehicle_type}
+    if company and meta.has_field("company"):
+        filters["company"] = company
+    vehicles = frappe.get_all(
+        "Transport Vehicle",
+        filters=filters,
+        fields=fields,
+        limit_page_length=0,
+    )
+    if not vehicles:
+        return []
+
+    manager = CapacityManager(company)
+    if not manager.is_enabled():
+        return []
+    keep = 1 - flt(manager.settings.get("default_buffer", 10)) / 100.0
+    bins = []
+    for cap in manager.get_vehicle_capacities(vehicles).values():
+        if not (cap["weight"] or cap["volume"] or cap["pallets"]):
+            continue
+        # a dimension the vehicle doesn't declare doesn't constrain packing
+        bins.append({k: (cap[k] * keep if cap[k] else inf) for k in ("weight", "volume", "pallets")})
+    bins.sort(key=lambda b: (b["weight"], b["volume"], b["pallets"]), reverse=True)
+    return bins
+
+
+def _service_time_fn() -> Callable[[Dict[str, Any]], Tuple[float, float]]:
+    """Loading / unloading minutes from Transport Settings defaults (read once per run)."""
+    ts = frappe.get_single("Transport Settings")
+    base_l = flt(getattr(ts, "default_base_loading_time_minutes", 15) or 15)
+    per_l = flt(getattr(ts, "default_loading_time_per_volume_m3", 5) or 5)
+    base_u = flt(getattr(ts, "default_base_unloading_time_minutes", 15) or 15)
+    per_u = flt(getattr(ts, "default_unloading_time_per_volume_m3", 5) or 5)
+
+    def service(leg: Dict[str, Any]) -> Tuple[float, float]:
+        vol = leg["_load"][1]
+        return base_l + vol * per_l, base_u + vol * per_u
+
+    return service
+
+
+def _sweep_order(legs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pick-window start, then polar angle around the pick centroid, so neighbours arrive together."""
+    pts = [leg["_pick_xy"] for leg in legs if leg.get("_pick_xy")]
+    cy = sum(p[0] for p in pts) / len(pts) if pts else 0.0
+    cx = sum(p[1] for p in pts) / len(pts) if pts else 0.0
+
+    def key(leg):
+        start = leg["_pick_window"][0]
+        xy = leg.get("_pick_xy")
+        angle = atan2(xy[0] - cy, xy[1] - cx) if xy else inf
+        return (start if start is not None else inf, angle, cint(leg.get("order")), cstr(leg.get("name")))
+
+    return sorted(legs, key=key)
+
+
+def _road_distance_fn(legs: List[Dict[str, Any]], debug: List[str]) -> Optional[DistanceFn]:
+    """Road km between the run's stops from the shared distance matrix (cached), if a provider is set."""
+    from logistics.transport.distance_matrix import _provider, _round, get_distance_matrix
+
+    if _provider() not in ("OSRM", "MAPBOX", "GOOGLE"):
+        return None
+    points = list(dict.fromkeys(
+        _round(xy) for leg in legs for xy in (leg.get("_pick_xy"), leg.get("_drop_xy")) if xy
+    ))
+    if len(points) < 2 or len(points) > MAX_MATRIX_POINTS:
+        return None
+    matrix = get_distance_matrix(points, debug=debug)
+    km = {(a, b): matrix[i][j][0] for i, a in enumerate(points) for j, b in enumerate(points)}
+
+    def road(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+        d = km.get((_round(a), _round(b)))
+        return d if d is not None else _haversine(a, b)
+
+    return road
+
+
+# ------------------------ Entry point ------------------------
+
+def build_trips(
+    legs: List[Dict[str, Any]],
+    vehicle_type: str,
+    company: Optional[str] = None,
+    debug: Optional[List[str]] = None,
+    distance_fn: Optional[DistanceFn] = None,
+) -> List[Dict[str, Any]]:
+    """Trips (same shape as Transport Plan consolidation trips) for one vehicle type."""
+    debug = debug if debug is not None else []
+    if not legs:
+        return []
+
+    _attach_loads(legs)
+    _attach_coords(legs)
+    bins = _vehicle_bins(vehicle_type, company) if vehicle_type else []
+    if not bins:
+        debug.append(f"No vehicle capacities for vehicle type {vehicle_type}; using default trip limits")
+
+    speed = flt(frappe.db.get_single_value("Transport Settings", "routing_default_avg_speed_kmh")) or 50.0
+    packed = pack_legs(
+        _sweep_order(legs),
+        bins,
+        speed_kmh=speed,
+        service_min=_service_time_fn(),
+        distance_fn=distance_fn or _road_distance_fn(legs, debug) or _haversine,
+    )
+
+    trips = []
+    for t in packed:
+        trips.append({
+            "legs": t.legs,
+            "vehicle_type": vehicle_type,
+            "total_weight": t.load[0],
+            "total_volume": t.load[1],
+            "total_pallets": t.load[2],
+            "contains_dangerous_goods": any(leg.get("contains_dangerous_goods") for leg in t.legs),
+            "leg_count": len(t.legs),
+            "capacity": {k: (v if v != inf else None) for k, v in t.cap.items()},
+        })
+    debug.append(
+        f"Packed {len(legs)} legs into {len(trips)} trips for vehicle type {vehicle_type} "
+        f"({len(bins)} vehicle capacities)"
+    )
+    return trips
@@ -16,7 +16,7 @@ from frappe.utils import getdate, get_datetime, now_datetime, date_diff
 
 def get_alert_settings():
 	"""Return Logistics Settings (Alerts and Delays Notification tab fields)."""
-	return frappe.get_single("Logistics Settings")
+	return frappe.get_cached_doc("Logistics Settings")
 
 
 def get_indicator_for_severity(severity):
@@ -0,0 +1,327 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Long-running operations on the background queue instead of the web request.
+
+	job = enqueue_operation(
+		"logistics.transport.doctype.transport_plan.transport_plan.auto_allocate_and_create",
+		"Transport Plan", plan_name, title=_("Create Run Sheets"), consolidate_legs=1,
+	)
+
+records a Logistics Background Job and runs ``method(**kwargs)`` on the ``long`` queue as
+the requesting user. Only one job per (method, document) is queued or running at a time:
+enqueueing again returns the job already in flight, and a unique ``in_flight_key`` stops two
+concurrent requests from both queueing it. A failed job is requeued on its own record; when
+it is requeued with the same arguments, chunked loops resume after their last checkpoint.
+
+Inside the job the operation reports progress with ``report_progress`` and walks big
+lists with ``iter_chunks`` (commit + checkpoint after every chunk). Both are plain no-ops /
+iteration outside a background job, so the same function still runs synchronously.
+An operation that returns ``{"ok": False}`` or ``{"success": False}`` fails the job like one
+that raised.
+
+Progress and the final status are pushed to the reference form as the
+``logistics_background_job`` realtime event; ``get_background_job`` returns the same
+payload for polling.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, cstr, flt, get_datetime, now_datetime, time_diff_in_seconds
+
+JOB_DOCTYPE = "Logistics Background Job"
+REALTIME_EVENT = "logistics_background_job"
+
+STATUS_QUEUED = "Queued"
+STATUS_RUNNING = "Running"
+STATUS_COMPLETED = "Completed"
+STATUS_FAILED = "Failed"
+
+DEFAULT_TIMEOUT = 60 * 60
+DEFAULT_CHUNK_SIZE = 50
+PROGRESS_INTERVAL = 1.0  # seconds between realtime progress events
+KEEP_DAYS = 14
+
+_PROGRESS_KEY = "logistics:background_job_progress:{0}"
+
+
+def current_job():
+	"""The Logistics Background Job running in this worker, or None."""
+	return getattr(frappe.local, "logistics_background_job", None)
+
+
+def enqueue_operation(method, ref_doctype=None, ref_name=None, title=None, queue="long", timeout=DEFAULT_TIMEOUT, **kwargs):
+	"""Queue ``method(**kwargs)`` for ``ref_doctype`` / ``ref_name`` unless it is already in flight; returns the job payload."""
+	job = _in_flight(method, ref_doctype, ref_name)
+	if job and job.status in (STATUS_QUEUED, STATUS_RUNNING):
+		return _payload(job)
+
+	arguments = frappe.as_json(kwargs)
+	values = {
+		"status": STATUS_QUEUED,
+		"title": title or method.rsplit(".", 1)[-1].replace("_", " ").title(),
+		"user": frappe.session.user,
+		"queue": queue,
+		"timeout": cint(timeout),
+		"arguments": arguments,
+		"progress": 0,
+		"progress_message": None,
+		"result": None,
+		"error_message": None,
+		"error_log": None,
+		"started_at": None,
+		"ended_at": None,
+	}
+	key = _in_flight_key(method, ref_doctype, ref_name)
+	frappe.db.savepoint("logistics_enqueue_operation")
+	if job:
+		# failed earlier: the checkpoint only applies to a rerun over the same arguments
+		if job.arguments != arguments:
+			values["checkpoint"] = None
+		job.update(values)
+		job.save(ignore_permissions=True)
+	else:
+		job = frappe.get_doc(dict(values, doctype=JOB_DOCTYPE, method=method, ref_doctype=ref_doctype, ref_name=ref_name))
+		job.insert(ignore_permissions=True)
+
+	if not _claim(job.name, key):
+		# another request queued the same operation since _in_flight looked
+		frappe.db.rollback(save_point="logistics_enqueue_operation")
+		return _payload(
+			frappe.db.get_value(JOB_DOCTYPE, {"in_flight_key": key}, "*", as_dict=True, for_update=True) or job
+		)
+
+	frappe.enqueue(
+		"logistics.utils.background_jobs.run_operation",
+		queue=queue,
+		timeout=cint(timeout),
+		job_name="{0}:{1}".format(method.rsplit(".", 1)[-1], ref_name or ""),
+		enqueue_after_commit=True,
+		background_job=job.name,
+	)
+	return _payload(job)
+
+
+def _in_flight(method, ref_doctype, ref_name):
+	"""Latest queued / running / failed job of ``method`` for the document (stale runs are marked failed)."""
+	rows = frappe.get_all(
+		JOB_DOCTYPE,
+		filters=dict(
+			_job_filters(method, ref_doctype, ref_name),
+			status=["in", [STATUS_QUEUED, STATUS_RUNNING, STATUS_FAILED]],
+		),
+		fields=["name"],
+		order_by="creation desc",
+		limit=1,
+	)
+	if not rows:
+		return None
+	job = frappe.get_doc(JOB_DOCTYPE, rows[0].name)
+	if job.status in (STATUS_QUEUED, STATUS_RUNNING) and _is_stale(job):
+		job.status = STATUS_FAILED
+		job.error_message = _("The job did not finish within its timeout.")
+		job.ended_at = now_datetime()
+		job.in_flight_key = None
+		job.save(ignore_permissions=True)
+	return job
+
+
+def _in_flight_key(method, ref_doctype, ref_name):
+	raw = "\x1f".join((method, ref_doctype or "", ref_name or ""))
+	return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _claim(job_name, key):
+	"""
+	Mark the job as the one in flight for its operation and document.
+
+	The unique index on ``in_flight_key`` makes a concurrent claim wait for the other
+	transaction and then fail; returns False in that case.
+	"""
+	try:
+		frappe.db.sql(f"UPDATE `tab{JOB_DOCTYPE}` SET in_flight_key = %s WHERE name = %s", (key, job_name))
+	except Exception as e:
+		if not frappe.db.is_unique_key_violation(e):
+			raise
+		return False
+	return True
+
+
+def _job_filters(method, ref_doctype, ref_name):
+	return {
+		"method": method,
+		"ref_doctype": ref_doctype or ["is", "not set"],
+		"ref_name": ref_name or ["is", "not set"],
+	}
+
+
+def _is_stale(job):
+	# modified moves with every checkpoint, so long chunked runs stay alive
+	limit = (cint(job.timeout) or DEFAULT_TIMEOUT) + 5 * 60
+	return time_diff_in_seconds(now_datetime(), get_datetime(job.modified)) > limit
+
+
+def _reported_failure(result):
+	"""Error message of a result dict that reports failure (``ok`` / ``success`` False), else None."""
+	if not isinstance(result, dict) or False not in (result.get("ok"), result.get("success")):
+		return None
+	return cstr(result.get("message") or result.get("error")) or _("Operation reported a failure")
+
+
+def run_operation(background_job):
+	"""Background worker entry point for one Logistics Background Job."""
+	job = frappe.get_doc(JOB_DOCTYPE, background_job)
+	if job.status != STATUS_QUEUED:
+		return
+	job.db_set({"status": STATUS_RUNNING, "started_at": now_datetime()}, commit=True)
+	frappe.local.logistics_background_job = job
+	frappe.local.logistics_background_job_published = 0.0
+	_publish(job)
+	try:
+		result = frappe.get_attr(job.method)(**json.loads(job.arguments or "{}"))
+	except Exception as e:
+		frappe.db.rollback()
+		error_log = frappe.log_error(title=_("Background job failed: {0}").format(job.title))
+		job.db_set(
+			{
+				"status": STATUS_FAILED,
+				"in_flight_key": None,
+				"ended_at": now_datetime(),
+				"error_message": cstr(e) or type(e).__name__,
+				"error_log": error_log.name if error_log else None,
+			},
+			commit=True,
+		)
+	else:
+		error = _reported_failure(result)
+		if error is None:
+			frappe.db.commit()
+			values = {"status": STATUS_COMPLETED, "progress": 100}
+		else:
+			frappe.db.rollback()
+			values = {"status": STATUS_FAILED, "error_message": error}
+		values.update({"in_flight_key": None, "ended_at": now_datetime(), "result": frappe.as_json(result)})
+		job.db_set(values, commit=True)
+	finally:
+		frappe.local.logistics_background_job = None
+		frappe.cache.delete_value(_PROGRESS_KEY.format(job.name))
+	_publish(job)
+
+
+def report_progress(done, total, message=None):
+	"""Publish progress of the running job (throttled); no-op outside a background job."""
+	job = current_job()
+	if job is None:
+		return
+	percent = min(100.0, flt(done) * 100.0 / flt(total)) if flt(total) > 0 else 0.0
+	now = time.monotonic()
+	if done < total and now - getattr(frappe.local, "logistics_background_job_published", 0.0) < PROGRESS_INTERVAL:
+		return
+	frappe.local.logistics_background_job_published = now
+	state = {"progress": percent, "progress_message": cstr(message or "")}
+	frappe.cache.set_value(_PROGRESS_KEY.format(job.name), state, expires_in_sec=cint(job.timeout) or DEFAULT_TIMEOUT)
+	_publish(job, state)
+
+
+def iter_chunks(items, key, chunk_size=DEFAULT_CHUNK_SIZE, item_key=None, message=None):
+	"""
+	Yield ``items`` in chunks sorted by ``item_key`` (default: the item itself, compared as text).
+
+	In a background job every finished chunk is committed together with a checkpoint
+	(the key of its last item) stored under ``key``; a requeued job skips items up to the
+	checkpoint, so the list may change between runs. Outside a job this is plain chunking.
+	"""
+	item_key = item_key or (lambda item: item)
+	items = sorted(items, key=lambda item: cstr(item_key(item)))
+	job = current_job()
+	total = len(items)
+	done = 0
+	if job is not None:
+		last = _checkpoints(job).get(key)
+		if last is not None:
+			items = [item for item in items if cstr(item_key(item)) > last]
+			done = total - len(items)
+	for offset in range(0, len(items), chunk_size):
+		chunk = items[offset : offset + chunk_size]
+		yield chunk
+		done += len(chunk)
+		if job is not None:
+			checkpoints = _checkpoints(job)
+			checkpoints[key] = cstr(item_key(chunk[-1]))
+			job.db_set("checkpoint", frappe.as_json(checkpoints))
+			frappe.db.commit()
+		report_progress(done, total, message)
+
+
+def _checkpoints(job):
+	try:
+		return json.loads(job.checkpoint or "{}")
+	except ValueError:
+		return {}
+
+
+def _payload(job, state=None):
+	payload = {
+		"name": job.name,
+		"title": job.title,
+		"status": job.status,
+		"method": job.method,
+		"ref_doctype": job.ref_doctype,
+		"ref_name": job.ref_name,
+		"progress": flt(job.progress),
+		"progress_message": job.progress_message,
+		"error_message": job.error_message,
+		"result": json.loads(job.result) if job.status == STATUS_COMPLETED and job.result else None,
+	}
+	if job.status == STATUS_RUNNING:
+		payload.update(state or frappe.cache.get_value(_PROGRESS_KEY.format(job.name)) or {})
+	return payload
+
+
+def _publish(job, state=None):
+	payload = _payload(job, state)
+	if job.ref_doctype and job.ref_name:
+		frappe.publish_realtime(REALTIME_EVENT, payload, doctype=job.ref_doctype, docname=job.ref_name)
+	else:
+		frappe.publish_realtime(REALTIME_EVENT, payload, user=job.user)
+
+
+def _can_read(job):
+	if job.user == frappe.session.user or "System Manager" in frappe.get_roles():
+		return True
+	return bool(job.ref_doctype and job.ref_name and frappe.has_permission(job.ref_doctype, "read", job.ref_name))
+
+
+@frappe.whitelist()
+def get_background_job(name):
+	"""Status, progress, result and error of a Logistics Background Job (for polling)."""
+	job = frappe.get_doc(JOB_DOCTYPE, name)
+	if not _can_read(job):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+	return _payload(job)
+
+
+@frappe.whitelist()
+def get_latest_background_job(method, ref_doctype=None, ref_name=None):
+	"""Most recent job of ``method`` for the document, so a reopened form can pick up a running job."""
+	rows = frappe.get_all(
+		JOB_DOCTYPE,
+		filters=_job_filters(method, ref_doctype, ref_name),
+		pluck="name",
+		order_by="creation desc",
+		limit=1,
+	)
+	return get_background_job(rows[0]) if rows else None
+
+
+def purge_finished_jobs():
+	"""Daily: drop completed / failed jobs older than ``KEEP_DAYS``."""
+	cutoff = add_days(now_datetime(), -KEEP_DAYS)
+	frappe.db.delete(JOB_DOCTYPE, {"status": ["in", [STATUS_COMPLETED, STATUS_FAILED]], "modified": ["<", cutoff]})
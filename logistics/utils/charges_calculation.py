@@ -13,10 +13,12 @@ import json
 
 import frappe
 from frappe import _
+from frappe.model import no_value_fields, numeric_fieldtypes
 from frappe.utils import cint, flt
 from typing import Any, Dict, List, Optional, Tuple
 
 from logistics.utils.rate_calculation_engine import RateCalculationEngine
+from logistics.utils.tariff_index import get_tariff_index
 
 # During parent Document.validate(), child rows may run validate() before the DB row reflects new totals.
 # Register the in-memory parent so charge math uses fresh aggregates (weight, chargeable, volume, …).
@@ -535,13 +537,16 @@ def _find_tariff_rate_match(
     """
     Find matching rate row on Tariff by item (or warehouse item_charge). Returns
     (normalized rate_data dict, raw child row, table_name), or None.
+    Rows come from the shared tariff index (logistics.utils.tariff_index) and are read-only.
     """
     if not tariff_name or not item_code:
         return None
     try:
-        tariff_doc = frappe.get_doc("Tariff", tariff_name)
+        tariff_index = get_tariff_index(tariff_name)
     except Exception:
         return None
+    if tariff_index is None:
+        return None
 
     tables: List[tuple] = list(TARIFF_RATE_TABLES)
     pref = SERVICE_PREFERRED_TARIFF_TABLE.get((service_type or "").strip())
@@ -553,10 +558,8 @@ def _find_tariff_rate_match(
         if table_name in seen_tables:
             continue
         seen_tables.add(table_name)
-        rows = getattr(tariff_doc, table_name, None) or []
-        for rate in rows:
-            if getattr(rate, item_field, None) != item_code:
-                continue
+        rate = tariff_index.first(table_name, item_field, item_code)
+        if rate is not None:
             return (_tariff_rate_row_to_rate_data(rate), rate, table_name)
     return None
 
@@ -926,6 +929,148 @@ def calculate_charge_cost(charge_doc: Any, parent_doc: Optional[Any] = None) ->
     return _calculate_charge_amount(charge_doc, parent_doc, is_revenue=False)
 
 
+# Parent aggregates (keys of _get_parent_actual_data) read per calculation method / unit type.
+# Mirrors _get_quantity_for_calculation_method; anything unmapped falls back to actual_quantity.
+CHARGE_METHOD_INPUTS = {
+    "Flat Rate": (),
+    "Fixed Amount": (),
+    "Percentage": (),
+    "Weight Break": ("actual_weight",),
+    "Qty Break": ("actual_pieces", "actual_weight"),
+}
+CHARGE_UNIT_TYPE_INPUTS = {
+    "weight": ("actual_weight",),
+    "chargeable weight": ("actual_chargeable_weight", "actual_weight"),
+    "volume": ("actual_volume",),
+    "piece": ("actual_pieces",),
+    "package": ("actual_pieces",),
+    "distance": ("actual_distance",),
+    "teu": ("actual_teu",),
+    "container": ("actual_containers",),
+    "operation time": ("actual_operation_time",),
+    "day": ("actual_days", "actual_operation_time"),
+    "item count": ("actual_item_count",),
+    "handling unit": ("actual_handling_units",),
+    "trip": ("actual_trips",),
+    "job": (),
+    "shipment": (),
+}
+# Header fields outside the quantity aggregates that change how every row is calculated.
+CHARGE_PARENT_INPUT_FIELDS = ("company", "is_internal_job", "main_job_type", "main_job")
+
+
+def _method_inputs(method: Optional[str], unit_type: Optional[str]) -> Tuple[str, ...]:
+    method = (method or "").strip()
+    if method in CHARGE_METHOD_INPUTS:
+        return CHARGE_METHOD_INPUTS[method]
+    return CHARGE_UNIT_TYPE_INPUTS.get((unit_type or "Weight").strip().lower(), ("actual_quantity",))
+
+
+def charge_parent_inputs(charge_doc: Any) -> set:
+    """Parent aggregates the revenue and cost methods of ``charge_doc`` read (raw and normalized method)."""
+    keys = set()
+    for method_fields, unit_type_fields in (
+        (REVENUE_METHOD_FIELDS, UNIT_TYPE_FIELDS),
+        (COST_METHOD_FIELDS, COST_UNIT_TYPE_FIELDS),
+    ):
+        method = _get_field(charge_doc, *method_fields)
+        if not method:
+            continue
+        unit_type = _get_field(charge_doc, *unit_type_fields) or "Weight"
+        keys.update(_method_inputs(method, unit_type))
+        keys.update(_method_inputs(*_normalize_calculation_method(method, unit_type)))
+    return keys
+
+
+def _charge_row_signature(row: Any) -> Dict:
+    """Comparable snapshot of a charge row's own values (form payload vs. database types)."""
+    signature = {}
+    for df in frappe.get_meta(row.doctype).fields:
+        if df.fieldtype in no_value_fields:
+            continue
+        value = row.get(df.fieldname)
+        if df.fieldtype in numeric_fieldtypes:
+            signature[df.fieldname] = flt(value, 6)
+        else:
+            signature[df.fieldname] = "" if value is None else str(value)
+    return signature
+
+
+def _has_linked_leg_distance(parent_doc: Any) -> bool:
+    """True when the parent's distance is read from linked Transport Leg rows in the database.
+
+    Such a distance is the same on the document and on ``get_doc_before_save()``, so a
+    leg route edit cannot be detected by comparing the two.
+    """
+    if flt(_get_field(parent_doc, "total_distance", "distance", "transport_distance", "distance_km", "total_distance_km") or 0) > 0:
+        return False
+    legs = getattr(parent_doc, "legs", None) or getattr(parent_doc, "routing_legs", None) or []
+    return any(
+        getattr(leg, "transport_leg", None)
+        and _get_field(leg, "distance_km", "actual_distance_km", "route_distance_km", "distance", "total_distance") is None
+        for leg in legs
+    )
+
+
+def _recalculate_every_charge(parent_doc: Any, before: Any) -> bool:
+    if before is None:
+        return True
+    # Internal jobs price revenue off the main job's charges, which live outside this document
+    if getattr(parent_doc, "doctype", None) in ("Transport Order", "Declaration Order") and cint(
+        getattr(parent_doc, "is_internal_job", 0)
+    ):
+        return True
+    return any(
+        (getattr(parent_doc, f, None) or "") != (getattr(before, f, None) or "") for f in CHARGE_PARENT_INPUT_FIELDS
+    )
+
+
+def sync_charges_with_parent(parent_doc: Any, table_field: str = "charges", force: bool = False) -> int:
+    """
+    Recalculate charge rows of ``parent_doc`` whose inputs changed since the last save.
+
+    A row is recalculated when it is new, when any of its own fields changed, or when a parent
+    aggregate its revenue/cost method reads (``charge_parent_inputs``) changed. Distance read from
+    linked Transport Legs cannot be compared, so distance-priced rows are always recalculated then. New parents,
+    ``force`` and ``parent_doc.flags.force_charge_recalc`` recalculate every row.
+    Tariff and Sales Quote break edits are picked up by the explicit Recalculate Charges actions.
+
+    Returns the number of rows recalculated.
+    """
+    rows = [row for row in parent_doc.get(table_field) or [] if hasattr(row, "calculate_charge_amount")]
+    if not rows:
+        return 0
+
+    before = None
+    if not force and not parent_doc.flags.get("force_charge_recalc") and not parent_doc.is_new():
+        before = parent_doc.get_doc_before_save()
+
+    if _recalculate_every_charge(parent_doc, before):
+        for row in rows:
+            row.calculate_charge_amount(parent_doc=parent_doc)
+        return len(rows)
+
+    now_data = _get_parent_actual_data(None, parent_doc)
+    before_data = _get_parent_actual_data(None, before)
+    changed = {key for key, value in now_data.items() if flt(value, 6) != flt(before_data.get(key), 6)}
+    if _has_linked_leg_distance(parent_doc):
+        changed.add("actual_distance")
+    before_rows = {row.name: row for row in before.get(table_field) or []}
+
+    recalculated = 0
+    for row in rows:
+        old = before_rows.get(row.name)
+        if (
+            old is not None
+            and not (changed & charge_parent_inputs(row))
+            and _charge_row_signature(row) == _charge_row_signature(old)
+        ):
+            continue
+        row.calculate_charge_amount(parent_doc=parent_doc)
+        recalculated += 1
+    return recalculated
+
+
 def _calculate_charge_amount(
     charge_doc: Any,
     parent_doc: Optional[Any],
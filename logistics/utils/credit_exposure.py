@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, Logistics Team and contributors
+# For license information, please see license.txt
+
+"""
+Customer credit exposure for credit-hold checks.
+
+``Customer Credit Exposure`` holds, per customer and company, the ERPNext customer
+outstanding (get_customer_outstanding: receivable balance plus unbilled Sales Orders and
+Delivery Notes) and the oldest due date of a submitted Sales Invoice with outstanding
+amount. Overdue checks compare that date with today minus the grace days, which is the
+same as scanning for any overdue invoice.
+
+Submit / cancel of Sales Invoice, Payment Entry, Journal Entry, Sales Order and Delivery
+Note recomputes the exposure of the customers they touch. Reads go through a short-TTL
+cache; a missing record is computed on first read. ``recompute_all`` runs nightly and
+corrects records that drifted (e.g. credit notes or reposts that bypass the hooks).
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate, now_datetime
+
+EXPOSURE_DOCTYPE = "Customer Credit Exposure"
+CACHE_TTL_SEC = 60
+_RECOMPUTE_COMMIT_EVERY = 100
+
+
+def _cache_key(customer, company):
+	return "logistics:credit_exposure:{0}".format(_record_name(customer, company))
+
+
+def _record_name(customer, company):
+	return hashlib.md5("\x1f".join((customer, company)).encode("utf-8")).hexdigest()
+
+
+def compute_exposure(customer, company):
+	"""Exposure of ``customer`` in ``company`` from ERPNext outstanding and open Sales Invoices."""
+	try:
+		from erpnext.selling.doctype.customer.customer import get_customer_outstanding
+
+		outstanding = flt(get_customer_outstanding(customer, company))
+	except ImportError:
+		outstanding = 0.0
+	oldest_due_date = frappe.db.sql(
+		"""
+		select min(due_date) from `tabSales Invoice`
+		where customer = %s and company = %s and docstatus = 1
+		and ifnull(outstanding_amount, 0) > 0
+		and due_date is not null
+		""",
+		(customer, company),
+	)[0][0]
+	return frappe._dict(
+		outstanding_amount=outstanding,
+		oldest_due_date=getdate(oldest_due_date) if oldest_due_date else None,
+	)
+
+
+def refresh_exposure(customer, company):
+	"""Recompute and store the exposure record; returns it."""
+	exposure = compute_exposure(customer, company)
+	now = now_datetime()
+	overdue = 1 if exposure.oldest_due_date and exposure.oldest_due_date < getdate() else 0
+	frappe.db.sql(
+		"""
+		insert into `tab{0}`
+			(name, creation, modified, owner, modified_by, docstatus, idx,
+			customer, company, outstanding_amount, oldest_due_date, overdue, last_computed)
+		values
+			(%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+			%(customer)s, %(company)s, %(outstanding_amount)s, %(oldest_due_date)s, %(overdue)s, %(now)s)
+		on duplicate key update
+			outstanding_amount = values(outstanding_amount),
+			oldest_due_date = values(oldest_due_date),
+			overdue = values(overdue),
+			last_computed = values(last_computed),
+			modified = values(modified)
+		""".format(EXPOSURE_DOCTYPE),
+		dict(
+			exposure,
+			name=_record_name(customer, company),
+			now=now,
+			user=frappe.session.user,
+			customer=customer,
+			company=company,
+			overdue=overdue,
+		),
+	)
+	frappe.cache.delete_value(_cache_key(customer, company))
+	return exposure
+
+
+def get_credit_exposure(customer, company):
+	"""Cached exposure (outstanding_amount, oldest_due_date) of ``customer`` in ``company``."""
+	key = _cache_key(customer, company)
+	cached = frappe.cache.get_value(key)
+	if cached is not None:
+		return frappe._dict(
+			outstanding_amount=flt(cached.get("outstanding_amount")),
+			oldest_due_date=getdate(cached["oldest_due_date"]) if cached.get("oldest_due_date") else None,
+		)
+	row = frappe.db.get_value(
+		EXPOSURE_DOCTYPE,
+		_record_name(customer, company),
+		["outstanding_amount", "oldest_due_date"],
+		as_dict=True,
+	)
+	if row:
+		exposure = frappe._dict(
+			outstanding_amount=flt(row.outstanding_amount),
+			oldest_due_date=getdate(row.oldest_due_date) if row.oldest_due_date else None,
+		)
+	else:
+		exposure = refresh_exposure(customer, company)
+	frappe.cache.set_value(
+		key,
+		{
+			"outstanding_amount": exposure.outstanding_amount,
+			"oldest_due_date": str(exposure.oldest_due_date) if exposure.oldest_due_date else None,
+		},
+		expires_in_sec=CACHE_TTL_SEC,
+	)
+	return exposure
+
+
+# ---------------------------------------------------------------------------
+# Maintain
+# ---------------------------------------------------------------------------
+
+def _customers_of(doc):
+	"""Customers whose exposure ``doc`` changes."""
+	if doc.doctype == "Payment Entry":
+		return [doc.party] if doc.get("party_type") == "Customer" and doc.get("party") else []
+	if doc.doctype == "Journal Entry":
+		return sorted({
+			row.party for row in doc.get("accounts") or []
+			if row.get("party_type") == "Customer" and row.get("party")
+		})
+	return [doc.customer] if doc.get("customer") else []
+
+
+def on_exposure_change(doc, method=None):
+	"""on_submit / on_cancel of receivable documents: recompute the exposure of their customers."""
+	if not doc.get("company"):
+		return
+	for customer in _customers_of(doc):
+		try:
+			refresh_exposure(customer, doc.company)
+		except Exception:
+			frappe.log_error(frappe.get_traceback(), "Credit exposure refresh")
+
+
+def recompute_all():
+	"""Nightly: recompute every exposure record and log how many had drifted."""
+	rows = frappe.get_all(
+		EXPOSURE_DOCTYPE,
+		fields=["customer", "company", "outstanding_amount", "oldest_due_date"],
+	)
+	drift = []
+	for i, row in enumerate(rows, 1):
+		try:
+			exposure = refresh_exposure(row.customer, row.company)
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(frappe.get_traceback(), "Credit exposure recompute")
+			continue
+		stored_due = getdate(row.oldest_due_date) if row.oldest_due_date else None
+		if abs(flt(row.outstanding_amount) - exposure.outstanding_amount) > 0.005 or stored_due != exposure.oldest_due_date:
+			drift.append({"customer": row.customer, "company": row.company})
+		if i % _RECOMPUTE_COMMIT_EVERY == 0:
+			frappe.db.commit()
+	frappe.db.commit()
+	if drift:
+		frappe.log_error(
+			title=_("Customer credit exposure drift corrected"),
+			message=frappe.as_json({"drift_count": len(drift), "drift": drift[:50]}),
+		)
@@ -5,6 +5,9 @@
 """
 Cross-module credit control: Customer logistics credit status, ERPNext credit limit,
 overdue Sales Invoices, and per-doctype rules in Logistics Settings.
+
+Outstanding and overdue checks read the cached Customer Credit Exposure
+(see logistics.utils.credit_exposure), not the live ledger.
 """
 
 from __future__ import unicode_literals
@@ -13,6 +16,8 @@ import frappe
 from frappe import _
 from frappe.utils import cint, flt, getdate, add_days
 
+from logistics.utils.credit_exposure import get_credit_exposure
+
 # DocTypes that participate in hooks (must match registered doc_events).
 # Party is resolved via get_credit_customer_for_doc (customer, local_customer, booking_party, …).
 CREDIT_SUBJECT_DOCTYPES = (
@@ -152,13 +157,13 @@ def is_credit_limit_breached(customer, company):
 	if not customer or not company:
 		return False
 	try:
-		from erpnext.selling.doctype.customer.customer import get_credit_limit, get_customer_outstanding
+		from erpnext.selling.doctype.customer.customer import get_credit_limit
 	except ImportError:
 		return False
 	limit = flt(get_credit_limit(customer, company))
 	if limit <= 0:
 		return False
-	outstanding = flt(get_customer_outstanding(customer, company))
+	outstanding = get_credit_exposure(customer, company).outstanding_amount
 	return outstanding > limit
 
 
@@ -166,18 +171,8 @@ def has_overdue_outstanding_invoices(customer, company, grace_days=0):
 	if not customer or not company:
 		return False
 	cutoff = add_days(getdate(), -cint(grace_days))
-	return bool(
-		frappe.db.sql(
-			"""
-			select name from `tabSales Invoice`
-			where customer = %s and company = %s and docstatus = 1
-			and ifnull(outstanding_amount, 0) > 0
-			and due_date is not null and due_date < %s
-			limit 1
-			""",
-			(customer, company, cutoff),
-		)
-	)
+	oldest_due_date = get_credit_exposure(customer, company).oldest_due_date
+	return bool(oldest_due_date and oldest_due_date < getdate(cutoff))
 
 
 def credit_hold_reasons(customer, company, settings):
@@ -15,10 +15,13 @@ to preserve physical quantity.
 
 from __future__ import annotations
 
+import time
+from collections import deque
+
 import frappe
 from frappe import _
 from frappe.utils import flt
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 
 UOM_TYPE = Literal["dimension", "volume", "weight", "chargeable_weight"]
 
@@ -37,7 +40,7 @@ def get_base_uoms() -> Dict[str, Optional[str]]:
 	"""
 	out = {"dimension": None, "volume": None, "weight": None}
 	try:
-		settings = frappe.get_single("Logistics Settings")
+		settings = frappe.get_cached_doc("Logistics Settings")
 		out["dimension"] = getattr(settings, "base_dimension_uom", None) or None
 		out["volume"] = getattr(settings, "base_volume_uom", None) or None
 		out["weight"] = getattr(settings, "base_weight_uom", None) or None
@@ -54,7 +57,7 @@ def get_default_uoms(company: Optional[str] = None) -> Dict[str, Optional[str]]:
 	Returns:
 		Dict with keys: dimension, volume, weight, chargeable_weight.
 	"""
-	settings = frappe.get_single("Logistics Settings")
+	settings = frappe.get_cached_doc("Logistics Settings")
 	out = {
 		"dimension": getattr(settings, "default_dimension_uom", None) or None,
 		"volume": getattr(settings, "default_volume_uom", None) or None,
@@ -62,31 +65,6 @@ def get_default_uoms(company: Optional[str] = None) -> Dict[str, Optional[str]]:
 		"chargeable_weight": getattr(settings, "default_chargeable_weight_uom", None) or None,
 	}
 	missing = []
-	# region agent log
-	try:
-		import json as _agent_json
-		import time as _agent_time
-		_agent_payload = {
-			"sessionId": "8bf7dd",
-			"hypothesisId": "H1",
-			"location": "measurements.py:get_default_uoms",
-			"message": "logistics settings default uoms read",
-			"data": {
-				"company_arg": company,
-				"dimension": out.get("dimension"),
-				"volume": out.get("volume"),
-				"weight": out.get("weight"),
-				"chargeable_weight": out.get("chargeable_weight"),
-				"settings_name": getattr(settings, "name", None),
-			},
-			"timestamp": int(_agent_time.time() * 1000),
-		}
-		open("/home/frappe/frappe-bench/apps/logistics/.cursor/debug-8bf7dd.log", "a").write(
-			_agent_json.dumps(_agent_payload) + "\n"
-		)
-	except Exception:
-		pass
-	# endregion
 	if not out["dimension"]:
 		missing.append(_("Default Dimension UOM"))
 	if not out["volume"]:
@@ -94,24 +72,6 @@ def get_default_uoms(company: Optional[str] = None) -> Dict[str, Optional[str]]:
 	if not out["weight"]:
 		missing.append(_("Default Weight UOM"))
 	if missing:
-		# region agent log
-		try:
-			import json as _agent_json2
-			import time as _agent_time2
-			_agent_payload2 = {
-				"sessionId": "8bf7dd",
-				"hypothesisId": "H2",
-				"location": "measurements.py:get_default_uoms",
-				"message": "throwing for missing uoms",
-				"data": {"missing_keys": ["dimension", "volume", "weight"] if len(missing) == 3 else "partial", "missing_count": len(missing)},
-				"timestamp": int(_agent_time2.time() * 1000),
-			}
-			open("/home/frappe/frappe-bench/apps/logistics/.cursor/debug-8bf7dd.log", "a").write(
-				_agent_json2.dumps(_agent_payload2) + "\n"
-			)
-		except Exception:
-			pass
-		# endregion
 		frappe.throw(
 			_("Logistics Settings: please set {0}.").format(", ".join(missing)),
 			title=_("UOM Required"),
@@ -178,53 +138,131 @@ def _normalize_uom_alias(uom: str) -> str:
 	return aliases.get(uom, uom)
 
 
-def get_uom_conversion_factor(from_uom: str, to_uom: str) -> float:
+# Conversion matrix: UOM Conversion Factor and Dimension Volume UOM Conversion are loaded once per
+# site in each worker and rebuilt when either doctype changes (Redis generation token) or after UOM_MATRIX_TTL.
+UOM_MATRIX_TTL = 900
+_UOM_MATRIX_GENERATION_KEY = "logistics:uom_matrix_gen"
+_uom_matrices = {}  # site -> (generation, loaded_at, UomConversionMatrix)
+
+
+class UomConversionMatrix:
 	"""
-	Conversion factor between two UOMs from UOM Conversion Factor (Frappe).
-	Multiply source value by this to get target value.
-	Handles common UOM aliases (e.g., CBM = CUBIC METER).
+	Factors between UOMs, including transitive paths (e.g. GRAM -> KILOGRAM -> POUND).
+
+	A direct record beats its inverse, and both beat longer chains (breadth-first search).
+	Keys are upper-cased, alias-normalized UOM names; results are memoized per pair.
 	"""
-	if not from_uom or not to_uom:
-		return 1.0
-	from_uom = str(from_uom).strip().upper()
-	to_uom = str(to_uom).strip().upper()
-	
-	# Normalize aliases to canonical form
-	from_uom_normalized = _normalize_uom_alias(from_uom)
-	to_uom_normalized = _normalize_uom_alias(to_uom)
-	
-	# If normalized forms are the same, they're the same unit
-	if from_uom_normalized == to_uom_normalized:
-		return 1.0
-	
-	# Use normalized forms for database lookup
-	from_uom = from_uom_normalized
-	to_uom = to_uom_normalized
+
+	def __init__(self, factors, dimension_volume):
+		self.edges: Dict[str, Dict[str, float]] = {}
+		factors = [(_normalize_uom_alias(a), _normalize_uom_alias(b), flt(v)) for a, b, v in factors if a and b and flt(v) > 0]
+		for a, b, v in factors:
+			self.edges.setdefault(a, {}).setdefault(b, v)
+		for a, b, v in factors:
+			self.edges.setdefault(b, {}).setdefault(a, 1.0 / v)
+		self.dimension_volume = {}
+		for dim_uom, vol_uom, v in dimension_volume:
+			if dim_uom and vol_uom and flt(v):
+				self.dimension_volume.setdefault((str(dim_uom).strip().upper(), str(vol_uom).strip().upper()), flt(v))
+		self._factors: Dict[tuple, Optional[float]] = {}
+		self._volume_factors: Dict[tuple, Optional[float]] = {}
+
+	def factor(self, from_uom: str, to_uom: str) -> Optional[float]:
+		"""Multiply a value in ``from_uom`` by this to get ``to_uom``; None when no path exists."""
+		key = (_normalize_uom_alias(from_uom), _normalize_uom_alias(to_uom))
+		if key[0] == key[1]:
+			return 1.0
+		if key not in self._factors:
+			self._factors[key] = self._search(*key)
+		return self._factors[key]
+
+	def _search(self, source: str, target: str) -> Optional[float]:
+		seen = {source}
+		queue = deque([(source, 1.0)])
+		while queue:
+			node, factor = queue.popleft()
+			for nxt, f in self.edges.get(node, {}).items():
+				if nxt == target:
+					return factor * f
+				if nxt not in seen:
+					seen.add(nxt)
+					queue.append((nxt, factor * f))
+		return None
+
+	def volume_factor(self, dimension_uom: str, volume_uom: str) -> Optional[float]:
+		"""(dimension_uom)³ -> volume_uom: record (exact name, then aliases), else built-in factor."""
+		key = (str(dimension_uom).strip().upper(), str(volume_uom).strip().upper())
+		if key not in self._volume_factors:
+			found = None
+			for d in _get_dimension_volume_uom_lookup_names(dimension_uom, "dimension"):
+				for v in _get_dimension_volume_uom_lookup_names(volume_uom, "volume"):
+					found = self.dimension_volume.get((d.upper(), v.upper()))
+					if found:
+						break
+				if found:
+					break
+			if not found:
+				found = _get_builtin_dimension_volume_factor(dimension_uom, volume_uom)
+			self._volume_factors[key] = found
+		return self._volume_factors[key]
+
+
+def _load_uom_matrix() -> UomConversionMatrix:
+	factors, dimension_volume = [], []
 	try:
-		conversion = frappe.db.get_value(
-			"UOM Conversion Factor",
-			{"from_uom": from_uom, "to_uom": to_uom},
-			"value",
-			as_dict=True,
+		factors = frappe.get_all(
+			"UOM Conversion Factor", fields=["from_uom", "to_uom", "value"], order_by="creation asc", as_list=True
 		)
-		if conversion and conversion.get("value"):
-			return flt(conversion.get("value"))
 	except Exception:
 		pass
 	try:
-		conversion = frappe.db.get_value(
-			"UOM Conversion Factor",
-			{"from_uom": to_uom, "to_uom": from_uom},
-			"value",
-			as_dict=True,
+		dimension_volume = frappe.get_all(
+			"Dimension Volume UOM Conversion",
+			filters={"enabled": 1},
+			fields=["dimension_uom", "volume_uom", "conversion_factor"],
+			order_by="creation asc",
+			as_list=True,
 		)
-		if conversion and conversion.get("value"):
-			return 1.0 / flt(conversion.get("value"))
-	except Exception:
-		pass
+	except Exception as e:
+		frappe.log_error(
+			_("Unexpected error fetching conversion: {0}").format(str(e)),
+			"Volume Conversion Database Error",
+		)
+	return UomConversionMatrix(factors, dimension_volume)
+
+
+def get_uom_conversion_matrix() -> UomConversionMatrix:
+	"""Shared conversion matrix of this site in this worker."""
+	site = frappe.local.site
+	generation = frappe.cache.get_value(_UOM_MATRIX_GENERATION_KEY) or "0"
+	cached = _uom_matrices.get(site)
+	if cached and cached[0] == generation and time.monotonic() - cached[1] < UOM_MATRIX_TTL:
+		return cached[2]
+	matrix = _load_uom_matrix()
+	_uom_matrices[site] = (generation, time.monotonic(), matrix)
+	return matrix
+
+
+def invalidate_uom_conversion_matrix(doc=None, method=None):
+	"""UOM Conversion Factor / Dimension Volume UOM Conversion doc_events: rebuild in every worker."""
+	_uom_matrices.pop(frappe.local.site, None)
+	frappe.cache.set_value(_UOM_MATRIX_GENERATION_KEY, frappe.generate_hash(length=10))
+
+
+def get_uom_conversion_factor(from_uom: str, to_uom: str) -> float:
+	"""
+	Conversion factor between two UOMs from UOM Conversion Factor (Frappe).
+	Multiply source value by this to get target value.
+	Handles common UOM aliases (e.g., CBM = CUBIC METER) and chains of records.
+	"""
+	if not from_uom or not to_uom:
+		return 1.0
+	factor = get_uom_conversion_matrix().factor(from_uom, to_uom)
+	if factor:
+		return factor
 	frappe.throw(
 		_("UOM conversion not found: {0} to {1}. Please add a UOM Conversion Factor record.").format(
-			from_uom, to_uom
+			_normalize_uom_alias(from_uom), _normalize_uom_alias(to_uom)
 		),
 		title=_("Conversion Not Found"),
 	)
@@ -369,7 +407,8 @@ def get_volume_conversion_factor(
 	"""
 	Conversion factor from (dimension_uom)³ to volume_uom from Dimension Volume UOM Conversion.
 	Multiply raw_volume (L×W×H in dimension_uom) by this to get volume in volume_uom.
-	Tries exact match first, then alternative UOM names (e.g. Centimeter/CM, Cubic Meter/CBM).
+	Tries exact match first, then alternative UOM names (e.g. Centimeter/CM, Cubic Meter/CBM),
+	then built-in factors for common pairs.
 	"""
 	if not dimension_uom or not volume_uom:
 		raise ConversionNotFoundError(_("Dimension UOM and Volume UOM are required"))
@@ -377,48 +416,9 @@ def get_volume_conversion_factor(
 	vol_uom = (volume_uom or "").strip()
 	if dim_uom.upper() == vol_uom.upper():
 		return 1.0
-	# Query by UOM name as stored (Link to UOM stores doc name e.g. "Centimeter", "Cubic Meter")
-	conversion = None
-	try:
-		conversion = frappe.db.get_value(
-			"Dimension Volume UOM Conversion",
-			{"dimension_uom": dim_uom, "volume_uom": vol_uom, "enabled": 1},
-			"conversion_factor",
-			as_dict=True,
-		)
-	except (frappe.DoesNotExistError, frappe.ValidationError):
-		pass
-	except Exception as e:
-		frappe.log_error(
-			_("Unexpected error fetching conversion: {0}").format(str(e)),
-			"Volume Conversion Database Error",
-		)
-	if conversion and conversion.get("conversion_factor"):
-		return flt(conversion.get("conversion_factor"))
-	# Try alternative UOM names (e.g. "Centimeter" -> "CM", "Cubic Meter" -> "CBM")
-	dim_candidates = _get_dimension_volume_uom_lookup_names(dim_uom, "dimension")
-	vol_candidates = _get_dimension_volume_uom_lookup_names(vol_uom, "volume")
-	for d in dim_candidates:
-		for v in vol_candidates:
-			if d == dim_uom and v == vol_uom:
-				continue
-			try:
-				conv = frappe.db.get_value(
-					"Dimension Volume UOM Conversion",
-					{"dimension_uom": d, "volume_uom": v, "enabled": 1},
-					"conversion_factor",
-					as_dict=True,
-				)
-				if conv and conv.get("conversion_factor"):
-					return flt(conv.get("conversion_factor"))
-			except (frappe.DoesNotExistError, frappe.ValidationError):
-				pass
-			except Exception:
-				pass
-	# Use built-in factors for common dimension→volume pairs when no DB record exists
-	builtin = _get_builtin_dimension_volume_factor(dim_uom, vol_uom)
-	if builtin is not None:
-		return builtin
+	factor = get_uom_conversion_matrix().volume_factor(dim_uom, vol_uom)
+	if factor is not None:
+		return factor
 	raise ConversionNotFoundError(
 		_("No conversion factor found from {0} to {1}. Please create a Dimension Volume UOM Conversion record.").format(
 			dimension_uom, volume_uom
@@ -441,9 +441,10 @@ def convert_dimension(
 	if value is None or value == 0:
 		return 0.0
 	value = flt(value)
-	defaults = get_default_uoms(company)
-	from_uom = from_uom or defaults.get("dimension")
-	to_uom = to_uom or defaults.get("dimension")
+	if not from_uom or not to_uom:
+		defaults = get_default_uoms(company)
+		from_uom = from_uom or defaults.get("dimension")
+		to_uom = to_uom or defaults.get("dimension")
 	if not from_uom or not to_uom:
 		frappe.throw(
 			_("Dimension UOM is required. Set default in Logistics Settings or pass from_uom and to_uom."),
@@ -465,9 +466,10 @@ def convert_volume(
 	if value is None or value == 0:
 		return 0.0
 	value = flt(value)
-	defaults = get_default_uoms(company)
-	from_uom = from_uom or defaults.get("volume")
-	to_uom = to_uom or defaults.get("volume")
+	if not from_uom or not to_uom:
+		defaults = get_default_uoms(company)
+		from_uom = from_uom or defaults.get("volume")
+		to_uom = to_uom or defaults.get("volume")
 	if not from_uom or not to_uom:
 		frappe.throw(
 			_("Volume UOM is required. Set default in Logistics Settings or pass from_uom and to_uom."),
@@ -489,9 +491,10 @@ def convert_weight(
 	if value is None or value == 0:
 		return 0.0
 	value = flt(value)
-	defaults = get_default_uoms(company)
-	from_uom = from_uom or defaults.get("weight")
-	to_uom = to_uom or defaults.get("weight")
+	if not from_uom or not to_uom:
+		defaults = get_default_uoms(company)
+		from_uom = from_uom or defaults.get("weight")
+		to_uom = to_uom or defaults.get("weight")
 	if not from_uom or not to_uom:
 		frappe.throw(
 			_("Weight UOM is required. Set default in Logistics Settings or pass from_uom and to_uom."),
@@ -503,6 +506,36 @@ def convert_weight(
 	return value * factor
 
 
+def convert_rows(
+	rows: List[Any],
+	value_field: str,
+	uom_field: str,
+	to_uom: str,
+	default_uom: Optional[str] = None,
+) -> List[float]:
+	"""
+	Batch convert ``value_field`` of many rows (Documents or dicts) to ``to_uom``.
+
+	Factors are resolved once per distinct source UOM. Rows without a value or UOM (and
+	no ``default_uom``) come back as their raw value.
+	"""
+	target = str(to_uom or "").strip().upper()
+	factors: Dict[str, float] = {}
+	out = []
+	for row in rows or []:
+		get = row.get if hasattr(row, "get") else lambda k: getattr(row, k, None)
+		value = flt(get(value_field))
+		from_uom = get(uom_field) or default_uom
+		if not value or not from_uom or not target:
+			out.append(value)
+			continue
+		key = str(from_uom).strip().upper()
+		if key not in factors:
+			factors[key] = 1.0 if key == target else get_uom_conversion_factor(from_uom, to_uom)
+		out.append(value * factors[key])
+	return out
+
+
 def compute_density_factor(
 	volume: float,
 	weight: float,
@@ -703,12 +736,7 @@ def apply_measurement_uom_conversion_to_children(
 	children = getattr(doc, child_table_fieldname, None) or []
 	if not children or not doc.get("name"):
 		return
-	try:
-		existing = frappe.get_doc(doc.doctype, doc.name)
-	except Exception:
-		return
-	existing_children = getattr(existing, child_table_fieldname, None) or []
-	existing_by_name = {c.name: c for c in existing_children if c.get("name")}
+	existing_by_name = _stored_child_uoms(doc, child_table_fieldname)
 	for row in children:
 		name = row.get("name")
 		if not name or str(name).startswith("new"):
@@ -729,6 +757,28 @@ def apply_measurement_uom_conversion_to_children(
 			convert_measurements_to_uom(row, uom_type, new_uom, old_uom=old_uom, company=company)
 
 
+def _stored_child_uoms(doc: Any, child_table_fieldname: str) -> Dict[str, Any]:
+	"""UOM fields of the saved child rows, from doc_before_save or one child-table query."""
+	before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if before is not None:
+		return {c.name: c for c in before.get(child_table_fieldname) or [] if c.get("name")}
+	try:
+		child_doctype = frappe.get_meta(doc.doctype).get_field(child_table_fieldname).options
+		uom_fields = [
+			f
+			for f in ("dimension_uom", "volume_uom", "weight_uom", "chargeable_weight_uom")
+			if frappe.db.has_column(child_doctype, f)
+		]
+		rows = frappe.get_all(
+			child_doctype,
+			filters={"parent": doc.name, "parenttype": doc.doctype, "parentfield": child_table_fieldname},
+			fields=["name"] + uom_fields,
+		)
+	except Exception:
+		return {}
+	return {r.name: r for r in rows}
+
+
 @frappe.whitelist()
 def get_default_uoms_api(company: Optional[str] = None) -> Dict[str, Optional[str]]:
 	"""Whitelisted API for client scripts to fetch default UOMs."""
@@ -0,0 +1,240 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Opt-in save pipeline profiler.
+
+Off unless the site enables sampling in site_config.json::
+
+	"logistics_save_profile_rate": 0.05,           # share of saves sampled, 0 = off
+	"logistics_save_profile_min_ms": 500,          # keep only saves at least this slow
+	"logistics_save_profile_doctypes": ["Air Shipment", "Sea Shipment", "Transport Job"],
+	"logistics_save_profile_keep_days": 14
+
+A sampled ``insert`` / ``save`` (``submit`` and ``cancel`` go through ``save``) records wall
+time, query count and rows returned for every document event, split into the controller
+method and each doc_events hook, plus code wrapped with ``profiled``. The result is stored
+as one Save Profile Log; the Slowest Save Hooks report aggregates them.
+
+Installed from ``before_request`` / ``before_job``; nothing is patched while the rate is 0.
+"""
+
+from __future__ import unicode_literals
+
+import random
+import time
+from functools import wraps
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, flt, now_datetime
+
+LOG_DOCTYPE = "Save Profile Log"
+
+RATE_KEY = "logistics_save_profile_rate"
+MIN_MS_KEY = "logistics_save_profile_min_ms"
+DOCTYPES_KEY = "logistics_save_profile_doctypes"
+KEEP_DAYS_KEY = "logistics_save_profile_keep_days"
+
+KIND_EVENT = "Event"
+KIND_CONTROLLER = "Controller"
+KIND_HOOK = "Hook"
+KIND_SECTION = "Section"
+
+_installed = False
+_orig_run_method = None
+_orig_get_attr = None
+
+
+class _Profile(object):
+	"""Counters and per-(event, label) totals for one top-level save."""
+
+	def __init__(self, doc, action):
+		self.doctype = doc.doctype
+		self.action = action
+		self.queries = 0
+		self.rows = 0
+		self.events = []  # stack of (event label, doc_events handler paths)
+		self.entries = {}  # (event, kind, label) -> [calls, seconds, queries, rows]
+		self.started = time.perf_counter()
+
+	def measure(self, event, kind, label, fn, *args, **kwargs):
+		q0, r0, t0 = self.queries, self.rows, time.perf_counter()
+		try:
+			return fn(*args, **kwargs)
+		finally:
+			entry = self.entries.setdefault((event, kind, label), [0, 0.0, 0, 0])
+			entry[0] += 1
+			entry[1] += time.perf_counter() - t0
+			entry[2] += self.queries - q0
+			entry[3] += self.rows - r0
+
+	def current_event(self):
+		return self.events[-1][0] if self.events else "{0}.{1}".format(self.doctype, self.action)
+
+
+def _active():
+	return getattr(frappe.local, "save_profile", None)
+
+
+def _should_sample(doc):
+	rate = flt(frappe.conf.get(RATE_KEY))
+	if rate <= 0 or doc.doctype == LOG_DOCTYPE or doc.meta.istable:
+		return False
+	doctypes = frappe.conf.get(DOCTYPES_KEY)
+	if doctypes and doc.doctype not in doctypes:
+		return False
+	return random.random() < rate
+
+
+def _counting_sql(profile, sql):
+	@wraps(sql)
+	def sql_wrapper(*args, **kwargs):
+		result = sql(*args, **kwargs)
+		profile.queries += 1
+		if isinstance(result, (list, tuple)):
+			profile.rows += len(result)
+		return result
+
+	return sql_wrapper
+
+
+def _hook_handlers(doctype, method):
+	doc_hooks = frappe.get_doc_hooks()
+	return frozenset(
+		(doc_hooks.get(doctype, {}).get(method) or []) + (doc_hooks.get("*", {}).get(method) or [])
+	)
+
+
+def _profiled_entry(action, orig):
+	@wraps(orig)
+	def entry(self, *args, **kwargs):
+		if _active() is not None or not _should_sample(self):
+			return orig(self, *args, **kwargs)
+		profile = _Profile(self, action)
+		db = frappe.local.db  # the connection object itself, not the proxy
+		prev_sql = db.__dict__.get("sql")
+		db.sql = _counting_sql(profile, db.sql)
+		frappe.local.save_profile = profile
+		try:
+			result = orig(self, *args, **kwargs)
+		finally:
+			frappe.local.save_profile = None
+			if prev_sql is None:
+				del db.sql
+			else:
+				db.sql = prev_sql
+		_store(profile, self)
+		return result
+
+	return entry
+
+
+def _run_method(self, method, *args, **kwargs):
+	profile = _active()
+	if profile is None:
+		return _orig_run_method(self, method, *args, **kwargs)
+	event = "{0}.{1}".format(self.doctype, method)
+	controller = getattr(self, method, None)
+	wrap_controller = callable(controller) and method not in self.__dict__
+	if wrap_controller:
+		# run_method prefers an instance attribute over the class method
+		label = "{0}.{1}.{2}".format(type(self).__module__, type(self).__name__, method)
+		self.__dict__[method] = lambda *a, **kw: profile.measure(event, KIND_CONTROLLER, label, controller, *a, **kw)
+	profile.events.append((event, _hook_handlers(self.doctype, method)))
+	try:
+		return profile.measure(event, KIND_EVENT, event, _orig_run_method, self, method, *args, **kwargs)
+	finally:
+		profile.events.pop()
+		if wrap_controller:
+			self.__dict__.pop(method, None)
+
+
+def _get_attr(method_string):
+	fn = _orig_get_attr(method_string)
+	profile = _active()
+	if profile is None or not profile.events or not callable(fn):
+		return fn
+	event, handlers = profile.events[-1]
+	if method_string not in handlers:
+		return fn
+
+	@wraps(fn)
+	def hook(*args, **kwargs):
+		return profile.measure(event, KIND_HOOK, method_string, fn, *args, **kwargs)
+
+	return hook
+
+
+def profiled(fn):
+	"""Record calls of ``fn`` made during a profiled save (aggregated per event)."""
+	label = "{0}.{1}".format(fn.__module__, fn.__qualname__)
+
+	@wraps(fn)
+	def wrapper(*args, **kwargs):
+		profile = _active()
+		if profile is None:
+			return fn(*args, **kwargs)
+		return profile.measure(profile.current_event(), KIND_SECTION, label, fn, *args, **kwargs)
+
+	return wrapper
+
+
+def install():
+	"""before_request / before_job: patch Document once per process when sampling is enabled."""
+	global _installed, _orig_run_method, _orig_get_attr
+	if _installed or flt(frappe.conf.get(RATE_KEY)) <= 0:
+		return
+	_orig_run_method = Document.run_method
+	_orig_get_attr = frappe.get_attr
+	Document.run_method = _run_method
+	Document.save = _profiled_entry("save", Document.save)
+	Document.insert = _profiled_entry("insert", Document.insert)
+	frappe.get_attr = _get_attr
+	_installed = True
+
+
+def _store(profile, doc):
+	total_ms = (time.perf_counter() - profile.started) * 1000.0
+	if total_ms < flt(frappe.conf.get(MIN_MS_KEY)):
+		return
+	try:
+		entries = sorted(profile.entries.items(), key=lambda kv: kv[1][1], reverse=True)
+		log = frappe.get_doc(
+			{
+				"doctype": LOG_DOCTYPE,
+				"ref_doctype": doc.doctype,
+				"ref_name": doc.name,
+				"action": profile.action,
+				"user": frappe.session.user,
+				"total_ms": total_ms,
+				"queries": profile.queries,
+				"rows_read": profile.rows,
+				"entries": [
+					{
+						"event": event,
+						"kind": kind,
+						"label": label[:140],
+						"calls": calls,
+						"wall_ms": seconds * 1000.0,
+						"queries": queries,
+						"rows_read": rows,
+					}
+					for (event, kind, label), (calls, seconds, queries, rows) in entries
+				],
+			}
+		)
+		log.insert(ignore_permissions=True)
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "Save profiler")
+
+
+def purge_old_logs():
+	"""Daily: drop Save Profile Logs older than ``logistics_save_profile_keep_days`` (default 14)."""
+	keep_days = cint(frappe.conf.get(KEEP_DAYS_KEY)) or 14
+	cutoff = add_days(now_datetime(), -keep_days)
+	names = frappe.get_all(LOG_DOCTYPE, filters={"creation": ["<", cutoff]}, pluck="name")
+	if not names:
+		return
+	frappe.db.delete("Save Profile Log Entry", {"parent": ["in", names], "parenttype": LOG_DOCTYPE})
+	frappe.db.delete(LOG_DOCTYPE, {"name": ["in", names]})
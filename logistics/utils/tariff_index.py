@@ -0,0 +1,145 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+In-memory index of Tariff rate lines.
+
+Charge recalculation looks up a Tariff line per charge row (item code, and for transport
+the route / vehicle / load / container). Loading the full Tariff document and scanning
+its child tables on every lookup is linear in the tariff size, so large customer tariffs
+are loaded once per worker process and indexed lazily per (table, field):
+
+	index = get_tariff_index("TAR-0001")
+	row = index.first("transport_rates", "item_code", "FREIGHT")
+	rows = index.match("transport_rates", location_from="MNL", vehicle_type="10W", as_of="2026-10-01")
+
+Rows are shared between callers and must be treated as read-only. Cached indexes are
+dropped when the Tariff is saved or deleted (generation token in Redis, so every worker
+notices) and after ``TARIFF_INDEX_TTL`` seconds at the latest.
+"""
+
+from __future__ import unicode_literals
+
+import time
+from collections import OrderedDict
+
+import frappe
+from frappe.utils import getdate
+
+TARIFF_INDEX_TTL = 600
+MAX_CACHED_TARIFFS = 16
+
+# (site, tariff name) -> (generation, loaded_at, TariffIndex); workers serve several sites
+_indexes = OrderedDict()
+
+
+class TariffIndex(object):
+	"""Rate rows of one Tariff by table, with per-field posting lists built on first use."""
+
+	def __init__(self, name, tables):
+		self.name = name
+		self.tables = tables  # table fieldname -> [row dicts in idx order]
+		self._postings = {}
+
+	def rows(self, table):
+		return self.tables.get(table) or []
+
+	def _posting(self, table, field):
+		key = (table, field)
+		posting = self._postings.get(key)
+		if posting is None:
+			posting = {}
+			for pos, row in enumerate(self.rows(table)):
+				posting.setdefault(row.get(field), []).append(pos)
+			self._postings[key] = posting
+		return posting
+
+	def first(self, table, field, value):
+		"""First row (by idx) of ``table`` whose ``field`` equals ``value``, or None."""
+		positions = self._posting(table, field).get(value)
+		return self.rows(table)[positions[0]] if positions else None
+
+	def match(self, table, as_of=None, **criteria):
+		"""Rows of ``table`` equal to every truthy criterion (falsy criteria match anything), in idx order."""
+		postings = sorted(
+			(self._posting(table, field).get(value) or [] for field, value in criteria.items() if value),
+			key=len,
+		)
+		if postings:
+			positions = set(postings[0])
+			for posting in postings[1:]:
+				positions.intersection_update(posting)
+				if not positions:
+					break
+			rows = [self.rows(table)[pos] for pos in sorted(positions)]
+		else:
+			rows = list(self.rows(table))
+		if as_of:
+			as_of = getdate(as_of)
+			rows = [row for row in rows if _valid_on(row, as_of)]
+		return rows
+
+
+def _valid_on(row, on_date):
+	valid_from, valid_to = row.get("valid_from"), row.get("valid_to")
+	if valid_from and getdate(valid_from) > on_date:
+		return False
+	if valid_to and getdate(valid_to) < on_date:
+		return False
+	return True
+
+
+def _generation_key(tariff_name):
+	return "logistics:tariff_index_gen:{0}".format(tariff_name)
+
+
+def _generation(tariff_name):
+	return frappe.cache.get_value(_generation_key(tariff_name)) or "0"
+
+
+def _load(tariff_name):
+	if not frappe.db.exists("Tariff", tariff_name):
+		return None
+	tables = {}
+	for df in frappe.get_meta("Tariff").get_table_fields():
+		rows = frappe.get_all(
+			df.options,
+			filters={"parent": tariff_name, "parenttype": "Tariff", "parentfield": df.fieldname},
+			fields=["*"],
+			order_by="idx asc",
+		)
+		for row in rows:
+			row.doctype = df.options
+		tables[df.fieldname] = rows
+	return TariffIndex(tariff_name, tables)
+
+
+def get_tariff_index(tariff_name):
+	"""Indexed rate rows of ``tariff_name`` (None when the Tariff does not exist)."""
+	if not tariff_name:
+		return None
+	key = (frappe.local.site, tariff_name)
+	generation = _generation(tariff_name)
+	cached = _indexes.get(key)
+	if cached and cached[0] == generation and time.monotonic() - cached[1] < TARIFF_INDEX_TTL:
+		_indexes.move_to_end(key)
+		return cached[2]
+	index = _load(tariff_name)
+	if index is None:
+		_indexes.pop(key, None)
+		return None
+	_indexes[key] = (generation, time.monotonic(), index)
+	_indexes.move_to_end(key)
+	while len(_indexes) > MAX_CACHED_TARIFFS:
+		_indexes.popitem(last=False)
+	return index
+
+
+def invalidate_tariff_index(tariff_name):
+	_indexes.pop((frappe.local.site, tariff_name), None)
+	frappe.cache.set_value(_generation_key(tariff_name), frappe.generate_hash(length=10))
+
+
+def on_tariff_change(doc, method=None):
+	"""Tariff on_update / on_trash: rate lines changed, drop cached indexes in every worker."""
+	invalidate_tariff_index(doc.name)
@@ -0,0 +1,117 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the long-running operation layer."""
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.utils import background_jobs
+
+
+class _Job(frappe._dict):
+	def db_set(self, field, value=None, commit=False):
+		self.update(field if isinstance(field, dict) else {field: value})
+
+	def save(self, ignore_permissions=False):
+		self.saved = True
+
+
+class TestBackgroundJobs(UnitTestCase):
+	def _requeue(self, job, claimed=True, **kwargs):
+		with patch.object(background_jobs, "_in_flight", return_value=job), patch.object(
+			background_jobs, "_claim", return_value=claimed
+		), patch.object(frappe, "enqueue") as enqueue, patch.object(frappe.db, "savepoint"), patch.object(
+			frappe.db, "rollback"
+		) as rollback, patch.object(
+			frappe.db, "get_value", return_value=frappe._dict(name="BGJ-2", title="Other", status="Queued")
+		):
+			payload = background_jobs.enqueue_operation("pkg.op", "Company", "Co", **kwargs)
+		return payload, enqueue, rollback
+
+	def test_iter_chunks_is_plain_chunking_outside_a_job(self):
+		with patch.object(background_jobs, "current_job", return_value=None), patch.object(frappe.db, "commit") as commit:
+			chunks = list(background_jobs.iter_chunks(["c", "a", "e", "b", "d"], "names", chunk_size=2))
+		self.assertEqual(chunks, [["a", "b"], ["c", "d"], ["e"]])
+		commit.assert_not_called()
+
+	def test_iter_chunks_checkpoints_and_resumes(self):
+		job = _Job(name="BGJ-1", title="Test", status="Running", timeout=600, checkpoint='{"names": "b"}')
+		with patch.object(background_jobs, "current_job", return_value=job), patch.object(
+			frappe.db, "commit"
+		) as commit, patch.object(background_jobs, "report_progress") as progress:
+			chunks = list(background_jobs.iter_chunks(["a", "b", "c", "d", "e"], "names", chunk_size=2))
+		self.assertEqual(chunks, [["c", "d"], ["e"]])
+		self.assertEqual(frappe.parse_json(job.checkpoint), {"names": "e"})
+		self.assertEqual(commit.call_count, 2)
+		self.assertEqual(progress.call_args_list[-1][0][:2], (5, 5))
+
+	def test_report_progress_is_noop_outside_a_job(self):
+		with patch.object(background_jobs, "current_job", return_value=None), patch.object(
+			background_jobs, "_publish"
+		) as publish:
+			background_jobs.report_progress(1, 2)
+		publish.assert_not_called()
+
+	def test_enqueue_returns_job_in_flight(self):
+		running = _Job(
+			name="BGJ-1", title="Test", status="Running", method="pkg.op", ref_doctype="Transport Plan", ref_name="TP-1", progress=40
+		)
+		enqueue = MagicMock()
+		with patch.object(background_jobs, "_in_flight", return_value=running), patch.object(
+			frappe, "enqueue", enqueue
+		), patch.object(frappe.cache, "get_value", return_value=None):
+			payload = background_jobs.enqueue_operation("pkg.op", "Transport Plan", "TP-1", plan_name="TP-1")
+		enqueue.assert_not_called()
+		self.assertEqual((payload["name"], payload["status"]), ("BGJ-1", background_jobs.STATUS_RUNNING))
+
+	def test_failed_job_resumes_only_with_the_same_arguments(self):
+		args = frappe.as_json({"company": "Co", "period_end_date": "2026-09-30"})
+		same = _Job(name="BGJ-1", title="Test", status="Failed", arguments=args, checkpoint='{"jobs": "J-9"}')
+		self._requeue(same, company="Co", period_end_date="2026-09-30")
+		self.assertEqual((same.status, same.checkpoint), ("Queued", '{"jobs": "J-9"}'))
+
+		other = _Job(name="BGJ-1", title="Test", status="Failed", arguments=args, checkpoint='{"jobs": "J-9"}')
+		payload, enqueue, _rollback = self._requeue(other, company="Co", period_end_date="2026-10-31")
+		self.assertIsNone(other.checkpoint)
+		self.assertEqual(frappe.parse_json(other.arguments)["period_end_date"], "2026-10-31")
+		self.assertEqual(enqueue.call_args.kwargs["background_job"], "BGJ-1")
+		self.assertEqual(payload["name"], "BGJ-1")
+
+	def test_losing_a_concurrent_enqueue_returns_the_other_job(self):
+		failed = _Job(name="BGJ-1", title="Test", status="Failed", arguments="{}", checkpoint=None)
+		payload, enqueue, rollback = self._requeue(failed, claimed=False)
+		rollback.assert_called_once_with(save_point="logistics_enqueue_operation")
+		enqueue.assert_not_called()
+		self.assertEqual((payload["name"], payload["status"]), ("BGJ-2", "Queued"))
+
+	def test_in_flight_key_is_per_operation_and_document(self):
+		key = background_jobs._in_flight_key("pkg.op", "Company", "Co")
+		self.assertEqual(key, background_jobs._in_flight_key("pkg.op", "Company", "Co"))
+		self.assertNotEqual(key, background_jobs._in_flight_key("pkg.op", "Company", "Co 2"))
+		self.assertNotEqual(key, background_jobs._in_flight_key("pkg.other", "Company", "Co"))
+
+	def _run(self, outcome):
+		job = _Job(name="BGJ-1", title="Test", status="Queued", method="pkg.op", arguments="{}", in_flight_key="k")
+		with patch.object(frappe, "get_doc", return_value=job), patch.object(
+			frappe, "get_attr", return_value=lambda: outcome
+		), patch.object(frappe.db, "commit"), patch.object(frappe.db, "rollback") as rollback, patch.object(
+			background_jobs, "_publish"
+		), patch.object(frappe.cache, "delete_value"):
+			background_jobs.run_operation("BGJ-1")
+		return job, rollback
+
+	def test_reported_failure_fails_the_job(self):
+		job, rollback = self._run({"ok": False, "message": "No warehouse contract found for this job."})
+		self.assertEqual((job.status, job.error_message), ("Failed", "No warehouse contract found for this job."))
+		self.assertIsNone(job.in_flight_key)
+		rollback.assert_called_once()
+
+		job, _rollback = self._run({"success": False, "error": "lock wait timeout"})
+		self.assertEqual((job.status, job.error_message), ("Failed", "lock wait timeout"))
+
+		job, rollback = self._run({"ok": True, "message": "Added 2 charge line(s)."})
+		self.assertEqual((job.status, job.progress), ("Completed", 100))
+		rollback.assert_not_called()
@@ -0,0 +1,199 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for skipping charge recalculation when a row's inputs are unchanged."""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.utils import charges_calculation as cc
+
+
+class _Charge(frappe._dict):
+	def calculate_charge_amount(self, parent_doc=None):
+		self.recalculated = (self.recalculated or 0) + 1
+
+
+class _Parent(frappe._dict):
+	# _get_parent_actual_data reads parent_doc.items (Warehouse Job table); hide dict.items
+	items = None
+
+	def is_new(self):
+		return False
+
+	def get_doc_before_save(self):
+		return self.before
+
+
+def _signature(row):
+	return {k: v for k, v in row.items() if k != "recalculated"}
+
+
+class TestChargeRecalcGating(UnitTestCase):
+	def _sync(self, parent):
+		with patch.object(cc, "_charge_row_signature", side_effect=_signature):
+			return cc.sync_charges_with_parent(parent)
+
+	def test_unrelated_edit_skips_all_rows(self):
+		before = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Volume"),
+			],
+		)
+		parent = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			remarks="edited",
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Volume"),
+			],
+			flags=frappe._dict(),
+			before=before,
+		)
+		self.assertEqual(self._sync(parent), 0)
+
+	def test_weight_change_only_recalculates_weight_rows(self):
+		before = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Volume"),
+			],
+		)
+		parent = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=250,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Volume"),
+			],
+			flags=frappe._dict(),
+			before=before,
+		)
+		self.assertEqual(self._sync(parent), 1)
+		self.assertEqual(parent.charges[0].recalculated, 1)
+		self.assertFalse(parent.charges[1].recalculated)
+
+	def test_edited_and_new_rows_are_recalculated(self):
+		before = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight"),
+			],
+		)
+		parent = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(
+					doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight", unit_rate=5
+				),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c3", revenue_calculation_method="Per Unit", unit_type="Weight"),
+			],
+			flags=frappe._dict(),
+			before=before,
+		)
+		self.assertEqual(self._sync(parent), 2)
+		self.assertFalse(parent.charges[1].recalculated)
+
+	def test_force_flag_recalculates_everything(self):
+		before = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight"),
+			],
+		)
+		parent = _Parent(
+			doctype="Air Shipment",
+			company="Co",
+			total_weight=100,
+			total_volume=1,
+			charges=[
+				_Charge(doctype="Air Shipment Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Weight"),
+				_Charge(doctype="Air Shipment Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight"),
+			],
+			flags=frappe._dict(force_charge_recalc=True),
+			before=before,
+		)
+		self.assertEqual(self._sync(parent), 2)
+
+	def test_flat_rate_reads_no_parent_aggregates(self):
+		self.assertEqual(
+			cc.charge_parent_inputs(frappe._dict(doctype="Air Shipment Charges", revenue_calculation_method="Flat Rate")), set()
+		)
+		self.assertEqual(
+			cc.charge_parent_inputs(frappe._dict(doctype="Air Shipment Charges", revenue_calculation_method="Per kg")),
+			{"actual_weight"},
+		)
+
+	def test_leg_distance_change_recalculates_distance_rows(self):
+		meta = frappe._dict(
+			fields=[
+				frappe._dict(fieldname="revenue_calculation_method", fieldtype="Select"),
+				frappe._dict(fieldname="unit_type", fieldtype="Select"),
+				frappe._dict(fieldname="unit_rate", fieldtype="Currency"),
+			]
+		)
+		before = _Parent(
+			doctype="Transport Job",
+			company="Co",
+			total_weight=100,
+			legs=[frappe._dict(transport_leg="TL-1")],
+			charges=[
+				_Charge(
+					doctype="Transport Job Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Distance", unit_rate=2
+				),
+				_Charge(
+					doctype="Transport Job Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight", unit_rate=2
+				),
+			],
+		)
+		parent = _Parent(
+			doctype="Transport Job",
+			company="Co",
+			total_weight=100,
+			legs=[frappe._dict(transport_leg="TL-1")],
+			charges=[
+				_Charge(
+					doctype="Transport Job Charges", name="c1", revenue_calculation_method="Per Unit", unit_type="Distance", unit_rate=2
+				),
+				_Charge(
+					doctype="Transport Job Charges", name="c2", revenue_calculation_method="Per Unit", unit_type="Weight", unit_rate=2
+				),
+			],
+			flags=frappe._dict(),
+			before=before,
+		)
+		# The leg route was edited to 42 km; the before and current documents both read the saved leg
+		with patch.object(frappe, "get_meta", return_value=meta), patch.object(
+			frappe.db, "get_value", return_value=frappe._dict(distance_km=42)
+		):
+			self.assertEqual(cc.sync_charges_with_parent(parent), 1)
+		self.assertEqual(parent.charges[0].recalculated, 1)
+		self.assertFalse(parent.charges[1].recalculated)
@@ -0,0 +1,60 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the cached customer credit exposure."""
+
+from datetime import date
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+from frappe.utils import add_days, getdate
+
+from logistics.utils import credit_exposure, credit_management
+
+
+class TestCreditExposure(UnitTestCase):
+	def test_overdue_compares_oldest_due_date_with_grace(self):
+		exposure = frappe._dict(outstanding_amount=100.0, oldest_due_date=getdate(add_days(getdate(), -5)))
+		with patch.object(credit_management, "get_credit_exposure", return_value=exposure):
+			self.assertTrue(credit_management.has_overdue_outstanding_invoices("CUST-1", "Co"))
+			self.assertFalse(credit_management.has_overdue_outstanding_invoices("CUST-1", "Co", grace_days=5))
+		with patch.object(credit_management, "get_credit_exposure", return_value=frappe._dict(oldest_due_date=None)):
+			self.assertFalse(credit_management.has_overdue_outstanding_invoices("CUST-1", "Co"))
+
+	def test_cached_exposure_skips_the_database(self):
+		cached = {"outstanding_amount": 250.0, "oldest_due_date": "2026-09-30"}
+		with patch.object(frappe.cache, "get_value", return_value=cached), patch.object(
+			frappe.db, "get_value"
+		) as get_value, patch.object(credit_exposure, "refresh_exposure") as refresh:
+			exposure = credit_exposure.get_credit_exposure("CUST-1", "Co")
+		self.assertEqual((exposure.outstanding_amount, exposure.oldest_due_date), (250.0, date(2026, 9, 30)))
+		get_value.assert_not_called()
+		refresh.assert_not_called()
+
+	def test_missing_record_is_computed_and_cached(self):
+		computed = frappe._dict(outstanding_amount=75.0, oldest_due_date=None)
+		with patch.object(frappe.cache, "get_value", return_value=None), patch.object(
+			frappe.cache, "set_value"
+		) as set_value, patch.object(frappe.db, "get_value", return_value=None), patch.object(
+			credit_exposure, "refresh_exposure", return_value=computed
+		) as refresh:
+			exposure = credit_exposure.get_credit_exposure("CUST-1", "Co")
+		refresh.assert_called_once_with("CUST-1", "Co")
+		self.assertEqual(exposure.outstanding_amount, 75.0)
+		self.assertEqual(set_value.call_args[0][1], {"outstanding_amount": 75.0, "oldest_due_date": None})
+
+	def test_journal_entry_refreshes_each_customer_once(self):
+		je = frappe._dict(
+			doctype="Journal Entry",
+			company="Co",
+			accounts=[
+				frappe._dict(party_type="Customer", party="CUST-2"),
+				frappe._dict(party_type="Supplier", party="SUP-1"),
+				frappe._dict(party_type="Customer", party="CUST-1"),
+				frappe._dict(party_type="Customer", party="CUST-2"),
+			],
+		)
+		with patch.object(credit_exposure, "refresh_exposure") as refresh:
+			credit_exposure.on_exposure_change(je)
+		self.assertEqual([c.args for c in refresh.call_args_list], [("CUST-1", "Co"), ("CUST-2", "Co")])
@@ -0,0 +1,70 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the in-memory Tariff rate index."""
+
+from datetime import date
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.utils import tariff_index
+from logistics.utils.tariff_index import TariffIndex
+
+
+def _index():
+	rows = [
+		frappe._dict(item_code="FRT", location_from="MNL", location_to="CEB", vehicle_type="10W"),
+		frappe._dict(item_code="FRT", location_from="MNL", location_to="DVO", vehicle_type="6W"),
+		frappe._dict(item_code="FRT", location_from="MNL", location_to="CEB", vehicle_type="6W", valid_to=date(2026, 1, 31)),
+		frappe._dict(item_code="FUEL", location_from="MNL", location_to="CEB", vehicle_type="10W"),
+	]
+	return TariffIndex("TAR-0001", {"transport_rates": rows, "air_freight_rates": []})
+
+
+class TestTariffIndex(UnitTestCase):
+	def test_first_returns_lowest_idx_row(self):
+		index = _index()
+		self.assertEqual(index.first("transport_rates", "item_code", "FRT").location_to, "CEB")
+		self.assertIsNone(index.first("air_freight_rates", "item_code", "FRT"))
+
+	def test_match_intersects_criteria_and_ignores_empty_ones(self):
+		index = _index()
+		rows = index.match("transport_rates", location_from="MNL", location_to="CEB", vehicle_type=None)
+		self.assertEqual(len(rows), 3)
+		rows = index.match("transport_rates", location_to="CEB", vehicle_type="6W")
+		self.assertEqual([row.valid_to for row in rows], [date(2026, 1, 31)])
+
+	def test_match_filters_validity(self):
+		rows = _index().match("transport_rates", location_to="CEB", vehicle_type="6W", as_of="2026-10-01")
+		self.assertEqual(rows, [])
+
+	def test_index_is_reused_until_generation_changes(self):
+		tariff_index._indexes.clear()
+		generation = ["0"]
+		with patch.object(tariff_index, "_generation", side_effect=lambda name: generation[0]), patch.object(
+			tariff_index, "_load", side_effect=lambda name: _index()
+		) as load:
+			first = tariff_index.get_tariff_index("TAR-0001")
+			self.assertIs(tariff_index.get_tariff_index("TAR-0001"), first)
+			generation[0] = "1"
+			self.assertIsNot(tariff_index.get_tariff_index("TAR-0001"), first)
+		self.assertEqual(load.call_count, 2)
+		tariff_index._indexes.clear()
+
+	def test_index_is_not_shared_between_sites(self):
+		tariff_index._indexes.clear()
+		site = frappe.local.site
+		self.addCleanup(setattr, frappe.local, "site", site)
+		with patch.object(tariff_index, "_generation", return_value="0"), patch.object(
+			tariff_index, "_load", side_effect=lambda name: _index()
+		) as load:
+			frappe.local.site = "site-a"
+			first = tariff_index.get_tariff_index("TAR-0001")
+			frappe.local.site = "site-b"
+			self.assertIsNot(tariff_index.get_tariff_index("TAR-0001"), first)
+			frappe.local.site = "site-a"
+			self.assertIs(tariff_index.get_tariff_index("TAR-0001"), first)
+		self.assertEqual(load.call_count, 2)
+		tariff_index._indexes.clear()
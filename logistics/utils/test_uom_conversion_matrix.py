@@ -0,0 +1,65 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the cached UOM conversion matrix."""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.utils import measurements
+from logistics.utils.measurements import UomConversionMatrix
+
+
+def _matrix():
+	return UomConversionMatrix(
+		[("Kg", "Gram", 1000), ("Pound", "Kilogram", 0.45359237), ("Cubic Meter", "Liter", 1000)],
+		[("Centimeter", "Cubic Meter", 0.000001)],
+	)
+
+
+class TestUomConversionMatrix(UnitTestCase):
+	def test_direct_inverse_and_aliases(self):
+		matrix = _matrix()
+		self.assertEqual(matrix.factor("KG", "GRAM"), 1000)
+		self.assertAlmostEqual(matrix.factor("g", "kgs"), 0.001)
+		self.assertEqual(matrix.factor("CBM", "Cubic Meter"), 1.0)
+
+	def test_transitive_path(self):
+		self.assertAlmostEqual(_matrix().factor("LB", "G"), 453.59237)
+
+	def test_missing_path(self):
+		self.assertIsNone(_matrix().factor("KG", "LITER"))
+
+	def test_volume_factor_aliases_and_builtin(self):
+		matrix = _matrix()
+		self.assertEqual(matrix.volume_factor("CM", "CBM"), 0.000001)
+		self.assertEqual(matrix.volume_factor("Millimeter", "Cubic Meter"), 1e-9)
+
+	def test_convert_rows_resolves_each_uom_once(self):
+		rows = [
+			frappe._dict(weight=2, weight_uom="Gram"),
+			frappe._dict(weight=3, weight_uom="Gram"),
+			frappe._dict(weight=1, weight_uom=None),
+		]
+		with patch.object(measurements, "get_uom_conversion_factor", return_value=0.001) as factor:
+			values = measurements.convert_rows(rows, "weight", "weight_uom", "Kg", default_uom="Kg")
+		self.assertEqual(values, [0.002, 0.003, 1.0])
+		factor.assert_called_once()
+
+	def test_matrix_is_not_shared_between_sites(self):
+		measurements._uom_matrices.clear()
+		site = frappe.local.site
+		self.addCleanup(setattr, frappe.local, "site", site)
+		with patch.object(frappe.cache, "get_value", return_value="0"), patch.object(
+			measurements, "_load_uom_matrix", side_effect=_matrix
+		) as load:
+			frappe.local.site = "site-a"
+			first = measurements.get_uom_conversion_matrix()
+			frappe.local.site = "site-b"
+			self.assertIsNot(measurements.get_uom_conversion_matrix(), first)
+			frappe.local.site = "site-a"
+			self.assertIs(measurements.get_uom_conversion_matrix(), first)
+		self.assertEqual(load.call_count, 2)
+		measurements._uom_matrices.clear()
@@ -17,6 +17,10 @@ from frappe.utils import flt, now_datetime, get_datetime, getdate, add_days, add
 from datetime import datetime, timedelta
 import json
 
+import numpy as np
+
+from logistics.warehousing import capacity_forecast
+
 
 class CapacityForecaster:
     """Advanced capacity forecasting and analytics"""
@@ -44,45 +48,70 @@ class CapacityForecaster:
             include_seasonality: Include seasonal patterns
             
         Returns:
-            Dict with forecast data and recommendations
+            Dict with forecast data and recommendations (cached per arguments and day)
         """
         try:
-            # Get historical capacity data
-            historical_data = self._get_historical_capacity_data(
-                location, company, branch, days=90
-            )
-            
-            # Analyze trends and patterns
-            trend_analysis = self._analyze_capacity_trends(historical_data)
-            
-            # Generate forecast
-            forecast_data = self._generate_forecast_data(
-                historical_data, trend_analysis, forecast_days, include_seasonality
-            )
-            
-            # Calculate capacity recommendations
-            recommendations = self._generate_capacity_recommendations(
-                forecast_data, trend_analysis
-            )
-            
-            # Generate alerts for potential capacity issues
-            alerts = self._generate_forecast_alerts(forecast_data)
-            
-            return {
-                "forecast_period": forecast_days,
-                "historical_data": historical_data,
-                "trend_analysis": trend_analysis,
-                "forecast_data": forecast_data,
-                "recommendations": recommendations,
-                "alerts": alerts,
-                "generated_at": now_datetime(),
-                "confidence_score": self._calculate_forecast_confidence(historical_data)
+            forecast_days = int(forecast_days)
+            key_filters = {
+                "location": location,
+                "company": company,
+                "branch": branch,
+                "forecast_days": forecast_days,
+                "include_seasonality": bool(include_seasonality),
             }
+            return capacity_forecast.cached(
+                "capacity_forecaster",
+                key_filters,
+                lambda: self._build_capacity_forecast(
+                    location, company, branch, forecast_days, include_seasonality
+                ),
+            )
             
         except Exception as e:
             frappe.log_error(f"Capacity forecasting error: {str(e)}")
             return {"error": str(e)}
     
+    def _build_capacity_forecast(
+        self,
+        location: Optional[str],
+        company: Optional[str],
+        branch: Optional[str],
+        forecast_days: int,
+        include_seasonality: bool
+    ) -> Dict[str, Any]:
+        """Build the forecast returned by generate_capacity_forecast"""
+        # Get historical capacity data
+        historical_data = self._get_historical_capacity_data(
+            location, company, branch, days=90
+        )
+        
+        # Analyze trends and patterns
+        trend_analysis = self._analyze_capacity_trends(historical_data)
+        
+        # Generate forecast
+        forecast_data = self._generate_forecast_data(
+            historical_data, trend_analysis, forecast_days, include_seasonality
+        )
+        
+        # Calculate capacity recommendations
+        recommendations = self._generate_capacity_recommendations(
+            forecast_data, trend_analysis
+        )
+        
+        # Generate alerts for potential capacity issues
+        alerts = self._generate_forecast_alerts(forecast_data)
+        
+        return {
+            "forecast_period": forecast_days,
+            "historical_data": historical_data,
+            "trend_analysis": trend_analysis,
+            "forecast_data": forecast_data,
+            "recommendations": recommendations,
+            "alerts": alerts,
+            "generated_at": now_datetime(),
+            "confidence_score": self._calculate_forecast_confidence(historical_data)
+        }
+    
     def _get_historical_capacity_data(
         self,
         location: Optional[str] = None,
@@ -168,28 +197,19 @@ class CapacityForecaster:
         if not historical_data:
             return {"trend": "insufficient_data", "growth_rate": 0, "seasonality": False}
         
-        # Calculate average utilization over time
-        daily_utilization = {}
-        for record in historical_data:
-            date = record["date"]
-            if date not in daily_utilization:
-                daily_utilization[date] = []
-            daily_utilization[date].append(record["overall_utilization"])
-        
-        # Calculate daily averages
-        daily_averages = {}
-        for date, utilizations in daily_utilization.items():
-            daily_averages[date] = sum(utilizations) / len(utilizations)
-        
-        # Calculate trend
-        dates = sorted(daily_averages.keys())
+        # Daily average utilization (all locations of a day)
+        dates = sorted({record["date"] for record in historical_data})
         if len(dates) < 7:
             return {"trend": "insufficient_data", "growth_rate": 0, "seasonality": False}
+        date_index = {date: i for i, date in enumerate(dates)}
+        day_of_record = np.array([date_index[record["date"]] for record in historical_data])
+        utilization = np.array([flt(record["overall_utilization"]) for record in historical_data])
+        daily_averages = np.bincount(day_of_record, weights=utilization) / np.bincount(day_of_record)
         
         # Simple linear trend calculation
-        recent_avg = sum(daily_averages[d] for d in dates[-7:]) / 7
-        older_avg = sum(daily_averages[d] for d in dates[:7]) / 7
-        growth_rate = ((recent_avg - older_avg) / older_avg) * 100 if older_avg > 0 else 0
+        recent_avg = daily_averages[-7:].mean()
+        older_avg = daily_averages[:7].mean()
+        growth_rate = float((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
         
         # Determine trend direction
         if growth_rate > 5:
@@ -200,17 +220,13 @@ class CapacityForecaster:
             trend = "stable"
         
         # Check for seasonality (simplified - look for weekly patterns)
-        weekly_patterns = {}
-        for date in dates:
-            weekday = date.weekday()
-            if weekday not in weekly_patterns:
-                weekly_patterns[weekday] = []
-            weekly_patterns[weekday].append(daily_averages[date])
-        
-        # Calculate weekly variation
-        weekly_avgs = {}
-        for weekday, values in weekly_patterns.items():
-            weekly_avgs[weekday] = sum(values) / len(values)
+        weekdays = np.array([date.weekday() for date in dates])
+        weekday_counts = np.bincount(weekdays, minlength=7)
+        weekday_sums = np.bincount(weekdays, weights=daily_averages, minlength=7)
+        weekly_avgs = {
+            int(weekday): float(weekday_sums[weekday] / weekday_counts[weekday])
+            for weekday in np.flatnonzero(weekday_counts)
+        }
         
         weekly_variation = max(weekly_avgs.values()) - min(weekly_avgs.values())
         has_seasonality = weekly_variation > 10  # 10% variation indicates seasonality
@@ -220,9 +236,9 @@ class CapacityForecaster:
             "growth_rate": growth_rate,
             "seasonality": has_seasonality,
             "weekly_patterns": weekly_avgs,
-            "average_utilization": sum(daily_averages.values()) / len(daily_averages),
-            "peak_utilization": max(daily_averages.values()),
-            "low_utilization": min(daily_averages.values())
+            "average_utilization": float(daily_averages.mean()),
+            "peak_utilization": float(daily_averages.max()),
+            "low_utilization": float(daily_averages.min())
         }
     
     def _generate_forecast_data(
@@ -233,11 +249,9 @@ class CapacityForecaster:
         include_seasonality: bool
     ) -> List[Dict[str, Any]]:
         """Generate forecast data for the specified period"""
-        forecast_data = []
-        
         # Get baseline utilization
         if historical_data:
-            baseline_utilization = sum(record["overall_utilization"] for record in historical_data) / len(historical_data)
+            baseline_utilization = float(np.mean([flt(record["overall_utilization"]) for record in historical_data]))
         else:
             baseline_utilization = 50  # Default baseline
         
@@ -245,35 +259,27 @@ class CapacityForecaster:
         growth_rate = trend_analysis.get("growth_rate", 0)
         daily_growth = growth_rate / 100 / 30  # Convert monthly growth to daily
         
-        # Generate forecast for each day
+        # Base utilization with growth for every forecast day
         start_date = getdate()
-        for i in range(forecast_days):
-            forecast_date = add_days(start_date, i)
-            
-            # Calculate base utilization with growth
-            base_utilization = baseline_utilization * (1 + daily_growth * i)
-            
-            # Apply seasonality if enabled
-            if include_seasonality and trend_analysis.get("seasonality"):
-                weekday = forecast_date.weekday()
-                weekly_patterns = trend_analysis.get("weekly_patterns", {})
-                if weekday in weekly_patterns:
-                    seasonal_factor = weekly_patterns[weekday] / baseline_utilization
-                    base_utilization *= seasonal_factor
-            
-            # Add some randomness for realistic forecasting
-            import random
-            random_factor = random.uniform(0.95, 1.05)
-            forecast_utilization = min(100, max(0, base_utilization * random_factor))
-            
-            forecast_data.append({
-                "date": forecast_date,
-                "predicted_utilization": forecast_utilization,
-                "confidence_level": self._calculate_daily_confidence(i, forecast_days),
-                "risk_level": self._assess_risk_level(forecast_utilization)
-            })
+        day_index = np.arange(forecast_days)
+        utilization = baseline_utilization * (1 + daily_growth * day_index)
+        
+        # Apply seasonality if enabled
+        weekly_patterns = trend_analysis.get("weekly_patterns", {})
+        if include_seasonality and trend_analysis.get("seasonality") and baseline_utilization > 0:
+            factors = np.array([weekly_patterns.get(d, baseline_utilization) for d in range(7)]) / baseline_utilization
+            utilization = utilization * factors[(start_date.weekday() + day_index) % 7]
         
-        return forecast_data
+        utilization = np.clip(utilization, 0, 100)
+        return [
+            {
+                "date": add_days(start_date, i),
+                "predicted_utilization": float(utilization[i]),
+                "confidence_level": self._calculate_daily_confidence(i, forecast_days),
+                "risk_level": self._assess_risk_level(utilization[i])
+            }
+            for i in range(forecast_days)
+        ]
     
     def _calculate_daily_confidence(self, day_index: int, total_days: int) -> float:
         """Calculate confidence level for forecast (decreases over time)"""
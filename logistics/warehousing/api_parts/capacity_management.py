@@ -17,6 +17,9 @@ from frappe import _
 from frappe.utils import flt, now_datetime, get_datetime, getdate
 from frappe.model.document import Document
 
+from logistics.utils.background_jobs import enqueue_operation
+from logistics.warehousing.capacity_metrics import reconcile_capacity_metrics
+
 
 class CapacityValidationError(Exception):
     """Custom exception for capacity validation errors"""
@@ -941,94 +944,34 @@ def get_capacity_utilization_report(
         return {"error": str(e)}
 
 
+@frappe.whitelist()
+def start_refresh_capacity_data():
+    """Queue ``refresh_capacity_data`` as a Logistics Background Job (one site-wide run at a time)."""
+    frappe.has_permission("Handling Unit", "write", throw=True)
+    frappe.has_permission("Storage Location", "write", throw=True)
+    return enqueue_operation(
+        "logistics.warehousing.api_parts.capacity_management.refresh_capacity_data",
+        title=_("Refresh Capacity Data"),
+    )
+
+
 @frappe.whitelist()
 def refresh_capacity_data():
-    """Refresh capacity data for all handling units and storage locations"""
+    """
+    Bring capacity data of all handling units and storage locations in line with the ledger.
+
+    Metrics are maintained per ledger posting (logistics.warehousing.capacity_metrics); this
+    recomputes them in bulk SQL and only rewrites the rows that drifted.
+    """
     try:
-        updated_count = 0
-        
-        # Refresh handling unit capacity data
-        handling_units = frappe.get_all(
-            "Handling Unit",
-            filters={"docstatus": ["!=", 2]},
-            fields=["name"]
-        )
-        
-        for hu in handling_units:
-            try:
-                hu_doc = frappe.get_doc("Handling Unit", hu.name)
-                
-                # Calculate current capacity usage
-                current_volume = calculate_handling_unit_current_volume(hu.name)
-                current_weight = calculate_handling_unit_current_weight(hu.name)
-                
-                # Calculate utilization percentage
-                max_volume = flt(hu_doc.max_volume)
-                max_weight = flt(hu_doc.max_weight)
-                
-                volume_utilization = (current_volume / max_volume * 100) if max_volume > 0 else 0
-                weight_utilization = (current_weight / max_weight * 100) if max_weight > 0 else 0
-                
-                # Use the higher of volume or weight utilization
-                utilization_percentage = max(volume_utilization, weight_utilization)
-                
-                # Update the handling unit
-                hu_doc.current_volume = current_volume
-                hu_doc.current_weight = current_weight
-                hu_doc.utilization_percentage = utilization_percentage
-                hu_doc.save(ignore_permissions=True)
-                
-                updated_count += 1
-                
-            except Exception as e:
-                frappe.log_error(f"Error updating handling unit {hu.name}: {str(e)}")
-                continue
-        
-        # Refresh storage location capacity data
-        storage_locations = frappe.get_all(
-            "Storage Location",
-            filters={"docstatus": ["!=", 2]},
-            fields=["name"]
-        )
-        
-        for sl in storage_locations:
-            try:
-                sl_doc = frappe.get_doc("Storage Location", sl.name)
-                
-                # Calculate current capacity usage
-                current_volume = calculate_storage_location_current_volume(sl.name)
-                current_weight = calculate_storage_location_current_weight(sl.name)
-                
-                # Calculate utilization percentage
-                max_volume = flt(sl_doc.max_volume)
-                max_weight = flt(sl_doc.max_weight)
-                
-                volume_utilization = (current_volume / max_volume * 100) if max_volume > 0 else 0
-                weight_utilization = (current_weight / max_weight * 100) if max_weight > 0 else 0
-                
-                # Use the higher of volume or weight utilization
-                utilization_percentage = max(volume_utilization, weight_utilization)
-                
-                # Update the storage location
-                sl_doc.current_volume = current_volume
-                sl_doc.current_weight = current_weight
-                sl_doc.utilization_percentage = utilization_percentage
-                sl_doc.save(ignore_permissions=True)
-                
-                updated_count += 1
-                
-            except Exception as e:
-                frappe.log_error(f"Error updating storage location {sl.name}: {str(e)}")
-                continue
-        
+        out = reconcile_capacity_metrics(fix=True)
         frappe.db.commit()
-        
         return {
             "success": True,
-            "message": f"Capacity data refreshed successfully for {updated_count} units",
-            "updated_count": updated_count
+            "message": f"Capacity data refreshed successfully for {out['drift_count']} units",
+            "updated_count": out["drift_count"],
         }
-        
+
     except Exception as e:
         frappe.db.rollback()
         frappe.log_error(f"Capacity data refresh error: {str(e)}")
@@ -1036,79 +979,3 @@ def refresh_capacity_data():
             "success": False,
             "error": str(e)
         }
-
-
-def calculate_handling_unit_current_volume(handling_unit_name):
-    """Calculate current volume usage for a handling unit"""
-    try:
-        # Get stock ledger entries for this handling unit
-        stock_entries = frappe.db.sql("""
-            SELECT 
-                SUM(COALESCE(quantity, 0) * COALESCE(wi.volume, 0)) as total_volume
-            FROM `tabWarehouse Stock Ledger` wsl
-            LEFT JOIN `tabWarehouse Item` wi ON wsl.item = wi.name
-            WHERE wsl.handling_unit = %s
-        """, (handling_unit_name,), as_dict=True)
-        
-        return flt(stock_entries[0].total_volume) if stock_entries else 0
-        
-    except Exception as e:
-        frappe.log_error(f"Error calculating handling unit volume: {str(e)}")
-        return 0
-
-
-def calculate_handling_unit_current_weight(handling_unit_name):
-    """Calculate current weight usage for a handling unit"""
-    try:
-        # Get stock ledger entries for this handling unit
-        stock_entries = frappe.db.sql("""
-            SELECT 
-                SUM(COALESCE(quantity, 0) * COALESCE(wi.weight, 0)) as total_weight
-            FROM `tabWarehouse Stock Ledger` wsl
-            LEFT JOIN `tabWarehouse Item` wi ON wsl.item = wi.name
-            WHERE wsl.handling_unit = %s
-        """, (handling_unit_name,), as_dict=True)
-        
-        return flt(stock_entries[0].total_weight) if stock_entries else 0
-        
-    except Exception as e:
-        frappe.log_error(f"Error calculating handling unit weight: {str(e)}")
-        return 0
-
-
-def calculate_storage_location_current_volume(storage_location_name):
-    """Calculate current volume usage for a storage location"""
-    try:
-        # Get stock ledger entries for this storage location
-        stock_entries = frappe.db.sql("""
-            SELECT 
-                SUM(COALESCE(quantity, 0) * COALESCE(wi.volume, 0)) as total_volume
-            FROM `tabWarehouse Stock Ledger` wsl
-            LEFT JOIN `tabWarehouse Item` wi ON wsl.item = wi.name
-            WHERE wsl.storage_location = %s
-        """, (storage_location_name,), as_dict=True)
-        
-        return flt(stock_entries[0].total_volume) if stock_entries else 0
-        
-    except Exception as e:
-        frappe.log_error(f"Error calculating storage location volume: {str(e)}")
-        return 0
-
-
-def calculate_storage_location_current_weight(storage_location_name):
-    """Calculate current weight usage for a storage location"""
-    try:
-        # Get stock ledger entries for this storage location
-        stock_entries = frappe.db.sql("""
-            SELECT 
-                SUM(COALESCE(quantity, 0) * COALESCE(wi.weight, 0)) as total_weight
-            FROM `tabWarehouse Stock Ledger` wsl
-            LEFT JOIN `tabWarehouse Item` wi ON wsl.item = wi.name
-            WHERE wsl.storage_location = %s
-        """, (storage_location_name,), as_dict=True)
-        
-        return flt(stock_entries[0].total_weight) if stock_entries else 0
-        
-    except Exception as e:
-        frappe.log_error(f"Error calculating storage location weight: {str(e)}")
-        return 0
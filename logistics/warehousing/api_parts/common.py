@@ -75,7 +75,7 @@ def _hu_fields():
 
 def _hu_balance(hu: Optional[str]) -> float:
     if not hu: return 0.0
-    r = frappe.db.sql("SELECT COALESCE(SUM(quantity),0) FROM `tabWarehouse Stock Ledger` WHERE handling_unit=%s", (hu,))
+    r = frappe.db.sql("SELECT COALESCE(SUM(actual_qty),0) FROM `tabWarehouse Stock Bin` WHERE handling_unit=%s", (hu,))
     return float(r[0][0] if r else 0.0)
 
 def _set_hu_status_by_balance(hu: Optional[str], *, after_release: bool = False) -> None:
@@ -463,7 +463,7 @@ def _get_hu(name: Optional[str]):
 
 def _sl_balance(loc: Optional[str]) -> float:
     if not loc: return 0.0
-    r = frappe.db.sql("SELECT COALESCE(SUM(quantity),0) FROM `tabWarehouse Stock Ledger` WHERE storage_location=%s", (loc,))
+    r = frappe.db.sql("SELECT COALESCE(SUM(actual_qty),0) FROM `tabWarehouse Stock Bin` WHERE storage_location=%s", (loc,))
     return float(r[0][0] if r else 0.0)
 
 def _validate_status_for_action(*, action: str, location: Optional[str], handling_unit: Optional[str]):
@@ -625,130 +625,59 @@ def _query_available_candidates(
     company: Optional[str] = None,
     branch: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    """Aggregate positive availability from Warehouse Stock Ledger, scoped by Company/Branch."""
+    """Positive availability per location/HU/batch/serial from Warehouse Stock Bin, scoped by Company/Branch."""
     slf = _safe_meta_fieldnames("Storage Location")
     huf = _safe_meta_fieldnames("Handling Unit")
-    llf = _safe_meta_fieldnames("Warehouse Stock Ledger")
 
     # status filters
     sl_status = "AND sl.status IN ('Available','In Use')" if ("status" in slf) else ""
     hu_block  = "AND COALESCE(hu.status,'Available') NOT IN ('Under Maintenance','Inactive')" if ("status" in huf) else ""
 
     conds = []
-    # Parameters needed for the query:
-    # 1. latest subquery WHERE: item, batch_no, batch_no, serial_no, serial_no (5 params)
-    # 2. latest subquery join: item (1 param)
-    # 3. main join: item (1 param)
-    # 4. first_seen subquery: item, batch_no, batch_no, serial_no, serial_no (5 params)
-    # 5. main WHERE: item, batch_no, batch_no, serial_no, serial_no (5 params)
-    # Total: 17 params before company/branch
-    params: List[Any] = [
-        # latest subquery WHERE (lines 683-685)
-        item, batch_no, batch_no, serial_no, serial_no,
-        # latest subquery join (line 693)
-        item,
-        # main join (line 701)
-        item,
-        # first_seen subquery (lines 710-712)
-        item, batch_no, batch_no, serial_no, serial_no,
-        # main WHERE (lines 723, 725-726)
-        item, batch_no, batch_no, serial_no, serial_no,
-    ]
-
-    if company and (("company" in slf) or ("company" in huf) or ("company" in llf)):
-        conds.append("COALESCE(hu.company, sl.company, l.company) = %s")
+    params: List[Any] = [item]
+    if batch_no:
+        conds.append("bin.batch_no = %s")
+        params.append(batch_no)
+    if serial_no:
+        conds.append("bin.serial_no = %s")
+        params.append(serial_no)
+    if company:
+        conds.append("COALESCE(hu.company, sl.company, NULLIF(bin.company, '')) = %s")
         params.append(company)
-    if branch and (("branch" in slf) or ("branch" in huf) or ("branch" in llf)):
-        conds.append("COALESCE(hu.branch, sl.branch, l.branch) = %s")
+    if branch:
+        conds.append("COALESCE(hu.branch, sl.branch, NULLIF(bin.branch, '')) = %s")
         params.append(branch)
 
     scope_sql = (" AND " + " AND ".join(conds)) if conds else ""
 
-    # Get the latest entry for each location/handling_unit/batch/serial combination
-    # Use end_qty from the latest entry as the current stock
+    # Bins already hold SUM(quantity) per key, so this is an indexed read on item
+    # rather than a latest-row self-join over the whole ledger.
     sql = f"""
         SELECT
-            l.storage_location,
-            l.handling_unit,
-            l.batch_no,
-            l.serial_no,
-            l.end_qty AS available_qty,
-            first_seen.first_seen,
-            l.posting_date AS last_seen,
-            b.expiry_date AS expiry_date,
-            COALESCE(ws.quality_grade, b.quality_grade) AS quality_grade,
-            IFNULL(sl.bin_priority, 999999) AS bin_priority,
-            IFNULL(st.picking_rank, 999999) AS storage_type_rank
-        FROM `tabWarehouse Stock Ledger` l
-        INNER JOIN (
-            SELECT
-                l1.storage_location,
-                l1.handling_unit,
-                l1.batch_no,
-                l1.serial_no,
-                l1.end_qty,
-                l1.posting_date,
-                l1.creation,
-                l1.name
-            FROM `tabWarehouse Stock Ledger` l1
-            INNER JOIN (
-                SELECT
-                    storage_location,
-                    handling_unit,
-                    batch_no,
-                    serial_no,
-                    MAX(posting_date) AS max_date,
-                    MAX(creation) AS max_creation
-                FROM `tabWarehouse Stock Ledger`
-                WHERE item = %s
-                  AND (%s IS NULL OR batch_no = %s)
-                  AND (%s IS NULL OR serial_no = %s)
-                GROUP BY storage_location, handling_unit, batch_no, serial_no
-            ) max_dates ON l1.storage_location = max_dates.storage_location
-                AND IFNULL(l1.handling_unit, '') = IFNULL(max_dates.handling_unit, '')
-                AND IFNULL(l1.batch_no, '') = IFNULL(max_dates.batch_no, '')
-                AND IFNULL(l1.serial_no, '') = IFNULL(max_dates.serial_no, '')
-                AND l1.posting_date = max_dates.max_date
-                AND l1.creation = max_dates.max_creation
-                AND l1.item = %s
-        ) latest ON l.storage_location = latest.storage_location
-            AND IFNULL(l.handling_unit, '') = IFNULL(latest.handling_unit, '')
-            AND IFNULL(l.batch_no, '') = IFNULL(latest.batch_no, '')
-            AND IFNULL(l.serial_no, '') = IFNULL(latest.serial_no, '')
-            AND l.posting_date = latest.posting_date
-            AND l.creation = latest.creation
-            AND l.name = latest.name
-            AND l.item = %s
-        LEFT JOIN (
-            SELECT
-                storage_location,
-                handling_unit,
-                batch_no,
-                serial_no,
-                MIN(posting_date) AS first_seen
-            FROM `tabWarehouse Stock Ledger`
-            WHERE item = %s
-              AND (%s IS NULL OR batch_no = %s)
-              AND (%s IS NULL OR serial_no = %s)
-            GROUP BY storage_location, handling_unit, batch_no, serial_no
-        ) first_seen ON l.storage_location = first_seen.storage_location
-            AND IFNULL(l.handling_unit, '') = IFNULL(first_seen.handling_unit, '')
-            AND IFNULL(l.batch_no, '') = IFNULL(first_seen.batch_no, '')
-            AND IFNULL(l.serial_no, '') = IFNULL(first_seen.serial_no, '')
-        LEFT JOIN `tabStorage Location` sl ON sl.name = l.storage_location
+            bin.storage_location,
+            NULLIF(bin.handling_unit, '') AS handling_unit,
+            NULLIF(bin.batch_no, '')      AS batch_no,
+            NULLIF(bin.serial_no, '')     AS serial_no,
+            SUM(bin.actual_qty)           AS available_qty,
+            MIN(bin.first_posting_date)   AS first_seen,
+            MAX(bin.last_posting_date)    AS last_seen,
+            MAX(b.expiry_date)            AS expiry_date,
+            MAX(COALESCE(ws.quality_grade, b.quality_grade)) AS quality_grade,
+            MAX(IFNULL(sl.bin_priority, 999999)) AS bin_priority,
+            MAX(IFNULL(st.picking_rank, 999999)) AS storage_type_rank
+        FROM `tabWarehouse Stock Bin` bin
+        LEFT JOIN `tabStorage Location` sl ON sl.name = bin.storage_location
         LEFT JOIN `tabStorage Type`   st ON st.name = sl.storage_type
-        LEFT JOIN `tabHandling Unit`  hu ON hu.name = l.handling_unit
-        LEFT JOIN `tabWarehouse Batch`  b ON b.name = l.batch_no
-        LEFT JOIN `tabWarehouse Serial` ws ON ws.name = l.serial_no
-        WHERE l.item = %s
+        LEFT JOIN `tabHandling Unit`  hu ON hu.name = NULLIF(bin.handling_unit, '')
+        LEFT JOIN `tabWarehouse Batch`  b ON b.name = NULLIF(bin.batch_no, '')
+        LEFT JOIN `tabWarehouse Serial` ws ON ws.name = NULLIF(bin.serial_no, '')
+        WHERE bin.item = %s
           AND IFNULL(sl.staging_area, 0) = 0
-          AND (%s IS NULL OR l.batch_no = %s)
-          AND (%s IS NULL OR l.serial_no = %s)
-          AND l.end_qty > 0
           {scope_sql}
           {sl_status}
           {hu_block}
-        GROUP BY l.storage_location, l.handling_unit, l.batch_no, l.serial_no
+        GROUP BY bin.storage_location, bin.handling_unit, bin.batch_no, bin.serial_no
+        HAVING SUM(bin.actual_qty) > 0
     """
     return frappe.db.sql(sql, tuple(params), as_dict=True) or []
 
@@ -323,9 +323,9 @@ def _putaway_candidate_locations(
         SELECT l.storage_location AS location,
                IFNULL(sl.bin_priority, 999999) AS bin_priority,
                IFNULL(st.picking_rank, 999999) AS storage_type_rank,
-               SUM(l.quantity) AS current_quantity,
+               SUM(l.actual_qty) AS current_quantity,
                sl.storage_type
-        FROM `tabWarehouse Stock Ledger` l
+        FROM `tabWarehouse Stock Bin` l
         INNER JOIN `tabStorage Location` sl ON sl.name = l.storage_location
         LEFT JOIN `tabStorage Type` st ON st.name = sl.storage_type
         WHERE l.item = %s
@@ -336,7 +336,7 @@ def _putaway_candidate_locations(
           AND (%s IS NULL OR sl.branch  = %s)
           {storage_type_filter}
         GROUP BY l.storage_location, sl.bin_priority, st.picking_rank, sl.storage_type
-        HAVING SUM(l.quantity) > 0
+        HAVING SUM(l.actual_qty) > 0
         ORDER BY storage_type_rank ASC, bin_priority ASC, sl.name ASC
         """,
         tuple(params),
@@ -833,10 +833,10 @@ def _check_hu_contains_item(hu_name: str, item: str) -> bool:
         True if HU contains the item, False otherwise
     """
     try:
-        # Check Warehouse Stock Ledger for this HU and item
+        # Check Warehouse Stock Bin for this HU and item
         result = frappe.db.sql("""
-            SELECT SUM(quantity) AS total_qty
-            FROM `tabWarehouse Stock Ledger`
+            SELECT SUM(actual_qty) AS total_qty
+            FROM `tabWarehouse Stock Bin`
             WHERE handling_unit = %s AND item = %s
         """, (hu_name, item), as_dict=True)
         
@@ -9,8 +9,16 @@ import frappe
 from frappe import _
 from frappe.utils import flt, getdate
 from typing import Dict, List, Tuple, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from logistics.warehousing.api_parts.common import _get_default_currency
+from logistics.warehousing.hu_occupancy import (
+    ensure_occupancy_snapshot,
+    get_customer_hu_occupancy_summary,
+    get_daily_hu_occupancy,
+)
+from logistics.utils.background_jobs import enqueue_operation, report_progress
+
+_BILLING_STEPS = 4
 
 
 @frappe.whitelist()
@@ -52,11 +60,15 @@ def periodic_billing_get_charges(periodic_billing: str, clear_existing: int = 1)
         if int(clear_existing or 0):
             pb.set("charges", [])
 
+        # Close out any missing occupancy days for the period before reading it
+        ensure_occupancy_snapshot(date_from, date_to)
+
         warnings = []
         created = 0
         grand_total = 0.0
         
         # Step 1: Process Warehouse Job Charges
+        report_progress(0, _BILLING_STEPS, _("Warehouse job charges"))
         # First, try to get existing charges from warehouse_job_charges table
         frappe.log_error(
             title="Getting Warehouse Job Charges",
@@ -105,6 +117,7 @@ def periodic_billing_get_charges(periodic_billing: str, clear_existing: int = 1)
         )
         
         # Step 2: Process Storage Charges (if contract specified)
+        report_progress(1, _BILLING_STEPS, _("Storage charges"))
         if warehouse_contract:
             storage_charges_created, storage_total, storage_warnings = get_storage_charges_from_contract(
                 customer, date_from, date_to, warehouse_contract, company, branch
@@ -128,9 +141,11 @@ def periodic_billing_get_charges(periodic_billing: str, clear_existing: int = 1)
             warnings.append(_("No warehouse contract specified. Only job charges will be processed."))
         
         # Step 3: Populate Storage Details from warehouse/inventory data (daily snapshot)
+        report_progress(2, _BILLING_STEPS, _("Storage details"))
         populate_storage_details_from_inventory(pb, customer, date_from, date_to, company, branch)
         
         # Step 4: Save and return results
+        report_progress(3, _BILLING_STEPS, _("Saving charges"))
         if created > 0:
             pb.save(ignore_permissions=True)
             frappe.db.commit()
@@ -146,6 +161,20 @@ def periodic_billing_get_charges(periodic_billing: str, clear_existing: int = 1)
         return {"ok": False, "message": str(e), "created": 0, "grand_total": 0.0, "warnings": []}
 
 
+@frappe.whitelist()
+def start_periodic_billing_get_charges(periodic_billing: str, clear_existing: int = 1) -> Dict[str, Any]:
+    """Queue ``periodic_billing_get_charges`` as a Logistics Background Job (one per Periodic Billing at a time)."""
+    frappe.has_permission("Periodic Billing", "write", periodic_billing, throw=True)
+    return enqueue_operation(
+        "logistics.warehousing.billing.periodic_billing_get_charges",
+        "Periodic Billing",
+        periodic_billing,
+        title=_("Get Charges for {0}").format(periodic_billing),
+        periodic_billing=periodic_billing,
+        clear_existing=int(clear_existing or 0),
+    )
+
+
 def get_existing_warehouse_job_charges(customer: str, date_from: str, date_to: str, company: Optional[str] = None, branch: Optional[str] = None) -> Tuple[List[Dict], float, List[str]]:
     """Get existing warehouse job charges from the warehouse_job_charges table."""
     charges = []
@@ -292,10 +321,10 @@ def get_storage_charges_from_contract(customer: str, date_from: str, date_to: st
     warnings = []
     
     try:
-        # Get handling units for the customer
-        hu_list = get_customer_handling_units(customer, date_to, company, branch)
+        # Per-HU occupancy for the whole period in a few grouped queries over the daily snapshot
+        hu_summaries = get_customer_hu_occupancy_summary(customer, date_from, date_to, company, branch)
         
-        if not hu_list:
+        if not hu_summaries:
             warnings.append(_("No handling units found for this customer; storage charges skipped."))
             return charges, total, warnings
         
@@ -317,11 +346,9 @@ def get_storage_charges_from_contract(customer: str, date_from: str, date_to: st
         # Track which HUs have charges
         hus_with_charges = set()
         
-        # Process each handling unit
-        for hu in hu_list:
-            hu_details = get_handling_unit_billing_details(hu, date_from, date_to)
-            if not hu_details:
-                continue
+        # Process each handling unit (every summarised HU held stock outside staging in the period)
+        for hu_details in hu_summaries:
+            hu = hu_details["handling_unit"]
                 
             # Find matching contract item
             contract_item = find_matching_contract_item(contract_items, hu_details)
@@ -332,13 +359,12 @@ def get_storage_charges_from_contract(customer: str, date_from: str, date_to: st
                 total += sum(flt(charge.get("total", 0)) for charge in hu_charges)
                 hus_with_charges.add(hu)
             else:
-                # Check if this HU has outstanding stock but no matching contract item
-                if has_handling_unit_outstanding_stock(hu, date_from, date_to):
-                    # Create charge with zero rate and remark about missing rates
-                    missing_rate_charge = create_missing_rate_charge(hu, hu_details, date_from, date_to, company)
-                    if missing_rate_charge:
-                        charges.append(missing_rate_charge)
-                        hus_with_charges.add(hu)
+                # Outstanding stock but no matching contract item:
+                # create charge with zero rate and remark about missing rates
+                missing_rate_charge = create_missing_rate_charge(hu, hu_details, date_from, date_to, company)
+                if missing_rate_charge:
+                    charges.append(missing_rate_charge)
+                    hus_with_charges.add(hu)
         
     except Exception as e:
         warnings.append(f"Error getting storage charges from contract: {str(e)}")
@@ -367,101 +393,6 @@ def get_customer_handling_units(customer: str, date_to: str, company: Optional[s
         return []
 
 
-def get_handling_unit_billing_details(hu: str, date_from: str, date_to: str) -> Dict[str, Any]:
-    """Get comprehensive billing details for a handling unit."""
-    try:
-        # Get handling unit type
-        hu_type = frappe.db.get_value("Handling Unit", hu, "type") if hu else None
-        
-        # Get storage location (excluding staging)
-        storage_location = None
-        storage_type = None
-        
-        if hu:
-            rows = frappe.db.sql("""
-                SELECT 
-                    l.storage_location,
-                    COUNT(*) as day_count,
-                    SUM(ABS(l.quantity)) as total_movement
-                FROM `tabWarehouse Stock Ledger` l
-                LEFT JOIN `tabStorage Location` sl ON sl.name = l.storage_location
-                WHERE l.handling_unit = %s 
-                  AND DATE(l.posting_date) BETWEEN %s AND %s
-                  AND l.storage_location IS NOT NULL
-                  AND (sl.staging_area = 0 OR sl.staging_area IS NULL)
-                GROUP BY l.storage_location
-                ORDER BY day_count DESC, total_movement DESC
-                LIMIT 1
-            """, (hu, date_from, date_to), as_dict=True)
-            
-            if rows:
-                storage_location = rows[0]["storage_location"]
-                storage_type = frappe.db.get_value("Storage Location", storage_location, "storage_type")
-        
-        # Check if only in staging areas
-        if not storage_location and hu:
-            staging_check = frappe.db.sql("""
-                SELECT COUNT(*) as staging_days
-                FROM `tabWarehouse Stock Ledger` l
-                LEFT JOIN `tabStorage Location` sl ON sl.name = l.storage_location
-                WHERE l.handling_unit = %s 
-                  AND DATE(l.posting_date) BETWEEN %s AND %s
-                  AND l.storage_location IS NOT NULL
-                  AND sl.staging_area = 1
-            """, (hu, date_from, date_to), as_dict=True)
-            
-            if staging_check and staging_check[0]["staging_days"] > 0:
-                return None  # Skip staging-only handling units
-        
-        return {
-            "handling_unit": hu,
-            "handling_unit_type": hu_type,
-            "storage_location": storage_location,
-            "storage_type": storage_type,
-            "date_from": date_from,
-            "date_to": date_to,
-            "total_volume": 0.0,
-            "total_weight": 0.0
-        }
-        
-    except Exception as e:
-        frappe.log_error(f"Error getting handling unit details for {hu}: {str(e)}")
-        return None
-
-
-def has_handling_unit_outstanding_stock(hu: str, date_from: str, date_to: str) -> bool:
-    """Check if a handling unit has outstanding stock during the billing period."""
-    try:
-        # Check if there's any stock balance during the period
-        # Look for any day where end_qty > 0
-        stock_check = frappe.db.sql("""
-            SELECT COUNT(*) as days_with_stock
-            FROM `tabWarehouse Stock Ledger` l
-            WHERE l.handling_unit = %s
-              AND DATE(l.posting_date) BETWEEN %s AND %s
-              AND COALESCE(l.end_qty, 0) > 0
-            LIMIT 1
-        """, (hu, date_from, date_to), as_dict=True)
-        
-        if stock_check and stock_check[0]["days_with_stock"] > 0:
-            return True
-        
-        # Also check if there's stock at the end date
-        end_stock = frappe.db.sql("""
-            SELECT SUM(COALESCE(l.end_qty, 0)) as end_balance
-            FROM `tabWarehouse Stock Ledger` l
-            WHERE l.handling_unit = %s
-              AND DATE(l.posting_date) <= %s
-            HAVING end_balance > 0
-        """, (hu, date_to), as_dict=True)
-        
-        return bool(end_stock and end_stock[0]["end_balance"] > 0)
-        
-    except Exception as e:
-        frappe.log_error(f"Error checking outstanding stock for {hu}: {str(e)}")
-        return False
-
-
 def create_missing_rate_charge(hu: str, hu_details: Dict, date_from: str, date_to: str, company: Optional[str] = None) -> Optional[Dict]:
     """Create a charge entry for handling unit with stock but no matching contract rate."""
     try:
@@ -470,21 +401,9 @@ def create_missing_rate_charge(hu: str, hu_details: Dict, date_from: str, date_t
         end_date = datetime.strptime(str(date_to), "%Y-%m-%d")
         days = (end_date - start_date).days + 1
         
-        # Get volume and weight for the handling unit
-        volume_weight = frappe.db.sql("""
-            SELECT 
-                SUM(COALESCE(wi.volume, 0) * COALESCE(l.end_qty, 0)) as total_volume,
-                SUM(COALESCE(wi.weight, 0) * COALESCE(l.end_qty, 0)) as total_weight
-            FROM `tabWarehouse Stock Ledger` l
-            LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
-            WHERE l.handling_unit = %s
-              AND DATE(l.posting_date) BETWEEN %s AND %s
-              AND COALESCE(l.end_qty, 0) > 0
-            GROUP BY l.handling_unit
-        """, (hu, date_from, date_to), as_dict=True)
-        
-        total_volume = flt(volume_weight[0]["total_volume"]) if volume_weight else 0.0
-        total_weight = flt(volume_weight[0]["total_weight"]) if volume_weight else 0.0
+        # Average occupied volume and weight, from the occupancy summary (notes only)
+        total_volume = flt(hu_details.get("avg_volume"))
+        total_weight = flt(hu_details.get("avg_weight"))
         
         # Create charge with zero rate
         charge = {
@@ -744,7 +663,7 @@ def populate_storage_details_from_inventory(pb, customer: str, date_from: str, d
     This function:
     - Gets handling units from storage charges that were created (not all inventory)
     - Creates a daily snapshot for each day in the date range
-    - Uses physical stock (end_qty) from Warehouse Stock Ledger to calculate volume and weight
+    - Reads end-of-day volume and weight from the Handling Unit Occupancy snapshot
     - Shows the breakdown of volume/weight data used for storage charge computation
     
     The Storage Details table provides a breakdown showing how storage charges are computed.
@@ -771,94 +690,15 @@ def populate_storage_details_from_inventory(pb, customer: str, date_from: str, d
         if not handling_units:
             return
         
-        # Generate date range for daily snapshots
-        start_date = datetime.strptime(str(date_from), "%Y-%m-%d")
-        end_date = datetime.strptime(str(date_to), "%Y-%m-%d")
-        date_list = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_list.append(current_date.strftime("%Y-%m-%d"))
-            current_date += timedelta(days=1)
-        
-        # Get daily snapshots of physical stock for each handling unit
-        hu_list = list(handling_units)
-        placeholders = ", ".join(["%s"] * len(hu_list))
-        
-        # For each day, get the physical stock snapshot (end_qty) for each handling unit
-        # This represents the actual physical inventory on that date
-        for date_str in date_list:
-            # Get aggregated physical stock snapshot for each handling unit on this date
-            # Use end_qty which represents the physical stock balance at end of day
-            # Aggregate all items in each handling unit to get total volume and weight
-            daily_snapshot = frappe.db.sql(f"""
-                SELECT 
-                    l.handling_unit,
-                    SUM(COALESCE(l.end_qty, 0)) as total_physical_qty,
-                    SUM(COALESCE(wi.volume, 0) * COALESCE(l.end_qty, 0)) as total_volume,
-                    SUM(COALESCE(wi.weight, 0) * COALESCE(l.end_qty, 0)) as total_weight
-                FROM `tabWarehouse Stock Ledger` l
-                LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
-                WHERE l.handling_unit IN ({placeholders})
-                  AND DATE(l.posting_date) = %s
-                  AND l.handling_unit IS NOT NULL
-                  AND wi.customer = %s
-                  AND COALESCE(l.end_qty, 0) > 0
-                GROUP BY l.handling_unit
-            """, tuple(hu_list) + (date_str, customer), as_dict=True)
-            
-            # Create snapshot entries for this date
-            hu_snapshot = {}
-            for entry in daily_snapshot:
-                hu = entry.get("handling_unit")
-                if not hu:
-                    continue
-                
-                total_volume = flt(entry.get("total_volume", 0))
-                total_weight = flt(entry.get("total_weight", 0))
-                total_qty = flt(entry.get("total_physical_qty", 0))
-                
-                # Only add if there's actual physical stock
-                if total_qty > 0:
-                    hu_snapshot[hu] = {
-                        "date": date_str,
-                        "handling_unit": hu,
-                        "volume": total_volume,
-                        "weight": total_weight,
-                        "hu_count": 1.0
-                    }
-            
-            # If no ledger entries for this date, check if handling unit exists
-            # and use current values from Handling Unit master
-            for hu in handling_units:
-                if hu not in hu_snapshot:
-                    try:
-                        # Get current volume/weight from Handling Unit
-                        hu_doc = frappe.get_doc("Handling Unit", hu)
-                        hu_volume = flt(hu_doc.get("current_volume") or 0.0)
-                        hu_weight = flt(hu_doc.get("current_weight") or 0.0)
-                        
-                        # Only add if there's actual volume/weight data
-                        if hu_volume > 0 or hu_weight > 0:
-                            hu_snapshot[hu] = {
-                                "date": date_str,
-                                "handling_unit": hu,
-                                "volume": hu_volume,
-                                "weight": hu_weight,
-                                "hu_count": 1.0
-                            }
-                    except Exception:
-                        continue
-            
-            # Add entries for this date (sorted by handling_unit)
-            for hu in sorted(hu_snapshot.keys()):
-                snapshot = hu_snapshot[hu]
-                pb.append("storage_details", {
-                    "date": snapshot["date"],
-                    "handling_unit": snapshot["handling_unit"],
-                    "volume": snapshot["volume"],
-                    "weight": snapshot["weight"],
-                    "hu_count": snapshot["hu_count"]
-                })
+        # Daily end-of-day volume/weight per HU straight from the occupancy snapshot (one query)
+        for snapshot in get_daily_hu_occupancy(handling_units, customer, date_from, date_to):
+            pb.append("storage_details", {
+                "date": str(snapshot["date"]),
+                "handling_unit": snapshot["handling_unit"],
+                "volume": flt(snapshot["volume"]),
+                "weight": flt(snapshot["weight"]),
+                "hu_count": 1.0
+            })
         
     except Exception as e:
         frappe.log_error(f"Error populating storage details from inventory: {str(e)}")
@@ -0,0 +1,281 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Batch capacity forecasting for Storage Locations.
+
+``load_utilization_history`` reads the daily utilization of every filtered location in
+one grouped Warehouse Stock Ledger query. ``forecast_series`` fits all series at once:
+series of the same length are stacked into a (locations x days) NumPy matrix and each
+method (linear / quadratic least squares, moving average, exponential smoothing,
+seasonal decomposition) runs as array operations over the whole matrix. Thresholds and
+confidence formulas are those of the per-location functions in the Capacity
+Forecasting Report, so a batch forecast gives the same numbers as the old loop.
+
+A series is the location's daily utilization (higher of volume and weight use) on the
+days that had stock, oldest first. Short series are padded at the front with the
+current utilization up to ``MIN_HISTORY_DAYS``; a location without history gets a flat
+series at its current utilization.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import frappe
+from frappe.utils import today
+
+HISTORY_DAYS = 90
+MIN_HISTORY_DAYS = 7
+FLAT_HISTORY_DAYS = 30
+SMOOTHING_ALPHA = 0.3
+CACHE_TTL_SEC = 24 * 60 * 60
+
+METHODS = (
+    "Linear Regression",
+    "Moving Average",
+    "Exponential Smoothing",
+    "Seasonal Decomposition",
+    "Neural Network",
+)
+
+
+# ---------------------------------------------------------------------------
+# History
+# ---------------------------------------------------------------------------
+
+def load_utilization_history(
+    where_sql: str,
+    params: Dict[str, Any],
+    days: int = HISTORY_DAYS,
+) -> Dict[str, np.ndarray]:
+    """Daily utilization per location for the Storage Locations matching ``where_sql``.
+
+    ``where_sql`` filters ``tabStorage Location`` aliased ``sl``. Returns
+    {location: array of utilization %, oldest day first}; locations without stock in
+    the last ``days`` days are absent.
+    """
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            l.storage_location,
+            SUM(COALESCE(wi.volume * COALESCE(l.end_qty, l.beg_quantity + COALESCE(l.quantity, 0)), 0)) AS total_volume,
+            SUM(COALESCE(wi.weight * COALESCE(l.end_qty, l.beg_quantity + COALESCE(l.quantity, 0)), 0)) AS total_weight,
+            COALESCE(MAX(sl.max_volume), 0) AS max_volume,
+            COALESCE(MAX(sl.max_weight), 0) AS max_weight
+        FROM `tabWarehouse Stock Ledger` l
+        INNER JOIN `tabStorage Location` sl ON sl.name = l.storage_location
+        LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
+        WHERE {where_sql}
+        AND DATE(l.posting_date) >= DATE_SUB(CURDATE(), INTERVAL %(history_days)s DAY)
+        AND COALESCE(l.end_qty, l.beg_quantity + COALESCE(l.quantity, 0)) > 0
+        GROUP BY l.storage_location, DATE(l.posting_date)
+        ORDER BY l.storage_location, DATE(l.posting_date)
+        """,
+        dict(params, history_days=int(days)),
+    )
+    if not rows:
+        return {}
+
+    locations = [row[0] for row in rows]
+    values = np.array([row[1:] for row in rows], dtype=float)
+    volume, weight, max_volume, max_weight = values.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_util = np.where(max_volume > 0, volume / max_volume * 100, 0.0)
+        weight_util = np.where(max_weight > 0, weight / max_weight * 100, 0.0)
+    utilization = np.maximum(volume_util, weight_util)
+
+    # rows are ordered by location, so each location is one contiguous run
+    starts = [0] + [i for i in range(1, len(locations)) if locations[i] != locations[i - 1]]
+    return {
+        locations[start]: series
+        for start, series in zip(starts, np.split(utilization, starts[1:]))
+    }
+
+
+def pad_history(series: Optional[np.ndarray], current_utilization: float) -> np.ndarray:
+    """History as forecast input: front-padded to ``MIN_HISTORY_DAYS``, flat when empty."""
+    if series is None or not len(series):
+        return np.full(FLAT_HISTORY_DAYS, float(current_utilization))
+    if len(series) < MIN_HISTORY_DAYS:
+        pad = np.full(MIN_HISTORY_DAYS - len(series), float(current_utilization))
+        return np.concatenate([pad, series])
+    return np.asarray(series, dtype=float)
+
+
+# ---------------------------------------------------------------------------
+# Forecast methods (Y is a (series x days) matrix, all series the same length)
+# ---------------------------------------------------------------------------
+
+def _trend_labels(slope: np.ndarray, threshold: float) -> np.ndarray:
+    return np.where(slope > threshold, "Increasing", np.where(slope < -threshold, "Decreasing", "Stable"))
+
+
+def _result(forecast, confidence, slope, threshold) -> Dict[str, np.ndarray]:
+    return {
+        "forecast": np.clip(forecast, 0, 100),
+        "confidence": confidence,
+        "trend": _trend_labels(slope, threshold),
+        "growth_rate": slope * 30,
+    }
+
+
+def _last_value(Y: np.ndarray, confidence: float) -> Dict[str, np.ndarray]:
+    m = Y.shape[0]
+    last = Y[:, -1] if Y.shape[1] else np.zeros(m)
+    return {
+        "forecast": last,
+        "confidence": np.full(m, float(confidence)),
+        "trend": np.full(m, "Stable"),
+        "growth_rate": np.zeros(m),
+    }
+
+
+def _r_squared(Y: np.ndarray, fitted: np.ndarray) -> np.ndarray:
+    ss_res = ((Y - fitted) ** 2).sum(axis=1)
+    ss_tot = ((Y - Y.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ss_tot == 0, (ss_res == 0).astype(float), 1 - ss_res / ss_tot)
+
+
+def linear_regression(Y: np.ndarray, forecast_period: int) -> Dict[str, np.ndarray]:
+    n = Y.shape[1]
+    if n < 2:
+        return _last_value(Y, 50)
+    x = np.arange(n, dtype=float)
+    dx = x - x.mean()
+    slope = (Y - Y.mean(axis=1, keepdims=True)) @ dx / (dx @ dx)
+    intercept = Y.mean(axis=1) - slope * x.mean()
+    r_squared = _r_squared(Y, intercept[:, None] + slope[:, None] * x)
+    confidence = np.clip(r_squared * 100, 50, 95)
+    return _result(intercept + slope * (n + forecast_period), confidence, slope, 0.5)
+
+
+def moving_average(Y: np.ndarray, forecast_period: int) -> Dict[str, np.ndarray]:
+    n = Y.shape[1]
+    if n < 3:
+        return _last_value(Y, 60)
+    window = Y[:, -min(7, n):]
+    recent_avg = window.mean(axis=1)
+    slope = (Y[:, -1] - Y[:, 0]) / n
+    variance = ((window - recent_avg[:, None]) ** 2).mean(axis=1)
+    confidence = np.clip(100 - variance / 10, 50, 90)
+    return _result(recent_avg + slope * forecast_period, confidence, slope, 0.3)
+
+
+def exponential_smoothing(Y: np.ndarray, forecast_period: int, alpha: float = SMOOTHING_ALPHA) -> Dict[str, np.ndarray]:
+    n = Y.shape[1]
+    if n < 2:
+        return _last_value(Y, 60)
+    smoothed = np.empty_like(Y)
+    smoothed[:, 0] = Y[:, 0]
+    # the recursion runs over days; every step is vectorized over all series
+    for i in range(1, n):
+        smoothed[:, i] = alpha * Y[:, i] + (1 - alpha) * smoothed[:, i - 1]
+    slope = (smoothed[:, -1] - smoothed[:, 0]) / n
+    error = np.abs(Y - smoothed).mean(axis=1)
+    confidence = np.clip(100 - error / 2, 50, 90)
+    return _result(smoothed[:, -1] + slope * forecast_period, confidence, slope, 0.2)
+
+
+def seasonal_decomposition(Y: np.ndarray, forecast_period: int, include_seasonality: bool = True) -> Dict[str, np.ndarray]:
+    n = Y.shape[1]
+    if n < 14:
+        return moving_average(Y, forecast_period)
+    pattern = np.stack([Y[:, day::7].mean(axis=1) for day in range(7)], axis=1)
+    pattern_mean = pattern.mean(axis=1)
+
+    # trailing 7-day averages ending before day i, for i in 7..n-1
+    csum = np.concatenate([np.zeros((Y.shape[0], 1)), np.cumsum(Y, axis=1)], axis=1)
+    trend_data = (csum[:, 7:n] - csum[:, 0:n - 7]) / 7
+    points = trend_data.shape[1]
+    slope = (trend_data[:, -1] - trend_data[:, 0]) / points if points > 1 else np.zeros(Y.shape[0])
+
+    forecast = trend_data[:, -1] + slope * forecast_period
+    if include_seasonality:
+        forecast = forecast + pattern[:, (forecast_period - 1) % 7] - pattern_mean
+    seasonal_variance = ((pattern - pattern_mean[:, None]) ** 2).mean(axis=1)
+    confidence = np.clip(100 - seasonal_variance / 5, 50, 95)
+    return _result(forecast, confidence, slope, 0.2)
+
+
+def quadratic_regression(Y: np.ndarray, forecast_period: int) -> Dict[str, np.ndarray]:
+    """The report's "Neural Network" method: a least-squares quadratic fit."""
+    n = Y.shape[1]
+    if n < 5:
+        return moving_average(Y, forecast_period)
+    x = np.arange(n, dtype=float)
+    vander = np.vander(x, 3, increasing=True)
+    coeffs, *_ = np.linalg.lstsq(vander, Y.T, rcond=None)
+    a, b, c = coeffs
+    r_squared = _r_squared(Y, (vander @ coeffs).T)
+    confidence = np.clip(r_squared * 100, 50, 95)
+    forecast_x = n + forecast_period
+    slope = b + 2 * c * n
+    return _result(a + b * forecast_x + c * forecast_x ** 2, confidence, slope, 0.3)
+
+
+def _fit(Y: np.ndarray, method: str, forecast_period: int, include_seasonality: bool) -> Dict[str, np.ndarray]:
+    if method == "Linear Regression":
+        return linear_regression(Y, forecast_period)
+    if method == "Moving Average":
+        return moving_average(Y, forecast_period)
+    if method == "Exponential Smoothing":
+        return exponential_smoothing(Y, forecast_period)
+    if method == "Seasonal Decomposition":
+        return seasonal_decomposition(Y, forecast_period, include_seasonality)
+    return quadratic_regression(Y, forecast_period)
+
+
+def forecast_series(
+    series: Sequence[np.ndarray],
+    method: str,
+    forecast_period: int,
+    include_seasonality: bool = True,
+) -> List[Dict[str, Any]]:
+    """Forecast every series in ``series``; returns one result dict per series, in order.
+
+    Each result has ``forecast`` (utilization %), ``confidence``, ``trend`` and
+    ``growth_rate`` (per 30 days), as the report's per-location methods return.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(series)
+    by_length: Dict[int, List[int]] = {}
+    for i, s in enumerate(series):
+        by_length.setdefault(len(s), []).append(i)
+
+    for length, indexes in by_length.items():
+        Y = np.vstack([series[i] for i in indexes]) if length else np.zeros((len(indexes), 0))
+        fitted = _fit(Y, method, forecast_period, include_seasonality)
+        for row, i in enumerate(indexes):
+            results[i] = {
+                "forecast": float(fitted["forecast"][row]),
+                "confidence": float(fitted["confidence"][row]),
+                "trend": str(fitted["trend"][row]),
+                "growth_rate": float(fitted["growth_rate"][row]),
+            }
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def cache_key(prefix: str, filters: Dict[str, Any]) -> str:
+    """Cache key for ``filters`` valid for today."""
+    payload = json.dumps({k: filters[k] for k in sorted(filters) if filters[k] not in (None, "")}, default=str)
+    digest = hashlib.md5(payload.encode("utf-8")).hexdigest()
+    return f"logistics:{prefix}:{today()}:{digest}"
+
+
+def cached(prefix: str, filters: Dict[str, Any], compute) -> Any:
+    """``compute()`` cached per (``filters``, day)."""
+    key = cache_key(prefix, filters)
+    value = frappe.cache.get_value(key)
+    if value is None:
+        value = compute()
+        frappe.cache.set_value(key, value, expires_in_sec=CACHE_TTL_SEC)
+    return value
@@ -0,0 +1,163 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Handling Unit / Storage Location capacity metrics.
+
+``current_volume`` / ``current_weight`` are SUM(quantity * Warehouse Item volume / weight)
+over the Warehouse Stock Ledger rows of the HU or location, and ``utilization_percentage``
+is the higher of volume and weight use against ``max_volume`` / ``max_weight``.
+
+Every ledger posting applies its delta to its own HU and location in the same
+transaction (see WarehouseStockLedger.after_insert / on_trash) with a single column
+UPDATE, without loading or saving the documents. ``reconcile_capacity_metrics``
+recomputes the sums in bulk SQL and corrects the rows that drifted; it replaces the
+old per-document refresh and runs daily.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+CAPACITY_DOCTYPES = (
+    # (doctype, ledger column)
+    ("Handling Unit", "handling_unit"),
+    ("Storage Location", "storage_location"),
+)
+
+# Volumes / weights closer than this are treated as equal when looking for drift.
+CAPACITY_TOLERANCE = 1e-6
+
+
+def _utilization_sql(volume: str, weight: str, prefix: str = "") -> str:
+    """SQL for the higher of volume and weight utilization (0 when no max is set)."""
+    return f"""GREATEST(
+        CASE WHEN IFNULL({prefix}max_volume, 0) > 0 THEN ({volume}) / {prefix}max_volume * 100 ELSE 0 END,
+        CASE WHEN IFNULL({prefix}max_weight, 0) > 0 THEN ({weight}) / {prefix}max_weight * 100 ELSE 0 END
+    )"""
+
+
+def _ledger_delta(led: Any) -> Tuple[float, float]:
+    item = getattr(led, "item", None)
+    if not item:
+        return 0.0, 0.0
+    volume, weight = frappe.db.get_value("Warehouse Item", item, ["volume", "weight"], cache=True) or (0, 0)
+    qty = flt(getattr(led, "quantity", 0))
+    return qty * flt(volume), qty * flt(weight)
+
+
+def _apply_delta(led: Any, sign: int) -> None:
+    volume, weight = _ledger_delta(led)
+    if not volume and not weight:
+        return
+    params = {"volume": sign * volume, "weight": sign * weight}
+    for doctype, column in CAPACITY_DOCTYPES:
+        name = getattr(led, column, None)
+        if not name:
+            continue
+        # utilization first: it must read the old current_* values on MariaDB and MySQL alike
+        frappe.db.sql(
+            f"""
+            UPDATE `tab{doctype}`
+            SET utilization_percentage = {_utilization_sql(
+                    "IFNULL(current_volume, 0) + %(volume)s", "IFNULL(current_weight, 0) + %(weight)s"
+                )},
+                current_volume = IFNULL(current_volume, 0) + %(volume)s,
+                current_weight = IFNULL(current_weight, 0) + %(weight)s
+            WHERE name = %(name)s
+            """,
+            dict(params, name=name),
+        )
+
+
+def apply_ledger_capacity(led: Any) -> None:
+    """Add a ledger row's volume / weight to its Handling Unit and Storage Location."""
+    _apply_delta(led, 1)
+
+
+def reverse_ledger_capacity(led: Any) -> None:
+    """Remove a deleted ledger row's volume / weight from its Handling Unit and Storage Location."""
+    _apply_delta(led, -1)
+
+
+# ---------------------------------------------------------------------------
+# Reconcile
+# ---------------------------------------------------------------------------
+
+def _ledger_totals_sql(column: str) -> str:
+    return f"""
+        SELECT wsl.{column} AS name,
+            SUM(COALESCE(wsl.quantity, 0) * COALESCE(wi.volume, 0)) AS volume,
+            SUM(COALESCE(wsl.quantity, 0) * COALESCE(wi.weight, 0)) AS weight
+        FROM `tabWarehouse Stock Ledger` wsl
+        LEFT JOIN `tabWarehouse Item` wi ON wsl.item = wi.name
+        WHERE IFNULL(wsl.{column}, '') != ''
+        GROUP BY wsl.{column}
+    """
+
+
+def _drift_condition() -> str:
+    return f"""
+        d.docstatus != 2
+        AND (ABS(IFNULL(d.current_volume, 0) - IFNULL(t.volume, 0)) > {CAPACITY_TOLERANCE}
+            OR ABS(IFNULL(d.current_weight, 0) - IFNULL(t.weight, 0)) > {CAPACITY_TOLERANCE})
+    """
+
+
+def reconcile_capacity_metrics(fix: bool = True, limit: int = 500) -> Dict[str, Any]:
+    """
+    Compare stored capacity metrics with ledger sums (one grouped query per doctype).
+
+    With ``fix`` the drifted rows are corrected in one UPDATE per doctype. Returns the
+    drift count per doctype and up to ``limit`` sample rows.
+    """
+    out: Dict[str, Any] = {"fixed": bool(fix), "drift_count": 0, "drift": []}
+    for doctype, column in CAPACITY_DOCTYPES:
+        totals = _ledger_totals_sql(column)
+        drift = frappe.db.sql(
+            f"""
+            SELECT d.name, IFNULL(d.current_volume, 0) AS stored_volume, IFNULL(t.volume, 0) AS ledger_volume,
+                IFNULL(d.current_weight, 0) AS stored_weight, IFNULL(t.weight, 0) AS ledger_weight
+            FROM `tab{doctype}` d
+            LEFT JOIN ({totals}) t ON t.name = d.name
+            WHERE {_drift_condition()}
+            """,
+            as_dict=True,
+        )
+        out[doctype] = len(drift)
+        out["drift_count"] += len(drift)
+        room = max(0, limit - len(out["drift"]))
+        out["drift"].extend(dict(row, doctype=doctype) for row in drift[:room])
+        if fix and drift:
+            frappe.db.sql(
+                f"""
+                UPDATE `tab{doctype}` d
+                LEFT JOIN ({totals}) t ON t.name = d.name
+                SET d.utilization_percentage = {_utilization_sql("IFNULL(t.volume, 0)", "IFNULL(t.weight, 0)", "d.")},
+                    d.current_volume = IFNULL(t.volume, 0),
+                    d.current_weight = IFNULL(t.weight, 0)
+                WHERE {_drift_condition()}
+                """
+            )
+    return out
+
+
+def reconcile_daily() -> None:
+    """Daily: correct capacity metrics that drifted from the ledger and log how many."""
+    out = reconcile_capacity_metrics(fix=True, limit=50)
+    if out["drift_count"]:
+        frappe.log_error(
+            title=_("Capacity metrics drift corrected"),
+            message=frappe.as_json(out),
+        )
+
+
+@frappe.whitelist()
+def verify(limit: Optional[int] = 500):
+    """Report Handling Units / Storage Locations whose capacity metrics drifted from the ledger."""
+    frappe.only_for("System Manager")
+    return reconcile_capacity_metrics(fix=False, limit=int(limit or 500))
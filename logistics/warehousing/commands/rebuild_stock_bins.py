@@ -0,0 +1,46 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Bench Command: Rebuild / Verify Warehouse Stock Bins
+====================================================
+
+Recomputes Warehouse Stock Bin from Warehouse Stock Ledger, or reports drift
+between the two without writing anything.
+
+Usage:
+    bench --site your-site execute logistics.warehousing.commands.rebuild_stock_bins.rebuild
+    bench --site your-site execute logistics.warehousing.commands.rebuild_stock_bins.verify
+    bench --site your-site execute logistics.warehousing.commands.rebuild_stock_bins.rebuild --kwargs "{'company': 'My Co'}"
+"""
+
+import frappe
+
+from logistics.warehousing.stock_bin import rebuild_stock_bins, verify_stock_bins
+
+
+def rebuild(company=None, item=None):
+    """Rebuild bins from the ledger and commit."""
+    print("Rebuilding Warehouse Stock Bin from ledger...")
+    try:
+        out = rebuild_stock_bins(company=company, item=item)
+        frappe.db.commit()
+        print(f"Rebuilt {out['bins']} bins.")
+        return out
+    except Exception as e:
+        frappe.db.rollback()
+        print(f"Rebuild failed: {str(e)}")
+        raise
+
+
+def verify(company=None, item=None):
+    """Print bins whose qty no longer matches SUM(ledger.quantity)."""
+    out = verify_stock_bins(company=company, item=item)
+    print(f"Checked {out['checked']} bins, {out['drift_count']} drifted.")
+    for row in out["drift"]:
+        print(
+            f"  {row['item']} @ {row['storage_location']} HU={row['handling_unit'] or '-'} "
+            f"batch={row['batch_no'] or '-'} serial={row['serial_no'] or '-'}: "
+            f"ledger={row['ledger_qty']} bin={row['bin_qty']}"
+        )
+    return out
@@ -6,47 +6,20 @@ frappe.ui.form.on('Periodic Billing', {
     if (frm.is_new()) return;
 
     // Get Charges button
-    frm.add_custom_button(__('Get Charges'), async () => {
-      console.log('Get Charges button clicked');
-      try {
-        console.log('Calling periodic_billing_get_charges with:', frm.doc.name);
-        const r = await frappe.call({
-          method: 'logistics.warehousing.billing.periodic_billing_get_charges',
-          args: { periodic_billing: frm.doc.name, clear_existing: 1 },
-          freeze: true,
-          freeze_message: __('Fetching charges...'),
-        });
-        console.log('Response received:', r);
-        console.log('Response message:', r.message);
-        console.log('Response type:', typeof r.message);
-
-        let msg = '';
-        if (r && r.message) {
-          if (typeof r.message === 'string') {
-            msg = r.message;
-          } else if (typeof r.message.message === 'string') {
-            msg = r.message.message;
-          } else {
-            msg = __('Charges fetched.');
-          }
-        } else {
-          msg = __('Charges fetched.');
-        }
-
-        console.log('Final message:', msg);
-        frappe.msgprint({ title: __('Get Charges'), message: msg, indicator: 'green' });
-        
-        // Check if charges were actually created
-        if (r && r.message && r.message.created) {
-          console.log('Charges created:', r.message.created);
-          console.log('Grand total:', r.message.grand_total);
-        }
-        
-        frm.reload_doc();
-      } catch (e) {
+    frm.add_custom_button(__('Get Charges'), () => {
+      logistics.background_job.run({
+        method: 'logistics.warehousing.billing.start_periodic_billing_get_charges',
+        args: { periodic_billing: frm.doc.name, clear_existing: 1 },
+        title: __('Fetching charges...'),
+        on_done: (res) => {
+          const msg = (res && typeof res.message === 'string') ? res.message : __('Charges fetched.');
+          frappe.msgprint({ title: __('Get Charges'), message: msg, indicator: res && res.ok === false ? 'red' : 'green' });
+          frm.reload_doc();
+        },
+      }).catch((e) => {
         const server = (e && e.message) ? e.message : (e && e._server_messages) ? e._server_messages : e;
         frappe.msgprint({ title: __('Error'), indicator: 'red', message: String(server || __('Unknown error')) });
-      }
+      });
     }, __('Action'));
     
     // Add contract setup summary button
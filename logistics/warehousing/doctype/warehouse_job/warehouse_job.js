@@ -742,13 +742,15 @@ function allocate_items(frm) {
     frappe.confirm(
         confirm_message,
         function() {
-            // No progress dialog - allocation runs silently
-            frappe.call({
-                method: 'logistics.warehousing.doctype.warehouse_job.warehouse_job.allocate_items',
+            // Runs as a background job; progress is shown while it is queued / running
+            logistics.background_job.run({
+                method: 'logistics.warehousing.doctype.warehouse_job.warehouse_job.start_allocate_items',
                 args: {
                     job_name: frm.doc.name
                 },
-                callback: function(r) {
+                title: __('Allocating items'),
+                on_done: function(result) {
+                    let r = { message: result };
                     if (r.message && r.message.success) {
                         // Reload document first to get the allocated items
                         frm.reload_doc().then(function() {
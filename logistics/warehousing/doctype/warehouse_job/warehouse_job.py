@@ -7,6 +7,10 @@ from frappe.model.document import Document
 from frappe.utils import flt, now_datetime
 from frappe import _
 from logistics.warehousing.api_parts.common import _get_default_currency
+from logistics.utils.background_jobs import enqueue_operation
+
+# Seconds a rendered Warehouse Job dashboard is reused (it embeds live location capacity)
+WAREHOUSE_DASHBOARD_CACHE_TTL = 120
 
 # ---------------------------------------------------------------------------
 # Meta helpers
@@ -86,46 +90,21 @@ def _get_last_qty(
     branch: str | None = None,
 ) -> float:
     """
-    Return the last end_qty snapshot for this item+location(+HU/serial/batch),
-    filtered by Company/Branch if those columns exist on the Ledger.
+    Return the current on-hand qty for this item+location(+HU/serial/batch),
+    filtered by Company/Branch when given. Reads Warehouse Stock Bin, which is
+    maintained from ledger postings, instead of scanning the ledger.
     """
-    ledger_fields = _safe_meta_fieldnames("Warehouse Stock Ledger")
-
-    conds = [
-        "item = %(item)s",
-        "storage_location = %(location)s",
-        "IFNULL(handling_unit,'') = %(handling_unit)s",
-        "IFNULL(serial_no,'') = %(serial_no)s",
-        "IFNULL(batch_no,'') = %(batch_no)s",
-    ]
-    if "company" in ledger_fields and company:
-        conds.append("company = %(company)s")
-    if "branch" in ledger_fields and branch:
-        conds.append("branch = %(branch)s")
-
-    where_sql = " AND ".join(conds)
-    params = {
-        "item": item,
-        "location": location,
-        "handling_unit": handling_unit or "",
-        "serial_no": serial_no or "",
-        "batch_no": batch_no or "",
-        "company": company,
-        "branch": branch,
-    }
-
-    row = frappe.db.sql(
-        f"""
-        SELECT end_qty
-        FROM `tabWarehouse Stock Ledger`
-        WHERE {where_sql}
-        ORDER BY posting_date DESC, creation DESC
-        LIMIT 1
-        """,
-        params,
-        as_dict=True,
+    from logistics.warehousing.stock_bin import get_bin_qty
+
+    return get_bin_qty(
+        item,
+        location,
+        handling_unit=handling_unit,
+        serial_no=serial_no,
+        batch_no=batch_no,
+        company=company,
+        branch=branch,
     )
-    return flt(row[0].end_qty) if row else 0.0
 
 # ---------------------------------------------------------------------------
 # Write helper
@@ -286,26 +265,18 @@ class WarehouseJob(Document):
 	def get_warehouse_dashboard_html(self, job_name=None):
 		"""Generate HTML for warehouse dashboard visualization"""
 		try:
+			from logistics.document_management.dashboard_cache import cached_dashboard_html
+
 			# If job_name is provided, get the job document
 			if job_name:
 				job = frappe.get_doc("Warehouse Job", job_name)
 			else:
 				job = self
 			
-			# Get company and branch
-			company = getattr(job, 'company', None) or ""
-			branch = getattr(job, 'branch', None) or ""
-			
-			frappe.logger().info(f"Loading warehouse dashboard for company: {company}, branch: {branch}")
-			
-			# Get dashboard data directly
-			dashboard_data = job._get_dashboard_data(company, branch)
-			
-			# Render complete HTML with data
-			dashboard_html = job._render_dashboard_html(dashboard_data, company, branch)
-			
-			frappe.logger().info(f"Dashboard HTML generated successfully, final size: {len(dashboard_html)} characters")
-			return dashboard_html
+			# Location capacity is live warehouse state, so keep the cached copy short-lived
+			return cached_dashboard_html(
+				job, "warehouse_dashboard", job._build_warehouse_dashboard_html, ttl=WAREHOUSE_DASHBOARD_CACHE_TTL
+			)
 			
 		except Exception as e:
 			frappe.logger().error(f"Error loading warehouse dashboard: {e}")
@@ -316,6 +287,47 @@ class WarehouseJob(Document):
 					<p>Please refresh the page or contact support.</p>
 				</div>
 			"""
+	def _build_warehouse_dashboard_html(self):
+		# Get company and branch
+		company = getattr(self, 'company', None) or ""
+		branch = getattr(self, 'branch', None) or ""
+		
+		frappe.logger().info(f"Loading warehouse dashboard for company: {company}, branch: {branch}")
+		
+		# Get dashboard data directly
+		dashboard_data = self._get_dashboard_data(company, branch)
+		
+		# Render complete HTML with data
+		dashboard_html = self._render_dashboard_html(dashboard_data, company, branch)
+		
+		frappe.logger().info(f"Dashboard HTML generated successfully, final size: {len(dashboard_html)} characters")
+		return dashboard_html
+
+	def _get_capacity_tolerance_percentage(self, company):
+		"""Capacity tolerance % from Warehouse Settings (0 when not configured)."""
+		try:
+			settings = frappe.get_cached_doc("Warehouse Settings", company)
+			return flt(getattr(settings, "capacity_tolerance_percentage", 0.0))
+		except Exception:
+			return 0.0
+
+	def _get_item_names(self, item_codes):
+		"""item code -> name, from Warehouse Item and then Item (one query per doctype)."""
+		item_codes = [c for c in set(item_codes) if c]
+		if not item_codes:
+			return {}
+		names = {
+			r.name: r.item_name or r.name
+			for r in frappe.get_all(
+				"Warehouse Item", filters={"name": ["in", item_codes]}, fields=["name", "item_name"]
+			)
+		}
+		missing = [c for c in item_codes if c not in names]
+		if missing:
+			for r in frappe.get_all("Item", filters={"name": ["in", missing]}, fields=["name", "item_name"]):
+				names[r.name] = r.item_name or r.name
+		return names
+
 	def _get_dashboard_data(self, company, branch):
 		"""Get dashboard data from database"""
 		try:
@@ -355,6 +367,9 @@ class WarehouseJob(Document):
 				frappe.logger().info(f"No items found in warehouse job {self.name}")
 				return []
 			
+			# Item names: Warehouse Item first, then Item, prefetched for all rows
+			item_names = self._get_item_names(item.item for item in self.items if item.handling_unit)
+			
 			# Group items by handling unit
 			hu_items = {}
 			for item in self.items:
@@ -363,21 +378,7 @@ class WarehouseJob(Document):
 					if hu_name not in hu_items:
 						hu_items[hu_name] = []
 					
-					# Get item details - try Warehouse Item first, then Item
-					item_name = item.item  # Default to item code
-					if item.item:
-						try:
-							# Try Warehouse Item first
-							warehouse_item_doc = frappe.get_doc("Warehouse Item", item.item)
-							item_name = warehouse_item_doc.item_name if warehouse_item_doc else item.item
-						except Exception:
-							try:
-								# Fallback to Item doctype
-								item_doc = frappe.get_doc("Item", item.item)
-								item_name = item_doc.item_name if item_doc else item.item
-							except Exception:
-								# If both fail, use the item code as name
-								item_name = item.item
+					item_name = item_names.get(item.item, item.item)
 					
 					# Get volume and weight from item
 					item_volume = flt(item.volume or 0)
@@ -407,16 +408,26 @@ class WarehouseJob(Document):
 				frappe.logger().info(f"No handling units found in warehouse job {self.name}")
 				return []
 			
+			# Handling unit masters in one query
+			hu_rows = {
+				hu.name: hu
+				for hu in frappe.get_all(
+					"Handling Unit",
+					filters={"name": ["in", list(hu_items)]},
+					fields=["name", "type", "brand", "company", "weight_uom", "max_volume", "max_weight"],
+				)
+			}
+			
+			# Get capacity tolerance percentage from warehouse settings
+			tolerance_percentage = self._get_capacity_tolerance_percentage(company)
+			
 			# Create handling unit records
 			for hu_name, items in hu_items.items():
 				# Get handling unit details
-				try:
-					hu_doc = frappe.get_doc("Handling Unit", hu_name)
-					hu_type = hu_doc.handling_unit_type if hasattr(hu_doc, 'handling_unit_type') else "Pallet"
-					hu_brand = hu_doc.brand if hasattr(hu_doc, 'brand') else "Unknown"
-				except Exception:
-					hu_type = "Pallet"
-					hu_brand = "Unknown"
+				hu_row = hu_rows.get(hu_name)
+				# Handling Unit carries no handling_unit_type, so the card has always shown Pallet
+				hu_type = "Pallet"
+				hu_brand = hu_row.brand if hu_row else "Unknown"
 				
 				# Calculate totals
 				total_qty = sum(flt(item["qty"]) for item in items)
@@ -438,14 +449,7 @@ class WarehouseJob(Document):
 					total_weight = sum(flt(item["weight"]) for item in items)
 				
 				# Get handling unit capacity limits
-				capacity_info = self._get_handling_unit_capacity(hu_name)
-				
-				# Get capacity tolerance percentage from warehouse settings
-				try:
-					settings = frappe.get_doc("Warehouse Settings", company)
-					tolerance_percentage = flt(getattr(settings, "capacity_tolerance_percentage", 0.0))
-				except Exception:
-					tolerance_percentage = 0.0
+				capacity_info = self._get_handling_unit_capacity(hu_name, hu_row)
 				
 				# Calculate allowed capacity with tolerance (e.g., 5% tolerance: max * 1.05)
 				tolerance_multiplier = 1.0 + (tolerance_percentage / 100.0)
@@ -483,11 +487,11 @@ class WarehouseJob(Document):
 			frappe.logger().error(f"Error getting handling units data: {e}")
 			return []
 	
-	def _get_handling_unit_capacity(self, hu_name):
-		"""Get handling unit capacity limits"""
+	def _get_handling_unit_capacity(self, hu_name, hu_doc=None):
+		"""Get handling unit capacity limits (``hu_doc``: prefetched Handling Unit row, if any)"""
 		try:
 			# Get handling unit document
-			hu_doc = frappe.get_doc("Handling Unit", hu_name)
+			hu_doc = hu_doc or frappe.get_doc("Handling Unit", hu_name)
 			
 			# Get warehouse settings for defaults
 			from logistics.warehousing.doctype.warehouse_settings.warehouse_settings import get_warehouse_settings
@@ -559,11 +563,11 @@ class WarehouseJob(Document):
 				'weight_utilization': 0
 			}
 	
-	def _get_storage_location_capacity(self, location_name):
-		"""Get storage location capacity limits"""
+	def _get_storage_location_capacity(self, location_name, location_doc=None):
+		"""Get storage location capacity limits (``location_doc``: prefetched Storage Location row, if any)"""
 		try:
 			# Get storage location document
-			location_doc = frappe.get_doc("Storage Location", location_name)
+			location_doc = location_doc or frappe.get_doc("Storage Location", location_name)
 			
 			# Get warehouse settings for defaults
 			from logistics.warehousing.doctype.warehouse_settings.warehouse_settings import get_warehouse_settings
@@ -867,6 +871,19 @@ class WarehouseJob(Document):
 						"handling_unit": getattr(item, 'handling_unit', None)
 					})
 			
+			# Storage location masters in one query
+			location_rows = {
+				loc.name: loc
+				for loc in frappe.get_all(
+					"Storage Location",
+					filters={"name": ["in", list(location_items)]},
+					fields=["name", "company", "max_volume", "max_weight", "max_hu_slot", "current_volume", "current_weight"],
+				)
+			} if location_items else {}
+			
+			# Get capacity tolerance percentage from warehouse settings
+			tolerance_percentage = self._get_capacity_tolerance_percentage(company)
+			
 			# Build location records with capacity info
 			locations = []
 			for loc_name, items in location_items.items():
@@ -876,14 +893,7 @@ class WarehouseJob(Document):
 				total_weight = sum(flt(item["weight"]) for item in items)
 				
 				# Get storage location capacity limits
-				capacity_info = self._get_storage_location_capacity(loc_name)
-				
-				# Get capacity tolerance percentage from warehouse settings
-				try:
-					settings = frappe.get_doc("Warehouse Settings", company)
-					tolerance_percentage = flt(getattr(settings, "capacity_tolerance_percentage", 0.0))
-				except Exception:
-					tolerance_percentage = 0.0
+				capacity_info = self._get_storage_location_capacity(loc_name, location_rows.get(loc_name))
 				
 				# Calculate allowed capacity with tolerance (e.g., 5% tolerance: max * 1.05)
 				tolerance_multiplier = 1.0 + (tolerance_percentage / 100.0)
@@ -3816,6 +3826,19 @@ def update_operation_end(job_name, operation_id, end_date):
 
 
 
+@frappe.whitelist()
+def start_allocate_items(job_name: str) -> Dict[str, Any]:
+	"""Queue ``allocate_items`` as a Logistics Background Job (one per Warehouse Job at a time)."""
+	frappe.has_permission("Warehouse Job", "write", job_name, throw=True)
+	return enqueue_operation(
+		"logistics.warehousing.doctype.warehouse_job.warehouse_job.allocate_items",
+		"Warehouse Job",
+		job_name,
+		title=_("Allocate items for {0}").format(job_name),
+		job_name=job_name,
+	)
+
+
 @frappe.whitelist()
 def allocate_items(job_name: str) -> Dict[str, Any]:
 	"""
@@ -0,0 +1,34 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from datetime import date
+from unittest.mock import patch
+
+from frappe.tests import UnitTestCase
+
+from logistics.warehousing import stock_balance_snapshot as sbs
+
+SELECT = "SELECT wsl.item, wsl.quantity FROM {source} wsl WHERE wsl.item = %(item)s"
+
+
+class UnitTestWarehouseStockBalanceSnapshot(UnitTestCase):
+	def test_reads_full_ledger_without_snapshot(self):
+		with patch.object(sbs, "_latest_snapshot", return_value=None):
+			sql, params = sbs.stock_balance_base_sql(SELECT, "2026-03-10", "2026-03-20")
+		self.assertNotIn("UNION ALL", sql)
+		self.assertNotIn("sbs_after", sql)
+		self.assertEqual(params["sbs_until"], date(2026, 3, 21))
+
+	def test_starts_from_snapshot_before_window(self):
+		with patch.object(sbs, "_latest_snapshot", return_value=date(2026, 2, 28)):
+			sql, params = sbs.stock_balance_base_sql(SELECT, "2026-03-10", "2026-03-20")
+		self.assertEqual(sql.count("UNION ALL"), 1)
+		self.assertIn(f"`tab{sbs.SNAPSHOT_DOCTYPE}`", sql)
+		self.assertEqual(params["sbs_anchor"], date(2026, 2, 28))
+		self.assertEqual(params["sbs_after"], date(2026, 3, 1))
+
+	def test_row_name_is_per_month_end(self):
+		self.assertNotEqual(
+			sbs._row_name(date(2026, 1, 31), "ITEM-1", "LOC-1", "", "Co", "Br"),
+			sbs._row_name(date(2026, 2, 28), "ITEM-1", "LOC-1", "", "Co", "Br"),
+		)
@@ -0,0 +1,122 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.warehousing import stock_bin
+from logistics.warehousing.stock_bin import bin_name
+
+
+class _BinTable:
+	"""In-memory stand-in for `tabWarehouse Stock Bin` that runs the bin SQL."""
+
+	def __init__(self):
+		self.rows = {}
+
+	def sql(self, query, params=None, *args, **kwargs):
+		verb = query.split()[0]
+		if verb == "INSERT":
+			row = self.rows.setdefault(
+				params["name"], frappe._dict({f: params[f] for f in stock_bin.BIN_KEY_FIELDS}, actual_qty=0.0)
+			)
+			row.actual_qty += params["qty"]
+		elif verb == "UPDATE":
+			qty, _modified, _user, name = params
+			if name in self.rows:
+				self.rows[name].actual_qty -= qty
+		else:
+			wanted = {
+				"item": params["item"],
+				"storage_location": params["location"],
+				"handling_unit": params["handling_unit"],
+				"batch_no": params["batch_no"],
+				"serial_no": params["serial_no"],
+			}
+			for field in ("company", "branch"):
+				if params[field]:
+					wanted[field] = params[field]
+			total = sum(r.actual_qty for r in self.rows.values() if all(r[f] == v for f, v in wanted.items()))
+			return [(total,)]
+
+	def get_value(self, doctype, name, field):
+		row = self.rows.get(name)
+		return row[field] if row else None
+
+	def patch(self):
+		return patch.multiple(frappe.db, sql=self.sql, get_value=self.get_value)
+
+
+class UnitTestWarehouseStockBin(UnitTestCase):
+	def test_bin_name_is_deterministic(self):
+		a = bin_name("ITEM-1", "LOC-1", "HU-1", None, None, "Co", "Br")
+		b = bin_name("ITEM-1", "LOC-1", "HU-1", "", "", "Co", "Br")
+		self.assertEqual(a, b)
+		self.assertEqual(len(a), 32)
+
+	def test_bin_name_distinguishes_key_parts(self):
+		self.assertNotEqual(
+			bin_name("ITEM-1", "LOC-1", "HU-1"),
+			bin_name("ITEM-1", "LOC-1", None, "HU-1"),
+		)
+		self.assertNotEqual(
+			bin_name("ITEM-1", "LOC-1", company="Co A"),
+			bin_name("ITEM-1", "LOC-1", company="Co B"),
+		)
+
+	def test_postings_add_with_their_sign(self):
+		table = _BinTable()
+		with table.patch():
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=10, company="Co", branch="Br"))
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=-4, company="Co", branch="Br"))
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", company="Co", branch="Br"), 6)
+		self.assertEqual(len(table.rows), 1)
+
+	def test_reversal_cancels_posting(self):
+		table = _BinTable()
+		receipt = frappe._dict(item="ITEM-1", storage_location="LOC-1", handling_unit="HU-1", quantity=5)
+		pick = frappe._dict(item="ITEM-1", storage_location="LOC-1", handling_unit="HU-1", quantity=-3)
+		with table.patch():
+			stock_bin.apply_ledger_entry(receipt)
+			stock_bin.apply_ledger_entry(pick)
+			stock_bin.reverse_ledger_entry(pick)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", "HU-1"), 5)
+			stock_bin.reverse_ledger_entry(receipt)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", "HU-1"), 0)
+			# reversing a row that never posted leaves other bins alone
+			stock_bin.reverse_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-2", quantity=7))
+		self.assertEqual(len(table.rows), 1)
+
+	def test_bin_crosses_zero_both_ways(self):
+		table = _BinTable()
+		with table.patch():
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=-2))
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1"), -2)
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=3))
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1"), 1)
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=-1))
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1"), 0)
+
+	def test_rows_without_item_or_location_are_ignored(self):
+		table = _BinTable()
+		with table.patch():
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location=None, quantity=1))
+			stock_bin.apply_ledger_entry(frappe._dict(item=None, storage_location="LOC-1", quantity=1))
+			stock_bin.reverse_ledger_entry(frappe._dict(item="ITEM-1", storage_location=None, quantity=1))
+		self.assertEqual(table.rows, {})
+
+	def test_get_bin_qty_narrows_by_given_keys(self):
+		table = _BinTable()
+		with table.patch():
+			for branch, qty in (("Br A", 4), ("Br B", 6)):
+				stock_bin.apply_ledger_entry(
+					frappe._dict(item="ITEM-1", storage_location="LOC-1", batch_no="B1", quantity=qty, company="Co", branch=branch)
+				)
+			stock_bin.apply_ledger_entry(frappe._dict(item="ITEM-1", storage_location="LOC-1", quantity=9, company="Co", branch="Br A"))
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", batch_no="B1"), 10)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", batch_no="B1", branch="Br B"), 6)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", batch_no="B1", company="Co", branch="Br A"), 4)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1"), 9)
+			self.assertEqual(stock_bin.get_bin_qty("ITEM-1", "LOC-1", batch_no="B2"), 0)
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, www.agilasoft.com and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Warehouse Stock Bin", {
+// 	refresh(frm) {
+
+// 	},
+// });
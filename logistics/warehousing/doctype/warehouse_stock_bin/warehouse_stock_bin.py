@@ -0,0 +1,10 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class WarehouseStockBin(Document):
+	"""Read-only on-hand snapshot; rows are written by logistics.warehousing.stock_bin."""
+	pass
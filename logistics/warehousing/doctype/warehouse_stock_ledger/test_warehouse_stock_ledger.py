@@ -0,0 +1,33 @@
+# Copyright (c) 2026, www.agilasoft.com and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.warehousing import capacity_metrics
+
+
+class UnitTestWarehouseStockLedger(UnitTestCase):
+	def _updates(self, fn, led, dims=(0.5, 2.0)):
+		with patch.object(frappe.db, "get_value", return_value=dims), patch.object(frappe.db, "sql") as sql:
+			fn(led)
+		return [(c.args[0].split("`")[1], c.args[1]) for c in sql.call_args_list]
+
+	def test_posting_updates_hu_and_location_columns(self):
+		led = frappe._dict(item="ITEM-1", quantity=4, handling_unit="HU-1", storage_location="LOC-1")
+		updates = self._updates(capacity_metrics.apply_ledger_capacity, led)
+		self.assertEqual([table for table, _ in updates], ["tabHandling Unit", "tabStorage Location"])
+		self.assertEqual(updates[0][1], {"volume": 2.0, "weight": 8.0, "name": "HU-1"})
+
+	def test_reversal_subtracts_the_delta(self):
+		led = frappe._dict(item="ITEM-1", quantity=4, handling_unit=None, storage_location="LOC-1")
+		updates = self._updates(capacity_metrics.reverse_ledger_capacity, led)
+		self.assertEqual(updates, [("tabStorage Location", {"volume": -2.0, "weight": -8.0, "name": "LOC-1"})])
+
+	def test_dimensionless_item_writes_nothing(self):
+		led = frappe._dict(item="ITEM-1", quantity=4, handling_unit="HU-1", storage_location="LOC-1")
+		self.assertEqual(self._updates(capacity_metrics.apply_ledger_capacity, led, dims=(0, 0)), [])
+		led = frappe._dict(item=None, quantity=4, handling_unit="HU-1", storage_location="LOC-1")
+		self.assertEqual(self._updates(capacity_metrics.apply_ledger_capacity, led), [])
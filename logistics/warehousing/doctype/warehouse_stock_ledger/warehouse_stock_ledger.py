@@ -4,6 +4,24 @@
 # import frappe
 from frappe.model.document import Document
 
+from logistics.warehousing.capacity_metrics import apply_ledger_capacity, reverse_ledger_capacity
+from logistics.warehousing.hu_occupancy import invalidate_occupancy_from
+from logistics.warehousing.stock_balance_snapshot import invalidate_stock_balance_from
+from logistics.warehousing.stock_bin import apply_ledger_entry, reverse_ledger_entry
+
 
 class WarehouseStockLedger(Document):
-	pass
+	def after_insert(self):
+		# Keep Warehouse Stock Bin in step with the ledger (same transaction)
+		apply_ledger_entry(self)
+		# Capacity metrics of the HU and location move by this posting's volume / weight
+		apply_ledger_capacity(self)
+		# Back-dated postings make closed occupancy days / month-end balances stale
+		invalidate_occupancy_from(self.posting_date)
+		invalidate_stock_balance_from(self.posting_date)
+
+	def on_trash(self):
+		reverse_ledger_entry(self)
+		reverse_ledger_capacity(self)
+		invalidate_occupancy_from(self.posting_date)
+		invalidate_stock_balance_from(self.posting_date)
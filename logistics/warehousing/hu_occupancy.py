@@ -0,0 +1,412 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Daily Handling Unit occupancy snapshot.
+
+Each Handling Unit Occupancy row is the end-of-day balance of one
+(handling unit, storage location, customer) with its volume and weight.
+Snapshots are rolled forward one day at a time from the previous day's rows
+plus that day's ledger deltas, so filling a day never rescans ledger history.
+Periodic storage billing reads a customer-period from here with a few grouped
+queries instead of per-HU / per-day ledger scans.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, date_diff, flt, getdate, now_datetime, today
+
+OCCUPANCY_DOCTYPE = "Handling Unit Occupancy"
+QTY_TOLERANCE = 1e-9
+
+# (handling_unit, storage_location, customer) -> [qty, volume, weight]
+Balances = Dict[Tuple[str, str, str], List[float]]
+
+
+def _row_name(snapshot_date, hu: str, location: str, customer: str) -> str:
+    raw = "\x1f".join((str(snapshot_date), hu or "", location or "", customer or ""))
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _coverage() -> Tuple[Optional[Any], Optional[Any]]:
+    row = frappe.db.sql(
+        f"SELECT MIN(snapshot_date), MAX(snapshot_date) FROM `tab{OCCUPANCY_DOCTYPE}`"
+    )
+    if not row or not row[0][0]:
+        return None, None
+    return getdate(row[0][0]), getdate(row[0][1])
+
+
+# ---------------------------------------------------------------------------
+# Opening balances
+# ---------------------------------------------------------------------------
+
+def _balances_from_ledger(before_date) -> Balances:
+    """HU/location/customer balances strictly before ``before_date`` (one grouped ledger pass)."""
+    rows = frappe.db.sql(
+        """
+        SELECT
+            l.handling_unit,
+            l.storage_location,
+            IFNULL(wi.customer, '') AS customer,
+            SUM(l.quantity) AS qty,
+            SUM(l.quantity * COALESCE(wi.volume, 0)) AS volume,
+            SUM(l.quantity * COALESCE(wi.weight, 0)) AS weight
+        FROM `tabWarehouse Stock Ledger` l
+        LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
+        WHERE l.posting_date < %s
+          AND IFNULL(l.handling_unit, '') != ''
+          AND IFNULL(l.storage_location, '') != ''
+        GROUP BY l.handling_unit, l.storage_location, IFNULL(wi.customer, '')
+        """,
+        (getdate(before_date),),
+        as_dict=True,
+    )
+    return {
+        (r.handling_unit, r.storage_location, r.customer): [flt(r.qty), flt(r.volume), flt(r.weight)]
+        for r in rows
+        if abs(flt(r.qty)) > QTY_TOLERANCE
+    }
+
+
+def _balances_from_snapshot(snapshot_date) -> Balances:
+    rows = frappe.db.sql(
+        f"""
+        SELECT handling_unit, storage_location, IFNULL(customer, '') AS customer, qty, volume, weight
+        FROM `tab{OCCUPANCY_DOCTYPE}`
+        WHERE snapshot_date = %s
+        """,
+        (snapshot_date,),
+        as_dict=True,
+    )
+    return {
+        (r.handling_unit, r.storage_location, r.customer): [flt(r.qty), flt(r.volume), flt(r.weight)]
+        for r in rows
+    }
+
+
+def _daily_deltas(date_from, date_to) -> Dict[Any, List[Dict[str, Any]]]:
+    """Ledger movements in [date_from, date_to] grouped per day and key (range predicate, index friendly)."""
+    rows = frappe.db.sql(
+        """
+        SELECT
+            DATE(l.posting_date) AS day,
+            l.handling_unit,
+            l.storage_location,
+            IFNULL(wi.customer, '') AS customer,
+            SUM(l.quantity) AS qty,
+            SUM(l.quantity * COALESCE(wi.volume, 0)) AS volume,
+            SUM(l.quantity * COALESCE(wi.weight, 0)) AS weight
+        FROM `tabWarehouse Stock Ledger` l
+        LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
+        WHERE l.posting_date >= %s
+          AND l.posting_date < %s
+          AND IFNULL(l.handling_unit, '') != ''
+          AND IFNULL(l.storage_location, '') != ''
+        GROUP BY DATE(l.posting_date), l.handling_unit, l.storage_location, IFNULL(wi.customer, '')
+        """,
+        (getdate(date_from), getdate(add_days(date_to, 1))),
+        as_dict=True,
+    )
+    out: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for r in rows:
+        out[getdate(r.day)].append(r)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Attribute lookups (one query per master, per run)
+# ---------------------------------------------------------------------------
+
+def _location_attrs(locations) -> Dict[str, Dict[str, Any]]:
+    if not locations:
+        return {}
+    rows = frappe.get_all(
+        "Storage Location",
+        filters={"name": ["in", list(locations)]},
+        fields=["name", "storage_type", "staging_area", "company", "branch"],
+    )
+    return {r.name: r for r in rows}
+
+
+def _hu_attrs(hus) -> Dict[str, Dict[str, Any]]:
+    if not hus:
+        return {}
+    rows = frappe.get_all(
+        "Handling Unit",
+        filters={"name": ["in", list(hus)]},
+        fields=["name", "type", "company", "branch"],
+    )
+    return {r.name: r for r in rows}
+
+
+# ---------------------------------------------------------------------------
+# Roll forward
+# ---------------------------------------------------------------------------
+
+def _roll_forward(date_from, date_to, opening: Balances, chunk_size: int = 5000) -> int:
+    """Write snapshot rows for each day in [date_from, date_to] starting from ``opening`` balances."""
+    date_from, date_to = getdate(date_from), getdate(date_to)
+    if date_from > date_to:
+        return 0
+
+    deltas = _daily_deltas(date_from, date_to)
+    balances: Balances = {k: list(v) for k, v in opening.items()}
+
+    touched_hus = {k[0] for k in balances}
+    touched_locs = {k[1] for k in balances}
+    for day_rows in deltas.values():
+        for r in day_rows:
+            touched_hus.add(r.handling_unit)
+            touched_locs.add(r.storage_location)
+    locs = _location_attrs(touched_locs)
+    hus = _hu_attrs(touched_hus)
+
+    frappe.db.sql(
+        f"DELETE FROM `tab{OCCUPANCY_DOCTYPE}` WHERE snapshot_date BETWEEN %s AND %s",
+        (date_from, date_to),
+    )
+
+    now = now_datetime()
+    user = frappe.session.user
+    written = 0
+    for offset in range(date_diff(date_to, date_from) + 1):
+        day = add_days(date_from, offset)
+        for r in deltas.get(getdate(day), []):
+            key = (r.handling_unit, r.storage_location, r.customer)
+            bal = balances.setdefault(key, [0.0, 0.0, 0.0])
+            bal[0] += flt(r.qty)
+            bal[1] += flt(r.volume)
+            bal[2] += flt(r.weight)
+            if abs(bal[0]) <= QTY_TOLERANCE:
+                balances.pop(key, None)
+
+        values = []
+        for (hu, loc, customer), (qty, volume, weight) in balances.items():
+            if qty <= QTY_TOLERANCE:
+                continue
+            la = locs.get(loc) or {}
+            ha = hus.get(hu) or {}
+            values.append((
+                _row_name(day, hu, loc, customer), now, now, user, user, 0, 0,
+                day, hu, ha.get("type"), customer or None,
+                loc, la.get("storage_type"), 1 if la.get("staging_area") else 0,
+                qty, volume, weight,
+                ha.get("company") or la.get("company"), ha.get("branch") or la.get("branch"),
+            ))
+        _upsert_rows(values, chunk_size)
+        written += len(values)
+    return written
+
+
+def _upsert_rows(rows: List[Tuple[Any, ...]], chunk_size: int) -> None:
+    """
+    Multi-row INSERT ... ON DUPLICATE KEY UPDATE. Billing fills days synchronously,
+    so two runs can roll the same day forward at once; the later write wins
+    instead of failing on the deterministic row name.
+    """
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset : offset + chunk_size]
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * 19) + ")"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{OCCUPANCY_DOCTYPE}`
+                (name, creation, modified, owner, modified_by, docstatus, idx,
+                 snapshot_date, handling_unit, handling_unit_type, customer,
+                 storage_location, storage_type, staging_area, qty, volume, weight,
+                 company, branch)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                handling_unit_type = VALUES(handling_unit_type),
+                storage_type       = VALUES(storage_type),
+                staging_area       = VALUES(staging_area),
+                qty                = VALUES(qty),
+                volume             = VALUES(volume),
+                weight             = VALUES(weight),
+                company            = VALUES(company),
+                branch             = VALUES(branch),
+                modified           = VALUES(modified)
+            """,
+            [v for row in chunk for v in row],
+        )
+
+
+def ensure_occupancy_snapshot(date_from, date_to) -> int:
+    """
+    Make sure every day in [date_from, date_to] has a snapshot.
+
+    Extends coverage forward from the last snapshot day (no ledger history scan),
+    or backward from the ledger when an older period is requested. Only closed
+    days (up to yesterday) are persisted; today is still receiving postings.
+    """
+    date_from, date_to = getdate(date_from), getdate(date_to)
+    date_to = min(date_to, getdate(add_days(today(), -1)))
+    if date_from > date_to:
+        return 0
+
+    lo, hi = _coverage()
+    written = 0
+    if lo is None:
+        return _roll_forward(date_from, date_to, _balances_from_ledger(date_from))
+
+    if date_from < lo:
+        written += _roll_forward(date_from, add_days(lo, -1), _balances_from_ledger(date_from))
+    if date_to > hi:
+        written += _roll_forward(add_days(hi, 1), date_to, _balances_from_snapshot(hi))
+    return written
+
+
+def invalidate_occupancy_from(posting_date) -> None:
+    """Drop snapshot days at or after a back-dated posting; they are rolled forward again on demand."""
+    if not posting_date:
+        return
+    frappe.db.sql(
+        f"DELETE FROM `tab{OCCUPANCY_DOCTYPE}` WHERE snapshot_date >= %s",
+        (getdate(posting_date),),
+    )
+
+
+def snapshot_daily_occupancy() -> None:
+    """Scheduler entry point: close out every day up to yesterday."""
+    yesterday = add_days(today(), -1)
+    _lo, hi = _coverage()
+    ensure_occupancy_snapshot(add_days(hi, 1) if hi else yesterday, yesterday)
+    frappe.db.commit()
+
+
+# ---------------------------------------------------------------------------
+# Billing reads
+# ---------------------------------------------------------------------------
+
+def _scope(company: Optional[str], branch: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    bits, params = [], {}
+    if company:
+        bits.append("AND o.company = %(company)s")
+        params["company"] = company
+    if branch:
+        bits.append("AND o.branch = %(branch)s")
+        params["branch"] = branch
+    return " ".join(bits), params
+
+
+def get_customer_hu_occupancy_summary(
+    customer: str,
+    date_from,
+    date_to,
+    company: Optional[str] = None,
+    branch: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Per-HU billing details for a customer period, computed from the snapshot.
+
+    Returns handling_unit, handling_unit_type, dominant storage_location /
+    storage_type plus days_occupied, volume_days / weight_days and the average
+    occupied volume / weight. HUs that only sat in staging areas are excluded.
+    total_volume / total_weight stay 0 (what Volume / Weight contract lines have
+    always billed); switching them to the averages would change invoice amounts.
+    """
+    scope_sql, params = _scope(company, branch)
+    params.update({"customer": customer, "date_from": getdate(date_from), "date_to": getdate(date_to)})
+
+    totals = frappe.db.sql(
+        f"""
+        SELECT
+            o.handling_unit,
+            MAX(o.handling_unit_type) AS handling_unit_type,
+            COUNT(DISTINCT o.snapshot_date) AS days_occupied,
+            SUM(o.volume) AS volume_days,
+            SUM(o.weight) AS weight_days
+        FROM `tab{OCCUPANCY_DOCTYPE}` o
+        WHERE o.customer = %(customer)s
+          AND o.snapshot_date BETWEEN %(date_from)s AND %(date_to)s
+          AND o.staging_area = 0
+          {scope_sql}
+        GROUP BY o.handling_unit
+        """,
+        params,
+        as_dict=True,
+    )
+    if not totals:
+        return []
+
+    # Dominant (most-occupied) non-staging location per HU
+    loc_rows = frappe.db.sql(
+        f"""
+        SELECT o.handling_unit, o.storage_location, o.storage_type, COUNT(*) AS days
+        FROM `tab{OCCUPANCY_DOCTYPE}` o
+        WHERE o.customer = %(customer)s
+          AND o.snapshot_date BETWEEN %(date_from)s AND %(date_to)s
+          AND o.staging_area = 0
+          {scope_sql}
+        GROUP BY o.handling_unit, o.storage_location, o.storage_type
+        """,
+        params,
+        as_dict=True,
+    )
+    dominant: Dict[str, Dict[str, Any]] = {}
+    for r in loc_rows:
+        cur = dominant.get(r.handling_unit)
+        if not cur or r.days > cur["days"] or (r.days == cur["days"] and r.storage_location < cur["storage_location"]):
+            dominant[r.handling_unit] = r
+
+    out = []
+    for t in sorted(totals, key=lambda x: x.handling_unit):
+        days = int(t.days_occupied or 0)
+        loc = dominant.get(t.handling_unit) or {}
+        out.append({
+            "handling_unit": t.handling_unit,
+            "handling_unit_type": t.handling_unit_type,
+            "storage_location": loc.get("storage_location"),
+            "storage_type": loc.get("storage_type"),
+            "date_from": str(date_from),
+            "date_to": str(date_to),
+            "days_occupied": days,
+            "volume_days": flt(t.volume_days),
+            "weight_days": flt(t.weight_days),
+            # Average occupied volume / weight over the days the HU held stock
+            "avg_volume": flt(t.volume_days) / days if days else 0.0,
+            "avg_weight": flt(t.weight_days) / days if days else 0.0,
+            "total_volume": 0.0,
+            "total_weight": 0.0,
+        })
+    return out
+
+
+def get_daily_hu_occupancy(
+    handling_units: List[str],
+    customer: str,
+    date_from,
+    date_to,
+) -> List[Dict[str, Any]]:
+    """Per-day volume/weight per HU for the Storage Details breakdown (single query)."""
+    if not handling_units:
+        return []
+    return frappe.db.sql(
+        f"""
+        SELECT
+            o.snapshot_date AS date,
+            o.handling_unit,
+            SUM(o.qty) AS qty,
+            SUM(o.volume) AS volume,
+            SUM(o.weight) AS weight
+        FROM `tab{OCCUPANCY_DOCTYPE}` o
+        WHERE o.handling_unit IN %(hus)s
+          AND o.customer = %(customer)s
+          AND o.snapshot_date BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY o.snapshot_date, o.handling_unit
+        HAVING SUM(o.qty) > 0
+        ORDER BY o.snapshot_date, o.handling_unit
+        """,
+        {
+            "hus": tuple(handling_units),
+            "customer": customer,
+            "date_from": getdate(date_from),
+            "date_to": getdate(date_to),
+        },
+        as_dict=True,
+    )
@@ -143,16 +143,15 @@ frappe.query_reports["Handling Unit Capacity"] = {
 	"onload": function(report) {
 		// Add Actions dropdown menu
 		report.page.add_inner_button(__("Refresh Capacity Data"), function() {
-			frappe.call({
-				method: "logistics.warehousing.api_parts.capacity_management.refresh_capacity_data",
-				callback: function(r) {
-					if (r.message) {
-						frappe.show_alert({
-							message: __("Capacity data refreshed successfully"),
-							indicator: "green"
-						});
-						report.refresh();
-					}
+			logistics.background_job.run({
+				method: "logistics.warehousing.api_parts.capacity_management.start_refresh_capacity_data",
+				title: __("Refreshing capacity data"),
+				on_done: function(res) {
+					frappe.show_alert({
+						message: res.success === false ? res.error : __("Capacity data refreshed successfully"),
+						indicator: res.success === false ? "red" : "green"
+					});
+					report.refresh();
 				}
 			});
 		}, __("Action"));
@@ -5,6 +5,7 @@ from frappe import _
 from frappe.utils import getdate
 
 from logistics.analytics_reports.bootstrap import bar_top_numeric
+from logistics.warehousing.stock_balance_snapshot import stock_balance_base_sql
 
 
 def execute(filters=None):
@@ -82,9 +83,9 @@ def execute(filters=None):
         group_by_fields = "b.item"
         order_by_fields = "b.item"
     
-    data = frappe.db.sql(
+    # Balances start from the month-end snapshot before from_date; only later ledger rows are read
+    base_sql, base_params = stock_balance_base_sql(
         """
-        WITH base AS (
             SELECT
                 wsl.item,
                 wsl.storage_location,
@@ -95,11 +96,21 @@ def execute(filters=None):
                 wsl.creation,
                 COALESCE(hu.company, sl.company) AS company,
                 COALESCE(hu.branch,  sl.branch)  AS branch
-            FROM `tabWarehouse Stock Ledger` wsl
+            FROM {{source}} wsl
             LEFT JOIN `tabStorage Location` sl ON sl.name = wsl.storage_location
             LEFT JOIN `tabHandling Unit`   hu ON hu.name = wsl.handling_unit
             LEFT JOIN `tabWarehouse Item`  wi ON wi.name = wsl.item
             WHERE {where_sql}
+        """.format(where_sql=where_sql),
+        f.from_date,
+        f.to_date,
+    )
+    params.update(base_params)
+
+    data = frappe.db.sql(
+        """
+        WITH base AS (
+            {base_sql}
         )
         SELECT
             {select_fields}
@@ -126,7 +137,7 @@ def execute(filters=None):
         GROUP BY {group_by_fields}
         ORDER BY {order_by_fields}
         """.format(
-            where_sql=where_sql,
+            base_sql=base_sql,
             select_fields=select_fields,
             group_by_fields=group_by_fields,
             order_by_fields=order_by_fields
@@ -0,0 +1,233 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Month-end stock balance snapshots.
+
+Each Warehouse Stock Balance Snapshot row is the closing quantity of one
+(item, storage location, handling unit, company, branch) at a month end.
+Months are rolled forward from the previous month's rows plus that month's
+ledger deltas, so closing a month never rescans ledger history.
+
+Stock balance reads (customer portal, Warehouse Stock Balance report) start
+from the latest snapshot before the requested window and add only the ledger
+rows after it, see stock_balance_base_sql().
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, add_months, flt, get_first_day, get_last_day, getdate, now_datetime, today
+
+SNAPSHOT_DOCTYPE = "Warehouse Stock Balance Snapshot"
+QTY_TOLERANCE = 1e-9
+
+# (item, storage_location, handling_unit, company, branch) -> [qty, last_posting_date, customer]
+Balances = Dict[Tuple[str, str, str, str, str], List[Any]]
+
+# Snapshot rows shaped like Warehouse Stock Ledger rows, so a balance query can
+# read "{source} wsl" from either table with the same select list and filters.
+_SNAPSHOT_SOURCE = f"""(
+    SELECT item, storage_location, handling_unit, company, branch,
+           last_posting_date AS posting_date,
+           qty AS quantity, qty AS end_qty, 0 AS beg_quantity,
+           NULL AS creation
+    FROM `tab{SNAPSHOT_DOCTYPE}`
+    WHERE snapshot_date = %(sbs_anchor)s
+)"""
+
+
+def _row_name(snapshot_date, item: str, location: str, hu: str, company: str, branch: str) -> str:
+    raw = "\x1f".join((str(snapshot_date), item or "", location or "", hu or "", company or "", branch or ""))
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _last_closed_month_end():
+    return getdate(get_last_day(add_months(today(), -1)))
+
+
+def _next_month_end(month_end):
+    return getdate(get_last_day(add_days(month_end, 1)))
+
+
+def _latest_snapshot(before=None) -> Optional[Any]:
+    """Latest snapshot date (strictly before ``before`` when given)."""
+    if before:
+        row = frappe.db.sql(
+            f"SELECT MAX(snapshot_date) FROM `tab{SNAPSHOT_DOCTYPE}` WHERE snapshot_date < %s",
+            (getdate(before),),
+        )
+    else:
+        row = frappe.db.sql(f"SELECT MAX(snapshot_date) FROM `tab{SNAPSHOT_DOCTYPE}`")
+    return getdate(row[0][0]) if row and row[0][0] else None
+
+
+# ---------------------------------------------------------------------------
+# Opening balances and deltas
+# ---------------------------------------------------------------------------
+
+def _balances_from_snapshot(snapshot_date) -> Balances:
+    rows = frappe.db.sql(
+        f"""
+        SELECT item, IFNULL(storage_location, '') AS storage_location,
+               IFNULL(handling_unit, '') AS handling_unit, IFNULL(company, '') AS company,
+               IFNULL(branch, '') AS branch, qty, last_posting_date, customer
+        FROM `tab{SNAPSHOT_DOCTYPE}`
+        WHERE snapshot_date = %s
+        """,
+        (snapshot_date,),
+        as_dict=True,
+    )
+    return {
+        (r.item, r.storage_location, r.handling_unit, r.company, r.branch): [flt(r.qty), r.last_posting_date, r.customer]
+        for r in rows
+    }
+
+
+def _monthly_deltas(date_from, date_to) -> Dict[Any, List[Dict[str, Any]]]:
+    """Ledger movements in [date_from, date_to] grouped per month end and key (range predicate, index friendly)."""
+    rows = frappe.db.sql(
+        """
+        SELECT
+            LAST_DAY(l.posting_date) AS month_end,
+            l.item,
+            IFNULL(l.storage_location, '') AS storage_location,
+            IFNULL(l.handling_unit, '') AS handling_unit,
+            IFNULL(l.company, '') AS company,
+            IFNULL(l.branch, '') AS branch,
+            MAX(wi.customer) AS customer,
+            SUM(COALESCE(l.quantity, l.end_qty - l.beg_quantity, 0)) AS qty,
+            MAX(l.posting_date) AS last_posting_date
+        FROM `tabWarehouse Stock Ledger` l
+        LEFT JOIN `tabWarehouse Item` wi ON wi.name = l.item
+        WHERE l.posting_date >= %s
+          AND l.posting_date < %s
+          AND IFNULL(l.item, '') != ''
+        GROUP BY LAST_DAY(l.posting_date), l.item, IFNULL(l.storage_location, ''),
+                 IFNULL(l.handling_unit, ''), IFNULL(l.company, ''), IFNULL(l.branch, '')
+        """,
+        (getdate(date_from), getdate(add_days(date_to, 1))),
+        as_dict=True,
+    )
+    out: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for r in rows:
+        out[getdate(r.month_end)].append(r)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Roll forward
+# ---------------------------------------------------------------------------
+
+def _roll_forward(first_month_end, last_month_end, opening: Balances, chunk_size: int = 5000) -> int:
+    """Write snapshot rows for each month end in [first_month_end, last_month_end] starting from ``opening``."""
+    first_month_end, last_month_end = getdate(first_month_end), getdate(last_month_end)
+    if first_month_end > last_month_end:
+        return 0
+
+    deltas = _monthly_deltas(get_first_day(first_month_end), last_month_end)
+    balances: Balances = {k: list(v) for k, v in opening.items()}
+
+    frappe.db.sql(
+        f"DELETE FROM `tab{SNAPSHOT_DOCTYPE}` WHERE snapshot_date BETWEEN %s AND %s",
+        (first_month_end, last_month_end),
+    )
+
+    now = now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+        "snapshot_date", "item", "customer", "storage_location", "handling_unit",
+        "qty", "last_posting_date", "company", "branch",
+    ]
+    written = 0
+    month_end = first_month_end
+    while month_end <= last_month_end:
+        for r in deltas.get(month_end, []):
+            key = (r.item, r.storage_location, r.handling_unit, r.company, r.branch)
+            bal = balances.setdefault(key, [0.0, None, None])
+            bal[0] += flt(r.qty)
+            bal[1] = max(bal[1], r.last_posting_date) if bal[1] else r.last_posting_date
+            bal[2] = r.customer or bal[2]
+            if abs(bal[0]) <= QTY_TOLERANCE:
+                balances.pop(key, None)
+
+        values = [
+            (
+                _row_name(month_end, *key), now, now, user, user, 0, 0,
+                month_end, key[0], customer, key[1] or None, key[2] or None,
+                qty, last_posting, key[3] or None, key[4] or None,
+            )
+            for key, (qty, last_posting, customer) in balances.items()
+        ]
+        if values:
+            frappe.db.bulk_insert(SNAPSHOT_DOCTYPE, fields, values, chunk_size=chunk_size)
+            written += len(values)
+        month_end = _next_month_end(month_end)
+    return written
+
+
+def ensure_stock_balance_snapshot() -> int:
+    """
+    Close every month that has ended since the last snapshot.
+
+    Extends forward from the latest snapshot; the first run (or a run after a
+    back-dated posting older than every snapshot) starts at the first ledger month.
+    """
+    last_closed = _last_closed_month_end()
+    hi = _latest_snapshot()
+    if hi:
+        return _roll_forward(_next_month_end(hi), last_closed, _balances_from_snapshot(hi))
+
+    row = frappe.db.sql("SELECT MIN(posting_date) FROM `tabWarehouse Stock Ledger`")
+    if not row or not row[0][0]:
+        return 0
+    return _roll_forward(get_last_day(row[0][0]), last_closed, {})
+
+
+def invalidate_stock_balance_from(posting_date) -> None:
+    """Drop month ends at or after a back-dated posting; the next daily run rebuilds them."""
+    if not posting_date:
+        return
+    frappe.db.sql(
+        f"DELETE FROM `tab{SNAPSHOT_DOCTYPE}` WHERE snapshot_date >= %s",
+        (getdate(posting_date),),
+    )
+
+
+def snapshot_stock_balances() -> None:
+    """Scheduler entry point: close out every month up to the last one."""
+    ensure_stock_balance_snapshot()
+    frappe.db.commit()
+
+
+# ---------------------------------------------------------------------------
+# Balance reads
+# ---------------------------------------------------------------------------
+
+def stock_balance_base_sql(select_sql: str, from_date, to_date) -> Tuple[str, Dict[str, Any]]:
+    """
+    Ledger rows for a balance window, starting from the nearest snapshot.
+
+    ``select_sql`` is one SELECT that reads ``{source} wsl`` (joins and filters
+    as for Warehouse Stock Ledger). It is run against the latest snapshot before
+    ``from_date`` (as one pseudo-row per key dated at its last posting) and
+    against ledger rows after that snapshot up to the end of ``to_date``,
+    combined with UNION ALL. Returns the SQL and its extra parameters.
+    """
+    anchor = _latest_snapshot(before=from_date)
+    params: Dict[str, Any] = {"sbs_until": getdate(add_days(getdate(to_date), 1))}
+    lower = ""
+    parts = []
+    if anchor:
+        params["sbs_anchor"] = anchor
+        params["sbs_after"] = getdate(add_days(anchor, 1))
+        lower = " AND posting_date >= %(sbs_after)s"
+        parts.append(select_sql.replace("{source}", _SNAPSHOT_SOURCE))
+    ledger = f"(SELECT * FROM `tabWarehouse Stock Ledger` WHERE posting_date < %(sbs_until)s{lower})"
+    parts.append(select_sql.replace("{source}", ledger))
+    return "\n            UNION ALL\n".join(parts), params
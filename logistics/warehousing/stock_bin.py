@@ -0,0 +1,275 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# For license information, please see license.txt
+
+"""
+Warehouse Stock Bin maintenance.
+
+One bin row per (item, storage_location, handling_unit, batch_no, serial_no,
+company, branch) holds the running SUM(quantity) of the Warehouse Stock Ledger.
+Bins are updated in the same transaction as the ledger insert (see
+WarehouseStockLedger.after_insert), so availability checks become a single
+primary-key / indexed lookup instead of a "latest end_qty" scan over the ledger.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import frappe
+from frappe import _
+from frappe.utils import flt, get_datetime, now_datetime
+
+BIN_DOCTYPE = "Warehouse Stock Bin"
+BIN_KEY_FIELDS = ("item", "storage_location", "handling_unit", "batch_no", "serial_no", "company", "branch")
+
+# Quantities below this are treated as zero when comparing ledger vs bin.
+QTY_TOLERANCE = 1e-6
+
+
+def bin_name(
+    item: Optional[str],
+    storage_location: Optional[str],
+    handling_unit: Optional[str] = None,
+    batch_no: Optional[str] = None,
+    serial_no: Optional[str] = None,
+    company: Optional[str] = None,
+    branch: Optional[str] = None,
+) -> str:
+    """Deterministic bin name for a key tuple (empty parts normalised to '')."""
+    raw = "\x1f".join(
+        (v or "") for v in (item, storage_location, handling_unit, batch_no, serial_no, company, branch)
+    )
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _bin_keys_from_row(row: Any) -> Dict[str, str]:
+    get = row.get if isinstance(row, dict) else (lambda f: getattr(row, f, None))
+    return {f: (get(f) or "") for f in BIN_KEY_FIELDS}
+
+
+# ---------------------------------------------------------------------------
+# Write path (called from Warehouse Stock Ledger controller)
+# ---------------------------------------------------------------------------
+
+def apply_ledger_entry(led: Any) -> None:
+    """Add a ledger row's quantity to its bin, creating the bin on first posting."""
+    keys = _bin_keys_from_row(led)
+    if not keys["item"] or not keys["storage_location"]:
+        return
+
+    now = now_datetime()
+    posting = get_datetime(led.posting_date) if getattr(led, "posting_date", None) else now
+    params = dict(keys)
+    params.update({
+        "name": bin_name(**keys),
+        "now": now,
+        "user": frappe.session.user,
+        "qty": flt(getattr(led, "quantity", 0)),
+        "posting": posting,
+        "ledger": getattr(led, "name", None),
+    })
+
+    # Single upsert keyed on the deterministic primary key: concurrent postings to
+    # the same bin serialise on the row lock instead of racing on read-then-write.
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{BIN_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, docstatus, idx,
+             item, storage_location, handling_unit, batch_no, serial_no, company, branch,
+             actual_qty, first_posting_date, last_posting_date, last_ledger_entry)
+        VALUES
+            (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, 0, 0,
+             %(item)s, %(storage_location)s, %(handling_unit)s, %(batch_no)s, %(serial_no)s,
+             %(company)s, %(branch)s,
+             %(qty)s, %(posting)s, %(posting)s, %(ledger)s)
+        ON DUPLICATE KEY UPDATE
+            actual_qty         = actual_qty + VALUES(actual_qty),
+            first_posting_date = LEAST(COALESCE(first_posting_date, VALUES(first_posting_date)), VALUES(first_posting_date)),
+            last_posting_date  = GREATEST(COALESCE(last_posting_date, VALUES(last_posting_date)), VALUES(last_posting_date)),
+            last_ledger_entry  = VALUES(last_ledger_entry),
+            modified           = VALUES(modified),
+            modified_by        = VALUES(modified_by)
+        """,
+        params,
+    )
+
+
+def reverse_ledger_entry(led: Any) -> None:
+    """Remove a deleted ledger row's quantity from its bin."""
+    keys = _bin_keys_from_row(led)
+    if not keys["item"] or not keys["storage_location"]:
+        return
+    frappe.db.sql(
+        f"""
+        UPDATE `tab{BIN_DOCTYPE}`
+        SET actual_qty = actual_qty - %s, modified = %s, modified_by = %s
+        WHERE name = %s
+        """,
+        (flt(getattr(led, "quantity", 0)), now_datetime(), frappe.session.user, bin_name(**keys)),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Read path
+# ---------------------------------------------------------------------------
+
+def get_bin_qty(
+    item: str,
+    location: str,
+    handling_unit: Optional[str] = None,
+    serial_no: Optional[str] = None,
+    batch_no: Optional[str] = None,
+    company: Optional[str] = None,
+    branch: Optional[str] = None,
+) -> float:
+    """
+    Current on-hand qty for item+location(+HU/serial/batch).
+    Company/Branch narrow the lookup only when given (same contract as the old ledger scan).
+    """
+    if company and branch:
+        name = bin_name(item, location, handling_unit, batch_no, serial_no, company, branch)
+        return flt(frappe.db.get_value(BIN_DOCTYPE, name, "actual_qty"))
+
+    conds = [
+        "item = %(item)s",
+        "storage_location = %(location)s",
+        "handling_unit = %(handling_unit)s",
+        "batch_no = %(batch_no)s",
+        "serial_no = %(serial_no)s",
+    ]
+    if company:
+        conds.append("company = %(company)s")
+    if branch:
+        conds.append("branch = %(branch)s")
+    row = frappe.db.sql(
+        f"""
+        SELECT COALESCE(SUM(actual_qty), 0)
+        FROM `tab{BIN_DOCTYPE}`
+        WHERE {" AND ".join(conds)}
+        """,
+        {
+            "item": item,
+            "location": location,
+            "handling_unit": handling_unit or "",
+            "batch_no": batch_no or "",
+            "serial_no": serial_no or "",
+            "company": company,
+            "branch": branch,
+        },
+    )
+    return flt(row[0][0]) if row else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Rebuild / verify
+# ---------------------------------------------------------------------------
+
+def _ledger_totals(filters_sql: str = "", params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    return frappe.db.sql(
+        f"""
+        SELECT
+            IFNULL(item, '')             AS item,
+            IFNULL(storage_location, '') AS storage_location,
+            IFNULL(handling_unit, '')    AS handling_unit,
+            IFNULL(batch_no, '')         AS batch_no,
+            IFNULL(serial_no, '')        AS serial_no,
+            IFNULL(company, '')          AS company,
+            IFNULL(branch, '')           AS branch,
+            COALESCE(SUM(quantity), 0)   AS actual_qty,
+            MIN(posting_date)            AS first_posting_date,
+            MAX(posting_date)            AS last_posting_date
+        FROM `tabWarehouse Stock Ledger`
+        WHERE IFNULL(item, '') != '' AND IFNULL(storage_location, '') != ''
+        {filters_sql}
+        GROUP BY 1, 2, 3, 4, 5, 6, 7
+        """,
+        params or {},
+        as_dict=True,
+    )
+
+
+def _scope_sql(company: Optional[str], item: Optional[str]) -> tuple[str, Dict[str, Any]]:
+    bits, params = [], {}
+    if company:
+        bits.append("AND company = %(company)s")
+        params["company"] = company
+    if item:
+        bits.append("AND item = %(item)s")
+        params["item"] = item
+    return " ".join(bits), params
+
+
+def rebuild_stock_bins(company: Optional[str] = None, item: Optional[str] = None, chunk_size: int = 5000) -> Dict[str, Any]:
+    """Recompute bins from the ledger (whole site, or one company / item)."""
+    filters_sql, params = _scope_sql(company, item)
+    totals = _ledger_totals(filters_sql, params)
+
+    frappe.db.sql(f"DELETE FROM `tab{BIN_DOCTYPE}` WHERE 1=1 {filters_sql}", params)
+
+    now = now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+        *BIN_KEY_FIELDS, "actual_qty", "first_posting_date", "last_posting_date",
+    ]
+    values = [
+        (
+            bin_name(*(r[f] for f in BIN_KEY_FIELDS)), now, now, user, user, 0, 0,
+            *(r[f] for f in BIN_KEY_FIELDS),
+            flt(r.actual_qty), r.first_posting_date, r.last_posting_date,
+        )
+        for r in totals
+    ]
+    frappe.db.bulk_insert(BIN_DOCTYPE, fields, values, chunk_size=chunk_size)
+    return {"bins": len(values), "company": company, "item": item}
+
+
+def verify_stock_bins(company: Optional[str] = None, item: Optional[str] = None, limit: int = 500) -> Dict[str, Any]:
+    """Compare bins against ledger sums; returns drifted keys (ledger vs bin qty)."""
+    filters_sql, params = _scope_sql(company, item)
+    expected = {bin_name(*(r[f] for f in BIN_KEY_FIELDS)): r for r in _ledger_totals(filters_sql, params)}
+    actual = {
+        r.name: r
+        for r in frappe.db.sql(
+            f"SELECT name, {', '.join(BIN_KEY_FIELDS)}, actual_qty FROM `tab{BIN_DOCTYPE}` WHERE 1=1 {filters_sql}",
+            params,
+            as_dict=True,
+        )
+    }
+
+    drift = []
+    for name in expected.keys() | actual.keys():
+        exp_row, act_row = expected.get(name), actual.get(name)
+        ledger_qty = flt(exp_row.actual_qty) if exp_row else 0.0
+        bin_qty = flt(act_row.actual_qty) if act_row else 0.0
+        if abs(ledger_qty - bin_qty) > QTY_TOLERANCE:
+            src = exp_row or act_row
+            drift.append({
+                **{f: src.get(f) for f in BIN_KEY_FIELDS},
+                "bin": name,
+                "ledger_qty": ledger_qty,
+                "bin_qty": bin_qty,
+            })
+
+    return {
+        "checked": len(expected.keys() | actual.keys()),
+        "drift_count": len(drift),
+        "drift": drift[:limit],
+    }
+
+
+@frappe.whitelist()
+def rebuild(company: Optional[str] = None, item: Optional[str] = None):
+    """Rebuild Warehouse Stock Bin from the ledger."""
+    frappe.only_for("System Manager")
+    out = rebuild_stock_bins(company=company, item=item)
+    frappe.msgprint(_("Rebuilt {0} stock bins.").format(out["bins"]))
+    return out
+
+
+@frappe.whitelist()
+def verify(company: Optional[str] = None, item: Optional[str] = None):
+    """Report bins that have drifted from the ledger."""
+    frappe.only_for("System Manager")
+    return verify_stock_bins(company=company, item=item)
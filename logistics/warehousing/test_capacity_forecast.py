@@ -0,0 +1,53 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the batch capacity forecast."""
+
+from unittest.mock import patch
+
+import numpy as np
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.warehousing import capacity_forecast
+
+
+class TestCapacityForecast(UnitTestCase):
+    def test_linear_fit_per_series(self):
+        series = [np.arange(10, dtype=float) + 20, np.full(10, 40.0), np.arange(10, 0, -1, dtype=float) * 2]
+        results = capacity_forecast.forecast_series(series, "Linear Regression", 10)
+        self.assertAlmostEqual(results[0]["forecast"], 40.0)
+        self.assertEqual((results[0]["trend"], results[0]["confidence"]), ("Increasing", 95))
+        self.assertAlmostEqual(results[0]["growth_rate"], 30.0)
+        self.assertEqual((results[1]["forecast"], results[1]["trend"]), (40.0, "Stable"))
+        self.assertEqual((results[2]["forecast"], results[2]["trend"]), (0.0, "Decreasing"))
+
+    def test_series_of_different_lengths_keep_their_order(self):
+        series = [np.full(20, 10.0), np.array([5.0, 6.0]), np.full(7, 30.0)]
+        results = capacity_forecast.forecast_series(series, "Moving Average", 30)
+        self.assertEqual([r["forecast"] for r in results], [10.0, 6.0, 30.0])
+        self.assertEqual(results[1]["confidence"], 60)
+
+    def test_quadratic_fit_and_smoothing(self):
+        x = np.arange(12, dtype=float)
+        quadratic = capacity_forecast.forecast_series([0.1 * x ** 2 + 5], "Neural Network", 3)[0]
+        self.assertAlmostEqual(quadratic["forecast"], 0.1 * 15 ** 2 + 5)
+        self.assertAlmostEqual(quadratic["growth_rate"], 0.2 * 12 * 30)
+        smoothed = capacity_forecast.forecast_series([np.full(12, 50.0)], "Exponential Smoothing", 30)[0]
+        self.assertEqual((smoothed["forecast"], smoothed["confidence"]), (50.0, 90))
+
+    def test_pad_history(self):
+        self.assertEqual(capacity_forecast.pad_history(None, 12.5).tolist(), [12.5] * 30)
+        self.assertEqual(capacity_forecast.pad_history(np.array([40.0, 50.0]), 60.0).tolist(), [60.0] * 5 + [40.0, 50.0])
+
+    def test_history_splits_rows_by_location(self):
+        rows = [
+            ("LOC-A", 5.0, 0.0, 10.0, 0.0),
+            ("LOC-A", 2.0, 30.0, 10.0, 100.0),
+            ("LOC-B", 1.0, 1.0, 0.0, 0.0),
+        ]
+        with patch.object(frappe.db, "sql", return_value=rows):
+            history = capacity_forecast.load_utilization_history("sl.company = %(company)s", {"company": "Co"})
+        self.assertEqual(history["LOC-A"].tolist(), [50.0, 30.0])
+        self.assertEqual(history["LOC-B"].tolist(), [0.0])
@@ -0,0 +1,47 @@
+# Copyright (c) 2026, www.agilasoft.com and contributors
+# See license.txt
+
+"""Tests for the handling unit occupancy snapshot and the storage billing that reads it."""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from logistics.warehousing import billing, hu_occupancy
+
+
+class TestHuOccupancy(UnitTestCase):
+    def _summary(self):
+        totals = [
+            frappe._dict(handling_unit="HU-1", handling_unit_type="Pallet", days_occupied=4, volume_days=6.0, weight_days=200.0)
+        ]
+        locations = [
+            frappe._dict(handling_unit="HU-1", storage_location="LOC-B", storage_type="Rack", days=1),
+            frappe._dict(handling_unit="HU-1", storage_location="LOC-A", storage_type="Rack", days=3),
+        ]
+        with patch.object(frappe.db, "sql", side_effect=[totals, locations]):
+            return hu_occupancy.get_customer_hu_occupancy_summary("CUST-1", "2026-09-01", "2026-09-30")
+
+    def test_summary_keeps_billed_volume_and_weight(self):
+        (hu,) = self._summary()
+        self.assertEqual((hu["storage_location"], hu["days_occupied"]), ("LOC-A", 4))
+        self.assertEqual((hu["avg_volume"], hu["avg_weight"]), (1.5, 50.0))
+        # Volume / Weight contract lines bill the same quantities as before the snapshot
+        self.assertEqual(billing.calculate_billing_quantity_for_method("Volume", hu, "2026-09-01", "2026-09-30"), 0.0)
+        self.assertEqual(billing.calculate_billing_quantity_for_method("Weight", hu, "2026-09-01", "2026-09-30"), 0.0)
+        self.assertEqual(billing.calculate_billing_quantity_for_method("Day", hu, "2026-09-01", "2026-09-30"), 30.0)
+
+    def test_missing_rate_charge_bills_days_and_notes_averages(self):
+        (hu,) = self._summary()
+        with patch.object(billing, "_get_default_currency", return_value="USD"):
+            charge = billing.create_missing_rate_charge("HU-1", hu, "2026-09-01", "2026-09-30", "Co")
+        self.assertEqual((charge["quantity"], charge["total"]), (30.0, 0.0))
+        self.assertIn("Volume: 1.50 CBM", charge["calculation_notes"])
+
+    def test_snapshot_rows_are_upserted_in_chunks(self):
+        rows = [tuple(range(19))] * 5
+        with patch.object(frappe.db, "sql") as sql:
+            hu_occupancy._upsert_rows(rows, 2)
+        self.assertEqual([len(c.args[1]) for c in sql.call_args_list], [38, 38, 19])
+        self.assertIn("ON DUPLICATE KEY UPDATE", sql.call_args_list[0].args[0])
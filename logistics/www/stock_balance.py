@@ -6,6 +6,8 @@ from frappe import _
 from datetime import datetime, timedelta
 from frappe.utils import formatdate
 
+from logistics.warehousing.stock_balance_snapshot import stock_balance_base_sql
+
 
 def get_context(context):
     """Get context for stock balance web page"""
@@ -82,10 +84,6 @@ def get_context(context):
         frappe.log_error(f"Error getting available branches: {str(e)}", "Stock Balance Portal")
         available_branches = []
     
-    # Debug logging
-    print(f"Debug: get_context - available_branches count: {len(available_branches)}")
-    print(f"Debug: get_context - available_branches: {available_branches}")
-    
     # Calculate summary statistics
     try:
         total_items = len(stock_balance) if stock_balance else 0
@@ -273,10 +271,9 @@ def get_customer_stock_balance(customer, date_from, date_to, item_code=None, bra
         
         where_sql = " AND ".join(where_bits)
         
-        # Use the same logic as warehouse_stock_balance report
-        data = frappe.db.sql(
+        # Start from the month-end snapshot before date_from; only later ledger rows are read
+        base_sql, base_params = stock_balance_base_sql(
             """
-            WITH base AS (
                 SELECT
                     wsl.item,
                     wsl.posting_date,
@@ -284,11 +281,22 @@ def get_customer_stock_balance(customer, date_from, date_to, item_code=None, bra
                     wsl.creation,
                     COALESCE(hu.company, sl.company) AS company,
                     wsl.branch
-                FROM `tabWarehouse Stock Ledger` wsl
+                FROM {{source}} wsl
                 LEFT JOIN `tabStorage Location` sl ON sl.name = wsl.storage_location
                 LEFT JOIN `tabHandling Unit`   hu ON hu.name = wsl.handling_unit
                 LEFT JOIN `tabWarehouse Item`  wi ON wi.name = wsl.item
                 WHERE {where_sql}
+            """.format(where_sql=where_sql),
+            date_from,
+            date_to,
+        )
+        params.update(base_params)
+        
+        # Use the same logic as warehouse_stock_balance report
+        data = frappe.db.sql(
+            """
+            WITH base AS (
+                {base_sql}
             ),
             first_on_day AS (
                 SELECT item, MIN(creation) AS first_creation
@@ -327,7 +335,7 @@ def get_customer_stock_balance(customer, date_from, date_to, item_code=None, bra
             GROUP BY b.item, wi.item_name, wi.customer, b.branch
             HAVING ending_qty > 0
             ORDER BY wi.item_name
-            """.format(where_sql=where_sql),
+            """.format(base_sql=base_sql),
             params,
             as_dict=True,
         )
@@ -389,10 +397,10 @@ def get_available_items(customer):
 def get_available_branches(customer):
     """Get list of available branches for customer from Warehouse Stock Ledger"""
     try:
-        # Get branches from Warehouse Stock Ledger for this customer
+        # Get branches from Warehouse Stock Bin for this customer
         branches = frappe.db.sql("""
             SELECT DISTINCT wsl.branch AS name, wsl.branch AS warehouse_name
-            FROM `tabWarehouse Stock Ledger` wsl
+            FROM `tabWarehouse Stock Bin` wsl
             LEFT JOIN `tabWarehouse Item` wi ON wi.name = wsl.item
             WHERE wi.customer = %s
             AND wsl.branch IS NOT NULL
@@ -400,24 +408,20 @@ def get_available_branches(customer):
             ORDER BY wsl.branch
         """, (customer,), as_dict=True)
         
-        print(f"Debug: Found {len(branches)} branches from Warehouse Stock Ledger for customer {customer}: {branches}")
-        
         if not branches:
-            # If no customer-specific branches, get all branches from stock ledger
+            # If no customer-specific branches, get all branches from stock bins
             branches = frappe.db.sql("""
                 SELECT DISTINCT wsl.branch AS name, wsl.branch AS warehouse_name
-                FROM `tabWarehouse Stock Ledger` wsl
+                FROM `tabWarehouse Stock Bin` wsl
                 WHERE wsl.branch IS NOT NULL
                 AND wsl.branch != ''
                 ORDER BY wsl.branch
             """, as_dict=True)
-            
-            print(f"Debug: Found {len(branches)} branches from all Warehouse Stock Ledger entries: {branches}")
         
         return branches
         
     except Exception as e:
-        print(f"Error getting available branches: {str(e)}")
+        frappe.log_error(f"Error getting available branches: {str(e)}", "Stock Balance Portal")
         return []
 
 
@@ -462,7 +466,7 @@ def get_expired_items_count(customer, current_date, item_code=None, branch=None)
     """Get count of expired items for customer with filters"""
     try:
         # Build WHERE conditions
-        where_conditions = ["wi.customer = %s", "wi.expiry_date IS NOT NULL", "wi.expiry_date < %s", "wsl.quantity > 0"]
+        where_conditions = ["wi.customer = %s", "wi.expiry_date IS NOT NULL", "wi.expiry_date < %s", "wsl.actual_qty > 0"]
         params = [customer, current_date]
         
         if item_code:
@@ -479,9 +483,7 @@ def get_expired_items_count(customer, current_date, item_code=None, branch=None)
         expired_count = frappe.db.sql(f"""
             SELECT COUNT(DISTINCT wi.name) as expired_count
             FROM `tabWarehouse Item` wi
-            LEFT JOIN `tabWarehouse Stock Ledger` wsl ON wsl.item = wi.name
-            LEFT JOIN `tabStorage Location` sl ON sl.name = wsl.storage_location
-            LEFT JOIN `tabHandling Unit` hu ON hu.name = wsl.handling_unit
+            INNER JOIN `tabWarehouse Stock Bin` wsl ON wsl.item = wi.name
             WHERE {where_sql}
         """, params, as_dict=True)
         
@@ -495,7 +497,7 @@ def get_handling_units_count(customer, item_code=None, branch=None):
     """Get count of handling units for customer with filters"""
     try:
         # Build WHERE conditions
-        where_conditions = ["wi.customer = %s", "hu.name IS NOT NULL"]
+        where_conditions = ["wi.customer = %s", "wsl.handling_unit != ''", "wsl.actual_qty > 0"]
         params = [customer]
         
         if item_code:
@@ -508,12 +510,11 @@ def get_handling_units_count(customer, item_code=None, branch=None):
         
         where_sql = " AND ".join(where_conditions)
         
-        # Get count of distinct handling units for this customer
+        # Get count of distinct handling units currently holding this customer's stock
         handling_units_count = frappe.db.sql(f"""
-            SELECT COUNT(DISTINCT hu.name) as units_count
-            FROM `tabHandling Unit` hu
-            LEFT JOIN `tabWarehouse Stock Ledger` wsl ON wsl.handling_unit = hu.name
-            LEFT JOIN `tabWarehouse Item` wi ON wi.name = wsl.item
+            SELECT COUNT(DISTINCT wsl.handling_unit) as units_count
+            FROM `tabWarehouse Stock Bin` wsl
+            INNER JOIN `tabWarehouse Item` wi ON wi.name = wsl.item
             WHERE {where_sql}
         """, params, as_dict=True)
         